@@ -0,0 +1,85 @@
+# benchmarks/bench_rate_utils.py
+"""
+爆率计算批量版本与标量循环的性能对比
+用法: python -m benchmarks.bench_rate_utils [行数]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from src.utils.rate_utils import (
+    calculate_expected_kills, calculate_drop_chance, combine_rates, format_rate_for_display,
+    calculate_expected_kills_batch, calculate_drop_chance_batch, combine_rates_batch,
+    format_rate_for_display_batch,
+)
+
+
+def make_rates(n: int, seed: int = 20240101) -> np.ndarray:
+    """模拟真实数据: 爆率集中在少数常见值上（1/N 形式），并混入边界值"""
+    rng = np.random.default_rng(seed)
+    denominators = rng.choice([1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000, 1000000], size=n)
+    rates = 1.0 / denominators
+    edge = rng.random(n) < 0.01
+    rates[edge] = rng.choice([0.0, -1.0, 1.0, 1.5, 1e-18], size=int(edge.sum()))
+    return rates
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def check_equal(name: str, scalar, batch):
+    scalar = np.asarray(scalar, dtype=np.float64)
+    batch = np.asarray(batch, dtype=np.float64)
+    finite = np.isfinite(scalar) & np.isfinite(batch)
+    ok = np.array_equal(np.isinf(scalar), np.isinf(batch)) and np.allclose(scalar[finite], batch[finite], rtol=1e-9)
+    if not ok:
+        print(f"  !! {name}: 批量结果与标量结果不一致")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rates = make_rates(n)
+    values = rates.tolist()
+    kills = 1000
+    
+    print(f"行数: {n:,}")
+    print(f"{'函数':<28}{'标量循环':>12}{'批量':>12}{'加速比':>10}")
+    
+    cases = [
+        ('calculate_expected_kills',
+         lambda: [calculate_expected_kills(rate) for rate in values],
+         lambda: calculate_expected_kills_batch(rates)),
+        ('calculate_drop_chance',
+         lambda: [calculate_drop_chance(rate, kills) for rate in values],
+         lambda: calculate_drop_chance_batch(rates, kills)),
+        ('combine_rates',
+         lambda: [combine_rates(values[i:i + 10]) for i in range(0, n, 10)],
+         lambda: combine_rates_batch(rates[:n - n % 10].reshape(-1, 10))),
+    ]
+    
+    for name, scalar_func, batch_func in cases:
+        scalar, scalar_time = timed(scalar_func)
+        batch, batch_time = timed(batch_func)
+        if name == 'combine_rates':
+            scalar = scalar[:len(batch)]
+        if name != 'calculate_expected_kills':
+            # 极小爆率下标量版本精度不足，期望击杀数只比较耗时
+            check_equal(name, scalar, batch)
+        print(f"{name:<28}{scalar_time:>11.3f}s{batch_time:>11.3f}s{scalar_time / batch_time:>9.1f}x")
+    
+    subset = values[:min(n, 100000)]
+    scalar, scalar_time = timed(lambda: [format_rate_for_display(rate) for rate in subset])
+    batch, batch_time = timed(lambda: format_rate_for_display_batch(np.array(subset)))
+    if any(scalar[i]['percent'] != batch['percent'][i] for i in range(len(subset))):
+        print("  !! format_rate_for_display: 批量结果与标量结果不一致")
+    print(f"{'format_rate_for_display':<28}{scalar_time:>11.3f}s{batch_time:>11.3f}s{scalar_time / batch_time:>9.1f}x"
+          f"  ({len(subset):,} 行)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,84 @@ ENCODING = 'gbk'  # 传奇游戏通常使用GBK编码
 # 特殊标记
 CHILD_MARKER = '#CHILD'
 RANDOM_MARKER = 'RANDOM'
+CALL_MARKER = '#CALL'  # 引用其他文件: #CALL [\路径\文件.txt] @标签
+
+# 解析设置
+FRACTION_CACHE_SIZE = 100000  # 爆率写法解析缓存的最大条目数
+
+# 存储引擎
+STORAGE_MEMORY = 'memory'  # 内存字典（默认）
+STORAGE_SQLITE = 'sqlite'  # SQLite数据库
+SQLITE_BATCH_SIZE = 500  # 每个事务写入的文件数
+
+# 导出设置
+EXPORT_CHUNK_ROWS = 20000  # 每次写入的行数
+EXPORT_BUFFER_SIZE = 1024 * 1024  # 文件写缓冲区大小
+EXPORT_FILE_FILTER = "CSV文件 (*.csv);;二进制快照 (*.ldsnap);;JSON Lines (*.jsonl)"
+IMPORT_FILE_FILTER = "数据快照 (*.ldsnap *.jsonl)"
+ARCHIVE_FILE_FILTER = "压缩包 (*.zip *.tar *.tar.gz *.tgz)"
+ARCHIVE_MEMBER_DIR = "MonItems"  # 压缩包中爆率文件所在的目录（按路径末尾匹配，不区分大小写）
+PARSER_VERSION = 1  # 爆率解析规则变化时递增，使压缩包解析缓存失效
+
+# 数据目录导入方式
+IMPORT_MODE_REFERENCE = 'reference'  # 原地引用源目录
+IMPORT_MODE_LINK = 'link'  # 硬链接/符号链接
+IMPORT_MODE_SYNC = 'sync'  # 仅复制变化的文件
+IMPORT_WORKERS = 8  # 并行复制线程数
+
+# 掉落模拟
+SIMULATION_BATCH_TRIALS = 20000  # 每批模拟的轮数（决定内存上限）
+SIMULATION_FIRST_DROP_BINS = 400  # 首次掉落击杀数的对数分箱数
+SIMULATION_COUNT_BINS = 400  # 掉落数量的对数分箱数（小数量处每个整数一箱）
+WISHLIST_EXACT_MAX_ITEMS = 14  # 集齐计算精确求解的最大物品数（2^n个子集）
+WISHLIST_MC_TRIALS = 200000  # 超出上限时的模拟轮数
+
+# 刷怪推荐
+FARM_SCORE_EXPECTED = 'expected'  # 加权期望掉落
+FARM_SCORE_ANY = 'any'  # 任一物品命中概率
+FARM_TOP_N = 50  # 默认返回的怪物数
+
+# 模糊搜索
+FUZZY_MAX_DISTANCE = 2  # 模糊搜索最大容错编辑距离
+DUPLICATE_MAX_DISTANCE = 1  # 疑似重复名称的编辑距离
+DUPLICATE_MIN_LENGTH = 3  # 参与疑似重复检测的最短名称
+
+# 备份快照
+SNAPSHOT_WORKERS = 8  # 并行读写线程数
+SNAPSHOT_COMPRESS_LEVEL = 6  # zlib压缩级别
+
+# 批量修改爆率
+BULK_EDIT_WORKERS = 8  # 并行写回线程数
+BULK_EDIT_PREVIEW_LIMIT = 2000  # 界面中最多预览的修改行数
+
+# 掉落日志对比
+# 默认日志格式: 每行以制表符分隔，"时间\tkill\t怪物名" / "时间\tdrop\t怪物名\t物品名"（也接受 击杀/掉落）
+LOG_KILL_PATTERN = r'\t(?:kill|击杀)\t(?P<monster>[^\t\r\n]+)'
+LOG_DROP_PATTERN = r'\t(?:drop|掉落)\t(?P<monster>[^\t\r\n]+)\t(?P<item>[^\t\r\n]+)'
+LOG_CHUNK_SIZE = 32 * 1024 * 1024  # 并行扫描的分块大小（字节）
+LOG_WORKERS = 0  # 并行扫描进程数，0 表示CPU核数
+LOG_SIGNIFICANCE = 0.01  # 显著偏差的错误发现率阈值
+
+# 物品产出预测
+FORECAST_CONFIDENCE = 0.95  # 每日产出区间的置信水平
+FORECAST_DISPLAY_LIMIT = 5000  # 界面中最多显示的物品数（完整结果可导出）
+
+# 怪物刷新数据
+WORLD_BEST_MAPS = 10  # 物品详情中列出的最佳刷怪地图数
+
+# 数据文件检查
+VALIDATE_WORKERS = 0  # 并行检查进程数，0 表示CPU核数
+VALIDATE_BATCH_FILES = 500  # 每个进程任务包含的文件数
+VALIDATE_ENCODING_LINES = 5  # 每个文件最多报告的编码错误行数
+
+# 静态网站生成
+SITE_TITLE = "传奇掉落表"  # 默认网站标题
+SITE_WORKERS = 0  # 并行渲染进程数，0 表示CPU核数
+SITE_BATCH_PAGES = 500  # 每个进程任务包含的页面数
+SITE_SEARCH_LIMIT = 50  # 网页搜索最多显示的结果数
+
+# 数据对比
+COMPARE_DISPLAY_LIMIT = 5000  # 界面中最多显示的差异条数（完整结果可导出）
 
 # 界面设置
 APP_TITLE = "传奇物品掉落查询工具 v1.0"
@@ -27,6 +27,26 @@ class Settings:
             'recent_files': [],
             'max_recent_files': 10,
             'encoding': ENCODING,
+            'import_mode': IMPORT_MODE_SYNC,
+            'archive_member_dir': ARCHIVE_MEMBER_DIR,  # 压缩包中只读取该目录下的爆率文件
+            'storage_engine': STORAGE_MEMORY,
+            'sqlite_path': os.path.join(self.config_dir, "drops.db"),
+            'build_drop_matrix': False,
+            'build_rate_index': True,
+            'normalize_traditional': False,  # 搜索时繁体、简体视为相同
+            'item_categories_file': '',  # 物品分类规则文件，留空使用内置规则
+            'snapshot_dir': os.path.join(self.config_dir, "snapshots"),  # 备份快照库目录
+            'snapshot_compress': True,  # 快照内容压缩存储
+            'snapshot_before_bulk_edit': True,  # 批量修改写回前为整个目录创建快照
+            'mongen_path': '',  # 刷怪配置 MonGen.txt（或其所在目录），留空不加载刷新数据
+            'monster_db_path': '',  # 怪物数据库（Monster 表）的文本导出，用于显示怪物等级
+            'mapinfo_path': '',  # 地图信息 MapInfo.txt，用于显示地图名称
+            'log_encoding': ENCODING,  # 服务器掉落日志编码
+            'log_kill_pattern': LOG_KILL_PATTERN,  # 击杀事件正则（分组 monster）
+            'log_drop_pattern': LOG_DROP_PATTERN,  # 掉落事件正则（分组 monster、item）
+            'log_significance': LOG_SIGNIFICANCE,
+            'site_output_dir': '',  # 静态掉落表网站的输出目录
+            'site_title': SITE_TITLE,
             'show_toolbar': True,
             'show_statusbar': True,
         }
@@ -8,6 +8,7 @@
 import sys
 import os
 import re
+import multiprocessing
 from fractions import Fraction
 from collections import defaultdict
 from PyQt5.QtWidgets import *
@@ -16,6 +17,11 @@ from PyQt5.QtGui import *
 
 # settings persistence
 from config.settings import Settings
+from config.constants import IMPORT_MODE_REFERENCE, IMPORT_MODE_LINK, IMPORT_MODE_SYNC
+from src.utils.file_utils import import_directory
+from src.data_exporter import CsvExporter, RateFormatter
+from src.utils.rate_utils import combine_drop_lines
+from src.ui_workers import run_with_progress
 
 
 class DropDataParser:
@@ -23,13 +29,15 @@ class DropDataParser:
     
     def __init__(self, data_dir="data/MonItems"):
         self.data_dir = data_dir
-        self.drop_data = defaultdict(list)  # {怪物名: [(物品名, 爆率)]}
-        self.item_index = defaultdict(list)  # {物品名: [(怪物名, 爆率)]}
+        self.drop_data = defaultdict(list)  # {怪物名: [(物品名, 爆率)]}，原始爆率行
+        self.monster_drops = {}  # {怪物名: [(物品名, 合并爆率)]}
+        self.item_index = defaultdict(list)  # {物品名: [(怪物名, 合并爆率)]}
     
     def parse_file(self, filepath):
         """解析单个爆率文件"""
         monster_name = os.path.splitext(os.path.basename(filepath))[0]
         drops = []
+        lines_by_item = {}  # {物品名: [(爆率, 子掉落组)]}
         
         try:
             with open(filepath, 'r', encoding='gbk', errors='ignore') as f:
@@ -51,7 +59,11 @@ class DropDataParser:
                     parts = line.split()
                     if len(parts) >= 3:
                         child_rate_str = parts[1]
-                        child_rate = float(Fraction(child_rate_str))
+                        try:
+                            child_rate = float(Fraction(child_rate_str))
+                        except (ValueError, ZeroDivisionError):
+                            print(f"{filepath} 第{i + 1}行: 无法解析的组爆率 '{child_rate_str}'，该组被忽略")
+                            child_rate = 0.0
                         
                         # 查找括号开始
                         while i < len(lines) and lines[i].strip() != '(':
@@ -72,10 +84,11 @@ class DropDataParser:
                                 i += 1
                             
                             # 为每个物品计算实际爆率
-                            if child_items:
+                            if child_items and child_rate > 0:
                                 actual_rate = child_rate * (1 / len(child_items))
                                 for item in child_items:
                                     drops.append((item, actual_rate))
+                                    lines_by_item.setdefault(item, []).append((actual_rate, i))
                     
                     i += 1
                     continue
@@ -90,15 +103,20 @@ class DropDataParser:
                         rate = float(Fraction(rate_str))
                         if rate > 0:
                             drops.append((item_name, rate))
-                    except:
-                        pass
+                            lines_by_item.setdefault(item_name, []).append((rate, None))
+                    except (ValueError, ZeroDivisionError):
+                        print(f"{filepath} 第{i + 1}行: 无法解析的爆率 '{rate_str}'")
                 
                 i += 1
             
             self.drop_data[monster_name] = drops
             
+            # 同一物品的多行掉落合并为每次击杀至少掉落一个的概率
+            combined = [(item_name, combine_drop_lines(lines)) for item_name, lines in lines_by_item.items()]
+            self.monster_drops[monster_name] = combined
+            
             # 更新物品索引
-            for item_name, rate in drops:
+            for item_name, rate in combined:
                 self.item_index[item_name].append((monster_name, rate))
                 
             return True
@@ -107,12 +125,21 @@ class DropDataParser:
             print(f"解析文件 {filepath} 失败: {e}")
             return False
     
+    def get_item_lines(self, item_name, monster_name):
+        """某个怪物掉落某个物品的原始爆率行"""
+        return [rate for name, rate in self.drop_data.get(monster_name, []) if name == item_name]
+    
     def load_all(self):
         """加载所有爆率文件"""
         if not os.path.exists(self.data_dir):
             print(f"数据目录不存在: {self.data_dir}")
             return False
         
+        # 重新加载前清空，避免已删除的文件残留、索引重复
+        self.drop_data.clear()
+        self.monster_drops.clear()
+        self.item_index.clear()
+        
         count = 0
         for filename in os.listdir(self.data_dir):
             if filename.endswith('.txt'):
@@ -129,7 +156,12 @@ class LegendDropApp(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.parser = DropDataParser()
+        settings = Settings()
+        data_dir = "data/MonItems"
+        if settings.get('import_mode') == IMPORT_MODE_REFERENCE and os.path.isdir(settings.get('data_path') or ''):
+            # 引用模式直接读取上次所选的目录
+            data_dir = settings.get('data_path')
+        self.parser = DropDataParser(data_dir)
         self.current_item = None
         self.init_ui()
         
@@ -314,18 +346,8 @@ class LegendDropApp(QMainWindow):
         self.current_item = item_name
         
         if item_name in self.parser.item_index:
-            drops = self.parser.item_index[item_name]
-            
-            # 去重怪物名并选取最高爆率
-            unique = {}
-            for monster, rate in drops:
-                if monster not in unique or rate > unique[monster]:
-                    unique[monster] = rate
-            # 重新构建列表
-            drops = [(m, r) for m, r in unique.items()]
-            
-            # 按爆率排序
-            drops.sort(key=lambda x: x[1], reverse=True)
+            # 索引中每个怪物只有一条合并后的爆率
+            drops = sorted(self.parser.item_index[item_name], key=lambda x: x[1], reverse=True)
             
             # 更新怪物列表
             self.monster_list.clear()
@@ -351,6 +373,17 @@ class LegendDropApp(QMainWindow):
         monster_name, rate = item.data(Qt.UserRole)
         item_name = self.current_item
         
+        # 同一物品有多行掉落时列出原始爆率行
+        raw_rates = self.parser.get_item_lines(item_name, monster_name)
+        raw_row = ""
+        if len(raw_rates) > 1:
+            raw_text = " + ".join(f"{r*100:.6f}%" for r in raw_rates)
+            raw_row = f"""
+            <tr>
+                <td style="padding: 5px;"><b>原始爆率行:</b></td>
+                <td style="padding: 5px;">{raw_text}</td>
+            </tr>"""
+        
         # 构建详情
         if rate >= 0.01:
             rate_str = f"{rate*100:.2f}%"
@@ -375,7 +408,7 @@ class LegendDropApp(QMainWindow):
             <tr>
                 <td style="padding: 5px;"><b>分数形式:</b></td>
                 <td style="padding: 5px;">约 1/{int(1/rate) if rate > 0 else "∞"}</td>
-            </tr>
+            </tr>{raw_row}
             <tr>
                 <td style="padding: 5px;"><b>期望击杀数:</b></td>
                 <td style="padding: 5px;">{int(1/rate) if rate > 0 else "∞"} 只</td>
@@ -388,8 +421,8 @@ class LegendDropApp(QMainWindow):
         """
         
         # 获取该怪物的其他掉落
-        if monster_name in self.parser.drop_data:
-            other_drops = [(item, r) for item, r in self.parser.drop_data[monster_name] 
+        if monster_name in self.parser.monster_drops:
+            other_drops = [(item, r) for item, r in self.parser.monster_drops[monster_name]
                           if item != item_name]
             other_drops.sort(key=lambda x: x[1], reverse=True)
             
@@ -416,7 +449,7 @@ class LegendDropApp(QMainWindow):
                     QMessageBox.information(self, "打开目录", 
                                           f"数据目录位置:\n{os.path.abspath(data_dir)}")
                 self.status_label.setText("已打开数据目录")
-            except:
+            except OSError:
                 QMessageBox.information(self, "打开目录", 
                                       f"数据目录位置:\n{os.path.abspath(data_dir)}")
         else:
@@ -424,28 +457,56 @@ class LegendDropApp(QMainWindow):
                               f"数据目录不存在:\n{os.path.abspath(data_dir)}")
 
     def choose_data_directory(self):
-        """让用户选择数据目录，复制内容到 data/MonItems 并重新加载"""
+        """让用户选择数据目录，按所选方式导入到 data/MonItems 并重新加载"""
         dir_path = QFileDialog.getExistingDirectory(self, "选择数据目录", self.parser.data_dir)
-        if dir_path:
-            # 将选定目录中的 txt 文件复制到工作目录的 data/MonItems
-            target_dir = os.path.join(os.getcwd(), "data", "MonItems")
-            os.makedirs(target_dir, exist_ok=True)
-            copied = 0
-            for fname in os.listdir(dir_path):
-                if fname.lower().endswith('.txt'):
-                    src = os.path.join(dir_path, fname)
-                    dst = os.path.join(target_dir, fname)
-                    try:
-                        import shutil
-                        shutil.copy2(src, dst)
-                        copied += 1
-                    except Exception:
-                        pass
+        if not dir_path:
+            return
+        
+        settings = Settings()
+        modes = [
+            ("同步变化的文件到 data/MonItems", IMPORT_MODE_SYNC),
+            ("链接文件到 data/MonItems（不占用额外空间）", IMPORT_MODE_LINK),
+            ("直接引用所选目录（不复制）", IMPORT_MODE_REFERENCE),
+        ]
+        labels = [label for label, _ in modes]
+        values = [mode for _, mode in modes]
+        saved_mode = settings.get('import_mode', IMPORT_MODE_SYNC)
+        # 设置中是未知或旧版本的取值时使用默认方式
+        current = values.index(saved_mode if saved_mode in values else IMPORT_MODE_SYNC)
+        label, ok = QInputDialog.getItem(self, "导入方式", "请选择导入方式:", labels, current, False)
+        if not ok:
+            return
+        mode = modes[labels.index(label)][1]
+        target_dir = os.path.join(os.getcwd(), "data", "MonItems")
+        settings.set('import_mode', mode)
+        settings.set('data_path', dir_path if mode == IMPORT_MODE_REFERENCE else target_dir)
+        settings.save_settings()
+        
+        if mode == IMPORT_MODE_REFERENCE:
+            self.parser.data_dir = dir_path
+            self.status_label.setText(f"已引用数据目录: {dir_path}")
+            self.load_data()
+            return
+        
+        def job(progress_callback, cancel_event):
+            return import_directory(dir_path, target_dir, mode, progress_callback=progress_callback,
+                                    cancel_event=cancel_event)
+        
+        def on_finished(stats, cancelled):
+            if cancelled:
+                self.status_label.setText("导入已取消")
+                return
             # 更新解析器路径指向 data/MonItems
             self.parser.data_dir = target_dir
-            self.status_label.setText(f"已从{dir_path}导入{copied}个文件到{target_dir}")
+            self.status_label.setText(
+                f"已从{dir_path}导入: 复制{stats['copied']}个({stats['bytes_copied'] / 1024 / 1024:.1f}MB), "
+                f"链接{stats['linked']}个, 跳过{stats['skipped']}个, 删除{stats['removed']}个"
+            )
             self.load_data()
-
+        
+        run_with_progress(self, "导入数据目录", "正在导入爆率文件...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "导入失败", f"导入时出错:\n{message}"))
+    
     def choose_font(self):
         """弹出字体对话框选择字体族和大小"""
         current_font = QApplication.font()
@@ -473,27 +534,29 @@ class LegendDropApp(QMainWindow):
         )
         
         if file_path:
-            try:
-                import csv
-                
-                with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['怪物名称', '物品名称', '爆率', '爆率百分比'])
-                    
-                    for monster_name, drops in self.parser.drop_data.items():
-                        for item_name, rate in drops:
-                            writer.writerow([
-                                monster_name,
-                                item_name,
-                                f"1/{int(1/rate) if rate > 0 else '∞'}",
-                                f"{rate*100:.6f}%"
-                            ])
-                
+            drop_data = self.parser.drop_data
+            total = sum(len(drops) for drops in drop_data.values())
+            
+            def iter_rows():
+                formatter = RateFormatter()
+                for monster_name, drops in drop_data.items():
+                    for item_name, rate in drops:
+                        fraction, percent = formatter.format(rate)
+                        yield [monster_name, item_name, fraction, percent]
+            
+            def job(progress_callback, cancel_event):
+                exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+                return exporter.export(file_path, ['怪物名称', '物品名称', '爆率', '爆率百分比'], iter_rows(), total)
+            
+            def on_finished(rows, cancelled):
+                if cancelled:
+                    self.status_label.setText("导出已取消")
+                    return
                 QMessageBox.information(self, "导出成功", f"数据已导出到:\n{file_path}")
                 self.status_label.setText(f"数据已导出到: {os.path.basename(file_path)}")
-                
-            except Exception as e:
-                QMessageBox.critical(self, "导出失败", f"导出时出错:\n{str(e)}")
+            
+            run_with_progress(self, "导出数据", "正在导出CSV...", job, on_finished,
+                              lambda message: QMessageBox.critical(self, "导出失败", f"导出时出错:\n{message}"))
     
     def show_about(self):
         """显示关于对话框"""
@@ -537,7 +600,7 @@ def main():
     if sz:
         try:
             font.setPointSize(int(sz))
-        except:
+        except (TypeError, ValueError):
             pass
     if not fam and not sz:
         # 默认字体设为微软雅黑
@@ -559,6 +622,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中掉落日志统计的子进程需要
+    multiprocessing.freeze_support()
+    
     # 创建必要的目录
     os.makedirs("data/MonItems", exist_ok=True)
     os.makedirs("logs", exist_ok=True)
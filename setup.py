@@ -18,13 +18,15 @@ author_email = "your.email@example.com"
 build_exe_options = {
     "packages": [
         "os", "sys", "re", "json", "logging", "datetime",
-        "collections", "typing", "fractions", "math"
+        "collections", "typing", "fractions", "math", "sqlite3", "numpy",
+        "mmap", "multiprocessing", "concurrent"
     ],
     "excludes": ["tkinter", "test", "unittest"],
     "include_files": [
         ("data", "data"),           # 数据目录
         ("resources", "resources"), # 资源目录
-        ("README.md", "README.md")  # 说明文档
+        ("README.md", "README.md"),  # 说明文档
+        ("config/item_categories.json", "config/item_categories.json"),  # 物品分类规则
     ],
     "optimize": 2,
     "include_msvcr": True,
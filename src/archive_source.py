@@ -0,0 +1,256 @@
+# src/archive_source.py
+"""
+压缩包数据源（zip / tar.gz 服务器备份）
+"""
+
+import os
+import json
+import zlib
+import hashlib
+import logging
+import tarfile
+import zipfile
+from typing import Dict, Iterator, Tuple, Optional, Callable
+
+from config.constants import ENCODING, ARCHIVE_MEMBER_DIR, PARSER_VERSION
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".legenddroptool", "cache")
+CACHE_VERSION = 2
+
+
+def is_archive(path: str) -> bool:
+    """判断路径是否为支持的压缩包"""
+    if not os.path.isfile(path):
+        return False
+    try:
+        return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+    except OSError:
+        return False
+
+
+def monster_name_from_member(member_name: str) -> str:
+    """压缩包成员名 -> 怪物名"""
+    return os.path.splitext(os.path.basename(member_name.replace('\\', '/')))[0]
+
+
+def _member_directory(member_name: str) -> str:
+    """成员所在目录（统一为小写、/ 分隔，根目录为空串）"""
+    return os.path.dirname(member_name.replace('\\', '/').strip('/')).lower()
+
+
+def _is_drop_member(member_name: str, member_dir: str) -> bool:
+    """成员是否为 member_dir 目录下的爆率文件（member_dir 为空时接受全部 .txt）"""
+    if not member_name.lower().endswith('.txt'):
+        return False
+    if not member_dir:
+        return True
+    directory = _member_directory(member_name)
+    return directory == member_dir or directory.endswith('/' + member_dir)
+
+
+def _is_root_member(member_name: str) -> bool:
+    return member_name.lower().endswith('.txt') and not _member_directory(member_name)
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    """还原zip成员名（未标记UTF-8的文件名多为Windows下的GBK编码）"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    raw = info.filename.encode('cp437')
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return info.filename
+
+
+class ArchiveParseCache:
+    """按成员校验和缓存解析结果
+
+    缓存内容: {成员名: [校验和, [[物品名, 爆率, 子掉落组], ...]]}
+    编码、解析规则版本和成员目录不同的解析结果分别缓存，不会混用。
+    """
+    
+    def __init__(self, archive_path: str, cache_dir: str = DEFAULT_CACHE_DIR, encoding: str = ENCODING,
+                 member_dir: str = ARCHIVE_MEMBER_DIR):
+        self.archive_path = os.path.abspath(archive_path)
+        self.header = {'version': CACHE_VERSION, 'parser': PARSER_VERSION, 'encoding': encoding,
+                       'member_dir': member_dir}
+        key = f"{self.archive_path}|{encoding}|{member_dir}"
+        self.cache_path = os.path.join(cache_dir, f"archive_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+        self.entries = {}
+        self.archive_signature = None
+        self.dirty = False
+        self._load()
+    
+    def _current_signature(self) -> list:
+        stat = os.stat(self.archive_path)
+        return [stat.st_size, stat.st_mtime]
+    
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if all(data.get(key) == value for key, value in self.header.items()):
+                self.entries = data.get('entries', {})
+                self.archive_signature = data.get('archive')
+        except Exception as e:
+            logger.warning(f"读取解析缓存失败 {self.cache_path}: {e}")
+            self.entries = {}
+    
+    def is_archive_unchanged(self) -> bool:
+        """压缩包自上次缓存以来未变化（可直接使用全部缓存）"""
+        return bool(self.entries) and self.archive_signature == self._current_signature()
+    
+    def get(self, member_name: str, checksum: int) -> Optional[list]:
+        entry = self.entries.get(member_name)
+        if entry is not None and entry[0] == checksum:
+            return entry[1]
+        return None
+    
+    def put(self, member_name: str, checksum: int, rows: list):
+        self.entries[member_name] = [checksum, rows]
+        self.dirty = True
+    
+    def retain(self, member_names):
+        """删除压缩包中已不存在的成员"""
+        member_names = set(member_names)
+        for name in list(self.entries):
+            if name not in member_names:
+                del self.entries[name]
+                self.dirty = True
+    
+    def save(self):
+        signature = self._current_signature()
+        if not self.dirty and signature == self.archive_signature:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(self.header, archive=signature, entries=self.entries),
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.cache_path)
+            self.archive_signature = signature
+            self.dirty = False
+        except Exception as e:
+            logger.warning(f"保存解析缓存失败 {self.cache_path}: {e}")
+
+
+def iter_archive_members(archive_path: str, known_checksum: Callable[[str, int], bool] = None,
+                         member_dir: str = ARCHIVE_MEMBER_DIR) -> Iterator[Tuple[str, int, Optional[bytes]]]:
+    """
+    按压缩包内的存储顺序顺序读取爆率文件
+    只读取 member_dir 目录下的 .txt 成员（如 Mir200/Envir/MonItems/鸡.txt），不会把 MonGen.txt 等
+    其他配置当作怪物；压缩包中没有该目录时读取根目录下的 .txt（直接打包爆率文件的压缩包）
+    :param known_checksum: 回调 (成员名, 校验和) -> 是否已缓存；zip成员命中时跳过解压
+    :param member_dir: 爆率文件所在目录，为空时读取全部 .txt
+    :return: (成员名, 校验和, 内容)，命中缓存时内容为None
+    """
+    display_dir = member_dir
+    member_dir = member_dir.replace('\\', '/').strip('/').lower()
+    
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            members = [(info, _zip_member_name(info)) for info in zf.infolist() if not info.is_dir()]
+            selected = [(info, name) for info, name in members if _is_drop_member(name, member_dir)]
+            if not selected:
+                selected = [(info, name) for info, name in members if _is_root_member(name)]
+                if selected:
+                    logger.info(f"压缩包中没有 {display_dir} 目录，读取根目录下的 {len(selected)} 个文件")
+            for info, member_name in selected:
+                # zip中央目录自带CRC32，无需解压即可判断是否变化
+                checksum = info.CRC
+                if known_checksum is not None and known_checksum(member_name, checksum):
+                    yield member_name, checksum, None
+                    continue
+                yield member_name, checksum, zf.read(info)
+    else:
+        # 流式模式按顺序读取，避免随机访问压缩流；根目录的文件先暂存，确认没有爆率目录后再使用
+        root_members = []
+        found = False
+        with tarfile.open(archive_path, 'r|*') as tf:
+            for member in tf:
+                if not member.isfile():
+                    continue
+                if _is_drop_member(member.name, member_dir):
+                    found = True
+                    root_members = []
+                    raw = tf.extractfile(member).read()
+                    yield member.name, zlib.crc32(raw), raw
+                elif not found and _is_root_member(member.name):
+                    root_members.append((member.name, tf.extractfile(member).read()))
+        if root_members:
+            logger.info(f"压缩包中没有 {display_dir} 目录，读取根目录下的 {len(root_members)} 个文件")
+        for member_name, raw in root_members:
+            yield member_name, zlib.crc32(raw), raw
+
+
+def load_archive(archive_path: str, parse_content: Callable, decode_content: Callable,
+                 add_monster: Callable, cache_dir: str = DEFAULT_CACHE_DIR, encoding: str = ENCODING,
+                 member_dir: str = ARCHIVE_MEMBER_DIR) -> Dict[str, int]:
+    """
+    从压缩包加载全部怪物
+    :param parse_content: (怪物名, 文本) -> MonsterDropInfo
+    :param decode_content: bytes -> 文本（与目录加载使用同一编码处理）
+    :param add_monster: 接收 MonsterDropInfo 的回调
+    :param encoding: decode_content 使用的编码，作为缓存键的一部分
+    :param member_dir: 爆率文件所在目录（见 iter_archive_members）
+    :return: 加载统计
+    """
+    from src.data_parser import MonsterDropInfo
+    
+    cache = ArchiveParseCache(archive_path, cache_dir, encoding, member_dir)
+    stats = {'parsed': 0, 'cached': 0, 'failed': 0, 'duplicate': 0}
+    
+    if cache.is_archive_unchanged():
+        # 压缩包未变化，直接使用缓存
+        for member_name, (_, rows) in cache.entries.items():
+            add_monster(MonsterDropInfo.from_rows(monster_name_from_member(member_name), rows))
+            stats['cached'] += 1
+        logger.info(f"压缩包未变化，已从缓存加载 {stats['cached']} 个怪物")
+        return stats
+    
+    seen = []
+    monster_members = {}  # {怪物名: 成员名}，不同目录下的同名文件只取第一个
+    for member_name, checksum, raw in iter_archive_members(
+            archive_path, lambda name, crc: cache.get(name, crc) is not None, member_dir):
+        monster_name = monster_name_from_member(member_name)
+        first_member = monster_members.setdefault(monster_name, member_name)
+        if first_member != member_name:
+            logger.warning(f"压缩包中怪物文件重名: {member_name} 与 {first_member}，忽略前者")
+            stats['duplicate'] += 1
+            continue
+        
+        seen.append(member_name)
+        rows = cache.get(member_name, checksum)
+        if rows is not None:
+            add_monster(MonsterDropInfo.from_rows(monster_name, rows))
+            stats['cached'] += 1
+            continue
+        
+        try:
+            monster_info = parse_content(monster_name, decode_content(raw))
+        except Exception as e:
+            logger.error(f"解析压缩包成员 {member_name} 失败: {e}")
+            stats['failed'] += 1
+            continue
+        
+        add_monster(monster_info)
+        cache.put(member_name, checksum,
+                  [[item.name, item.rate, item.child_group] for item in monster_info.drop_items])
+        stats['parsed'] += 1
+    
+    cache.retain(seen)
+    cache.save()
+    
+    logger.info(f"压缩包加载完成: 解析 {stats['parsed']} 个, 缓存命中 {stats['cached']} 个, "
+                f"失败 {stats['failed']} 个, 重名忽略 {stats['duplicate']} 个")
+    return stats
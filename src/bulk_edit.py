@@ -0,0 +1,406 @@
+# src/bulk_edit.py
+"""
+批量修改爆率（按查询选择掉落行，预览后并行写回原文件）
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+from fractions import Fraction
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable
+
+from config.constants import CHILD_MARKER, BULK_EDIT_WORKERS
+from src.archive_source import is_archive
+from src.data_exporter import atomic_open
+from src.drop_query import QuerySyntaxError, parse_rate_value
+
+
+logger = logging.getLogger(__name__)
+
+
+LINE_BREAK_PATTERN = re.compile(r'(\r\n|\r|\n)')  # 与解析时的换行处理一致，分组保留原换行符
+RATE_TOKEN_PATTERN = re.compile(r'^(\s*)(\S+)')  # 普通掉落行: 爆率为第一个字段
+CHILD_RATE_PATTERN = re.compile(r'^(\s*' + re.escape(CHILD_MARKER) + r'\s+)(\S+)')  # #CHILD行: 爆率为第二个字段
+
+
+class RateOperation:
+    """爆率修改操作: *倍数、/除数、=爆率"""
+    
+    MULTIPLY = '*'
+    DIVIDE = '/'
+    SET = '='
+    
+    def __init__(self, kind: str, value: float, text: str = ""):
+        self.kind = kind
+        self.value = value
+        self.text = text or f"{kind}{value:g}"
+    
+    def apply(self, rate: float) -> float:
+        """计算新爆率（限制在0~1之间）"""
+        return min(1.0, max(0.0, self.apply_value(rate)))
+    
+    def apply_value(self, value: float) -> float:
+        """计算结果，不限制范围（也用于击杀数等其他数值）"""
+        if self.kind == self.MULTIPLY:
+            return value * self.value
+        if self.kind == self.DIVIDE:
+            return value / self.value
+        return self.value
+    
+    def __str__(self):
+        return self.text
+
+
+def parse_operation(text: str) -> RateOperation:
+    """解析修改操作，如 *2、x0.5、/2、=1/5000"""
+    text = text.strip()
+    if not text:
+        raise QuerySyntaxError("缺少修改操作（支持 *倍数、/除数、=爆率）")
+    
+    kind = {'x': RateOperation.MULTIPLY, 'X': RateOperation.MULTIPLY, '×': RateOperation.MULTIPLY}.get(text[0], text[0])
+    body = text[1:].strip()
+    if kind == RateOperation.SET:
+        value = parse_rate_value(body)
+        if not 0 <= value <= 1:
+            raise QuerySyntaxError(f"爆率必须在0到1之间: {body}")
+    elif kind in (RateOperation.MULTIPLY, RateOperation.DIVIDE):
+        try:
+            value = float(Fraction(body))
+        except (ValueError, ZeroDivisionError):
+            raise QuerySyntaxError(f"无效的倍数: {body}")
+        if value <= 0:
+            raise QuerySyntaxError(f"倍数必须大于0: {body}")
+    else:
+        raise QuerySyntaxError(f"无效的修改操作: {text}（支持 *倍数、/除数、=爆率）")
+    return RateOperation(kind, value, text)
+
+
+def format_rate_text(old_text: str, new_rate: float) -> str:
+    """
+    按原写法输出新爆率: 分数保持原分子，小数仍写成小数
+    保持分子时误差超过1%（如 1/3 加倍为 2/3）改用最接近的分数
+    """
+    if new_rate <= 0:
+        return '0'
+    if '/' in old_text:
+        try:
+            numerator = int(old_text.split('/', 1)[0])
+        except ValueError:
+            numerator = 1
+        numerator = max(numerator, 1)
+        denominator = max(numerator, round(numerator / new_rate))
+        if abs(numerator / denominator - new_rate) > new_rate * 0.01:
+            fraction = Fraction(new_rate).limit_denominator(1000000)
+            numerator, denominator = fraction.numerator, fraction.denominator
+        return f"{numerator}/{denominator}"
+    return f"{new_rate:.10g}"
+
+
+class LineEdit:
+    """一行的修改"""
+    
+    def __init__(self, monster_name: str, item_name: str, line_no: int, old_text: str, new_text: str,
+                 old_rate: float, new_rate: float, is_child: bool = False, note: str = ""):
+        self.monster_name = monster_name
+        self.item_name = item_name  # 子掉落组为组内命中的物品名（顿号分隔）
+        self.line_no = line_no  # 从0开始
+        self.old_text = old_text
+        self.new_text = new_text
+        self.old_rate = old_rate  # 该行原爆率（子掉落组为#CHILD行的组爆率）
+        self.new_rate = new_rate
+        self.is_child = is_child
+        self.note = note  # 预览备注（合并的重复行、一起变化的同组物品）
+
+
+class FileEdit:
+    """一个文件的全部修改"""
+    
+    def __init__(self, path: str, monster_name: str, digest: bytes):
+        self.path = path
+        self.monster_name = monster_name
+        self.digest = digest  # 生成计划时的文件内容摘要，写回前校验
+        self.edits = []  # List[LineEdit]，按行号排序
+        self.skipped = []  # [原因]，无法按操作修改的物品
+
+
+class EditPlan:
+    """批量修改计划（预览）"""
+    
+    def __init__(self, query_text: str, operation: RateOperation):
+        self.query_text = query_text
+        self.operation = operation
+        self.files = []  # List[FileEdit]
+        self.skipped = []  # [(怪物名, 原因)]
+        self.matched = 0  # 查询命中的 (怪物, 物品) 数
+        self.directory = None  # 爆率文件目录
+        self.plan_time = 0.0
+    
+    @property
+    def line_count(self) -> int:
+        return sum(len(file_edit.edits) for file_edit in self.files)
+    
+    def iter_edits(self):
+        for file_edit in self.files:
+            for edit in file_edit.edits:
+                yield file_edit, edit
+    
+    def preview_rows(self, limit: Optional[int] = None) -> List[list]:
+        """预览行: 怪物名称, 物品名称, 行号, 原爆率, 新爆率, 备注"""
+        rows = []
+        for _, edit in self.iter_edits():
+            if limit is not None and len(rows) >= limit:
+                break
+            rows.append([edit.monster_name, edit.item_name, edit.line_no + 1, edit.old_text, edit.new_text,
+                         edit.note])
+        return rows
+    
+    def describe(self) -> str:
+        text = (f"{self.query_text} {self.operation}: 命中 {self.matched} 条掉落，"
+                f"将修改 {len(self.files)} 个文件中的 {self.line_count} 行")
+        if self.skipped:
+            text += f"，跳过 {len(self.skipped)} 项"
+        return text
+
+
+class EditResult:
+    """写回结果"""
+    
+    def __init__(self):
+        self.files_written = 0
+        self.lines_written = 0
+        self.failed = []  # [(文件路径, 原因)]
+        self.cancelled = False
+        self.snapshot_id = None  # 写回前创建的备份快照
+        self.elapsed = 0.0
+    
+    def describe(self) -> str:
+        text = f"已修改 {self.files_written} 个文件，{self.lines_written} 行，耗时{self.elapsed:.2f}秒"
+        if self.failed:
+            text += f"，失败 {len(self.failed)} 个"
+        if self.cancelled:
+            text += "（已取消，未处理的文件保持原样）"
+        if self.snapshot_id:
+            text += f"，修改前的快照: {self.snapshot_id}"
+        return text
+
+
+def split_lines(text: str) -> List[str]:
+    """按换行符切分并保留换行符: [行0, 换行符0, 行1, 换行符1, ..., 最后一行]"""
+    return LINE_BREAK_PATTERN.split(text)
+
+
+def replace_rate_token(line: str, is_child: bool, old_text: str, new_text: str) -> Optional[str]:
+    """只替换行内的爆率字段，其余字符（缩进、分隔符、物品名、注释）原样保留；字段与预期不符时返回None"""
+    match = (CHILD_RATE_PATTERN if is_child else RATE_TOKEN_PATTERN).match(line)
+    if match is None or match.group(2) != old_text:
+        return None
+    return line[:match.start(2)] + new_text + line[match.end(2):]
+
+
+class BulkRateEditor:
+    """批量修改爆率
+
+    1. plan: 用掉落查询语句选出 (怪物, 物品)，只读取命中怪物的文件，按文件当前内容定位爆率行并计算新值；
+    2. apply: 多线程写回，每个文件只改动命中行的爆率字段，保留原编码、换行符和#CHILD结构，
+       写入同目录临时文件后原子替换。写回前校验文件摘要，预览之后被改动过的文件不会被覆盖。
+    中途取消或中断时，每个文件要么是原内容，要么是完整的新内容。
+    写回后解析器中的数据已过期，需要重新加载。
+    """
+    
+    def __init__(self, parser, workers: int = BULK_EDIT_WORKERS):
+        self.parser = parser
+        self.workers = workers
+    
+    def _data_directory(self) -> str:
+        directory = (self.parser.monster_stats or {}).get('directory')
+        if not directory or not os.path.isdir(directory) or is_archive(directory):
+            raise ValueError("批量修改需要从目录加载的数据（压缩包中的文件无法写回）")
+        return directory
+    
+    def _source_files(self, directory: str) -> Dict[str, str]:
+        """{怪物名: 文件路径}"""
+        return {os.path.splitext(filename)[0]: os.path.join(directory, filename)
+                for filename in os.listdir(directory) if filename.lower().endswith('.txt')}
+    
+    def plan(self, query_text: str, operation: RateOperation,
+             progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event=None) -> EditPlan:
+        """生成修改计划（不修改文件）"""
+        start = time.perf_counter()
+        edit_plan = EditPlan(query_text, operation)
+        
+        targets = {}  # {怪物名: {物品名}}
+        _, rows = self.parser.get_query_engine().execute(query_text)
+        for monster_name, item_name, _, _ in rows:
+            targets.setdefault(monster_name, set()).add(item_name)
+            edit_plan.matched += 1
+        
+        edit_plan.directory = self._data_directory()
+        source_files = self._source_files(edit_plan.directory)
+        jobs = []
+        for monster_name, item_names in targets.items():
+            path = source_files.get(monster_name)
+            if path is None:
+                edit_plan.skipped.append((monster_name, "找不到爆率文件"))
+            else:
+                jobs.append((monster_name, item_names, path))
+        
+        def plan_one(job):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            try:
+                return self._plan_file(*job, operation)
+            except Exception as e:
+                logger.error(f"读取爆率文件失败 {job[2]}: {e}")
+                return str(e)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for done, ((monster_name, _, _), result) in enumerate(zip(jobs, executor.map(plan_one, jobs)), 1):
+                if isinstance(result, FileEdit):
+                    if result.edits:
+                        edit_plan.files.append(result)
+                    edit_plan.skipped.extend((monster_name, reason) for reason in result.skipped)
+                elif isinstance(result, str):
+                    edit_plan.skipped.append((monster_name, result))
+                if progress_callback and (done % 100 == 0 or done == len(jobs)):
+                    progress_callback(done, len(jobs))
+        
+        edit_plan.plan_time = time.perf_counter() - start
+        logger.info(f"批量修改计划: {edit_plan.describe()}，耗时{edit_plan.plan_time:.2f}秒")
+        return edit_plan
+    
+    def _plan_file(self, monster_name: str, item_names: set, path: str, operation: RateOperation) -> FileEdit:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        file_edit = FileEdit(path, monster_name, hashlib.blake2b(raw, digest_size=16).digest())
+        lines = split_lines(raw.decode(self.parser.encoding))[0::2]
+        monster_info = self.parser.parse_monster_content(monster_name, '\n'.join(lines))
+        
+        # 命中物品的独立掉落行与子掉落组成员（按文件中首次出现的顺序）
+        item_lines = {}  # {物品名: [DropItem]}
+        for item in monster_info.drop_items:
+            if item.name in item_names and item.line_no is not None:
+                item_lines.setdefault(item.name, []).append(item)
+        
+        # 子掉落组在#CHILD行上修改整组爆率，组内多个物品命中时只改一次
+        child_groups = {}  # {组ID: [命中的物品]}
+        for item_name, items in item_lines.items():
+            single = [item for item in items if item.child_group is None]
+            grouped = [item for item in items if item.child_group is not None]
+            
+            if operation.kind == RateOperation.SET:
+                # 设为指定爆率针对合并后的爆率: 只保留一行该爆率，其余重复行改为0
+                if len(items) > 1 and grouped:
+                    file_edit.skipped.append(f"{item_name} 有多行掉落且在子掉落组中，无法设为单一爆率")
+                    continue
+                for number, item in enumerate(single):
+                    note = ""
+                    if len(single) > 1:
+                        note = f"合并{len(single)}行重复掉落" if number == 0 else f"重复行，合并到第{single[0].line_no + 1}行"
+                    match = RATE_TOKEN_PATTERN.match(lines[item.line_no])
+                    self._add_edit(file_edit, item_name, item.line_no, match.group(2), item.rate,
+                                   operation.value if number == 0 else 0.0, note=note)
+            else:
+                for item in single:
+                    match = RATE_TOKEN_PATTERN.match(lines[item.line_no])
+                    self._add_edit(file_edit, item_name, item.line_no, match.group(2), item.rate,
+                                   operation.apply(item.rate))
+            
+            for item in grouped:
+                child_groups.setdefault(item.child_group, []).append(item)
+        
+        for group_id, items in child_groups.items():
+            line_no = items[0].line_no
+            match = CHILD_RATE_PATTERN.match(lines[line_no])
+            if match is None:
+                continue
+            members = monster_info.child_groups[group_id]
+            group_rate = self.parser.parse_fraction(match.group(2))
+            # 操作作用于单个物品的实际爆率，再换算回组爆率
+            new_group_rate = min(1.0, operation.apply(items[0].rate) * len(members))
+            names = '、'.join(dict.fromkeys(item.name for item in items))
+            # 组爆率变化时同组的其他物品一起变化，在预览中列出
+            others = list(dict.fromkeys(item.name for item in members if item.name not in item_names))
+            note = "子掉落组"
+            if others:
+                note += f"，同组 {len(others)} 个物品一起变化: {'、'.join(others)}"
+            self._add_edit(file_edit, names, line_no, match.group(2), group_rate, new_group_rate,
+                           is_child=True, note=note)
+        
+        file_edit.edits.sort(key=lambda edit: edit.line_no)
+        return file_edit
+    
+    def _add_edit(self, file_edit: FileEdit, item_name: str, line_no: int, old_text: str, old_rate: float,
+                  new_rate: float, is_child: bool = False, note: str = ""):
+        """记录一行修改，按原写法取整后爆率不变的行不修改"""
+        new_text = format_rate_text(old_text, new_rate)
+        if new_text == old_text:
+            return
+        file_edit.edits.append(LineEdit(file_edit.monster_name, item_name, line_no, old_text, new_text,
+                                        old_rate, self.parser.parse_fraction(new_text), is_child, note))
+    
+    def apply(self, edit_plan: EditPlan, snapshot_store=None,
+              progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event=None) -> EditResult:
+        """
+        按计划并行写回文件
+        :param snapshot_store: SnapshotStore，提供时先为整个目录创建快照，快照失败则不写回
+        """
+        start = time.perf_counter()
+        result = EditResult()
+        total = len(edit_plan.files)
+        
+        if snapshot_store is not None:
+            snapshot = snapshot_store.create(edit_plan.directory, f"批量修改前: {edit_plan.describe()}",
+                                             progress_callback=progress_callback, cancel_event=cancel_event)
+            if snapshot is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    result.cancelled = True
+                    return result
+                raise OSError("创建修改前的备份快照失败，未修改任何文件")
+            result.snapshot_id = snapshot['id']
+        
+        def apply_one(file_edit):
+            if cancel_event is not None and cancel_event.is_set():
+                return 'cancelled', None
+            try:
+                return 'written', self._apply_file(file_edit)
+            except Exception as e:
+                logger.error(f"写回爆率文件失败 {file_edit.path}: {e}")
+                return 'failed', str(e)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for done, (file_edit, (status, detail)) in enumerate(
+                    zip(edit_plan.files, executor.map(apply_one, edit_plan.files)), 1):
+                if status == 'written':
+                    result.files_written += 1
+                    result.lines_written += detail
+                elif status == 'failed':
+                    result.failed.append((file_edit.path, detail))
+                else:
+                    result.cancelled = True
+                if progress_callback and (done % 100 == 0 or done == total):
+                    progress_callback(done, total)
+        
+        result.elapsed = time.perf_counter() - start
+        logger.info(f"批量修改爆率: {result.describe()}")
+        return result
+    
+    def _apply_file(self, file_edit: FileEdit) -> int:
+        with open(file_edit.path, 'rb') as f:
+            raw = f.read()
+        if hashlib.blake2b(raw, digest_size=16).digest() != file_edit.digest:
+            raise ValueError("文件在预览后已被修改，请重新预览")
+        
+        parts = split_lines(raw.decode(self.parser.encoding))
+        for edit in file_edit.edits:
+            line = replace_rate_token(parts[edit.line_no * 2], edit.is_child, edit.old_text, edit.new_text)
+            if line is None:
+                raise ValueError(f"第{edit.line_no + 1}行的爆率与预览不一致")
+            parts[edit.line_no * 2] = line
+        content = ''.join(parts).encode(self.parser.encoding)
+        
+        with atomic_open(file_edit.path, 'wb') as f:
+            f.write(content)
+        return len(file_edit.edits)
@@ -0,0 +1,609 @@
+# src/cli.py
+"""
+命令行工具
+用法: python -m src.cli <命令> [参数]
+"""
+
+import os
+import sys
+import csv
+import argparse
+import logging
+import unicodedata
+from fractions import Fraction
+
+from config.constants import (ENCODING, STORAGE_MEMORY, STORAGE_SQLITE, LOG_WORKERS, LOG_SIGNIFICANCE,
+                              WORLD_BEST_MAPS, VALIDATE_WORKERS, SITE_TITLE, SITE_WORKERS, ARCHIVE_MEMBER_DIR)
+from config.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(text: str) -> float:
+    """解析命令行中的爆率参数，支持 1/50000、0.01、1% 三种写法"""
+    text = text.strip()
+    try:
+        if text.endswith('%'):
+            return float(text[:-1]) / 100
+        return float(Fraction(text))
+    except (ValueError, ZeroDivisionError):
+        raise argparse.ArgumentTypeError(f"无效的爆率: {text}")
+
+
+def format_percent(rate: float) -> str:
+    return f"{rate * 100:.6f}%"
+
+
+def format_inverse(rate: float) -> str:
+    return f"1/{round(1 / rate)}" if rate > 0 else "∞"
+
+
+def display_width(text: str) -> int:
+    """终端显示宽度（中文字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+def pad(text: str, width: int) -> str:
+    return text + ' ' * (width - display_width(text))
+
+
+def load_parser(args, build_rate_index: bool = False):
+    """按命令行参数（缺省时按应用设置）加载数据"""
+    from src.data_parser import LegendDropParser
+    
+    settings = Settings()
+    storage = STORAGE_SQLITE if args.sqlite else STORAGE_MEMORY
+    parser = LegendDropParser(
+        encoding=args.encoding or settings.get('encoding', ENCODING),
+        storage=storage,
+        db_path=args.sqlite,
+        build_rate_index=build_rate_index,
+        normalize_traditional=settings.get('normalize_traditional', False),
+        archive_member_dir=settings.get('archive_member_dir', ARCHIVE_MEMBER_DIR),
+    )
+    
+    data_path = args.data or settings.get('data_path')
+    if not parser.parse_directory(data_path):
+        raise SystemExit(f"加载数据失败: {data_path}")
+    return parser
+
+
+def write_rows(rows, headers, as_csv: bool):
+    """输出结果表格"""
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return
+    
+    widths = [display_width(str(header)) for header in headers]
+    for row in rows:
+        widths = [max(width, display_width(str(cell))) for width, cell in zip(widths, row)]
+    print('  '.join(pad(str(header), width) for header, width in zip(headers, widths)).rstrip())
+    for row in rows:
+        print('  '.join(pad(str(cell), width) for cell, width in zip(row, widths)).rstrip())
+
+
+def cmd_rates(args) -> int:
+    """全局爆率排行与区间查询"""
+    parser = load_parser(args, build_rate_index=True)
+    index = parser.get_rate_index()
+    
+    if args.rarest:
+        results = index.rarest(args.rarest)
+    elif args.common:
+        results = index.most_common(args.common)
+    else:
+        low, high = args.above, args.below
+        if args.between:
+            low, high = args.between
+        if low is None and high is None:
+            raise SystemExit("请指定 --below / --above / --between / --rarest / --common 之一")
+        total = index.count_range(low, high)
+        results = index.range(low, high, limit=args.limit)
+        if not args.csv:
+            print(f"共 {total} 条" + (f"，显示前 {len(results)} 条" if len(results) < total else ""))
+    
+    rows = [(monster, item, format_percent(rate), format_inverse(rate)) for monster, item, rate in results]
+    write_rows(rows, ['怪物名称', '物品名称', '爆率', '约'], args.csv)
+    return 0
+
+
+def cmd_query(args) -> int:
+    """结构化掉落查询"""
+    from src.drop_query import QuerySyntaxError
+    
+    parser = load_parser(args)
+    engine = parser.get_query_engine()
+    try:
+        plan, rows = engine.execute(args.query)
+    except QuerySyntaxError as e:
+        raise SystemExit(f"查询语法错误: {e}")
+    
+    results = []
+    for monster, item, rate, is_child in rows:
+        if args.limit is not None and len(results) >= args.limit and not (args.explain or plan.query.explain):
+            break
+        results.append((monster, item, format_percent(rate), format_inverse(rate), "是" if is_child else ""))
+    
+    if args.limit is not None:
+        results = results[:args.limit]
+    write_rows(results, ['怪物名称', '物品名称', '爆率', '约', '#CHILD'], args.csv)
+    if args.explain or plan.query.explain:
+        print(plan.format(), file=sys.stderr)
+    return 0
+
+
+def cmd_fuzzy(args) -> int:
+    """模糊搜索物品名"""
+    parser = load_parser(args)
+    results = parser.fuzzy_search_items(args.keyword, args.distance)
+    rows = [(item, distance, len(parser.item_index.get(item, []))) for item, distance in results]
+    write_rows(rows, ['物品名称', '编辑距离', '掉落怪物数'], args.csv)
+    return 0
+
+
+def cmd_duplicates(args) -> int:
+    """疑似重复的物品名"""
+    parser = load_parser(args)
+    groups = parser.find_duplicate_items(args.distance)
+    rows = [(number, item, len(parser.item_index.get(item, [])))
+            for number, names in enumerate(groups, 1) for item in names]
+    if not args.csv:
+        print(f"共 {len(groups)} 组")
+    write_rows(rows, ['组', '物品名称', '掉落怪物数'], args.csv)
+    return 0
+
+
+def cmd_edit(args) -> int:
+    """批量修改爆率（默认只预览，--apply 时写回文件）"""
+    from src.bulk_edit import BulkRateEditor, parse_operation
+    from src.drop_query import QuerySyntaxError
+    
+    try:
+        operation = parse_operation(args.operation)
+    except QuerySyntaxError as e:
+        raise SystemExit(f"修改操作错误: {e}")
+    
+    parser = load_parser(args)
+    editor = BulkRateEditor(parser)
+    try:
+        plan = editor.plan(args.query, operation)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    
+    rows = plan.preview_rows(args.limit)
+    write_rows(rows, ['怪物名称', '物品名称', '行号', '原爆率', '新爆率', '备注'], args.csv)
+    print(plan.describe(), file=sys.stderr)
+    for monster_name, reason in plan.skipped:
+        print(f"跳过 {monster_name}: {reason}", file=sys.stderr)
+    
+    if not args.apply:
+        print("仅预览，加 --apply 写回文件", file=sys.stderr)
+        return 0
+    
+    store = None if args.no_snapshot else open_snapshot_store(args)
+    result = editor.apply(plan, snapshot_store=store)
+    print(result.describe(), file=sys.stderr)
+    for path, reason in result.failed:
+        print(f"失败 {path}: {reason}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def open_snapshot_store(args):
+    from src.snapshot_store import SnapshotStore
+    
+    settings = Settings()
+    return SnapshotStore(args.store or settings.get('snapshot_dir'), compress=settings.get('snapshot_compress', True))
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def cmd_snapshot(args) -> int:
+    """备份快照: 创建、列出、恢复、删除、清理"""
+    store = open_snapshot_store(args)
+    
+    if args.action == 'create':
+        data_path = args.data or Settings().get('data_path')
+        info = store.create(data_path, args.label or "")
+        if info is None:
+            raise SystemExit(f"创建快照失败: {data_path}")
+        print(f"{info['id']}: {info['file_count']} 个文件, 新增 {info['new_objects']} 个内容 "
+              f"({format_size(info['new_bytes'])})")
+    elif args.action == 'list':
+        rows = [(info['id'], info['created'], info['label'], info['file_count'], format_size(info['total_size']),
+                 format_size(info['new_bytes']), info['directory'])
+                for info in store.list_snapshots(args.data)]
+        write_rows(rows, ['快照', '创建时间', '说明', '文件数', '大小', '新增存储', '目录'], args.csv)
+    elif args.action == 'restore':
+        stats = store.restore(args.snapshot, args.target, args.file or None, remove_extra=args.delete_extra)
+        if stats is None:
+            raise SystemExit(f"快照不存在: {args.snapshot}")
+        print(f"恢复 {stats['restored']} 个, 未变 {stats['skipped']} 个, 删除 {stats['removed']} 个, "
+              f"失败 {stats['failed']} 个")
+        return 1 if stats['failed'] else 0
+    elif args.action == 'delete':
+        if not store.delete(args.snapshot):
+            raise SystemExit(f"删除快照失败: {args.snapshot}")
+    elif args.action == 'gc':
+        stats = store.gc()
+        print(f"删除 {stats['removed']} 个不再引用的内容, 释放 {format_size(stats['bytes'])}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    """对比多份爆率数据（目录或压缩包）"""
+    from src.data_compare import DataComparison
+    
+    settings = Settings()
+    comparison = DataComparison(args.encoding or settings.get('encoding', ENCODING))
+    for path in [args.base] + args.others:
+        if not comparison.load_source(path, os.path.basename(os.path.normpath(path)) or path):
+            raise SystemExit(f"加载数据失败: {path}")
+    
+    headers = ["类型", "怪物名称", "物品名称", "原爆率", "新爆率", "倍数"]
+    for diff in comparison.diffs():
+        if args.output:
+            output_path = args.output
+            if len(args.others) > 1:
+                root, ext = os.path.splitext(args.output)
+                output_path = f"{root}_{diff.other_label}{ext or '.csv'}"
+            if not diff.export_csv(output_path):
+                raise SystemExit(f"导出失败: {output_path}")
+        
+        print(diff.describe(), file=sys.stderr if args.csv else sys.stdout)
+        rows = list(diff.rows())
+        if args.limit is not None:
+            rows = rows[:args.limit]
+        write_rows(rows, headers, args.csv)
+    return 0
+
+
+def ingest_logs(paths, log_format, workers=None):
+    """统计掉落日志，失败时退出"""
+    from src.log_ingest import DropLogIngestor
+    
+    try:
+        ingestor = DropLogIngestor(log_format, workers=workers or LOG_WORKERS)
+        if not ingestor.ingest(paths):
+            raise SystemExit("日志统计失败")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    return ingestor
+
+
+def cmd_logcheck(args) -> int:
+    """统计服务器掉落日志，与配置爆率对比"""
+    from src.log_ingest import LogFormat, DEVIATION_LABELS
+    
+    settings = Settings()
+    parser = load_parser(args)
+    ingestor = ingest_logs(args.logs, LogFormat.from_settings(settings, args.log_encoding), args.workers)
+    
+    alpha = args.alpha if args.alpha is not None else settings.get('log_significance', LOG_SIGNIFICANCE)
+    report = ingestor.compare(parser, alpha)
+    if args.output and not report.export_csv(args.output):
+        raise SystemExit(f"导出失败: {args.output}")
+    
+    print(report.describe(), file=sys.stderr if args.csv else sys.stdout)
+    if report.unknown_monsters:
+        names = ", ".join(f"{name}({kills})" for name, kills in report.unknown_monsters[:20])
+        print(f"数据中没有的怪物: {names}", file=sys.stderr)
+    
+    headers = ["怪物名称", "物品名称", "击杀数", "掉落数", "配置爆率", "实际爆率", "倍数", "校正p值", "结论"]
+    rows = []
+    for row in (report.rows if args.all else report.significant()):
+        rows.append([row.monster_name, row.item_name, row.kills, row.drops, format_percent(row.configured_rate),
+                     format_percent(row.observed_rate), f"{row.ratio:.3g}" if row.ratio is not None else "",
+                     f"{row.q_value:.3g}", DEVIATION_LABELS[row.deviation]])
+        if args.limit is not None and len(rows) >= args.limit:
+            break
+    write_rows(rows, headers, args.csv)
+    return 0
+
+
+def cmd_forecast(args) -> int:
+    """按每日击杀数预测全服物品产出"""
+    from src.economy_forecast import EconomyForecast, load_kill_table, kill_table_from_log, parse_scenario
+    from src.drop_query import QuerySyntaxError
+    from src.log_ingest import LogFormat
+    
+    settings = Settings()
+    parser = load_parser(args)
+    if args.kills:
+        kills = load_kill_table(args.kills)
+        if kills is None:
+            raise SystemExit(f"读取击杀表失败: {args.kills}")
+    else:
+        ingestor = ingest_logs(args.log, LogFormat.from_settings(settings, args.log_encoding), args.workers)
+        try:
+            kills = kill_table_from_log(ingestor, parser, args.days)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    
+    scenario_text = "\n".join(args.change or [])
+    if args.scenario:
+        try:
+            with open(args.scenario, 'r', encoding='utf-8-sig') as f:
+                scenario_text = f.read() + "\n" + scenario_text
+        except (OSError, UnicodeDecodeError) as e:
+            raise SystemExit(f"读取假设修改失败 {args.scenario}: {e}")
+    try:
+        changes = parse_scenario(scenario_text)
+    except QuerySyntaxError as e:
+        raise SystemExit(f"假设修改有误: {e}")
+    
+    forecast = EconomyForecast(parser, kills, poisson_kills=args.poisson)
+    result = forecast.evaluate(changes) if changes else forecast.baseline()
+    if args.output and not result.export_csv(args.output):
+        raise SystemExit(f"导出失败: {args.output}")
+    
+    print(result.describe(), file=sys.stderr if args.csv else sys.stdout)
+    columns = result.order(affected_only=args.affected)
+    if args.limit is not None:
+        columns = columns[:args.limit]
+    write_rows(list(result.rows(columns)), ["物品名称", "每日期望", "标准差", "区间下限", "区间上限", "修改前", "变化"], args.csv)
+    return 0
+
+
+def cmd_maps(args) -> int:
+    """物品的最佳刷怪地图，或怪物的刷新地图"""
+    from src.world_data import WorldData
+    
+    settings = Settings()
+    paths = [args.mongen or settings.get('mongen_path', ''), args.monster_db or settings.get('monster_db_path', ''),
+             args.mapinfo or settings.get('mapinfo_path', '')]
+    if not paths[0]:
+        raise SystemExit("未指定刷怪配置（--mongen 或设置中的 mongen_path）")
+    parser = load_parser(args)
+    world_data = WorldData(args.encoding or settings.get('encoding', ENCODING))
+    if not world_data.load(*paths):
+        raise SystemExit("加载刷怪数据失败")
+    
+    if args.monster:
+        level = world_data.monster_level(parser, args.name)
+        print(f"{args.name} 等级: {level if level is not None else '未知'}", file=sys.stderr if args.csv else sys.stdout)
+        rows = [[world_data.map_name(map_code), map_code, count, f"{per_hour:.4g}"]
+                for map_code, count, per_hour in world_data.monster_maps_for(parser, args.name)[:args.limit]]
+        write_rows(rows, ['地图', '地图编号', '刷新数量', '每小时刷新'], args.csv)
+        return 0
+    
+    if args.name not in parser.item_index:
+        raise SystemExit(f"没有掉落 {args.name} 的怪物")
+    rows = []
+    for entry in world_data.best_maps(parser, args.name, args.limit):
+        sources = "、".join(f"{monster_name}×{count}" for monster_name, count, _ in entry.sources[:3])
+        rows.append([entry.map_name, entry.map_code, f"{entry.per_cycle:.4g}", f"{entry.per_hour:.4g}", sources])
+    write_rows(rows, ['地图', '地图编号', '每轮期望掉落', '每小时期望掉落', '主要来源'], args.csv)
+    return 0
+
+
+def cmd_site(args) -> int:
+    """生成静态掉落表网站（只写入内容变化的页面）"""
+    from src.site_generator import SiteGenerator
+    
+    settings = Settings()
+    output_dir = args.output or settings.get('site_output_dir')
+    if not output_dir:
+        raise SystemExit("未指定输出目录（参数或设置中的 site_output_dir）")
+    parser = load_parser(args)
+    
+    # 配置了刷怪数据时页面中显示怪物等级
+    world_data = None
+    paths = [settings.get(key, '') for key in ('mongen_path', 'monster_db_path', 'mapinfo_path')]
+    if any(paths):
+        from src.world_data import WorldData
+        world_data = WorldData(args.encoding or settings.get('encoding', ENCODING))
+        if not world_data.load(*paths):
+            print("刷怪数据加载失败，页面中不显示怪物等级", file=sys.stderr)
+            world_data = None
+    
+    generator = SiteGenerator(parser, output_dir, args.title or settings.get('site_title', SITE_TITLE), world_data,
+                              workers=args.workers or SITE_WORKERS)
+    if not generator.generate(force=args.force):
+        raise SystemExit(f"生成网站失败: {output_dir}")
+    print(f"{generator.describe()}: {os.path.abspath(os.path.join(output_dir, 'index.html'))}")
+    return 0
+
+
+def cmd_validate(args) -> int:
+    """检查数据目录下的所有爆率文件，有错误（--strict 时包括警告）时返回非零，可用作发布前检查"""
+    from src.drop_validator import DropValidator, SEVERITY_ERROR
+    
+    settings = Settings()
+    data_path = args.data or settings.get('data_path')
+    validator = DropValidator(encoding=args.encoding or settings.get('encoding', ENCODING),
+                              workers=args.workers or VALIDATE_WORKERS, use_cache=not args.no_cache)
+    report = validator.validate(data_path)
+    if report is None:
+        raise SystemExit(f"检查失败: {data_path}")
+    if args.output and not report.export_csv(args.output):
+        raise SystemExit(f"导出失败: {args.output}")
+    
+    issues = report.issues if not args.errors_only else [issue for issue in report.issues
+                                                         if issue.severity == SEVERITY_ERROR]
+    rows = [[issue.file_name, issue.line, issue.severity_label, issue.message] for issue in issues[:args.limit]]
+    write_rows(rows, ['文件', '行号', '级别', '说明'], args.csv)
+    print(report.describe(), file=sys.stderr if args.csv else sys.stdout)
+    return 0 if report.passed(args.strict) else 1
+
+
+def add_data_arguments(subparser):
+    """各子命令共用的数据源参数"""
+    subparser.add_argument('--data', help="爆率文件目录或压缩包（默认使用设置中的数据目录）")
+    subparser.add_argument('--encoding', help="爆率文件编码")
+    subparser.add_argument('--sqlite', metavar='DB', help="使用SQLite存储引擎并指定数据库文件")
+    subparser.add_argument('--csv', action='store_true', help="以CSV格式输出")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog='legenddroptool', description="传奇物品掉落查询工具（命令行）")
+    subparsers = arg_parser.add_subparsers(dest='command')
+    
+    rates = subparsers.add_parser('rates', help="全局爆率排行与区间查询")
+    add_data_arguments(rates)
+    group = rates.add_mutually_exclusive_group()
+    group.add_argument('--rarest', type=int, metavar='K', help="最稀有的K条掉落")
+    group.add_argument('--common', type=int, metavar='K', help="最常见的K条掉落")
+    group.add_argument('--between', type=parse_rate, nargs=2, metavar=('LOW', 'HIGH'), help="爆率在区间内的掉落")
+    rates.add_argument('--below', type=parse_rate, metavar='RATE', help="爆率不高于RATE，如 1/50000")
+    rates.add_argument('--above', type=parse_rate, metavar='RATE', help="爆率不低于RATE，如 1%%")
+    rates.add_argument('--limit', type=int, help="最多输出的条数")
+    rates.set_defaults(func=cmd_rates)
+    
+    query = subparsers.add_parser('query', help="结构化掉落查询，如 'item:*戒指 rate<1/1000'")
+    add_data_arguments(query)
+    query.add_argument('query', help="查询语句")
+    query.add_argument('--explain', action='store_true', help="输出执行计划与耗时（到标准错误）")
+    query.add_argument('--limit', type=int, help="最多输出的条数")
+    query.set_defaults(func=cmd_query)
+    
+    fuzzy = subparsers.add_parser('fuzzy', help="模糊搜索物品名（容错错别字）")
+    add_data_arguments(fuzzy)
+    fuzzy.add_argument('keyword', help="物品名")
+    fuzzy.add_argument('--distance', type=int, help="容错的编辑距离（默认按名称长度取1或2）")
+    fuzzy.set_defaults(func=cmd_fuzzy)
+    
+    duplicates = subparsers.add_parser('duplicates', help="列出疑似重复的物品名")
+    add_data_arguments(duplicates)
+    duplicates.add_argument('--distance', type=int, help="视为重复的编辑距离（默认1）")
+    duplicates.set_defaults(func=cmd_duplicates)
+    
+    edit = subparsers.add_parser('edit', help="批量修改爆率，如 edit 'item:屠龙 monster:*王' '*2'",
+                                 description="用查询语句选择掉落并按倍数或指定爆率修改，预览后并行写回原文件，"
+                                             "只改动爆率字段并保留编码、换行符和#CHILD结构")
+    add_data_arguments(edit)
+    edit.add_argument('query', help="选择掉落的查询语句（同 query 命令）")
+    edit.add_argument('operation', help="修改操作: *倍数、/除数、=爆率，如 *2、/2、=1/5000")
+    edit.add_argument('--apply', action='store_true', help="写回文件（默认只预览）")
+    edit.add_argument('--no-snapshot', action='store_true', help="写回前不创建备份快照")
+    edit.add_argument('--store', metavar='DIR', help="备份快照库目录（默认使用设置中的目录）")
+    edit.add_argument('--limit', type=int, help="最多预览的行数")
+    edit.set_defaults(func=cmd_edit)
+    
+    snapshot = subparsers.add_parser('snapshot', help="备份快照（按内容去重，变化的文件才占用空间）",
+                                     description="按内容去重、压缩存储整个数据目录，未变化的文件不占空间；"
+                                                 "批量修改前自动创建，可恢复整个目录或单个文件")
+    snapshot.add_argument('--store', metavar='DIR', help="备份快照库目录（默认使用设置中的目录）")
+    actions = snapshot.add_subparsers(dest='action', required=True)
+    snapshot_create = actions.add_parser('create', help="为数据目录创建快照")
+    snapshot_create.add_argument('--data', help="爆率文件目录（默认使用设置中的数据目录）")
+    snapshot_create.add_argument('--label', help="快照说明")
+    snapshot_list = actions.add_parser('list', help="列出快照")
+    snapshot_list.add_argument('--data', help="只列出该目录的快照")
+    snapshot_list.add_argument('--csv', action='store_true', help="以CSV格式输出")
+    snapshot_restore = actions.add_parser('restore', help="恢复快照（整个目录或指定文件）")
+    snapshot_restore.add_argument('snapshot', help="快照ID")
+    snapshot_restore.add_argument('--file', action='append', metavar='NAME', help="只恢复指定文件，可重复")
+    snapshot_restore.add_argument('--target', metavar='DIR', help="恢复到其他目录（默认恢复到原目录）")
+    snapshot_restore.add_argument('--delete-extra', action='store_true', help="删除快照中没有的爆率文件")
+    snapshot_delete = actions.add_parser('delete', help="删除快照")
+    snapshot_delete.add_argument('snapshot', help="快照ID")
+    actions.add_parser('gc', help="清理不再被任何快照引用的内容")
+    snapshot.set_defaults(func=cmd_snapshot)
+    
+    compare = subparsers.add_parser('compare', help="对比多份爆率数据（不同服务器或版本）",
+                                    description="将数据与其他服务器或版本的目录、压缩包对比，"
+                                                "列出新增/移除掉落与爆率变化，可导出CSV")
+    compare.add_argument('base', help="作为基准的目录或压缩包")
+    compare.add_argument('others', nargs='+', help="对比的目录或压缩包")
+    compare.add_argument('--encoding', help="爆率文件编码")
+    compare.add_argument('--output', metavar='CSV', help="同时将差异导出为CSV（多个对比源时按名称分别导出）")
+    compare.add_argument('--limit', type=int, help="每个对比源最多输出的条数")
+    compare.add_argument('--csv', action='store_true', help="以CSV格式输出")
+    compare.set_defaults(func=cmd_compare)
+    
+    logcheck = subparsers.add_parser('logcheck', help="统计服务器掉落日志，找出实际掉落与配置爆率不符的物品",
+                                     description="多进程统计服务器掉落日志，逐个物品做二项检验并校正多重比较，"
+                                                 "找出实际掉落与配置爆率明显不符的物品；日志格式可在设置中用正则配置")
+    add_data_arguments(logcheck)
+    logcheck.add_argument('logs', nargs='+', help="掉落日志文件")
+    logcheck.add_argument('--log-encoding', help="日志文件编码")
+    logcheck.add_argument('--alpha', type=float, help=f"错误发现率阈值（默认 {LOG_SIGNIFICANCE}）")
+    logcheck.add_argument('--all', action='store_true', help="输出所有检验结果，而不只是显著偏差")
+    logcheck.add_argument('--workers', type=int, help="并行扫描进程数（默认CPU核数）")
+    logcheck.add_argument('--output', metavar='CSV', help="同时将完整结果导出为CSV")
+    logcheck.add_argument('--limit', type=int, help="最多输出的条数")
+    logcheck.set_defaults(func=cmd_logcheck)
+    
+    forecast = subparsers.add_parser('forecast', help="按每日击杀数预测全服物品产出，可做假设修改",
+                                     description="按各怪物每日击杀数（CSV击杀表或由掉落日志统计）计算每个物品每日的"
+                                                 "期望产出与波动区间；假设修改爆率或击杀数时只重新计算受影响的物品")
+    add_data_arguments(forecast)
+    source = forecast.add_mutually_exclusive_group(required=True)
+    source.add_argument('--kills', metavar='CSV', help="击杀表（每行 怪物名称,每日击杀数）")
+    source.add_argument('--log', nargs='+', metavar='LOG', help="由掉落日志统计击杀数")
+    forecast.add_argument('--days', type=float, default=1.0, help="日志覆盖的天数（默认1）")
+    forecast.add_argument('--log-encoding', help="日志文件编码")
+    forecast.add_argument('--workers', type=int, help="并行扫描日志的进程数（默认CPU核数）")
+    forecast.add_argument('--change', action='append', metavar='TEXT',
+                          help="假设修改，可重复，如 \"爆率 屠龙 *2\"、\"击杀 祖玛教主 600\"")
+    forecast.add_argument('--scenario', metavar='FILE', help="假设修改文件（每行一条）")
+    forecast.add_argument('--poisson', action='store_true', help="每日击杀数按泊松分布波动（计入方差）")
+    forecast.add_argument('--affected', action='store_true', help="只输出受假设修改影响的物品")
+    forecast.add_argument('--output', metavar='CSV', help="同时将完整结果导出为CSV")
+    forecast.add_argument('--limit', type=int, help="最多输出的条数")
+    forecast.set_defaults(func=cmd_forecast)
+    
+    maps = subparsers.add_parser('maps', help="物品的最佳刷怪地图（需要刷怪配置 MonGen）",
+                                 description="结合 MonGen 刷怪配置、Monster 数据库导出和 MapInfo，"
+                                             "按每轮刷新的期望掉落数排列物品的最佳刷怪地图")
+    add_data_arguments(maps)
+    maps.add_argument('name', help="物品名（--monster 时为怪物名）")
+    maps.add_argument('--monster', action='store_true', help="列出怪物的等级和刷新地图")
+    maps.add_argument('--mongen', help="刷怪配置文件或目录（默认使用设置）")
+    maps.add_argument('--monster-db', help="怪物数据库的文本导出（默认使用设置）")
+    maps.add_argument('--mapinfo', help="地图信息文件（默认使用设置）")
+    maps.add_argument('--limit', type=int, default=WORLD_BEST_MAPS, help=f"最多输出的地图数（默认 {WORLD_BEST_MAPS}）")
+    maps.set_defaults(func=cmd_maps)
+    
+    site = subparsers.add_parser('site', help="生成静态掉落表网站（每个怪物、物品一页，可离线搜索）",
+                                 description="为每个怪物和物品生成静态页面，附带预先生成的搜索索引，直接打开本地文件即可搜索；"
+                                             "页面并行渲染，再次生成时只写入内容变化的页面")
+    site.add_argument('output', nargs='?', help="输出目录（默认使用设置中的目录）")
+    site.add_argument('--data', help="爆率文件目录或压缩包（默认使用设置中的数据目录）")
+    site.add_argument('--encoding', help="爆率文件编码")
+    site.add_argument('--sqlite', metavar='DB', help="使用SQLite存储引擎并指定数据库文件")
+    site.add_argument('--title', help="网站标题")
+    site.add_argument('--force', action='store_true', help="重新写入所有页面")
+    site.add_argument('--workers', type=int, help="并行渲染进程数（默认CPU核数）")
+    site.set_defaults(func=cmd_site)
+    
+    validate = subparsers.add_parser('validate', help="检查所有爆率文件的格式（有错误时返回非零，可作为发布前检查）",
+                                     description="并行检查无效爆率、爆率为0或大于1、未闭合的#CHILD括号、空组、"
+                                                 "找不到的#CALL引用和编码错误，每个问题标明文件和行号；"
+                                                 "结果按文件内容哈希缓存，再次检查只处理改动过的文件")
+    validate.add_argument('--data', help="爆率文件目录（默认使用设置中的数据目录）")
+    validate.add_argument('--encoding', help="爆率文件编码")
+    validate.add_argument('--strict', action='store_true', help="有警告也视为不通过")
+    validate.add_argument('--errors-only', action='store_true', help="只输出错误")
+    validate.add_argument('--no-cache', action='store_true', help="不使用检查缓存，重新检查所有文件")
+    validate.add_argument('--workers', type=int, help="并行检查进程数（默认CPU核数）")
+    validate.add_argument('--output', metavar='CSV', help="同时将所有问题导出为CSV")
+    validate.add_argument('--limit', type=int, help="最多输出的条数")
+    validate.add_argument('--csv', action='store_true', help="以CSV格式输出")
+    validate.set_defaults(func=cmd_validate)
+    
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    
+    if not getattr(args, 'func', None):
+        arg_parser.print_help()
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# src/data_compare.py
+"""
+多版本爆率数据对比（不同服务器或不同版本的 MonItems 目录）
+"""
+
+import math
+import time
+import logging
+from typing import List, Tuple, Dict, Optional, Callable
+
+from config.constants import ENCODING
+from src.data_exporter import CsvExporter, RateFormatter
+
+
+logger = logging.getLogger(__name__)
+
+
+CHANGE_ADDED = 'added'  # 新增掉落
+CHANGE_REMOVED = 'removed'  # 移除掉落
+CHANGE_RATE = 'changed'  # 爆率变化
+CHANGE_MONSTER_ADDED = 'monster_added'  # 新增怪物
+CHANGE_MONSTER_REMOVED = 'monster_removed'  # 移除怪物
+
+CHANGE_LABELS = {
+    CHANGE_ADDED: "新增掉落",
+    CHANGE_REMOVED: "移除掉落",
+    CHANGE_RATE: "爆率变化",
+    CHANGE_MONSTER_ADDED: "新增怪物",
+    CHANGE_MONSTER_REMOVED: "移除怪物",
+}
+
+
+def table_key(monster_info) -> tuple:
+    """掉落表内容（逐项比较，不用哈希值，避免碰撞时漏掉变化）: 只有注释、空行不同的文件相等"""
+    return tuple((item.name, item.rate, item.child_group) for item in monster_info.drop_items)
+
+
+class DropChange:
+    """一条差异"""
+    
+    def __init__(self, kind: str, monster_name: str, item_name: str = "",
+                 old_rate: Optional[float] = None, new_rate: Optional[float] = None):
+        self.kind = kind
+        self.monster_name = monster_name
+        self.item_name = item_name
+        self.old_rate = old_rate
+        self.new_rate = new_rate
+    
+    @property
+    def ratio(self) -> Optional[float]:
+        """新爆率 / 原爆率"""
+        if self.old_rate and self.new_rate is not None:
+            return self.new_rate / self.old_rate
+        return None
+    
+    def __repr__(self):
+        return f"DropChange({self.kind}, {self.monster_name}, {self.item_name}, {self.old_rate}, {self.new_rate})"
+
+
+class DataDiff:
+    """两份数据之间的差异"""
+    
+    def __init__(self, base_label: str, other_label: str):
+        self.base_label = base_label
+        self.other_label = other_label
+        self.changes = []  # List[DropChange]，按怪物、物品顺序
+        self.identical_monsters = 0  # 掉落表完全相同而跳过的怪物数
+        self.changed_monsters = 0  # 掉落表有变化的怪物数
+        self.elapsed = 0.0
+    
+    def of_kind(self, kind: str) -> List[DropChange]:
+        return [change for change in self.changes if change.kind == kind]
+    
+    def summary(self) -> Dict[str, int]:
+        """各类差异的数量"""
+        counts = {kind: 0 for kind in CHANGE_LABELS}
+        for change in self.changes:
+            counts[change.kind] += 1
+        return counts
+    
+    def describe(self) -> str:
+        counts = self.summary()
+        parts = [f"{CHANGE_LABELS[kind]} {count}" for kind, count in counts.items() if count]
+        return (f"{self.base_label} → {self.other_label}: {', '.join(parts) if parts else '没有差异'}"
+                f"（相同怪物 {self.identical_monsters}，有变化怪物 {self.changed_monsters}）")
+    
+    def rows(self, formatter: Optional[RateFormatter] = None):
+        """导出行: 类型, 怪物名称, 物品名称, 原爆率, 新爆率, 倍数"""
+        return self.rows_for(self.changes, formatter)
+    
+    @staticmethod
+    def rows_for(changes: List[DropChange], formatter: Optional[RateFormatter] = None):
+        """指定差异的显示行"""
+        formatter = formatter or RateFormatter()
+        for change in changes:
+            old = formatter.format(change.old_rate)[1] if change.old_rate is not None else ""
+            new = formatter.format(change.new_rate)[1] if change.new_rate is not None else ""
+            ratio = f"{change.ratio:.4g}" if change.ratio is not None else ""
+            yield [CHANGE_LABELS[change.kind], change.monster_name, change.item_name, old, new, ratio]
+    
+    def export_csv(self, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event=None) -> bool:
+        """导出差异为CSV"""
+        try:
+            exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+            written = exporter.export(output_path, ["类型", "怪物名称", "物品名称", "原爆率", "新爆率", "倍数"],
+                                      self.rows(), len(self.changes))
+            logger.info(f"差异已导出到 {output_path}: {written} 行")
+            return True
+        except Exception as e:
+            logger.error(f"导出差异失败 {output_path}: {e}")
+            return False
+
+
+def diff_drop_data(base_data, other_data, base_label: str = "原数据", other_label: str = "新数据",
+                   base_digests: Optional[dict] = None, other_digests: Optional[dict] = None) -> DataDiff:
+    """
+    对比两份 {怪物名: MonsterDropInfo}
+    掉落表相同的怪物按以下顺序尽早跳过: 同一对象（加载时沿用）、文件摘要相同、
+    掉落行内容（物品名、爆率、子掉落组，见 table_key）逐项相同；
+    只有确实变化的怪物才按物品逐条比较合并后的爆率。
+    """
+    start = time.perf_counter()
+    diff = DataDiff(base_label, other_label)
+    base_digests = base_digests or {}
+    other_digests = other_digests or {}
+    
+    for monster_name, other_info in other_data.items():
+        base_info = base_data.get(monster_name)
+        if base_info is None:
+            diff.changes.append(DropChange(CHANGE_MONSTER_ADDED, monster_name))
+            continue
+        
+        if base_info is other_info:
+            diff.identical_monsters += 1
+            continue
+        digest = base_digests.get(monster_name)
+        if digest is not None and digest == other_digests.get(monster_name):
+            diff.identical_monsters += 1
+            continue
+        if table_key(base_info) == table_key(other_info):
+            diff.identical_monsters += 1
+            continue
+        
+        changes = _diff_monster(monster_name, base_info, other_info)
+        if changes:
+            diff.changed_monsters += 1
+            diff.changes.extend(changes)
+        else:
+            # 掉落行顺序或写法不同，合并后爆率一致
+            diff.identical_monsters += 1
+    
+    for monster_name in base_data.keys():
+        if monster_name not in other_data:
+            diff.changes.append(DropChange(CHANGE_MONSTER_REMOVED, monster_name))
+    
+    diff.elapsed = time.perf_counter() - start
+    logger.info(f"数据对比完成，耗时{diff.elapsed:.2f}秒: {diff.describe()}")
+    return diff
+
+
+def _diff_monster(monster_name: str, base_info, other_info) -> List[DropChange]:
+    base_rates = dict(base_info.get_combined_drops())
+    changes = []
+    for item_name, new_rate in other_info.get_combined_drops():
+        old_rate = base_rates.pop(item_name, None)
+        if old_rate is None:
+            changes.append(DropChange(CHANGE_ADDED, monster_name, item_name, None, new_rate))
+        elif not math.isclose(old_rate, new_rate, rel_tol=1e-9):
+            changes.append(DropChange(CHANGE_RATE, monster_name, item_name, old_rate, new_rate))
+    for item_name, old_rate in base_rates.items():
+        changes.append(DropChange(CHANGE_REMOVED, monster_name, item_name, old_rate, None))
+    return changes
+
+
+class DataComparison:
+    """多份数据源的对比
+
+    第一个数据源为基准。后续数据源与基准共用名称驻留池，
+    目录中与基准内容相同的文件直接沿用基准的解析结果，不再解析。
+    """
+    
+    def __init__(self, encoding: str = ENCODING):
+        self.encoding = encoding
+        self.string_pool = {}
+        self.sources = []  # [(名称, LegendDropParser)]
+    
+    @property
+    def base(self):
+        return self.sources[0][1] if self.sources else None
+    
+    @property
+    def labels(self) -> List[str]:
+        return [label for label, _ in self.sources]
+    
+    def add_parser(self, label: str, parser):
+        """加入已加载的数据（如界面当前数据）"""
+        if not self.sources:
+            self.string_pool = parser.string_pool
+        self.sources.append((label, parser))
+    
+    def load_source(self, path: str, label: Optional[str] = None) -> bool:
+        """加载一个目录或压缩包作为数据源"""
+        from src.data_parser import LegendDropParser
+        
+        parser = LegendDropParser(encoding=self.encoding, string_pool=self.string_pool, reuse_from=self.base)
+        if not parser.parse_directory(path):
+            logger.error(f"对比数据加载失败: {path}")
+            return False
+        self.add_parser(label or path, parser)
+        return True
+    
+    def diff(self, other: int = 1, base: int = 0) -> DataDiff:
+        """对比两个数据源（默认第二个相对第一个）"""
+        base_label, base_parser = self.sources[base]
+        other_label, other_parser = self.sources[other]
+        return diff_drop_data(base_parser.drop_data, other_parser.drop_data, base_label, other_label,
+                              base_parser.file_digests, other_parser.file_digests)
+    
+    def diffs(self) -> List[DataDiff]:
+        """每个数据源相对基准的差异"""
+        return [self.diff(other) for other in range(1, len(self.sources))]
+    
+    def item_side_by_side(self, item_name: str) -> List[Tuple[str, List[Optional[float]]]]:
+        """某个物品在各数据源中的掉落: [(怪物名, [各数据源的爆率或None])]"""
+        rates = {}
+        for number, (_, parser) in enumerate(self.sources):
+            for monster_name, rate in parser.item_index.get(item_name, []):
+                rates.setdefault(monster_name, [None] * len(self.sources))[number] = rate
+        return list(rates.items())
+    
+    def monster_side_by_side(self, monster_name: str) -> List[Tuple[str, List[Optional[float]]]]:
+        """某个怪物在各数据源中的掉落: [(物品名, [各数据源的爆率或None])]"""
+        rates = {}
+        for number, (_, parser) in enumerate(self.sources):
+            monster_info = parser.drop_data.get(monster_name)
+            if monster_info is None:
+                continue
+            for item_name, rate in monster_info.get_combined_drops():
+                rates.setdefault(item_name, [None] * len(self.sources))[number] = rate
+        return list(rates.items())
@@ -0,0 +1,129 @@
+# src/data_exporter.py
+"""
+数据导出（流式写入）
+"""
+
+import os
+import csv
+import uuid
+import logging
+from contextlib import contextmanager
+from typing import List, Iterable, Optional, Callable
+
+from config.constants import EXPORT_CHUNK_ROWS, EXPORT_BUFFER_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+# 临时文件的打开方式：不存在时才创建，Windows下按二进制打开（换行由 fdopen 的文本模式处理）
+_TEMP_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消"""
+    pass
+
+
+@contextmanager
+def atomic_open(output_path: str, mode: str = 'w', **kwargs):
+    """
+    写入同目录临时文件，成功后原子替换目标文件，失败时保留原文件
+    替换已有文件时沿用其权限；新文件以 0o666 创建临时文件，由系统按 umask 得到默认权限
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    try:
+        file_mode = os.stat(output_path).st_mode & 0o7777
+    except OSError:
+        file_mode = None
+    temp_path = os.path.join(output_dir, f".export_{uuid.uuid4().hex}.tmp")
+    fd = os.open(temp_path, _TEMP_FLAGS, 0o666)
+    
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        if file_mode is not None:
+            os.chmod(temp_path, file_mode)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class RateFormatter:
+    """爆率格式化（缓存重复出现的爆率值）"""
+    
+    def __init__(self):
+        self._cache = {}
+    
+    def format(self, rate: float):
+        """返回 (分数形式, 百分比形式)"""
+        cached = self._cache.get(rate)
+        if cached is None:
+            cached = (
+                f"1/{int(1/rate) if rate > 0 else '∞'}",
+                f"{rate*100:.6f}%",
+            )
+            self._cache[rate] = cached
+        return cached
+
+
+def iter_drop_rows(drop_data, formatter: RateFormatter) -> Iterable[list]:
+    """按怪物顺序生成导出行: 怪物名称, 物品名称, 爆率, 爆率百分比, 备注"""
+    for monster_name, monster_info in drop_data.items():
+        for item in monster_info.drop_items:
+            fraction, percent = formatter.format(item.rate)
+            yield [monster_name, item.name, fraction, percent, "子掉落" if item.is_child else ""]
+
+
+class CsvExporter:
+    """CSV流式导出器
+
+    先写入同目录下的临时文件，完成后原子替换目标文件；
+    取消或出错时删除临时文件，保留原有的导出结果。
+    """
+    
+    def __init__(self, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None):
+        self.chunk_rows = chunk_rows
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+    
+    def export(self, output_path: str, header: List[str], rows: Iterable[list], total: int = 0) -> int:
+        """
+        导出数据
+        :param output_path: 目标文件
+        :param header: 表头
+        :param rows: 数据行（可以是生成器）
+        :param total: 总行数（用于进度显示）
+        :return: 写入的行数
+        """
+        written = 0
+        with atomic_open(output_path, 'w', newline='', encoding='utf-8-sig', buffering=EXPORT_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_rows:
+                    written += self._write_chunk(writer, chunk, total, written)
+                    chunk = []
+            
+            if chunk:
+                written += self._write_chunk(writer, chunk, total, written)
+        
+        return written
+    
+    def _write_chunk(self, writer, chunk: list, total: int, written: int) -> int:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExportCancelled()
+        
+        writer.writerows(chunk)
+        
+        if self.progress_callback:
+            self.progress_callback(written + len(chunk), total)
+        return len(chunk)
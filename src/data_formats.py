@@ -0,0 +1,263 @@
+# src/data_formats.py
+"""
+数据快照格式（二进制列式快照 / JSON Lines）
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import logging
+from array import array
+from typing import Optional, Callable, Iterator
+
+from config.constants import EXPORT_BUFFER_SIZE
+from src.data_exporter import atomic_open, ExportCancelled
+
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_MAGIC = b'LDTSNAP1'
+SNAPSHOT_VERSION = 1
+
+# magic, version, 字符串数, 怪物数, 掉落行数, 7个段偏移
+_HEADER = struct.Struct('<8sIIII7Q')
+
+FORMAT_CSV = 'csv'
+FORMAT_SNAPSHOT = 'snapshot'
+FORMAT_JSONL = 'jsonl'
+
+# 扩展名 -> 格式
+FORMAT_EXTENSIONS = {
+    '.csv': FORMAT_CSV,
+    '.ldsnap': FORMAT_SNAPSHOT,
+    '.jsonl': FORMAT_JSONL,
+}
+
+FORMAT_NAMES = {
+    FORMAT_CSV: "CSV",
+    FORMAT_SNAPSHOT: "二进制快照",
+    FORMAT_JSONL: "JSON Lines",
+}
+
+
+def detect_format(path: str) -> Optional[str]:
+    """根据扩展名判断数据格式"""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExportCancelled()
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _write_section(f, values: array) -> int:
+    """按8字节对齐写入一个数组段，返回段偏移"""
+    padding = (-f.tell()) % 8
+    if padding:
+        f.write(b'\0' * padding)
+    offset = f.tell()
+    f.write(_little_endian(values).tobytes())
+    return offset
+
+
+def write_snapshot(drop_data, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event=None) -> int:
+    """
+    写入二进制列式快照
+    布局: 头部 | 字符串偏移(uint32) | 字符串数据(utf-8) | 怪物名ID(uint32) | 怪物行起点(uint32)
+          | 物品ID(uint32) | 爆率(float64) | 子掉落组ID(int32, -1表示无)
+    :return: 写入的掉落行数
+    """
+    strings = {}
+    
+    def intern(text: str) -> int:
+        string_id = strings.get(text)
+        if string_id is None:
+            string_id = strings[text] = len(strings)
+        return string_id
+    
+    monster_ids = array('I')
+    row_starts = array('I', [0])
+    item_ids = array('I')
+    rates = array('d')
+    group_ids = array('i')
+    
+    total = len(drop_data)
+    for done, (monster_name, monster_info) in enumerate(drop_data.items(), 1):
+        monster_ids.append(intern(monster_name))
+        for item in monster_info.drop_items:
+            item_ids.append(intern(item.name))
+            rates.append(item.rate)
+            group_ids.append(intern(item.child_group) if item.child_group is not None else -1)
+        row_starts.append(len(item_ids))
+        
+        if done % 1000 == 0:
+            _check_cancel(cancel_event)
+            if progress_callback:
+                progress_callback(done, total)
+    
+    blob = bytearray()
+    string_offsets = array('I', [0])
+    for text in strings:
+        blob += text.encode('utf-8')
+        string_offsets.append(len(blob))
+    
+    _check_cancel(cancel_event)
+    
+    with atomic_open(output_path, 'wb', buffering=EXPORT_BUFFER_SIZE) as f:
+        f.write(b'\0' * _HEADER.size)
+        offsets = [
+            _write_section(f, string_offsets),
+            _write_section(f, array('B', bytes(blob))),
+            _write_section(f, monster_ids),
+            _write_section(f, row_starts),
+            _write_section(f, item_ids),
+            _write_section(f, rates),
+            _write_section(f, group_ids),
+        ]
+        f.seek(0)
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings), len(monster_ids), len(item_ids),
+                             *offsets))
+    
+    if progress_callback:
+        progress_callback(total, total)
+    
+    logger.info(f"快照已导出到: {output_path} ({len(item_ids)} 行)")
+    return len(item_ids)
+
+
+def _read_column(buffer, offset: int, typecode: str, count: int):
+    """
+    读取一列: 小端平台直接返回映射内存上的视图（不复制，用完须 release），大端平台复制后转换字节序
+    """
+    size = array(typecode).itemsize
+    view = memoryview(buffer)[offset:offset + size * count]
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    view.release()
+    values.byteswap()
+    return values
+
+
+def read_snapshot(path: str, add_monster: Callable) -> int:
+    """
+    通过内存映射读取二进制快照，各列直接在映射内存上按下标读取，不先转换为完整的列表
+    :param add_monster: 回调，接收重建的 MonsterDropInfo
+    :return: 读取的怪物数
+    """
+    from src.data_parser import MonsterDropInfo
+    
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if len(buffer) < _HEADER.size:
+                raise ValueError("快照文件不完整")
+            
+            (magic, version, n_strings, n_monsters, n_rows, strings_offset, blob_offset,
+             monsters_offset, starts_offset, items_offset, rates_offset, groups_offset) = _HEADER.unpack_from(buffer, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("不是有效的快照文件")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"不支持的快照版本: {version}")
+            
+            columns = []
+            
+            def column(offset: int, typecode: str, count: int):
+                columns.append(_read_column(buffer, offset, typecode, count))
+                return columns[-1]
+            
+            try:
+                string_offsets = column(strings_offset, 'I', n_strings + 1)
+                blob = buffer[blob_offset:blob_offset + string_offsets[-1]]
+                strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode('utf-8') for i in range(n_strings)]
+                del blob
+                
+                monster_ids = column(monsters_offset, 'I', n_monsters)
+                row_starts = column(starts_offset, 'I', n_monsters + 1)
+                item_ids = column(items_offset, 'I', n_rows)
+                rates = column(rates_offset, 'd', n_rows)
+                group_ids = column(groups_offset, 'i', n_rows)
+                
+                for m, monster_id in enumerate(monster_ids):
+                    rows = []
+                    for row in range(row_starts[m], row_starts[m + 1]):
+                        group_id = group_ids[row]
+                        rows.append((strings[item_ids[row]], rates[row], strings[group_id] if group_id >= 0 else None))
+                    add_monster(MonsterDropInfo.from_rows(strings[monster_id], rows))
+            finally:
+                # 映射关闭前必须释放其上的视图
+                for column in columns:
+                    if isinstance(column, memoryview):
+                        column.release()
+    
+    return n_monsters
+
+
+def iter_jsonl_records(drop_data) -> Iterator[dict]:
+    """每个怪物一条记录"""
+    for monster_name, monster_info in drop_data.items():
+        yield {
+            'monster': monster_name,
+            'drops': [[item.name, item.rate, item.child_group] for item in monster_info.drop_items],
+        }
+
+
+def write_jsonl(drop_data, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                cancel_event=None) -> int:
+    """流式写入JSON Lines，返回写入的怪物数"""
+    total = len(drop_data)
+    written = 0
+    
+    with atomic_open(output_path, 'w', encoding='utf-8', newline='\n', buffering=EXPORT_BUFFER_SIZE) as f:
+        lines = []
+        for record in iter_jsonl_records(drop_data):
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            if len(lines) >= 1000:
+                _check_cancel(cancel_event)
+                f.write('\n'.join(lines) + '\n')
+                written += len(lines)
+                lines = []
+                if progress_callback:
+                    progress_callback(written, total)
+        
+        if lines:
+            _check_cancel(cancel_event)
+            f.write('\n'.join(lines) + '\n')
+            written += len(lines)
+    
+    if progress_callback:
+        progress_callback(written, total)
+    
+    logger.info(f"JSON Lines已导出到: {output_path} ({written} 个怪物)")
+    return written
+
+
+def read_jsonl(path: str, add_monster: Callable) -> int:
+    """流式读取JSON Lines，返回读取的怪物数"""
+    from src.data_parser import MonsterDropInfo
+    
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"第{line_no}行不是有效的JSON: {e}")
+            
+            add_monster(MonsterDropInfo.from_rows(record['monster'], record['drops']))
+            count += 1
+    
+    return count
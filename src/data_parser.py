@@ -5,12 +5,20 @@
 
 import os
 import re
+import hashlib
 import logging
+import threading
+import time
 from fractions import Fraction
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Optional
 
-from config.constants import ENCODING, CHILD_MARKER, RANDOM_MARKER
+from config.constants import (ENCODING, CHILD_MARKER, RANDOM_MARKER, STORAGE_MEMORY, STORAGE_SQLITE,
+                              FRACTION_CACHE_SIZE, ARCHIVE_MEMBER_DIR)
+from src.archive_source import is_archive, load_archive, DEFAULT_CACHE_DIR
+from src.utils.rate_utils import combine_drop_lines
+from src.utils.text_utils import normalize_name
+from src.item_categories import ItemCategorizer, ItemCategoryIndex, DEFAULT_RULES_FILE
 
 
 logger = logging.getLogger(__name__)
@@ -19,11 +27,13 @@ logger = logging.getLogger(__name__)
 class DropItem:
     """掉落物品类"""
     
-    def __init__(self, name: str, rate: float, is_child: bool = False, child_group: Optional[str] = None):
+    def __init__(self, name: str, rate: float, is_child: bool = False, child_group: Optional[str] = None,
+                 line_no: Optional[int] = None):
         self.name = name
         self.rate = rate
         self.is_child = is_child
         self.child_group = child_group
+        self.line_no = line_no  # 在文件中的行号（从0开始，子掉落为#CHILD行），数据库导入时为None
         
     def __repr__(self):
         return f"DropItem({self.name}, {self.rate*100:.4f}%)"
@@ -51,46 +61,237 @@ class MonsterDropInfo:
         
         self.child_groups[group_id] = items
         
+    @classmethod
+    def from_rows(cls, monster_name: str, rows) -> 'MonsterDropInfo':
+        """由已解析的 (物品名, 爆率, 子掉落组) 行重建（用于数据库和快照导入）"""
+        monster_info = cls(monster_name)
+        for item_name, rate, child_group in rows:
+            item = DropItem(item_name, rate, child_group is not None, child_group)
+            monster_info.drop_items.append(item)
+            if child_group is not None:
+                monster_info.child_groups.setdefault(child_group, []).append(item)
+        return monster_info
+    
     def get_total_drop_items(self) -> int:
         return len(self.drop_items)
     
-    def get_items_by_type(self, type_filter: str = None) -> List[DropItem]:
-        """按物品类型过滤（需要扩展）"""
+    def get_combined_drops(self) -> List[Tuple[str, float]]:
+        """按物品合并重复掉落行: [(物品名, 每次击杀至少掉落一个的概率)]，按首次出现顺序"""
+        lines = OrderedDict()
+        for item in self.drop_items:
+            lines.setdefault(item.name, []).append((item.rate, item.child_group))
+        return [(item_name, combine_drop_lines(item_lines)) for item_name, item_lines in lines.items()]
+    
+    def get_item_lines(self, item_name: str) -> List[DropItem]:
+        """某个物品的全部原始掉落行"""
+        return [item for item in self.drop_items if item.name == item_name]
+    
+    def get_items_by_type(self, type_filter: str = None, item_categories: Dict[str, str] = None) -> List[DropItem]:
+        """
+        按物品分类过滤
+        :param type_filter: 分类ID（见 config/item_categories.json）
+        :param item_categories: {物品名: 分类ID}，通常取 LegendDropParser.category_index.item_category；
+                                不提供时按物品名子串过滤
+        """
         if not type_filter:
             return self.drop_items
         
-        # 这里可以添加物品类型判断逻辑
-        return [item for item in self.drop_items if type_filter in item.name]
+        if item_categories is None:
+            return [item for item in self.drop_items if type_filter in item.name]
+        return [item for item in self.drop_items if item_categories.get(item.name) == type_filter]
+
+
+class DropIndexSnapshot:
+    """某一代的完整爆率数据及其索引
+
+    解析器每次加载都在新的快照中构建数据，构建完成后用一次引用赋值替换当前快照，
+    读者不会看到构建到一半的索引。快照发布后不再修改：读者取得快照后可以一直使用到结束，
+    期间的重新加载只影响之后取得快照的读者。generation 每次发布递增，依赖数据的缓存以它为键。
+    按需构建的派生索引（爆率排序索引、稀疏矩阵、模糊搜索索引）也挂在快照上，随快照一起失效。
+    SQLite存储模式下数据在数据库中原地同步，快照只包装数据库的查询视图，不提供上述隔离；
+    该模式下加载时维护的爆率排序索引和稀疏矩阵也由各代快照共用，在同步时原地更新。
+    """
+    
+    def __init__(self, categorizer: ItemCategorizer, drop_data=None, item_index=None):
+        self.generation = 0  # 发布时由解析器设置
+        self.drop_data = drop_data if drop_data is not None else OrderedDict()  # {怪物名: MonsterDropInfo}
+        self.item_index = item_index if item_index is not None else {}  # {物品名: [(怪物名, 爆率)]}
+        self.item_keys = {}  # {物品名: 搜索键}，加载时计算一次
+        self.monster_keys = {}  # {怪物名: 搜索键}
+        self.file_digests = {}  # {怪物名: 文件内容摘要}，目录加载时记录
+        self.monster_stats = {}  # 怪物统计信息
+        self.category_index = ItemCategoryIndex(categorizer)  # 与 item_keys 同步更新
+        self.drop_matrix = None  # 怪物×物品稀疏矩阵（可选，加载时同步维护）
+        self.rate_index = None  # 全局爆率排序索引（可选，加载时同步维护）
+        self.fuzzy_index = None  # 物品名模糊搜索索引（首次使用时构建）
+    
+    def derived_indexes(self) -> list:
+        """随数据同步维护的派生索引（均提供 set_monster / remove_monster / clear）"""
+        return [index for index in (self.drop_matrix, self.rate_index) if index is not None]
+    
+    def get_drop_matrix(self):
+        """怪物×物品稀疏矩阵，加载时未维护则按本快照的数据构建一次"""
+        if self.drop_matrix is None:
+            from src.drop_matrix import DropMatrix
+            self.drop_matrix = DropMatrix.from_drop_data(self.drop_data)
+        return self.drop_matrix
+    
+    def get_rate_index(self):
+        """全局爆率排序索引，加载时未维护则按本快照的数据构建一次"""
+        if self.rate_index is None:
+            from src.rate_index import RateIndex
+            self.rate_index = RateIndex.from_drop_data(self.drop_data)
+        return self.rate_index
 
 
 class LegendDropParser:
-    """传奇爆率文件解析器"""
+    """传奇爆率文件解析器
+
+    数据保存在当前快照（DropIndexSnapshot）中，drop_data、item_index 等属性均取当前快照；
+    同一操作中需要多次读取时先用 snapshot() 取得快照，避免中途重新加载后前后读到不同的数据。
+    """
     
-    def __init__(self, encoding: str = ENCODING):
+    def __init__(self, encoding: str = ENCODING, storage: str = STORAGE_MEMORY, db_path: Optional[str] = None,
+                 cache_dir: str = DEFAULT_CACHE_DIR, build_matrix: bool = False, build_rate_index: bool = False,
+                 normalize_traditional: bool = False, categories_file: Optional[str] = None,
+                 string_pool: Optional[dict] = None, reuse_from: Optional['LegendDropParser'] = None,
+                 archive_member_dir: str = ARCHIVE_MEMBER_DIR):
         self.encoding = encoding
-        self.drop_data = OrderedDict()  # {怪物名: MonsterDropInfo}
-        self.item_index = defaultdict(list)  # {物品名: [(怪物名, 爆率)]}
-        self.monster_stats = {}  # 怪物统计信息
+        self.string_pool = string_pool if string_pool is not None else {}  # 名称驻留池，多个解析器可共用
+        self.reuse_from = reuse_from  # 参照数据：内容相同的文件直接沿用其解析结果（数据对比时使用）
+        self.normalize_traditional = normalize_traditional  # 搜索时繁简视为相同
+        self.storage = storage
+        self.cache_dir = cache_dir  # 压缩包解析缓存目录
+        self.archive_member_dir = archive_member_dir  # 压缩包中爆率文件所在目录
+        self.store = None  # SQLite存储（可选）
+        self.build_matrix = build_matrix  # 加载时同步维护稀疏矩阵
+        self.build_rate_index = build_rate_index  # 加载时同步维护爆率排序索引
+        self._query_engine = None
+        self._generation = 0  # 最近发布的快照代数
+        self._load_lock = threading.Lock()  # 加载互相排队，读者不加锁
+        self._building = None  # 正在构建、尚未发布的快照
+        
+        # 物品分类: 规则加载失败时所有物品归入默认分类
+        self.categorizer = ItemCategorizer(normalizer=self.normalize_name)
+        self.categorizer.load(categories_file or DEFAULT_RULES_FILE)
+        
+        if build_rate_index:
+            try:
+                from src.rate_index import RateIndex
+            except ImportError:
+                logger.warning("未安装numpy，不构建爆率排序索引")
+                self.build_rate_index = False
+        
+        if storage == STORAGE_SQLITE:
+            from src.drop_store import SQLiteDropStore
+            self.store = SQLiteDropStore(db_path or os.path.join(os.getcwd(), "data", "drops.db"))
+        self._snapshot = self._new_snapshot()
+        self._fraction_cache = {}  # {爆率原文: 爆率}
+    
+    # ------------------------------------------------------------------
+    # 快照
+    # ------------------------------------------------------------------
+    
+    def snapshot(self) -> DropIndexSnapshot:
+        """当前发布的数据快照（不会再被修改，可以一直使用到读取结束）"""
+        return self._snapshot
+    
+    @property
+    def data_version(self) -> int:
+        """当前快照的代数，供查询缓存判断是否失效"""
+        return self._snapshot.generation
+    
+    @property
+    def drop_data(self):
+        return self._snapshot.drop_data
+    
+    @property
+    def item_index(self):
+        return self._snapshot.item_index
+    
+    @property
+    def item_keys(self) -> Dict[str, str]:
+        return self._snapshot.item_keys
+    
+    @property
+    def monster_keys(self) -> Dict[str, str]:
+        return self._snapshot.monster_keys
+    
+    @property
+    def file_digests(self) -> Dict[str, bytes]:
+        return self._snapshot.file_digests
+    
+    @property
+    def monster_stats(self) -> dict:
+        return self._snapshot.monster_stats
+    
+    @property
+    def category_index(self) -> ItemCategoryIndex:
+        return self._snapshot.category_index
+    
+    @property
+    def drop_matrix(self):
+        return self._snapshot.drop_matrix
+    
+    @property
+    def rate_index(self):
+        return self._snapshot.rate_index
+    
+    def _new_snapshot(self, previous: Optional[DropIndexSnapshot] = None) -> DropIndexSnapshot:
+        """
+        创建待构建的空快照
+        :param previous: SQLite模式下沿用上一快照的派生索引（只增量更新变化的怪物）
+        """
+        if self.store is not None:
+            # 查询接口与内存模式一致，数据按需从数据库读取
+            snapshot = DropIndexSnapshot(self.categorizer, self.store.monsters, self.store.items)
+            if previous is not None:
+                snapshot.drop_matrix, snapshot.rate_index = previous.drop_matrix, previous.rate_index
+                return snapshot
+        else:
+            snapshot = DropIndexSnapshot(self.categorizer)
+        
+        if self.build_matrix:
+            from src.drop_matrix import DropMatrix
+            snapshot.drop_matrix = DropMatrix()
+        if self.build_rate_index:
+            from src.rate_index import RateIndex
+            snapshot.rate_index = RateIndex()
+        return snapshot
+    
+    def _publish(self, snapshot: DropIndexSnapshot):
+        """发布构建完成的快照（调用方持有加载锁）: 一次引用赋值，正在使用旧快照的读者不受影响"""
+        self._generation += 1
+        snapshot.generation = self._generation
+        self._snapshot = snapshot
         
     def parse_fraction(self, fraction_str: str) -> float:
-        """解析分数字符串为浮点数"""
+        """解析分数字符串为浮点数（爆率写法高度重复，解析结果按原文缓存）"""
+        value = self._fraction_cache.get(fraction_str)
+        if value is not None:
+            return value
+        
         try:
             # 移除可能的空格
-            fraction_str = fraction_str.strip()
+            text = fraction_str.strip()
             
             # 处理特殊情况
-            if fraction_str == '0':
-                return 0.0
-            if '/' not in fraction_str:
+            if text == '0':
+                value = 0.0
+            elif '/' not in text:
                 # 尝试直接转换
-                return float(fraction_str)
-            
-            # 使用Fraction确保精度
-            return float(Fraction(fraction_str))
+                value = float(text)
+            else:
+                # 使用Fraction确保精度
+                value = float(Fraction(text))
             
         except (ValueError, ZeroDivisionError) as e:
             logger.warning(f"无法解析分数 '{fraction_str}': {e}")
             return 0.0
+        
+        if len(self._fraction_cache) < FRACTION_CACHE_SIZE:
+            self._fraction_cache[fraction_str] = value
+        return value
     
     def clean_item_name(self, name: str) -> str:
         """清理物品名称"""
@@ -103,193 +304,471 @@ class LegendDropParser:
             
         return name
     
+    def decode_content(self, raw: bytes) -> str:
+        """按解析器编码解码文件内容（与文本模式读取一致，统一换行符）"""
+        content = raw.decode(self.encoding)
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+    
+    def _intern(self, text: str) -> str:
+        return self.string_pool.setdefault(text, text)
+    
+    def _load_monster_file(self, filepath: str) -> Optional[MonsterDropInfo]:
+        """读取并解析怪物文件，记录内容摘要；与参照数据内容相同的文件沿用参照数据的解析结果"""
+        monster_name = self._intern(os.path.splitext(os.path.basename(filepath))[0])
+        try:
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+        except OSError as e:
+            logger.error(f"读取文件 {filepath} 失败: {e}")
+            return None
+        
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+        self._building.file_digests[monster_name] = digest
+        if self.reuse_from is not None and self.reuse_from.file_digests.get(monster_name) == digest:
+            monster_info = self.reuse_from.drop_data.get(monster_name)
+            if monster_info is not None:
+                return monster_info
+        
+        try:
+            return self.parse_monster_content(monster_name, self.decode_content(raw))
+        except Exception as e:
+            logger.error(f"解析文件 {filepath} 失败: {e}")
+            return None
+    
     def parse_monster_file(self, filepath: str) -> Optional[MonsterDropInfo]:
         """解析单个怪物爆率文件"""
         try:
             monster_name = os.path.splitext(os.path.basename(filepath))[0]
-            monster_info = MonsterDropInfo(monster_name)
             
-            with open(filepath, 'r', encoding=self.encoding) as f:
-                content = f.read()
+            with open(filepath, 'rb') as f:
+                content = self.decode_content(f.read())
             
-            lines = content.split('\n')
-            i = 0
+            return self.parse_monster_content(monster_name, content)
             
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                # 跳过空行和注释行（以#开头但不是#CHILD）
-                if not line or (line.startswith('#') and not line.startswith(CHILD_MARKER)):
-                    i += 1
-                    continue
-                
-                # 处理#CHILD结构
-                if line.startswith(CHILD_MARKER):
-                    parts = line.split()
-                    if len(parts) >= 3 and parts[2] == RANDOM_MARKER:
-                        # 解析子爆率
-                        child_rate_str = parts[1]
-                        child_rate = self.parse_fraction(child_rate_str)
-                        
-                        # 查找括号开始
-                        bracket_start = i
-                        while bracket_start < len(lines) and lines[bracket_start].strip() != '(':
-                            bracket_start += 1
-                        
-                        if bracket_start < len(lines):
-                            # 查找括号结束
-                            bracket_end = bracket_start
-                            while bracket_end < len(lines) and lines[bracket_end].strip() != ')':
-                                bracket_end += 1
-                            
-                            if bracket_end < len(lines):
-                                # 解析括号内的物品
-                                child_items = []
-                                for j in range(bracket_start + 1, bracket_end):
-                                    item_line = lines[j].strip()
-                                    if item_line:
-                                        item_parts = item_line.split()
-                                        if len(item_parts) >= 2:
-                                            # 括号内的1/1只是占位符，实际爆率由#CHILD控制
-                                            item_name = self.clean_item_name(' '.join(item_parts[1:]))
-                                            child_items.append(DropItem(item_name, 0.0))
-                                
-                                if child_items:
-                                    group_id = f"child_group_{len(monster_info.child_groups)}"
-                                    monster_info.add_child_group(group_id, child_items, child_rate)
-                                
-                                # 跳过已处理的括号内容
-                                i = bracket_end + 1
-                                continue
-                
-                # 普通爆率行
+        except Exception as e:
+            logger.error(f"解析文件 {filepath} 失败: {e}")
+            return None
+    
+    def parse_monster_content(self, monster_name: str, content: str) -> MonsterDropInfo:
+        """解析爆率文本内容"""
+        monster_info = MonsterDropInfo(self._intern(monster_name))
+        
+        lines = content.split('\n')
+        i = 0
+        
+        while i < len(lines):
+            line = lines[i].strip()
+            
+            # 跳过空行和注释行（以#开头但不是#CHILD）
+            if not line or (line.startswith('#') and not line.startswith(CHILD_MARKER)):
+                i += 1
+                continue
+            
+            # 处理#CHILD结构
+            if line.startswith(CHILD_MARKER):
                 parts = line.split()
-                if len(parts) >= 2:
-                    rate_str = parts[0]
-                    item_name = self.clean_item_name(' '.join(parts[1:]))
+                if len(parts) >= 3 and parts[2] == RANDOM_MARKER:
+                    # 解析子爆率
+                    child_rate_str = parts[1]
+                    child_rate = self.parse_fraction(child_rate_str)
                     
-                    # 解析爆率
-                    rate = self.parse_fraction(rate_str)
+                    # 查找括号开始
+                    bracket_start = i
+                    while bracket_start < len(lines) and lines[bracket_start].strip() != '(':
+                        bracket_start += 1
                     
-                    # 跳过爆率为0的物品（如果有的话）
-                    if rate > 0:
-                        item = DropItem(item_name, rate)
-                        monster_info.add_item(item)
-                
-                i += 1
+                    if bracket_start < len(lines):
+                        # 查找括号结束
+                        bracket_end = bracket_start
+                        while bracket_end < len(lines) and lines[bracket_end].strip() != ')':
+                            bracket_end += 1
+                        
+                        if bracket_end < len(lines):
+                            # 解析括号内的物品
+                            child_items = []
+                            for j in range(bracket_start + 1, bracket_end):
+                                item_line = lines[j].strip()
+                                if item_line:
+                                    item_parts = item_line.split()
+                                    if len(item_parts) >= 2:
+                                        # 括号内的1/1只是占位符，实际爆率由#CHILD控制
+                                        item_name = self._intern(self.clean_item_name(' '.join(item_parts[1:])))
+                                        child_items.append(DropItem(item_name, 0.0, line_no=i))
+                            
+                            if child_items:
+                                group_id = f"child_group_{len(monster_info.child_groups)}"
+                                monster_info.add_child_group(group_id, child_items, child_rate)
+                            
+                            # 跳过已处理的括号内容
+                            i = bracket_end + 1
+                            continue
             
-            return monster_info
+            # 普通爆率行
+            parts = line.split()
+            if len(parts) >= 2:
+                rate_str = parts[0]
+                item_name = self._intern(self.clean_item_name(' '.join(parts[1:])))
+                
+                # 解析爆率
+                rate = self.parse_fraction(rate_str)
+                
+                # 跳过爆率为0的物品（如果有的话）
+                if rate > 0:
+                    item = DropItem(item_name, rate, line_no=i)
+                    monster_info.add_item(item)
             
-        except Exception as e:
-            logger.error(f"解析文件 {filepath} 失败: {e}")
-            return None
+            i += 1
+        
+        return monster_info
     
     def parse_directory(self, directory: str) -> bool:
-        """解析指定目录下的所有爆率文件"""
+        """解析指定目录（或zip/tar压缩包）下的所有爆率文件"""
         if not os.path.exists(directory):
             logger.error(f"目录不存在: {directory}")
             return False
         
-        self.drop_data.clear()
-        self.item_index.clear()
+        if is_archive(directory):
+            return self._parse_archive(directory)
         
-        files_parsed = 0
-        total_items = 0
+        if self.store is not None:
+            return self._parse_directory_sqlite(directory)
         
-        for filename in os.listdir(directory):
-            if filename.lower().endswith('.txt'):
-                filepath = os.path.join(directory, filename)
-                monster_info = self.parse_monster_file(filepath)
-                
-                if monster_info:
-                    monster_name = monster_info.monster_name
-                    self.drop_data[monster_name] = monster_info
-                    
-                    # 添加到物品索引
-                    for item in monster_info.drop_items:
-                        self.item_index[item.name].append((monster_name, item.rate))
-                    
-                    files_parsed += 1
-                    total_items += monster_info.get_total_drop_items()
-        
-        # 生成统计信息
-        self.monster_stats = {
-            'total_monsters': files_parsed,
-            'total_items': total_items,
-            'unique_items': len(self.item_index),
-            'directory': directory,
-            'parse_time': None,  # 可以在调用时设置
-        }
-        
-        logger.info(f"解析完成: {files_parsed} 个怪物文件, {total_items} 个掉落项, {len(self.item_index)} 个唯一物品")
+        with self._load_lock:
+            start = time.perf_counter()
+            snapshot = self._begin_snapshot()
+            files_parsed = 0
+            total_items = 0
+            
+            try:
+                for filename in os.listdir(directory):
+                    if filename.lower().endswith('.txt'):
+                        filepath = os.path.join(directory, filename)
+                        monster_info = self._load_monster_file(filepath)
+                        
+                        if monster_info:
+                            self._add_monster(monster_info)
+                            files_parsed += 1
+                            total_items += monster_info.get_total_drop_items()
+            finally:
+                self._building = None
+            
+            self._finish_indexes(snapshot)
+            
+            # 生成统计信息
+            snapshot.monster_stats = {
+                'total_monsters': files_parsed,
+                'total_items': total_items,
+                'unique_items': len(snapshot.item_index),
+                'directory': directory,
+                'parse_time': time.perf_counter() - start,  # 加载耗时（秒），发布前写入
+            }
+            self._publish(snapshot)
+        
+        logger.info(f"解析完成: {files_parsed} 个怪物文件, {total_items} 个掉落项, {len(snapshot.item_index)} 个唯一物品")
         return files_parsed > 0
     
+    def _parse_archive(self, archive_path: str) -> bool:
+        """直接从zip/tar压缩包解析爆率文件，无需解压到磁盘"""
+        if self.store is not None:
+            logger.error("SQLite存储模式不支持直接读取压缩包，请先解压")
+            return False
+        
+        with self._load_lock:
+            start = time.perf_counter()
+            snapshot = self._begin_snapshot()
+            try:
+                archive_stats = load_archive(archive_path, self.parse_monster_content, self.decode_content,
+                                             self._add_monster, self.cache_dir, self.encoding,
+                                             self.archive_member_dir)
+            except Exception as e:
+                logger.error(f"读取压缩包失败 {archive_path}: {e}")
+                return False
+            finally:
+                self._building = None
+            
+            total_items = sum(info.get_total_drop_items() for info in snapshot.drop_data.values())
+            self._finish_indexes(snapshot)
+            snapshot.monster_stats = {
+                'total_monsters': len(snapshot.drop_data),
+                'total_items': total_items,
+                'unique_items': len(snapshot.item_index),
+                'directory': archive_path,
+                'parse_time': time.perf_counter() - start,
+                'archive': archive_stats,
+            }
+            self._publish(snapshot)
+        
+        logger.info(f"解析完成: {len(snapshot.drop_data)} 个怪物文件, {total_items} 个掉落项, "
+                    f"{len(snapshot.item_index)} 个唯一物品")
+        return len(snapshot.drop_data) > 0
+    
+    def _begin_snapshot(self) -> DropIndexSnapshot:
+        """开始构建新快照（调用方持有加载锁），_add_monster 加入的数据进入该快照"""
+        self._building = self._new_snapshot()
+        return self._building
+    
+    def _finish_indexes(self, snapshot: DropIndexSnapshot):
+        """加载完成后整理快照的派生索引"""
+        if snapshot.rate_index is not None:
+            snapshot.rate_index.flush()
+        self._update_name_keys(snapshot)
+    
+    def normalize_name(self, text: str) -> str:
+        """名称与查询词共用的规范化"""
+        return normalize_name(text, self.normalize_traditional)
+    
+    def _update_name_keys(self, snapshot: DropIndexSnapshot):
+        """为新出现的名称计算搜索键（当前快照中已有的键和物品分类直接沿用，不重复计算）"""
+        previous = self._snapshot
+        item_keys, monster_keys = previous.item_keys, previous.monster_keys
+        snapshot.item_keys = {name: item_keys[name] if name in item_keys else self.normalize_name(name)
+                              for name in snapshot.item_index.keys()}
+        snapshot.monster_keys = {name: monster_keys[name] if name in monster_keys else self.normalize_name(name)
+                                 for name in snapshot.drop_data.keys()}
+        snapshot.category_index.update(snapshot.item_keys, previous.category_index.item_category)
+    
+    def _add_monster(self, monster_info: MonsterDropInfo):
+        """把怪物数据加入正在构建的快照并更新物品索引"""
+        snapshot = self._building
+        monster_name = monster_info.monster_name
+        snapshot.drop_data[monster_name] = monster_info
+        
+        # 添加到物品索引（同一怪物的重复掉落行合并为一条）
+        item_index = snapshot.item_index
+        for item_name, rate in monster_info.get_combined_drops():
+            sources = item_index.get(item_name)
+            if sources is None:
+                item_index[item_name] = sources = []
+            sources.append((monster_name, rate))
+        
+        for index in snapshot.derived_indexes():
+            index.set_monster(monster_info)
+    
+    def _parse_directory_sqlite(self, directory: str) -> bool:
+        """增量解析目录到SQLite存储（数据库原地同步，新快照沿用并增量更新原有的派生索引）"""
+        with self._load_lock:
+            start = time.perf_counter()
+            snapshot = self._new_snapshot(self._snapshot)
+            indexes = snapshot.derived_indexes()
+            if self.store.get_meta('directory') != os.path.abspath(directory):
+                for index in indexes:
+                    index.clear()
+            
+            # 已有数据的索引只更新变化的怪物，空索引在同步后整体构建
+            incremental = [index for index in indexes if index.n_monsters > 0]
+            rebuild = [index for index in indexes if index.n_monsters == 0]
+            
+            def on_update(monster_info):
+                for index in incremental:
+                    index.set_monster(monster_info)
+            
+            def on_remove(monster_name):
+                for index in incremental:
+                    index.remove_monster(monster_name)
+            
+            sync_stats = self.store.sync_directory(directory, self.parse_monster_file,
+                                                   on_update=on_update if incremental else None,
+                                                   on_remove=on_remove if incremental else None)
+            if rebuild:
+                for monster_info in snapshot.drop_data.values():
+                    for index in rebuild:
+                        index.set_monster(monster_info)
+            self._finish_indexes(snapshot)
+            
+            stats = self.store.get_stats()
+            stats.update({
+                'directory': directory,
+                'parse_time': time.perf_counter() - start,
+                'sync': sync_stats,
+            })
+            snapshot.monster_stats = stats
+            self._publish(snapshot)
+        
+        logger.info(f"解析完成: {stats['total_monsters']} 个怪物文件, "
+                    f"{stats['total_items']} 个掉落项, {stats['unique_items']} 个唯一物品")
+        return stats['total_monsters'] > 0
+    
     def build_item_index(self) -> Dict[str, List[Tuple[str, float]]]:
         """构建物品到怪物的反向索引（已优化版本）"""
         # 已经在上面的parse_directory中构建了，这里可以直接返回
         return self.item_index
     
-    def search_items(self, keyword: str) -> List[str]:
-        """搜索物品（支持模糊搜索）"""
-        keyword = keyword.lower().strip()
-        if not keyword:
-            return list(self.item_index.keys())
+    def get_drop_matrix(self):
+        """获取怪物×物品稀疏矩阵，未开启加载时构建则按当前数据构建一次"""
+        return self._snapshot.get_drop_matrix()
+    
+    def get_rate_index(self):
+        """获取全局爆率排序索引，未开启加载时构建则按当前数据构建一次"""
+        return self._snapshot.get_rate_index()
+    
+    def get_query_engine(self):
+        """获取结构化查询引擎（数据变化后自动重建名称索引）"""
+        from src.drop_query import QueryEngine
         
-        results = []
-        for item_name in self.item_index.keys():
-            if keyword in item_name.lower():
-                results.append(item_name)
+        if self._query_engine is None:
+            self._query_engine = QueryEngine(self)
+        return self._query_engine
+    
+    def get_fuzzy_index(self):
+        """获取物品名模糊搜索索引（数据变化后重建）"""
+        snapshot = self._snapshot
+        if snapshot.fuzzy_index is None:
+            from src.fuzzy_index import FuzzyIndex
+            
+            fuzzy_index = FuzzyIndex(normalizer=self.normalize_name)
+            for item_name, key in snapshot.item_keys.items():
+                fuzzy_index.add(item_name, key)
+            snapshot.fuzzy_index = fuzzy_index
+            logger.info(f"模糊搜索索引已构建: {len(fuzzy_index)} 个物品名")
+        return snapshot.fuzzy_index
+    
+    def fuzzy_search_items(self, keyword: str, max_distance: int = None) -> List[Tuple[str, int]]:
+        """模糊搜索物品，返回 [(物品名, 编辑距离)]，距离越小越靠前"""
+        return self.get_fuzzy_index().search(keyword, max_distance)
+    
+    def find_duplicate_items(self, max_distance: int = None) -> List[List[str]]:
+        """疑似重复的物品名分组"""
+        from src.fuzzy_index import find_near_duplicates
+        
+        item_keys = self._snapshot.item_keys
+        if max_distance is None:
+            return find_near_duplicates(item_keys, normalizer=item_keys.__getitem__)
+        return find_near_duplicates(item_keys, max_distance, normalizer=item_keys.__getitem__)
+    
+    def search_items(self, keyword: str, fuzzy: bool = False) -> List[str]:
+        """搜索物品（fuzzy为True时按编辑距离容错匹配，结果按距离排序）"""
+        if fuzzy:
+            return [item_name for item_name, _ in self.fuzzy_search_items(keyword)]
         
-        return results
+        # 与预先计算的搜索键比较，不对全部名称重复规范化
+        snapshot = self._snapshot
+        key = self.normalize_name(keyword)
+        if not key:
+            return list(snapshot.item_index.keys())
+        
+        return [item_name for item_name, item_key in snapshot.item_keys.items() if key in item_key]
+    
+    def get_items_by_type(self, type_filter: str) -> List[str]:
+        """某个分类的全部物品名（直接取分类倒排表）"""
+        return self.category_index.items(type_filter)
+    
+    def get_item_category(self, item_name: str) -> Optional[str]:
+        return self.category_index.category_of(item_name)
+    
+    def get_category_counts(self) -> List[Tuple[str, str, int]]:
+        """各分类的物品数: [(分类ID, 显示名称, 物品数)]"""
+        return self.category_index.counts()
     
     def search_monsters(self, keyword: str) -> List[str]:
         """搜索怪物"""
-        keyword = keyword.lower().strip()
-        if not keyword:
-            return list(self.drop_data.keys())
+        snapshot = self._snapshot
+        key = self.normalize_name(keyword)
+        if not key:
+            return list(snapshot.drop_data.keys())
         
-        results = []
-        for monster_name in self.drop_data.keys():
-            if keyword in monster_name.lower():
-                results.append(monster_name)
-        
-        return results
+        return [monster_name for monster_name, monster_key in snapshot.monster_keys.items() if key in monster_key]
     
     def get_monster_drops(self, monster_name: str) -> List[Tuple[str, float]]:
-        """获取指定怪物的所有掉落"""
-        if monster_name in self.drop_data:
-            monster_info = self.drop_data[monster_name]
-            return [(item.name, item.rate) for item in monster_info.drop_items]
+        """获取指定怪物的所有掉落（重复掉落行已合并）"""
+        monster_info = self._snapshot.drop_data.get(monster_name)
+        if monster_info is not None:
+            return monster_info.get_combined_drops()
+        return []
+    
+    def get_item_lines(self, item_name: str, monster_name: str) -> List[DropItem]:
+        """获取指定怪物掉落指定物品的原始爆率行"""
+        monster_info = self._snapshot.drop_data.get(monster_name)
+        if monster_info is not None:
+            return monster_info.get_item_lines(item_name)
         return []
     
     def get_item_drops(self, item_name: str) -> List[Tuple[str, float]]:
         """获取指定物品的所有掉落来源"""
         return self.item_index.get(item_name, [])
     
-    def export_to_csv(self, output_path: str) -> bool:
-        """导出数据到CSV文件"""
+    def export_to_csv(self, output_path: str, progress_callback=None, cancel_event=None) -> bool:
+        """导出数据到CSV文件（流式写入，可取消；导出期间重新加载不影响本次导出）"""
+        from src.data_exporter import CsvExporter, RateFormatter, ExportCancelled, iter_drop_rows
+        
+        snapshot = self._snapshot
         try:
-            import csv
+            exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+            rows = iter_drop_rows(snapshot.drop_data, RateFormatter())
+            total = snapshot.monster_stats.get('total_items', 0)
             
-            with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                writer.writerow(['怪物名称', '物品名称', '爆率', '爆率百分比', '备注'])
-                
-                for monster_name, monster_info in self.drop_data.items():
-                    for item in monster_info.drop_items:
-                        rate_percent = item.rate * 100
-                        note = "子掉落" if item.is_child else ""
-                        writer.writerow([
-                            monster_name,
-                            item.name,
-                            f"1/{int(1/item.rate) if item.rate > 0 else '∞'}",
-                            f"{rate_percent:.6f}%",
-                            note
-                        ])
+            written = exporter.export(output_path, ['怪物名称', '物品名称', '爆率', '爆率百分比', '备注'], rows, total)
             
-            logger.info(f"数据已导出到: {output_path}")
+            logger.info(f"数据已导出到: {output_path} ({written} 行)")
             return True
             
+        except ExportCancelled:
+            logger.info(f"导出已取消: {output_path}")
+            return False
         except Exception as e:
             logger.error(f"导出CSV失败: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def export_dataset(self, output_path: str, progress_callback=None, cancel_event=None) -> bool:
+        """按扩展名导出数据（CSV / 二进制快照 / JSON Lines）"""
+        from src.data_exporter import ExportCancelled
+        from src.data_formats import detect_format, write_snapshot, write_jsonl, FORMAT_SNAPSHOT, FORMAT_JSONL
+        
+        data_format = detect_format(output_path)
+        if data_format not in (FORMAT_SNAPSHOT, FORMAT_JSONL):
+            return self.export_to_csv(output_path, progress_callback, cancel_event)
+        
+        drop_data = self._snapshot.drop_data
+        try:
+            if data_format == FORMAT_SNAPSHOT:
+                write_snapshot(drop_data, output_path, progress_callback, cancel_event)
+            else:
+                write_jsonl(drop_data, output_path, progress_callback, cancel_event)
+            return True
+            
+        except ExportCancelled:
+            logger.info(f"导出已取消: {output_path}")
+            return False
+        except Exception as e:
+            logger.error(f"导出数据失败: {e}")
+            return False
+    
+    def load_dataset(self, path: str) -> bool:
+        """从二进制快照或JSON Lines导入数据，无需重新解析源文件"""
+        from src.data_formats import detect_format, read_snapshot, read_jsonl, FORMAT_SNAPSHOT, FORMAT_JSONL
+        
+        if self.store is not None:
+            logger.error("SQLite存储模式不支持导入快照")
+            return False
+        
+        data_format = detect_format(path)
+        if data_format not in (FORMAT_SNAPSHOT, FORMAT_JSONL):
+            logger.error(f"不支持的数据格式: {path}")
+            return False
+        
+        with self._load_lock:
+            start = time.perf_counter()
+            snapshot = self._begin_snapshot()
+            try:
+                if data_format == FORMAT_SNAPSHOT:
+                    read_snapshot(path, self._add_monster)
+                else:
+                    read_jsonl(path, self._add_monster)
+            except Exception as e:
+                # 未发布的快照直接丢弃，当前数据保持不变
+                logger.error(f"导入数据失败 {path}: {e}")
+                return False
+            finally:
+                self._building = None
+            
+            self._finish_indexes(snapshot)
+            snapshot.monster_stats = stats = {
+                'total_monsters': len(snapshot.drop_data),
+                'total_items': sum(info.get_total_drop_items() for info in snapshot.drop_data.values()),
+                'unique_items': len(snapshot.item_index),
+                'directory': path,
+                'parse_time': time.perf_counter() - start,
+            }
+            self._publish(snapshot)
+        
+        logger.info(f"导入完成: {stats['total_monsters']} 个怪物, {stats['total_items']} 个掉落项")
+        return stats['total_monsters'] > 0
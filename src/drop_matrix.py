@@ -0,0 +1,293 @@
+# src/drop_matrix.py
+"""
+怪物×物品稀疏爆率矩阵（CSR/CSC，NumPy实现）
+"""
+
+import logging
+from typing import List, Tuple, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class DropMatrix:
+    """怪物×物品稀疏矩阵
+
+    行为怪物，列为物品，值为每次击杀该物品的期望掉落数量
+    （同一怪物多行掉落同一物品时累加，#CHILD组子物品已按组内平均计入）。
+    另按同样的稀疏结构保存每次击杀掉落数量的方差：独立掉落行各是一次伯努利试验，方差 p(1-p) 累加；
+    同一#CHILD组内同一物品的各行互斥，先把组内份额相加再按一次伯努利试验计入。
+    怪物/物品名称映射为连续整数ID。按行存储以支持单个怪物的增量更新，
+    查询时按需合并为CSR，并由CSR转置得到CSC。
+    """
+    
+    def __init__(self):
+        self.monster_names = []  # List[str]，下标即行号
+        self.monster_ids = {}  # {怪物名: 行号}
+        self.item_names = []  # List[str]，下标即列号
+        self.item_ids = {}  # {物品名: 列号}
+        self.version = 0  # 每次修改加一
+        
+        self._rows = {}  # {行号: (列号数组, 值数组, 方差数组)}
+        self._csr = None  # (indptr, indices, data)
+        self._csr_variances = None  # 与 CSR 的 data 对齐的方差
+        self._row_of_nnz = None  # 每个非零元素所在行
+        self._csc = None  # (indptr, 行号数组, data)
+        self._csc_order = None  # CSC 元素在 CSR 中的位置
+    
+    @classmethod
+    def from_drop_data(cls, drop_data) -> 'DropMatrix':
+        """由 {怪物名: MonsterDropInfo} 构建"""
+        matrix = cls()
+        for monster_info in drop_data.values():
+            matrix.set_monster(monster_info)
+        logger.info(f"爆率矩阵构建完成: {matrix.shape[0]} 个怪物 x {matrix.shape[1]} 个物品, {matrix.nnz} 个非零值")
+        return matrix
+    
+    @staticmethod
+    def _intern(name: str, ids: Dict[str, int], names: List[str]) -> int:
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(names)
+            names.append(name)
+        return index
+    
+    def _invalidate(self):
+        self._csr = None
+        self._csr_variances = None
+        self._row_of_nnz = None
+        self._csc = None
+        self._csc_order = None
+        self.version += 1
+    
+    # ------------------------------------------------------------------
+    # 增量维护
+    # ------------------------------------------------------------------
+    
+    def set_monster(self, monster_info):
+        """新增或替换一个怪物的整行"""
+        row_id = self._intern(monster_info.monster_name, self.monster_ids, self.monster_names)
+        
+        values = {}
+        variances = {}
+        group_shares = {}  # {(列号, 子掉落组): 组内该物品份额之和}
+        for item in monster_info.drop_items:
+            col_id = self._intern(item.name, self.item_ids, self.item_names)
+            values[col_id] = values.get(col_id, 0.0) + item.rate
+            variances.setdefault(col_id, 0.0)
+            rate = max(item.rate, 0.0)
+            if item.child_group is None:
+                rate = min(rate, 1.0)
+                variances[col_id] += rate * (1.0 - rate)
+            else:
+                key = (col_id, item.child_group)
+                group_shares[key] = group_shares.get(key, 0.0) + rate
+        for (col_id, _), share in group_shares.items():
+            share = min(share, 1.0)
+            variances[col_id] += share * (1.0 - share)
+        
+        cols = np.fromiter(sorted(values), dtype=np.int64, count=len(values))
+        self._rows[row_id] = (cols, np.array([values[c] for c in cols], dtype=np.float64),
+                              np.array([variances[c] for c in cols], dtype=np.float64))
+        self._invalidate()
+    
+    def remove_monster(self, monster_name: str):
+        """删除一个怪物（行号保留，该行变为空行）"""
+        row_id = self.monster_ids.get(monster_name)
+        if row_id is not None and self._rows.pop(row_id, None) is not None:
+            self._invalidate()
+    
+    def clear(self):
+        self.monster_names.clear()
+        self.monster_ids.clear()
+        self.item_names.clear()
+        self.item_ids.clear()
+        self._rows.clear()
+        self._invalidate()
+    
+    def __contains__(self, monster_name) -> bool:
+        row_id = self.monster_ids.get(monster_name)
+        return row_id is not None and row_id in self._rows
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.monster_names), len(self.item_names)
+    
+    @property
+    def n_monsters(self) -> int:
+        """当前存在的怪物数（不含已删除的空行）"""
+        return len(self._rows)
+    
+    @property
+    def nnz(self) -> int:
+        return sum(len(row[0]) for row in self._rows.values())
+    
+    # ------------------------------------------------------------------
+    # 压缩存储
+    # ------------------------------------------------------------------
+    
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """按行压缩: (indptr, 列号, 值)"""
+        if self._csr is None:
+            n_rows = len(self.monster_names)
+            lengths = np.zeros(n_rows, dtype=np.int64)
+            for row_id, row in self._rows.items():
+                lengths[row_id] = len(row[0])
+            
+            indptr = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            
+            order = sorted(self._rows)
+            if order:
+                indices = np.concatenate([self._rows[row_id][0] for row_id in order])
+                data = np.concatenate([self._rows[row_id][1] for row_id in order])
+                variances = np.concatenate([self._rows[row_id][2] for row_id in order])
+            else:
+                indices = np.zeros(0, dtype=np.int64)
+                data = np.zeros(0, dtype=np.float64)
+                variances = np.zeros(0, dtype=np.float64)
+            
+            self._csr = (indptr, indices, data)
+            self._csr_variances = variances
+            self._row_of_nnz = np.repeat(np.arange(n_rows, dtype=np.int64), lengths)
+        return self._csr
+    
+    def csc(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """按列压缩: (indptr, 行号, 值)"""
+        if self._csc is None:
+            _, indices, data = self.csr()
+            # 稳定排序保证同一列内按行号升序
+            order = np.argsort(indices, kind='stable')
+            indptr = np.zeros(len(self.item_names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(indices, minlength=len(self.item_names)), out=indptr[1:])
+            self._csc = (indptr, self._row_of_nnz[order], data[order])
+            self._csc_order = order
+        return self._csc
+    
+    def csr_variances(self) -> np.ndarray:
+        """与 csr() 的值数组对齐的每次击杀掉落数量方差"""
+        self.csr()
+        return self._csr_variances
+    
+    def csc_positions(self) -> np.ndarray:
+        """CSC 中每个元素在 CSR 值数组中的位置（用于取对齐的方差等附加数据）"""
+        self.csc()
+        return self._csc_order
+    
+    def row_slice(self, monster_name: str) -> Tuple[int, int]:
+        """怪物在 CSR 中的元素范围 [start, end)，不存在时为空范围"""
+        row_id = self.monster_ids.get(monster_name)
+        if row_id is None:
+            return 0, 0
+        indptr = self.csr()[0]
+        return int(indptr[row_id]), int(indptr[row_id + 1])
+    
+    def to_scipy(self):
+        """转换为 scipy.sparse.csr_matrix（需要安装scipy）"""
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("转换为scipy稀疏矩阵需要安装scipy")
+        
+        indptr, indices, data = self.csr()
+        return csr_matrix((data, indices, indptr), shape=self.shape)
+    
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    
+    def row(self, monster_name: str) -> List[Tuple[str, float]]:
+        """怪物的全部掉落: [(物品名, 每次击杀期望数量)]"""
+        row_id = self.monster_ids.get(monster_name)
+        if row_id is None or row_id not in self._rows:
+            return []
+        cols, values, _ = self._rows[row_id]
+        return [(self.item_names[c], float(v)) for c, v in zip(cols.tolist(), values.tolist())]
+    
+    def column(self, item_name: str) -> List[Tuple[str, float]]:
+        """物品的全部来源: [(怪物名, 每次击杀期望数量)]"""
+        col_id = self.item_ids.get(item_name)
+        if col_id is None:
+            return []
+        indptr, rows, data = self.csc()
+        start, end = indptr[col_id], indptr[col_id + 1]
+        return [(self.monster_names[r], float(v)) for r, v in zip(rows[start:end].tolist(), data[start:end].tolist())]
+    
+    def columns(self, item_names: Iterable[str]) -> Dict[str, List[Tuple[str, float]]]:
+        """批量查询多个物品的来源"""
+        return {name: self.column(name) for name in item_names}
+    
+    def _item_vector(self, weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        if isinstance(weights, dict):
+            vector = np.zeros(len(self.item_names))
+            for name, weight in weights.items():
+                col_id = self.item_ids.get(name)
+                if col_id is not None:
+                    vector[col_id] = weight
+            return vector
+        vector = np.asarray(weights, dtype=np.float64)
+        if vector.shape != (len(self.item_names),):
+            raise ValueError(f"物品向量长度应为 {len(self.item_names)}")
+        return vector
+    
+    def _monster_vector(self, weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        if isinstance(weights, dict):
+            vector = np.zeros(len(self.monster_names))
+            for name, weight in weights.items():
+                row_id = self.monster_ids.get(name)
+                if row_id is not None:
+                    vector[row_id] = weight
+            return vector
+        vector = np.asarray(weights, dtype=np.float64)
+        if vector.shape != (len(self.monster_names),):
+            raise ValueError(f"怪物向量长度应为 {len(self.monster_names)}")
+        return vector
+    
+    def matvec(self, item_weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        """
+        矩阵×物品向量
+        :param item_weights: {物品名: 权重} 或按列号排列的数组
+        :return: 每个怪物每次击杀的加权期望掉落（按行号排列）
+        """
+        x = self._item_vector(item_weights)
+        _, indices, data = self.csr()
+        return np.bincount(self._row_of_nnz, weights=data * x[indices], minlength=len(self.monster_names))
+    
+    def rmatvec(self, monster_weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        """
+        转置矩阵×怪物向量
+        :param monster_weights: {怪物名: 击杀数} 或按行号排列的数组
+        :return: 每个物品的期望掉落总数（按列号排列）
+        """
+        y = self._monster_vector(monster_weights)
+        _, indices, data = self.csr()
+        return np.bincount(indices, weights=data * y[self._row_of_nnz], minlength=len(self.item_names))
+    
+    def rmatvec_variance(self, monster_weights: Union[Dict[str, float], np.ndarray]) -> np.ndarray:
+        """
+        方差矩阵的转置×怪物向量
+        :param monster_weights: {怪物名: 击杀数} 或按行号排列的数组
+        :return: 每个物品掉落总数的方差（各次击杀相互独立，按列号排列）
+        """
+        y = self._monster_vector(monster_weights)
+        _, indices, _ = self.csr()
+        return np.bincount(indices, weights=self._csr_variances * y[self._row_of_nnz],
+                           minlength=len(self.item_names))
+    
+    def monster_scores(self, item_weights: Union[Dict[str, float], np.ndarray]) -> Dict[str, float]:
+        """matvec 结果转为 {怪物名: 分数}（不含已删除的怪物）"""
+        scores = self.matvec(item_weights)
+        return {self.monster_names[row_id]: float(scores[row_id]) for row_id in sorted(self._rows)}
+    
+    def expected_drops_per_kill(self) -> Dict[str, float]:
+        """每个怪物每次击杀的期望掉落物品总数"""
+        return self.monster_scores(np.ones(len(self.item_names)))
+    
+    def item_totals(self, monster_kills: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """按击杀数（默认每个怪物各击杀一次）汇总每个物品的期望掉落数"""
+        if monster_kills is None:
+            monster_kills = np.ones(len(self.monster_names))
+        totals = self.rmatvec(monster_kills)
+        return {name: float(totals[col_id]) for col_id, name in enumerate(self.item_names) if totals[col_id]}
@@ -0,0 +1,364 @@
+# src/drop_query.py
+"""
+结构化掉落查询
+
+查询语法（空格分隔的条件，条件之间为“且”）:
+    item:*戒指          物品名（含 * ? 时为通配符整体匹配，否则为子串匹配）
+    monster:祖玛*       怪物名（同上）
+    rate<1/1000         爆率比较，支持 < <= > >= =，数值可写 1/1000、0.001、0.1%
+    child:yes           是否来自#CHILD组（yes/no）
+    裁决                不带字段的词按物品名子串匹配
+    EXPLAIN ...         输出执行计划与耗时
+名称中有空格时用引号: item:"金 币"
+"""
+
+import re
+import time
+import shlex
+import logging
+from fractions import Fraction
+from typing import List, Tuple, Optional, Iterator
+
+from src.name_index import NGramIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+FIELD_ALIASES = {
+    'item': 'item', '物品': 'item',
+    'monster': 'monster', '怪物': 'monster',
+    'rate': 'rate', '爆率': 'rate',
+    'child': 'child',
+}
+TRUE_VALUES = {'yes', 'y', 'true', '1', '是'}
+FALSE_VALUES = {'no', 'n', 'false', '0', '否'}
+
+TERM_PATTERN = re.compile(r'^(?P<field>[^:<>=]+)(?P<op>:|<=|>=|<|>|=)(?P<value>.*)$')
+
+
+class QuerySyntaxError(ValueError):
+    """查询语法错误"""
+
+
+def parse_rate_value(text: str) -> float:
+    """解析爆率数值: 1/1000、0.001、0.1%"""
+    text = text.strip()
+    try:
+        if text.endswith('%'):
+            return float(text[:-1]) / 100
+        return float(Fraction(text))
+    except (ValueError, ZeroDivisionError):
+        raise QuerySyntaxError(f"无效的爆率: {text}")
+
+
+class DropQuery:
+    """解析后的查询"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.explain = False
+        self.item_patterns = []  # List[str]
+        self.monster_patterns = []  # List[str]
+        self.low = None  # 爆率下界
+        self.include_low = True
+        self.high = None  # 爆率上界
+        self.include_high = True
+        self.child = None  # None 不限 / True / False
+    
+    def _set_low(self, value: float, inclusive: bool):
+        if self.low is None or value > self.low or (value == self.low and not inclusive):
+            self.low, self.include_low = value, inclusive
+    
+    def _set_high(self, value: float, inclusive: bool):
+        if self.high is None or value < self.high or (value == self.high and not inclusive):
+            self.high, self.include_high = value, inclusive
+    
+    def add_rate_bound(self, op: str, value: float):
+        if op in ('<', '<='):
+            self._set_high(value, op == '<=')
+        elif op in ('>', '>='):
+            self._set_low(value, op == '>=')
+        else:
+            self._set_low(value, True)
+            self._set_high(value, True)
+    
+    @property
+    def has_rate_bounds(self) -> bool:
+        return self.low is not None or self.high is not None
+    
+    def rate_matches(self, rate: float) -> bool:
+        if self.low is not None and (rate < self.low or (rate == self.low and not self.include_low)):
+            return False
+        if self.high is not None and (rate > self.high or (rate == self.high and not self.include_high)):
+            return False
+        return True
+    
+    def describe_rate(self) -> str:
+        parts = []
+        if self.low is not None:
+            parts.append(f"rate{'>=' if self.include_low else '>'}{self.low:g}")
+        if self.high is not None:
+            parts.append(f"rate{'<=' if self.include_high else '<'}{self.high:g}")
+        return ' '.join(parts)
+
+
+def parse_query(text: str) -> DropQuery:
+    """解析查询文本"""
+    try:
+        tokens = shlex.split(text)
+    except ValueError as e:
+        raise QuerySyntaxError(f"引号不匹配: {e}")
+    
+    query = DropQuery(text)
+    if tokens and tokens[0].upper() == 'EXPLAIN':
+        query.explain = True
+        tokens = tokens[1:]
+    
+    for token in tokens:
+        match = TERM_PATTERN.match(token)
+        if not match:
+            query.item_patterns.append(token)
+            continue
+        
+        field = FIELD_ALIASES.get(match.group('field').strip().lower())
+        op = match.group('op')
+        value = match.group('value').strip()
+        if field is None:
+            raise QuerySyntaxError(f"未知字段: {match.group('field')}")
+        if not value:
+            raise QuerySyntaxError(f"条件缺少取值: {token}")
+        
+        if field in ('item', 'monster'):
+            if op != ':':
+                raise QuerySyntaxError(f"{field} 只支持 ':' 匹配: {token}")
+            (query.item_patterns if field == 'item' else query.monster_patterns).append(value)
+        elif field == 'rate':
+            query.add_rate_bound('=' if op == ':' else op, parse_rate_value(value))
+        else:
+            if op != ':' or value.lower() not in TRUE_VALUES | FALSE_VALUES:
+                raise QuerySyntaxError(f"child 只支持 child:yes / child:no: {token}")
+            query.child = value.lower() in TRUE_VALUES
+    
+    return query
+
+
+class PlanStep:
+    """执行计划中的一个条件"""
+    
+    def __init__(self, kind: str, description: str, estimate: Optional[int], matched: Optional[int] = None):
+        self.kind = kind  # 'item' / 'monster' / 'rate' / 'child' / 'scan'
+        self.description = description
+        self.estimate = estimate  # 估计行数，None表示只能作为过滤条件
+        self.matched = matched  # 匹配的名称数
+        self.is_driver = False
+
+
+class QueryPlan:
+    """执行计划: 选估计行数最少的条件驱动，其余条件逐行过滤"""
+    
+    def __init__(self, query: DropQuery):
+        self.query = query
+        self.steps = []  # List[PlanStep]
+        self.driver = None  # PlanStep
+        self.item_set = None  # 匹配的物品名集合（None表示不限）
+        self.monster_set = None  # 匹配的怪物名集合（None表示不限）
+        self.rate_index = None
+        self.snapshot = None  # 规划时取得的数据快照，执行期间的重新加载不影响本次查询
+        self.child_cache = {}  # 与快照对应的 {怪物名: 来自#CHILD组的物品名集合}
+        self.plan_time = 0.0
+        self.run_time = 0.0
+        self.examined = 0  # 检查的行数
+        self.returned = 0  # 返回的行数
+    
+    def format(self) -> str:
+        """EXPLAIN 输出"""
+        lines = [f"查询: {self.query.text}", "计划:"]
+        ordered = [self.driver] + [step for step in self.steps if step is not self.driver]
+        for number, step in enumerate(ordered, 1):
+            role = "驱动" if step.is_driver else "过滤"
+            detail = []
+            if step.matched is not None:
+                detail.append(f"匹配 {step.matched} 个名称")
+            if step.estimate is not None:
+                detail.append(f"估计 {step.estimate} 行")
+            suffix = f" → {', '.join(detail)}" if detail else ""
+            lines.append(f"  {number}. [{role}] {step.description}{suffix}")
+        lines.append(f"执行: 检查 {self.examined} 行, 返回 {self.returned} 行, "
+                     f"规划 {self.plan_time * 1000:.2f}毫秒, 执行 {self.run_time * 1000:.2f}毫秒")
+        return '\n'.join(lines)
+
+
+class QueryEngine:
+    """基于索引的查询执行
+
+    可用的访问路径:
+    - 物品/怪物名称的n-gram索引（解析名称后经 item_index / drop_data 取行）
+    - 全局爆率排序索引（二分查找取区间）
+    - 全表扫描（没有可用条件时）
+    
+    每个执行计划固定使用规划时的数据快照；但名称索引等刷新状态由引擎共用，规划不是线程安全的，
+    多个线程同时查询时应各自创建 QueryEngine。
+    """
+    
+    def __init__(self, parser):
+        self.parser = parser
+        self._version = None
+        self.item_names = None  # NGramIndex
+        self.monster_names = None  # NGramIndex
+        self._item_sizes = {}  # {物品名: 来源怪物数}
+        self._monster_sizes = {}  # {怪物名: 掉落行数}
+        self._child_cache = {}  # {怪物名: 来自#CHILD组的物品名集合}
+    
+    def _refresh(self, snapshot):
+        """快照更换后重建名称索引"""
+        if self._version == snapshot.generation:
+            return
+        
+        start = time.perf_counter()
+        store = self.parser.store
+        if store is not None:
+            self._item_sizes = dict(store.query("SELECT item, COUNT(DISTINCT monster) FROM drops GROUP BY item"))
+            self._monster_sizes = dict(store.query("SELECT monster, COUNT(*) FROM drops GROUP BY monster"))
+        else:
+            self._item_sizes = {name: len(sources) for name, sources in snapshot.item_index.items()}
+            self._monster_sizes = {name: len(info.drop_items) for name, info in snapshot.drop_data.items()}
+        
+        # 名称与查询词使用与物品搜索相同的规范化，键直接取解析器预先计算的结果
+        self.item_names = NGramIndex(normalizer=self.parser.normalize_name)
+        for name in self._item_sizes:
+            self.item_names.add(name, snapshot.item_keys.get(name))
+        self.monster_names = NGramIndex(normalizer=self.parser.normalize_name)
+        for name in self._monster_sizes:
+            self.monster_names.add(name, snapshot.monster_keys.get(name))
+        self._child_cache = {}
+        self._version = snapshot.generation
+        logger.info(f"查询名称索引已重建: {len(self.item_names)} 个物品, {len(self.monster_names)} 个怪物, "
+                    f"耗时{time.perf_counter() - start:.2f}秒")
+    
+    @staticmethod
+    def _resolve(index: NGramIndex, patterns: List[str]) -> set:
+        names = None
+        for pattern in patterns:
+            matched = set(index.match(pattern))
+            names = matched if names is None else names & matched
+        return names
+    
+    def plan(self, query: DropQuery) -> QueryPlan:
+        """为查询选择执行计划"""
+        start = time.perf_counter()
+        snapshot = self.parser.snapshot()
+        self._refresh(snapshot)
+        plan = QueryPlan(query)
+        plan.snapshot = snapshot
+        plan.child_cache = self._child_cache
+        
+        if query.item_patterns:
+            plan.item_set = self._resolve(self.item_names, query.item_patterns)
+            plan.steps.append(PlanStep(
+                'item', f"物品名称索引(n-gram) {' '.join('item:' + p for p in query.item_patterns)}",
+                sum(self._item_sizes[name] for name in plan.item_set), len(plan.item_set),
+            ))
+        
+        if query.monster_patterns:
+            plan.monster_set = self._resolve(self.monster_names, query.monster_patterns)
+            plan.steps.append(PlanStep(
+                'monster', f"怪物名称索引(n-gram) {' '.join('monster:' + p for p in query.monster_patterns)}",
+                sum(self._monster_sizes[name] for name in plan.monster_set), len(plan.monster_set),
+            ))
+        
+        if query.has_rate_bounds:
+            try:
+                plan.rate_index = snapshot.get_rate_index()
+                estimate = plan.rate_index.count_range(query.low, query.high, query.include_low, query.include_high)
+                plan.steps.append(PlanStep('rate', f"爆率排序索引 {query.describe_rate()}", estimate))
+            except ImportError:
+                plan.steps.append(PlanStep('rate', f"爆率比较 {query.describe_rate()}（未安装numpy，无排序索引）", None))
+        
+        if query.child is not None:
+            plan.steps.append(PlanStep('child', f"child:{'yes' if query.child else 'no'}", None))
+        
+        candidates = [step for step in plan.steps if step.estimate is not None]
+        if candidates:
+            plan.driver = min(candidates, key=lambda step: step.estimate)
+        else:
+            plan.driver = PlanStep('scan', "全表扫描", sum(self._item_sizes.values()))
+        plan.driver.is_driver = True
+        
+        plan.plan_time = time.perf_counter() - start
+        return plan
+    
+    @staticmethod
+    def _child_items(plan: QueryPlan, monster_name: str, monster_info=None) -> set:
+        cached = plan.child_cache.get(monster_name)
+        if cached is None:
+            if monster_info is None:
+                monster_info = plan.snapshot.drop_data.get(monster_name)
+            cached = set()
+            if monster_info is not None:
+                cached = {item.name for item in monster_info.drop_items if item.child_group is not None}
+            plan.child_cache[monster_name] = cached
+        return cached
+    
+    def _driver_rows(self, plan: QueryPlan) -> Iterator[Tuple[str, str, float]]:
+        """由驱动条件产生候选行 (怪物名, 物品名, 爆率)"""
+        kind = plan.driver.kind
+        query = plan.query
+        snapshot = plan.snapshot
+        
+        if kind == 'item':
+            for item_name in sorted(plan.item_set):
+                for monster_name, rate in snapshot.item_index.get(item_name, []):
+                    yield monster_name, item_name, rate
+        elif kind == 'rate':
+            yield from plan.rate_index.range(query.low, query.high, include_low=query.include_low,
+                                             include_high=query.include_high)
+        else:
+            monster_names = sorted(plan.monster_set) if kind == 'monster' else snapshot.drop_data.keys()
+            for monster_name in monster_names:
+                monster_info = snapshot.drop_data.get(monster_name)
+                if monster_info is None:
+                    continue
+                self._child_items(plan, monster_name, monster_info)
+                for item_name, rate in monster_info.get_combined_drops():
+                    yield monster_name, item_name, rate
+    
+    def run(self, plan: QueryPlan) -> Iterator[Tuple[str, str, float, bool]]:
+        """
+        按计划流式返回结果
+        :return: (怪物名, 物品名, 爆率, 是否来自#CHILD组)
+        """
+        query = plan.query
+        start = time.perf_counter()
+        try:
+            for monster_name, item_name, rate in self._driver_rows(plan):
+                plan.examined += 1
+                if plan.item_set is not None and item_name not in plan.item_set:
+                    continue
+                if plan.monster_set is not None and monster_name not in plan.monster_set:
+                    continue
+                if not query.rate_matches(rate):
+                    continue
+                is_child = item_name in self._child_items(plan, monster_name)
+                if query.child is not None and is_child != query.child:
+                    continue
+                
+                plan.returned += 1
+                # 计时不包含调用方处理结果的时间
+                plan.run_time += time.perf_counter() - start
+                yield monster_name, item_name, rate, is_child
+                start = time.perf_counter()
+        finally:
+            plan.run_time += time.perf_counter() - start
+    
+    def execute(self, text: str) -> Tuple[QueryPlan, Iterator[Tuple[str, str, float, bool]]]:
+        """解析并执行查询，返回 (执行计划, 结果迭代器)"""
+        plan = self.plan(parse_query(text))
+        return plan, self.run(plan)
+    
+    def explain(self, text: str) -> str:
+        """执行查询并返回执行计划与耗时"""
+        plan, rows = self.execute(text)
+        for _ in rows:
+            pass
+        return plan.format()
@@ -0,0 +1,286 @@
+# src/drop_simulator.py
+"""
+蒙特卡洛掉落模拟（NumPy向量化）
+"""
+
+import logging
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from config.constants import SIMULATION_BATCH_TRIALS, SIMULATION_FIRST_DROP_BINS, SIMULATION_COUNT_BINS
+
+
+logger = logging.getLogger(__name__)
+
+# 计算 log(1 - p) 时爆率的上限：小于1的最大浮点数，1/1 的掉落行不会得到 log(0)
+RATE_CAP = np.nextafter(1.0, 0.0)
+
+
+class CompiledDropTable:
+    """把 MonsterDropInfo 编译为数组
+
+    - 独立爆率行: 每行独立判定
+    - #CHILD组: 先按组爆率判定，命中后从子物品中等概率选一个
+    """
+    
+    def __init__(self, monster_info):
+        self.monster_name = monster_info.monster_name
+        self.item_names = []  # List[str]
+        self.item_ids = {}  # {物品名: 下标}
+        
+        line_rates, line_items = [], []
+        seen_groups = set()
+        group_rates, group_members = [], []
+        
+        for item in monster_info.drop_items:
+            if item.child_group is None:
+                line_rates.append(item.rate)
+                line_items.append(self._intern(item.name))
+            elif item.child_group not in seen_groups:
+                seen_groups.add(item.child_group)
+                children = monster_info.child_groups.get(item.child_group) or \
+                    [i for i in monster_info.drop_items if i.child_group == item.child_group]
+                # 子物品爆率 = 组爆率 / 子物品数
+                group_rates.append(min(1.0, item.rate * len(children)))
+                group_members.append(np.array([self._intern(child.name) for child in children], dtype=np.int64))
+        
+        self.line_rates = np.clip(np.array(line_rates, dtype=np.float64), 0.0, 1.0)
+        self.line_items = np.array(line_items, dtype=np.int64)
+        self.group_rates = np.array(group_rates, dtype=np.float64)
+        self.group_members = group_members
+    
+    def _intern(self, name: str) -> int:
+        item_id = self.item_ids.get(name)
+        if item_id is None:
+            item_id = self.item_ids[name] = len(self.item_names)
+            self.item_names.append(name)
+        return item_id
+    
+    @property
+    def n_items(self) -> int:
+        return len(self.item_names)
+    
+    def item_miss_log_probs(self) -> np.ndarray:
+        """每个物品单次击杀不掉落的对数概率"""
+        log_miss = np.zeros(self.n_items)
+        if len(self.line_rates):
+            np.add.at(log_miss, self.line_items, np.log1p(-np.minimum(self.line_rates, RATE_CAP)))
+        for rate, members in zip(self.group_rates, self.group_members):
+            # 同组内的同名子物品互斥，概率相加
+            counts = np.bincount(members, minlength=self.n_items)
+            hit = counts > 0
+            log_miss[hit] += np.log1p(-np.minimum(rate * counts[hit] / len(members), RATE_CAP))
+        return log_miss
+    
+    def item_drop_probs(self) -> np.ndarray:
+        """每个物品单次击杀至少掉落一个的概率"""
+        return -np.expm1(self.item_miss_log_probs())
+    
+    def item_expected_counts(self) -> np.ndarray:
+        """每个物品单次击杀的期望掉落数量"""
+        expected = np.bincount(self.line_items, weights=self.line_rates, minlength=self.n_items)
+        for rate, members in zip(self.group_rates, self.group_members):
+            expected += np.bincount(members, minlength=self.n_items) * (rate / len(members))
+        return expected
+
+
+class SimulationResult:
+    """模拟结果（按物品的数量分布与首次掉落分布）"""
+    
+    def __init__(self, table: CompiledDropTable, kills: int, trials: int, seed: Optional[int],
+                 count_edges: np.ndarray, count_hist: np.ndarray, count_sums: np.ndarray,
+                 first_drop_edges: np.ndarray, first_drop_hist: np.ndarray):
+        self.table = table
+        self.kills = kills
+        self.trials = trials
+        self.seed = seed
+        self.count_edges = count_edges  # 掉落数量分箱边界（第一箱恰为0个）
+        self.count_hist = count_hist  # (物品数, 分箱数)
+        self.count_sums = count_sums  # 每个物品所有轮次的掉落总数（用于精确的平均值）
+        self.first_drop_edges = first_drop_edges  # 首次掉落击杀数分箱边界
+        self.first_drop_hist = first_drop_hist  # (物品数, 分箱数)
+    
+    def _item(self, item_name: str) -> int:
+        return self.table.item_ids[item_name]
+    
+    def mean_count(self, item_name: str) -> float:
+        return float(self.count_sums[self._item(item_name)] / self.trials)
+    
+    def prob_at_least_one(self, item_name: str) -> float:
+        return float(1 - self.count_hist[self._item(item_name), 0] / self.trials)
+    
+    def count_quantile(self, item_name: str, q: float) -> int:
+        """掉落数量的分位数（小数量精确，大数量按分箱上界近似）"""
+        cumulative = np.cumsum(self.count_hist[self._item(item_name)])
+        index = min(int(np.searchsorted(cumulative, q * self.trials)), len(self.count_edges) - 2)
+        return int(self.count_edges[index + 1] - 1)
+    
+    def first_drop_quantile(self, item_name: str, q: float) -> float:
+        """首次掉落所需击杀数的分位数（按分箱上界近似，超出范围返回inf）"""
+        cumulative = np.cumsum(self.first_drop_hist[self._item(item_name)])
+        index = int(np.searchsorted(cumulative, q * self.trials))
+        if index >= len(self.first_drop_edges) - 1:
+            return float('inf')
+        return float(self.first_drop_edges[index + 1] - 1)
+    
+    def summary(self) -> List[Dict]:
+        """按期望数量从高到低汇总每个物品"""
+        rows = []
+        for name in self.table.item_names:
+            rows.append({
+                'item': name,
+                'mean': self.mean_count(name),
+                'p_any': self.prob_at_least_one(name),
+                'p50': self.count_quantile(name, 0.5),
+                'p95': self.count_quantile(name, 0.95),
+                'first_p50': self.first_drop_quantile(name, 0.5),
+                'first_p95': self.first_drop_quantile(name, 0.95),
+            })
+        rows.sort(key=lambda row: row['mean'], reverse=True)
+        return rows
+
+
+class DropSimulator:
+    """掉落模拟器
+
+    按批次模拟，内存占用只与批大小、物品数和分箱数有关，与总击杀数无关。
+    """
+    
+    def __init__(self, monster_info, seed: Optional[int] = None, batch_trials: int = SIMULATION_BATCH_TRIALS):
+        self.table = CompiledDropTable(monster_info)
+        self.seed = seed
+        self.batch_trials = batch_trials
+    
+    def simulate(self, kills: int, trials: int = 1000, progress_callback=None,
+                 cancel_event=None) -> Optional[SimulationResult]:
+        """
+        模拟 trials 轮、每轮击杀 kills 次
+        :param progress_callback: 回调 (已模拟轮数, 总轮数)，每批调用一次
+        :param cancel_event: threading.Event，设置后在批次之间停止
+        :return: 每个物品的数量分布与首次掉落击杀数分布，取消时返回None
+        """
+        table = self.table
+        rng = np.random.default_rng(self.seed)
+        n_items = table.n_items
+        
+        # 掉落数量按对数分箱: 小数量处每个整数一箱，最后一箱的上界为 kills + 1
+        count_edges = np.round(np.logspace(0, np.log10(kills + 1), SIMULATION_COUNT_BINS)).astype(np.int64)
+        count_edges = np.unique(np.concatenate(([0, 1], count_edges, [kills + 1])))
+        n_count_bins = len(count_edges) - 1
+        count_hist = np.zeros((n_items, n_count_bins), dtype=np.int64)
+        count_sums = np.zeros(n_items, dtype=np.int64)
+        bin_offsets = np.arange(n_items) * n_count_bins
+        
+        drop_probs = table.item_drop_probs()
+        max_kills = max(kills, 1)
+        positive = drop_probs[drop_probs > 0]
+        if len(positive):
+            # 覆盖到最稀有物品期望值的数倍
+            max_kills = max(max_kills, int(min(1e12, 20 / positive.min())))
+        edges = np.unique(np.round(np.logspace(0, np.log10(max_kills + 1), SIMULATION_FIRST_DROP_BINS)).astype(np.int64))
+        edges = np.append(edges, np.iinfo(np.int64).max)
+        first_drop_hist = np.zeros((n_items, len(edges) - 1), dtype=np.int64)
+        
+        remaining = trials
+        while remaining > 0:
+            batch = min(self.batch_trials, remaining)
+            remaining -= batch
+            
+            counts = np.zeros((batch, n_items), dtype=np.int64)
+            
+            # 独立爆率行: 二项分布
+            if len(table.line_rates):
+                line_counts = rng.binomial(kills, table.line_rates, size=(batch, len(table.line_rates)))
+                np.add.at(counts, (slice(None), table.line_items), line_counts)
+            
+            # #CHILD组: 先二项判定组命中次数，再多项分布分配到子物品
+            for rate, members in zip(table.group_rates, table.group_members):
+                fires = rng.binomial(kills, rate, size=batch)
+                split = rng.multinomial(fires, np.full(len(members), 1.0 / len(members)))
+                np.add.at(counts, (slice(None), members), split)
+            
+            count_sums += counts.sum(axis=0)
+            count_bins = np.searchsorted(count_edges, counts, side='right') - 1 + bin_offsets
+            count_hist += np.bincount(count_bins.ravel(), minlength=n_items * n_count_bins).reshape(n_items, -1)
+            
+            # 首次掉落: 每次击杀独立，服从几何分布
+            for item_id in range(n_items):
+                p = drop_probs[item_id]
+                if p <= 0:
+                    first_drop_hist[item_id, -1] += batch
+                    continue
+                first = rng.geometric(min(p, 1.0), size=batch)
+                bins = np.searchsorted(edges, first, side='right') - 1
+                first_drop_hist[item_id] += np.bincount(bins, minlength=len(edges) - 1)
+            
+            if progress_callback:
+                progress_callback(trials - remaining, trials)
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info(f"模拟已取消: {table.monster_name}")
+                return None
+        
+        logger.info(f"模拟完成: {table.monster_name}, {trials}轮 x {kills}次击杀")
+        return SimulationResult(table, kills, trials, self.seed, count_edges, count_hist, count_sums,
+                                edges, first_drop_hist)
+    
+    def simulate_collection(self, item_names: List[str], trials: int = 100000) -> np.ndarray:
+        """
+        模拟集齐多个物品所需的击杀数
+        不同爆率行/组相互独立；同一#CHILD组内的子物品互斥，按组命中序列联合抽样
+        :return: 每轮集齐所需的击杀数（长度为trials）
+        """
+        table = self.table
+        rng = np.random.default_rng(self.seed)
+        targets = [table.item_ids[name] for name in item_names]
+        results = np.empty(trials, dtype=np.float64)
+        
+        done = 0
+        while done < trials:
+            batch = min(self.batch_trials, trials - done)
+            # 每个目标物品的首次掉落击杀数
+            first = np.full((batch, len(targets)), np.inf)
+            
+            for t, item_id in enumerate(targets):
+                rates = table.line_rates[table.line_items == item_id]
+                for rate in rates[rates > 0]:
+                    first[:, t] = np.minimum(first[:, t], rng.geometric(rate, size=batch))
+            
+            for rate, members in zip(table.group_rates, table.group_members):
+                wanted = [t for t, item_id in enumerate(targets) if item_id in members]
+                if not wanted or rate <= 0:
+                    continue
+                first[:, wanted] = np.minimum(first[:, wanted],
+                                              self._group_first_hits(rng, rate, members, [targets[t] for t in wanted], batch))
+            
+            results[done:done + batch] = first.max(axis=1)
+            done += batch
+        
+        return results
+    
+    def _group_first_hits(self, rng, rate: float, members: np.ndarray, wanted_ids: List[int], batch: int) -> np.ndarray:
+        """#CHILD组内每个目标子物品首次出现的击杀数 (batch, 目标数)"""
+        k = len(members)
+        # 估计集齐目标子物品所需的组命中次数，不足时加倍重试
+        fires = max(16, int(4 * k * (np.log(len(wanted_ids)) + 1)))
+        hits = np.full((batch, len(wanted_ids)), np.inf)
+        offset = np.zeros(batch)
+        pending = np.arange(batch)
+        
+        while len(pending):
+            n = len(pending)
+            # 组命中发生的击杀序号 = 几何分布间隔的累加（未集齐的轮次接着上次的序列继续）
+            fire_kills = offset[pending, None] + np.cumsum(rng.geometric(rate, size=(n, fires)), axis=1)
+            picks = members[rng.integers(0, k, size=(n, fires))]
+            
+            for w, item_id in enumerate(wanted_ids):
+                matched = picks == item_id
+                found = matched.any(axis=1) & np.isinf(hits[pending, w])
+                index = matched.argmax(axis=1)
+                hits[pending[found], w] = fire_kills[found, index[found]]
+            
+            offset[pending] = fire_kills[:, -1]
+            pending = pending[np.isinf(hits[pending]).any(axis=1)]
+            fires *= 2
+        
+        return hits
@@ -0,0 +1,282 @@
+# src/drop_store.py
+"""
+SQLite爆率存储引擎
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from collections.abc import Mapping
+from typing import List, Tuple, Dict, Optional, Iterator
+
+from config.constants import SQLITE_BATCH_SIZE
+from src.utils.rate_utils import combine_drop_lines
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS source_files (
+    path TEXT PRIMARY KEY,
+    monster TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drops (
+    id INTEGER PRIMARY KEY,
+    monster TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    rate REAL NOT NULL,
+    child_group TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_drops_item ON drops(item);
+CREATE INDEX IF NOT EXISTS idx_drops_monster ON drops(monster, seq);
+CREATE INDEX IF NOT EXISTS idx_drops_rate ON drops(rate);
+CREATE INDEX IF NOT EXISTS idx_source_files_monster ON source_files(monster);
+"""
+
+
+class SQLiteDropStore:
+    """基于SQLite的爆率数据存储"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        
+        # 导出等后台线程也会读取，写入由锁串行化
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.RLock()
+        
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+        
+        self.monsters = SQLiteMonsterView(self)
+        self.items = SQLiteItemIndexView(self)
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+    
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """执行只读SQL查询（供分析人员临时查询使用）"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0][0] if row else default
+    
+    def clear(self):
+        """清空所有数据"""
+        with self.lock:
+            self.conn.execute("DELETE FROM drops")
+            self.conn.execute("DELETE FROM source_files")
+            self.conn.execute("DELETE FROM meta")
+            self.conn.commit()
+    
+    def sync_directory(self, directory: str, parse_file, on_update=None, on_remove=None) -> Dict[str, int]:
+        """
+        增量同步目录到数据库
+        :param directory: 爆率文件目录
+        :param parse_file: 解析函数 filepath -> MonsterDropInfo
+        :param on_update: 可选回调，接收新增或变化的 MonsterDropInfo
+        :param on_remove: 可选回调，接收被删除的怪物名
+        :return: 同步统计
+        """
+        directory = os.path.abspath(directory)
+        
+        # 目录变化时全量重建
+        if self.get_meta('directory') != directory:
+            self.clear()
+        
+        known = {path: (mtime, size) for path, mtime, size in
+                 self.query("SELECT path, mtime, size FROM source_files")}
+        
+        current = {}
+        for filename in os.listdir(directory):
+            if filename.lower().endswith('.txt'):
+                filepath = os.path.join(directory, filename)
+                stat = os.stat(filepath)
+                current[filepath] = (stat.st_mtime, stat.st_size)
+        
+        changed = [path for path, sig in current.items() if known.get(path) != sig]
+        removed = [path for path in known if path not in current]
+        
+        with self.lock:
+            if removed:
+                for start in range(0, len(removed), SQLITE_BATCH_SIZE):
+                    batch = removed[start:start + SQLITE_BATCH_SIZE]
+                    deleted = self._delete_files(batch)
+                    self.conn.commit()
+                    if on_remove is not None:
+                        for monster_name in deleted:
+                            on_remove(monster_name)
+            
+            failed = 0
+            for start in range(0, len(changed), SQLITE_BATCH_SIZE):
+                batch = changed[start:start + SQLITE_BATCH_SIZE]
+                parsed = []
+                for filepath in batch:
+                    monster_info = parse_file(filepath)
+                    if monster_info is None:
+                        failed += 1
+                        continue
+                    parsed.append((filepath, monster_info))
+                
+                # 每批一个事务
+                deleted = self._delete_files(batch)
+                self._insert_monsters(parsed, current)
+                self.conn.commit()
+                
+                if on_remove is not None:
+                    updated = {monster_info.monster_name for _, monster_info in parsed}
+                    for monster_name in deleted:
+                        if monster_name not in updated:
+                            on_remove(monster_name)
+                if on_update is not None:
+                    for _, monster_info in parsed:
+                        on_update(monster_info)
+            
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('directory', ?)", (directory,))
+            self.conn.commit()
+        
+        stats = {
+            'changed': len(changed) - failed,
+            'removed': len(removed),
+            'unchanged': len(current) - len(changed),
+            'failed': failed,
+        }
+        logger.info(f"SQLite同步完成: 更新{stats['changed']}个, 删除{stats['removed']}个, 未变化{stats['unchanged']}个")
+        return stats
+    
+    def _delete_files(self, paths: List[str]) -> List[str]:
+        """删除文件对应的数据，返回被删除的怪物名"""
+        rows = self.conn.execute(
+            f"SELECT monster FROM source_files WHERE path IN ({','.join('?' * len(paths))})", paths
+        ).fetchall()
+        monsters = [(row[0],) for row in rows]
+        self.conn.executemany("DELETE FROM drops WHERE monster = ?", monsters)
+        self.conn.executemany("DELETE FROM source_files WHERE path = ?", [(p,) for p in paths])
+        return [row[0] for row in rows]
+    
+    def _insert_monsters(self, parsed, file_stats):
+        drop_rows = []
+        file_rows = []
+        for filepath, monster_info in parsed:
+            monster_name = monster_info.monster_name
+            mtime, size = file_stats[filepath]
+            file_rows.append((filepath, monster_name, mtime, size))
+            for seq, item in enumerate(monster_info.drop_items):
+                drop_rows.append((monster_name, seq, item.name, item.rate, item.child_group))
+        
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO source_files(path, monster, mtime, size) VALUES (?, ?, ?, ?)", file_rows
+        )
+        self.conn.executemany(
+            "INSERT INTO drops(monster, seq, item, rate, child_group) VALUES (?, ?, ?, ?, ?)", drop_rows
+        )
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        total_monsters = self.query("SELECT COUNT(*) FROM source_files")[0][0]
+        total_items = self.query("SELECT COUNT(*) FROM drops")[0][0]
+        unique_items = self.query("SELECT COUNT(DISTINCT item) FROM drops")[0][0]
+        return {
+            'total_monsters': total_monsters,
+            'total_items': total_items,
+            'unique_items': unique_items,
+        }
+
+
+class SQLiteMonsterView(Mapping):
+    """{怪物名: MonsterDropInfo} 的只读视图"""
+    
+    def __init__(self, store: SQLiteDropStore):
+        self.store = store
+    
+    def _build(self, monster_name: str, rows) -> 'MonsterDropInfo':
+        from src.data_parser import MonsterDropInfo
+        return MonsterDropInfo.from_rows(monster_name, rows)
+    
+    def __getitem__(self, monster_name: str):
+        if monster_name not in self:
+            raise KeyError(monster_name)
+        rows = self.store.query(
+            "SELECT item, rate, child_group FROM drops WHERE monster = ? ORDER BY seq", (monster_name,)
+        )
+        return self._build(monster_name, rows)
+    
+    def __contains__(self, monster_name) -> bool:
+        return bool(self.store.query("SELECT 1 FROM source_files WHERE monster = ? LIMIT 1", (monster_name,)))
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self.store.query("SELECT monster FROM source_files ORDER BY monster")])
+    
+    def __len__(self) -> int:
+        return self.store.query("SELECT COUNT(*) FROM source_files")[0][0]
+    
+    def items(self):
+        """一次顺序扫描返回全部怪物，避免逐个查询"""
+        rows = self.store.query(
+            "SELECT s.monster, d.item, d.rate, d.child_group FROM source_files s "
+            "LEFT JOIN drops d ON d.monster = s.monster ORDER BY s.monster, d.seq"
+        )
+        
+        current_name = None
+        current_rows = []
+        for monster_name, item_name, rate, child_group in rows:
+            if monster_name != current_name:
+                if current_name is not None:
+                    yield current_name, self._build(current_name, current_rows)
+                current_name = monster_name
+                current_rows = []
+            if item_name is not None:
+                current_rows.append((item_name, rate, child_group))
+        
+        if current_name is not None:
+            yield current_name, self._build(current_name, current_rows)
+    
+    def values(self):
+        for _, monster_info in self.items():
+            yield monster_info
+
+
+class SQLiteItemIndexView(Mapping):
+    """{物品名: [(怪物名, 爆率)]} 的只读视图（同一怪物的重复掉落行已合并）"""
+    
+    def __init__(self, store: SQLiteDropStore):
+        self.store = store
+    
+    def __getitem__(self, item_name: str) -> List[Tuple[str, float]]:
+        rows = self.store.query(
+            "SELECT monster, rate, child_group FROM drops WHERE item = ? ORDER BY id", (item_name,)
+        )
+        if not rows:
+            raise KeyError(item_name)
+        
+        lines = {}
+        for monster, rate, child_group in rows:
+            lines.setdefault(monster, []).append((rate, child_group))
+        return [(monster, combine_drop_lines(monster_lines)) for monster, monster_lines in lines.items()]
+    
+    def __contains__(self, item_name) -> bool:
+        return bool(self.store.query("SELECT 1 FROM drops WHERE item = ? LIMIT 1", (item_name,)))
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self.store.query("SELECT DISTINCT item FROM drops ORDER BY item")])
+    
+    def __len__(self) -> int:
+        return self.store.query("SELECT COUNT(DISTINCT item) FROM drops")[0][0]
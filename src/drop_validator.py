@@ -0,0 +1,497 @@
+# src/drop_validator.py
+"""
+爆率文件检查（整个数据目录的格式校验，可作为发布前检查）
+"""
+
+import os
+import re
+import json
+import math
+import time
+import codecs
+import hashlib
+import logging
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Optional, Callable
+
+from config.constants import (ENCODING, CHILD_MARKER, RANDOM_MARKER, CALL_MARKER, VALIDATE_WORKERS,
+                              VALIDATE_BATCH_FILES, VALIDATE_ENCODING_LINES)
+from src.archive_source import DEFAULT_CACHE_DIR
+from src.data_exporter import CsvExporter
+
+
+logger = logging.getLogger(__name__)
+
+
+VALIDATE_CACHE_VERSION = 1  # 检查规则变化时递增，使旧缓存失效
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+SEVERITY_LABELS = {
+    SEVERITY_ERROR: "错误",
+    SEVERITY_WARNING: "警告",
+}
+
+COMMENT_PREFIXES = ('#', ';')
+
+CALL_PATTERN = re.compile(r'^' + re.escape(CALL_MARKER) + r'\s*\[\s*([^\]]+?)\s*\]\s*(@\S+)?', re.IGNORECASE)
+
+
+class ValidationIssue:
+    """检查发现的一个问题"""
+    
+    def __init__(self, file_name: str, line: int, severity: str, code: str, message: str):
+        self.file_name = file_name
+        self.line = line  # 行号，从1开始
+        self.severity = severity
+        self.code = code
+        self.message = message
+    
+    @property
+    def severity_label(self) -> str:
+        return SEVERITY_LABELS.get(self.severity, self.severity)
+    
+    def __repr__(self):
+        return f"{self.file_name}:{self.line}: {self.severity_label}: {self.message}"
+
+
+def parse_rate_text(text: str) -> float:
+    """与解析器相同的爆率写法解析，无法解析时抛出 ValueError/ZeroDivisionError"""
+    if text == '0':
+        return 0.0
+    if '/' not in text:
+        return float(text)
+    return float(Fraction(text))
+
+
+def _check_rate(text: str, line_no: int, issues: list, child: bool = False):
+    try:
+        value = parse_rate_text(text)
+    except (ValueError, ZeroDivisionError):
+        if child:
+            issues.append([line_no, SEVERITY_ERROR, 'bad_rate',
+                           f"无法解析的组爆率 \"{text}\"（查询按0处理，主程序整个文件解析失败）"])
+        else:
+            issues.append([line_no, SEVERITY_ERROR, 'bad_rate', f"无法解析的爆率 \"{text}\"（按0处理，该行不会掉落）"])
+        return
+    if not math.isfinite(value) or value < 0:
+        issues.append([line_no, SEVERITY_ERROR, 'bad_rate', f"无效的爆率 \"{text}\""])
+    elif value == 0:
+        issues.append([line_no, SEVERITY_WARNING, 'zero_rate', f"爆率为0，该行不会掉落: {text}"])
+    elif value > 1:
+        issues.append([line_no, SEVERITY_ERROR, 'rate_over_one', f"爆率 {text} 大于1"])
+
+
+def _decode(raw: bytes, encoding: str, issues: list) -> str:
+    """按数据编码解码；失败时按替换字符解码继续检查，并报告出错的行"""
+    try:
+        content = raw.decode(encoding)
+        failed = None
+    except UnicodeDecodeError as e:
+        content = raw.decode(encoding, errors='replace')
+        failed = e
+    
+    if raw.startswith(codecs.BOM_UTF8) and codecs.lookup(encoding).name not in ('utf-8', 'utf-8-sig'):
+        issues.append([1, SEVERITY_ERROR, 'encoding', f"文件带UTF-8 BOM，不是 {encoding} 编码"])
+        return content
+    if failed is None:
+        return content
+    
+    hint = ""
+    try:
+        raw.decode('utf-8')
+        hint = "，文件看起来是UTF-8编码"
+    except UnicodeDecodeError:
+        pass
+    message = f"无法按 {encoding} 解码{hint}（查询时跳过整个文件，主程序丢弃无法解码的字节）"
+    lines = content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    bad_lines = [number for number, line in enumerate(lines, 1) if '\ufffd' in line]
+    if not bad_lines:
+        bad_lines = [raw.count(b'\n', 0, failed.start) + 1]
+    for line_no in bad_lines[:VALIDATE_ENCODING_LINES]:
+        issues.append([line_no, SEVERITY_ERROR, 'encoding', message])
+    if len(bad_lines) > VALIDATE_ENCODING_LINES:
+        issues.append([bad_lines[VALIDATE_ENCODING_LINES], SEVERITY_ERROR, 'encoding',
+                       f"另有 {len(bad_lines) - VALIDATE_ENCODING_LINES} 行无法解码"])
+    return content
+
+
+def _check_child(lines: List[str], i: int, issues: list) -> int:
+    """检查从第 i 行开始的 #CHILD 组，返回组之后继续检查的位置"""
+    line_no = i + 1
+    parts = lines[i].split()
+    if len(parts) < 2:
+        issues.append([line_no, SEVERITY_ERROR, 'child_rate', "#CHILD 缺少组爆率"])
+    else:
+        _check_rate(parts[1], line_no, issues, child=True)
+    if len(parts) < 3 or parts[2] != RANDOM_MARKER:
+        # 查询模块只识别 "#CHILD 爆率 RANDOM"，否则组内物品按各自的占位爆率当作普通掉落，与主程序的结果不同
+        issues.append([line_no, SEVERITY_ERROR, 'child_random',
+                       f"#CHILD 行缺少 {RANDOM_MARKER}，组内物品会按占位爆率当作普通掉落（主程序仍按组平分）"])
+    
+    # 查找 "("，两个解析器都会跳过其间的所有内容
+    count = len(lines)
+    j = i + 1
+    skipped = None
+    while j < count:
+        text = lines[j].strip()
+        if text == '(' or text.startswith(CHILD_MARKER):
+            break
+        if text and not text.startswith(COMMENT_PREFIXES) and skipped is None:
+            skipped = j
+        j += 1
+    if j >= count or lines[j].strip() != '(':
+        issues.append([line_no, SEVERITY_ERROR, 'child_open', "#CHILD 之后没有 \"(\"，该组被忽略"])
+        return i + 1
+    if skipped is not None:
+        issues.append([skipped + 1, SEVERITY_ERROR, 'child_skipped', "#CHILD 与 \"(\" 之间的内容会被跳过"])
+    
+    # 查找 ")"；遇到下一个组时说明括号没有闭合，解析器会把后面的内容一直吞到下一个 ")"
+    k = j + 1
+    items = 0
+    while k < count:
+        text = lines[k].strip()
+        if text == ')':
+            break
+        if text == '(' or text.startswith(CHILD_MARKER):
+            issues.append([j + 1, SEVERITY_ERROR, 'child_unclosed', "\"(\" 没有对应的 \")\""])
+            return k
+        if text:
+            item_parts = text.split()
+            if len(item_parts) >= 2:
+                items += 1
+                if text.startswith(COMMENT_PREFIXES):
+                    issues.append([k + 1, SEVERITY_WARNING, 'child_comment', "组内的注释行会被当作物品"])
+            elif not text.startswith(COMMENT_PREFIXES):
+                issues.append([k + 1, SEVERITY_ERROR, 'missing_name', f"组内物品行格式错误，被忽略: {text}"])
+        k += 1
+    if k >= count:
+        issues.append([j + 1, SEVERITY_ERROR, 'child_unclosed', "\"(\" 直到文件结尾都没有对应的 \")\""])
+        return count
+    if not items:
+        issues.append([line_no, SEVERITY_WARNING, 'child_empty', "#CHILD 组内没有物品"])
+    return k + 1
+
+
+def validate_content(raw: bytes, encoding: str = ENCODING) -> Tuple[List[list], List[list]]:
+    """
+    检查单个爆率文件的内容
+    :return: (问题 [[行号, 级别, 代码, 说明]], #CALL 引用 [[行号, 路径, 标签]])
+    """
+    issues, calls = [], []
+    content = _decode(raw, encoding, issues)
+    lines = content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        line_no = i + 1
+        if not line:
+            i += 1
+            continue
+        
+        if line.startswith(CHILD_MARKER):
+            i = _check_child(lines, i, issues)
+            continue
+        
+        if line.startswith('#'):
+            if line[:len(CALL_MARKER)].upper() == CALL_MARKER:
+                match = CALL_PATTERN.match(line)
+                if match:
+                    calls.append([line_no, match.group(1), match.group(2) or ''])
+                else:
+                    issues.append([line_no, SEVERITY_ERROR, 'call_syntax', f"无法识别的 {CALL_MARKER} 写法: {line}"])
+            i += 1
+            continue
+        
+        if line.startswith(';'):
+            i += 1
+            continue
+        
+        if line in ('(', ')'):
+            issues.append([line_no, SEVERITY_ERROR, 'stray_bracket', f"#CHILD 组之外的 \"{line}\""])
+        else:
+            parts = line.split()
+            if len(parts) < 2:
+                issues.append([line_no, SEVERITY_ERROR, 'missing_name', f"缺少爆率或物品名，整行被忽略: {line}"])
+            else:
+                _check_rate(parts[0], line_no, issues)
+        i += 1
+    
+    return issues, calls
+
+
+def content_digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def validate_files(tasks: List[Tuple[str, Optional[str]]], encoding: str) -> List[list]:
+    """
+    检查一批文件（供进程池调用）
+    :param tasks: [(文件路径, 缓存中的内容哈希)]
+    :return: [[文件路径, 内容哈希, 问题, 引用]]，内容与缓存相同时问题和引用为 None
+    """
+    results = []
+    for path, cached_digest in tasks:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError as e:
+            results.append([path, '', [[0, SEVERITY_ERROR, 'read', f"读取失败: {e}"]], []])
+            continue
+        digest = content_digest(raw)
+        if digest == cached_digest:
+            results.append([path, digest, None, None])
+        else:
+            issues, calls = validate_content(raw, encoding)
+            results.append([path, digest, issues, calls])
+    return results
+
+
+class ValidationReport:
+    """数据目录检查结果"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.issues = []  # List[ValidationIssue]，按文件名和行号排序
+        self.files_checked = 0
+        self.files_cached = 0  # 内容未变化、直接沿用缓存结果的文件数
+        self.elapsed = 0.0
+        self.cancelled = False
+    
+    def count(self, severity: str) -> int:
+        return sum(1 for issue in self.issues if issue.severity == severity)
+    
+    @property
+    def error_count(self) -> int:
+        return self.count(SEVERITY_ERROR)
+    
+    @property
+    def warning_count(self) -> int:
+        return self.count(SEVERITY_WARNING)
+    
+    def passed(self, strict: bool = False) -> bool:
+        """没有错误（strict 时也没有警告）即通过"""
+        if self.cancelled or self.error_count:
+            return False
+        return not (strict and self.warning_count)
+    
+    def files_with_issues(self) -> int:
+        return len({issue.file_name for issue in self.issues})
+    
+    def describe(self) -> str:
+        text = (f"检查 {self.files_checked} 个文件（{self.files_cached} 个未变化），"
+                f"错误 {self.error_count}，警告 {self.warning_count}，涉及 {self.files_with_issues()} 个文件，"
+                f"耗时{self.elapsed:.2f}秒")
+        if self.cancelled:
+            text += "（已取消，结果不完整）"
+        return text
+    
+    def export_rows(self):
+        for issue in self.issues:
+            yield [issue.file_name, issue.line, issue.severity_label, issue.code, issue.message]
+    
+    def export_csv(self, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event=None) -> bool:
+        try:
+            exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+            exporter.export(output_path, ["文件", "行号", "级别", "代码", "说明"], self.export_rows(), len(self.issues))
+            return True
+        except Exception as e:
+            logger.error(f"导出检查结果失败 {output_path}: {e}")
+            return False
+
+
+class DropValidator:
+    """整个数据目录的爆率文件检查
+
+    各文件的检查结果按内容哈希缓存到磁盘；再次检查时，大小和修改时间都没变的文件不再读取，
+    变化了的文件读取后比较哈希，内容相同的仍沿用缓存，只有真正改动的文件重新检查。
+    需要检查的文件分批交给多个进程并行处理。#CALL 引用的目标是否存在与其他文件有关，
+    不进入缓存，每次检查时重新核对。
+    """
+    
+    def __init__(self, encoding: str = ENCODING, cache_dir: str = DEFAULT_CACHE_DIR, workers: int = VALIDATE_WORKERS,
+                 use_cache: bool = True, batch_files: int = VALIDATE_BATCH_FILES):
+        self.encoding = encoding
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.batch_files = batch_files
+        self._listings = {}  # 本次检查中 #CALL 查找用的目录列表 {目录: {小写文件名: 文件名}}
+        self._label_cache = {}  # {目标文件: 小写内容}
+    
+    def _cache_path(self, directory: str) -> str:
+        key = f"{os.path.abspath(directory)}|{self.encoding}"
+        return os.path.join(self.cache_dir, f"validate_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+    
+    def _load_cache(self, cache_path: str) -> Dict[str, list]:
+        if not self.use_cache or not os.path.exists(cache_path):
+            return {}
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != VALIDATE_CACHE_VERSION or data.get('encoding') != self.encoding:
+                return {}
+            return data['files']
+        except Exception as e:
+            logger.warning(f"读取检查缓存失败 {cache_path}: {e}")
+            return {}
+    
+    def _save_cache(self, cache_path: str, files: Dict[str, list]):
+        if not self.use_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': VALIDATE_CACHE_VERSION, 'encoding': self.encoding, 'files': files},
+                          f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"保存检查缓存失败 {cache_path}: {e}")
+    
+    def validate(self, directory: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None) -> Optional[ValidationReport]:
+        """检查目录下所有 .txt 爆率文件，进度以文件数计"""
+        start = time.perf_counter()
+        if not os.path.isdir(directory):
+            logger.error(f"数据目录不存在: {directory}")
+            return None
+        
+        cache_path = self._cache_path(directory)
+        cached = self._load_cache(cache_path)
+        files = {}  # {文件名: [大小, 修改时间, 内容哈希, 问题, 引用]}
+        tasks = []
+        try:
+            for entry in os.scandir(directory):
+                if not entry.name.lower().endswith('.txt') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                previous = cached.get(entry.name)
+                if previous is not None and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                    files[entry.name] = previous
+                else:
+                    files[entry.name] = [stat.st_size, stat.st_mtime_ns, None, None, None]
+                    tasks.append((entry.path, previous[2] if previous is not None else None))
+        except OSError as e:
+            logger.error(f"读取数据目录失败 {directory}: {e}")
+            return None
+        
+        report = ValidationReport(directory)
+        report.files_cached = len(files) - len(tasks)
+        total = len(files)
+        done = report.files_cached
+        if progress_callback:
+            progress_callback(done, total)
+        
+        def merge(results):
+            nonlocal done
+            for path, digest, issues, calls in results:
+                entry = files[os.path.basename(path)]
+                entry[2] = digest
+                if issues is None:
+                    previous = cached[os.path.basename(path)]
+                    entry[3], entry[4] = previous[3], previous[4]
+                    report.files_cached += 1
+                else:
+                    entry[3], entry[4] = issues, calls
+            done += len(results)
+            if progress_callback:
+                progress_callback(done, total)
+        
+        batches = [tasks[index:index + self.batch_files] for index in range(0, len(tasks), self.batch_files)]
+        try:
+            if self.workers <= 1 or len(batches) <= 1:
+                for batch in batches:
+                    if cancel_event is not None and cancel_event.is_set():
+                        report.cancelled = True
+                        break
+                    merge(validate_files(batch, self.encoding))
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                    futures = [executor.submit(validate_files, batch, self.encoding) for batch in batches]
+                    for future in as_completed(futures):
+                        merge(future.result())
+                        if cancel_event is not None and cancel_event.is_set():
+                            for pending in futures:
+                                pending.cancel()
+                            report.cancelled = True
+                            break
+        except Exception as e:
+            logger.error(f"检查数据文件失败: {e}")
+            return None
+        
+        # 只缓存已完成检查的文件，取消时未检查的和读取失败的文件下次重新检查
+        finished = {name: entry for name, entry in files.items() if entry[3] is not None}
+        self._save_cache(cache_path, {name: entry for name, entry in finished.items() if entry[2]})
+        
+        self._listings, self._label_cache = {}, {}
+        for name in sorted(finished):
+            _, _, digest, issues, calls = finished[name]
+            for line_no, severity, code, message in issues:
+                report.issues.append(ValidationIssue(name, line_no, severity, code, message))
+            for line_no, target, label in calls:
+                problem = self._check_call(directory, target, label)
+                if problem:
+                    report.issues.append(ValidationIssue(name, line_no, SEVERITY_ERROR, 'call_target', problem))
+        report.issues.sort(key=lambda issue: (issue.file_name, issue.line))
+        report.files_checked = len(finished)
+        report.elapsed = time.perf_counter() - start
+        logger.info(f"数据文件检查: {report.describe()}")
+        return report
+    
+    # ------------------------------------------------------------------
+    # #CALL 引用
+    # ------------------------------------------------------------------
+    
+    def _find_path(self, base: str, relative: str) -> Optional[str]:
+        """按不区分大小写的方式查找相对路径（服务端文件通常在Windows上编辑）"""
+        path = os.path.join(base, *relative.split('/'))
+        if os.path.isfile(path):
+            return path
+        current = base
+        for part in relative.split('/'):
+            if part in ('', '.'):
+                continue
+            listing = self._listings.get(current)
+            if listing is None:
+                try:
+                    listing = {name.lower(): name for name in os.listdir(current)}
+                except OSError:
+                    listing = {}
+                self._listings[current] = listing
+            name = listing.get(part.lower())
+            if name is None:
+                return None
+            current = os.path.join(current, name)
+        return current if os.path.isfile(current) else None
+    
+    def _check_call(self, directory: str, target: str, label: str) -> Optional[str]:
+        """核对 #CALL 目标，依次在数据目录及其上两级目录（Envir、服务端根目录）中查找，返回问题说明"""
+        relative = target.replace('\\', '/').strip('/')
+        base = os.path.abspath(directory)
+        path = None
+        for _ in range(3):
+            path = self._find_path(base, relative)
+            if path:
+                break
+            base = os.path.dirname(base)
+        if not path:
+            return f"{CALL_MARKER} 引用的文件不存在: {target}"
+        if not label:
+            return None
+        
+        content = self._label_cache.get(path)
+        if content is None:
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read().decode(self.encoding, errors='replace').lower()
+            except OSError as e:
+                return f"{CALL_MARKER} 引用的文件读取失败 {target}: {e}"
+            self._label_cache[path] = content
+        if label.lower() not in content:
+            return f"{CALL_MARKER} 引用的文件 {target} 中没有标签 {label}"
+        return None
@@ -0,0 +1,366 @@
+# src/economy_forecast.py
+"""
+全服物品产出预测（按各怪物每日击杀数计算每个物品每日的期望产出和波动）
+"""
+
+import csv
+import math
+import time
+import logging
+from statistics import NormalDist
+from typing import List, Tuple, Dict, Optional, Callable
+
+import numpy as np
+
+from config.constants import ENCODING, FORECAST_CONFIDENCE
+from src.bulk_edit import RateOperation, parse_operation
+from src.data_exporter import CsvExporter
+from src.drop_query import QuerySyntaxError
+from src.log_ingest import NameResolver
+
+
+logger = logging.getLogger(__name__)
+
+
+CHANGE_KILLS = 'kills'  # 修改怪物每日击杀数
+CHANGE_RATE = 'rate'  # 修改物品爆率
+
+CHANGE_KEYWORDS = {
+    '击杀': CHANGE_KILLS,
+    'kill': CHANGE_KILLS,
+    'kills': CHANGE_KILLS,
+    '爆率': CHANGE_RATE,
+    'rate': CHANGE_RATE,
+}
+
+
+def load_kill_table(path: str, encoding: Optional[str] = None) -> Optional[Dict[str, float]]:
+    """
+    读取击杀表CSV: 每行 怪物名称,每日击杀数（首行不是数字时视为表头）
+    未指定编码时先按UTF-8读取，失败再按爆率文件的默认编码读取
+    :return: {怪物名: 每日击杀数}，读取失败返回None
+    """
+    for file_encoding in ([encoding] if encoding else ['utf-8-sig', ENCODING]):
+        try:
+            with open(path, 'r', encoding=file_encoding, newline='') as f:
+                rows = list(csv.reader(f))
+            break
+        except UnicodeDecodeError:
+            continue
+        except OSError as e:
+            logger.error(f"读取击杀表失败 {path}: {e}")
+            return None
+    else:
+        logger.error(f"读取击杀表失败 {path}: 无法识别的文件编码")
+        return None
+    
+    kills = {}
+    for line_no, row in enumerate(rows, 1):
+        if len(row) < 2 or not row[0].strip():
+            continue
+        try:
+            value = float(row[1])
+        except ValueError:
+            if line_no == 1:
+                continue
+            logger.error(f"击杀表第{line_no}行的击杀数无效: {row[1]}")
+            return None
+        if value < 0:
+            logger.error(f"击杀表第{line_no}行的击杀数为负数: {row[1]}")
+            return None
+        name = row[0].strip()
+        kills[name] = kills.get(name, 0.0) + value
+    logger.info(f"击杀表已加载 {path}: {len(kills)} 个怪物")
+    return kills
+
+
+def kill_table_from_log(ingestor, parser, days: float = 1.0) -> Dict[str, float]:
+    """由掉落日志的击杀统计得到每日击杀数（日志覆盖 days 天）"""
+    if days <= 0:
+        raise ValueError("日志天数必须大于0")
+    return {name: count / days for name, count in ingestor.resolved_kills(parser).items()}
+
+
+class ScenarioChange:
+    """一条假设修改"""
+    
+    def __init__(self, kind: str, name: str, operation: RateOperation, monster_name: Optional[str] = None):
+        self.kind = kind
+        self.name = name  # 修改击杀数时为怪物名，修改爆率时为物品名
+        self.operation = operation
+        self.monster_name = monster_name  # 只修改该怪物的爆率，None 表示所有怪物
+    
+    def __str__(self):
+        if self.kind == CHANGE_KILLS:
+            return f"击杀 {self.name} {self.operation}"
+        target = f"{self.name}@{self.monster_name}" if self.monster_name else self.name
+        return f"爆率 {target} {self.operation}"
+
+
+def parse_kill_operation(text: str) -> RateOperation:
+    """击杀数修改: 数字表示设为该值，*倍数、/除数表示按比例修改"""
+    text = text.strip()
+    if text[:1] in ('*', 'x', 'X', '×', '/'):
+        return parse_operation(text)
+    
+    body = text[1:] if text.startswith('=') else text
+    try:
+        value = float(body)
+    except ValueError:
+        raise QuerySyntaxError(f"无效的击杀数: {text}")
+    if not value >= 0 or math.isinf(value):
+        raise QuerySyntaxError(f"击杀数必须是非负数: {text}")
+    return RateOperation(RateOperation.SET, value, f"={value:g}")
+
+
+def parse_scenario(text: str) -> List[ScenarioChange]:
+    """
+    解析假设修改，每行一条，# 开头为注释:
+        击杀 怪物名 600        每日击杀数设为600（也可写 *1.5、/2）
+        爆率 物品名 *2          所有怪物该物品的爆率加倍（也可写 /2、=1/5000）
+        爆率 物品名@怪物名 =1/500   只修改该怪物
+    语法错误时抛出 QuerySyntaxError
+    """
+    changes = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split()
+        kind = CHANGE_KEYWORDS.get(parts[0].lower())
+        if kind is None or len(parts) < 3:
+            raise QuerySyntaxError(f"第{line_no}行格式应为: 击杀 怪物名 数量 / 爆率 物品名[@怪物名] 操作")
+        name = " ".join(parts[1:-1])
+        try:
+            if kind == CHANGE_KILLS:
+                changes.append(ScenarioChange(kind, name, parse_kill_operation(parts[-1])))
+            else:
+                item_name, _, monster_name = name.partition('@')
+                changes.append(ScenarioChange(kind, item_name.strip(), parse_operation(parts[-1]),
+                                              monster_name.strip() or None))
+        except QuerySyntaxError as e:
+            raise QuerySyntaxError(f"第{line_no}行: {e}")
+    return changes
+
+
+class ForecastResult:
+    """预测结果（按物品列号排列的数组）"""
+    
+    def __init__(self, item_names: List[str], expected: np.ndarray, variance: np.ndarray,
+                 base_expected: np.ndarray, affected: np.ndarray, total_kills: float):
+        self.item_names = item_names
+        self.expected = expected  # 每日期望产出
+        self.variance = variance  # 每日产出的方差
+        self.base_expected = base_expected  # 不做修改时的期望产出
+        self.affected = affected  # 假设修改影响到的物品列号
+        self.total_kills = total_kills
+        self.unknown = []  # 数据中找不到的怪物或物品
+        self.elapsed = 0.0
+    
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+    
+    def interval(self, confidence: float = FORECAST_CONFIDENCE) -> Tuple[np.ndarray, np.ndarray]:
+        """每日产出的近似区间（正态近似，下限不小于0）"""
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        std = self.std
+        return np.maximum(self.expected - z * std, 0.0), self.expected + z * std
+    
+    def item(self, item_name: str) -> Optional[Tuple[float, float]]:
+        """单个物品的 (每日期望产出, 标准差)"""
+        try:
+            col_id = self.item_names.index(item_name)
+        except ValueError:
+            return None
+        return float(self.expected[col_id]), math.sqrt(self.variance[col_id])
+    
+    def order(self, affected_only: bool = False) -> np.ndarray:
+        """有产出的物品列号，按期望产出从高到低"""
+        columns = self.affected if affected_only else np.arange(len(self.item_names))
+        columns = columns[(self.expected[columns] > 0) | (self.base_expected[columns] > 0)]
+        return columns[np.argsort(-self.expected[columns], kind='stable')]
+    
+    def rows(self, columns: Optional[np.ndarray] = None, confidence: float = FORECAST_CONFIDENCE):
+        """显示和导出行: 物品名称, 每日期望, 标准差, 区间下限, 区间上限, 修改前, 变化"""
+        if columns is None:
+            columns = self.order()
+        low, high = self.interval(confidence)
+        std = self.std
+        for col_id in columns.tolist():
+            expected = self.expected[col_id]
+            base = self.base_expected[col_id]
+            change = f"{expected / base - 1:+.1%}" if base > 0 else ("新增" if expected > 0 else "")
+            yield [self.item_names[col_id], f"{expected:.4g}", f"{std[col_id]:.4g}", f"{low[col_id]:.4g}",
+                   f"{high[col_id]:.4g}", f"{base:.4g}", change if expected != base else ""]
+    
+    def describe(self) -> str:
+        producing = int(np.count_nonzero(self.expected))
+        text = f"每日击杀 {self.total_kills:,.0f}，有产出的物品 {producing} 个，每日期望产出 {self.expected.sum():,.1f} 件"
+        if len(self.affected):
+            text += f"，假设修改影响 {len(self.affected)} 个物品"
+        if self.unknown:
+            text += f"，数据中找不到: {', '.join(self.unknown[:10])}{' 等' if len(self.unknown) > 10 else ''}"
+        return text
+    
+    def export_csv(self, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event=None) -> bool:
+        try:
+            columns = self.order()
+            exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+            exporter.export(output_path, ["物品名称", "每日期望产出", "标准差", "区间下限", "区间上限", "修改前", "变化"],
+                            self.rows(columns), len(columns))
+            return True
+        except Exception as e:
+            logger.error(f"导出产出预测失败 {output_path}: {e}")
+            return False
+
+
+class EconomyForecast:
+    """全服物品产出预测
+
+    每次击杀每行掉落视为一次独立的伯努利试验，物品每日产出的期望和方差
+    由爆率矩阵（及同结构的方差矩阵）转置乘以每日击杀向量一次算出。
+    假设修改只重新计算受影响的物品列: 修改击杀数影响该怪物掉落的物品，
+    修改爆率影响该物品；其余物品直接沿用基准结果。
+    """
+    
+    def __init__(self, parser, kills: Dict[str, float], poisson_kills: bool = False):
+        """
+        :param kills: {怪物名: 每日击杀数}，名称按规范化后的写法对应到数据中的怪物
+        :param poisson_kills: 每日击杀数本身有波动（按泊松分布计入方差），否则视为固定值
+        """
+        self.parser = parser
+        self.matrix = parser.get_drop_matrix()
+        self.poisson_kills = poisson_kills
+        self.unknown_monsters = []
+        
+        resolve = NameResolver.monsters(parser)
+        self.kills = np.zeros(self.matrix.shape[0])
+        for name, count in kills.items():
+            row_id = self.matrix.monster_ids.get(resolve(name))
+            if row_id is None:
+                self.unknown_monsters.append(name)
+            else:
+                self.kills[row_id] += count
+        
+        indptr, self._indices, self._data = self.matrix.csr()
+        self._indptr = indptr
+        self._row_of_nnz = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        self._variances = self.matrix.csr_variances()
+        self._csc_indptr, self._csc_rows, self._csc_data = self.matrix.csc()
+        self._csc_variances = self._variances[self.matrix.csc_positions()]
+        
+        start = time.perf_counter()
+        self.base_expected = self.matrix.rmatvec(self.kills)
+        self.base_variance = self.matrix.rmatvec_variance(self.kills)
+        if poisson_kills:
+            squares = self._data * self._data * self.kills[self._row_of_nnz]
+            self.base_variance += np.bincount(self._indices, weights=squares, minlength=self.matrix.shape[1])
+        logger.info(f"产出预测基准: {self.matrix.shape[0]} 个怪物 x {self.matrix.shape[1]} 个物品, "
+                    f"耗时{(time.perf_counter() - start) * 1000:.1f}毫秒")
+    
+    def baseline(self) -> ForecastResult:
+        result = ForecastResult(self.matrix.item_names, self.base_expected, self.base_variance, self.base_expected,
+                                np.zeros(0, dtype=np.int64), float(self.kills.sum()))
+        result.unknown = list(self.unknown_monsters)
+        return result
+    
+    def evaluate(self, changes: List[ScenarioChange]) -> ForecastResult:
+        """按假设修改重新计算受影响的物品"""
+        start = time.perf_counter()
+        matrix = self.matrix
+        unknown = list(self.unknown_monsters)
+        resolve_monster = NameResolver.monsters(self.parser)
+        resolve_item = NameResolver.items(self.parser)
+        
+        # 击杀数修改
+        kills = self.kills.copy()
+        changed_rows = set()
+        rate_changes = []  # [(列号, 行号或None, 操作)]
+        for change in changes:
+            if change.kind == CHANGE_KILLS:
+                row_id = matrix.monster_ids.get(resolve_monster(change.name))
+                if row_id is None:
+                    unknown.append(change.name)
+                    continue
+                kills[row_id] = max(0.0, change.operation.apply_value(kills[row_id]))
+                changed_rows.add(row_id)
+            else:
+                col_id = matrix.item_ids.get(resolve_item(change.name))
+                row_id = None
+                if change.monster_name:
+                    row_id = matrix.monster_ids.get(resolve_monster(change.monster_name))
+                    if row_id is None:
+                        unknown.append(change.monster_name)
+                        continue
+                if col_id is None:
+                    unknown.append(change.name)
+                    continue
+                rate_changes.append((col_id, row_id, change.operation))
+        
+        columns = {col_id for col_id, _, _ in rate_changes}
+        for row_id in changed_rows:
+            columns.update(self._indices[self._indptr[row_id]:self._indptr[row_id + 1]].tolist())
+        affected = np.array(sorted(columns), dtype=np.int64)
+        
+        expected = self.base_expected.copy()
+        variance = self.base_variance.copy()
+        if len(affected):
+            # 取出受影响列的全部元素（CSC 中按列连续存放）
+            starts = self._csc_indptr[affected]
+            lengths = self._csc_indptr[affected + 1] - starts
+            offsets = np.zeros(len(affected) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+            rows = self._csc_rows[positions]
+            means = self._csc_data[positions].copy()
+            variances = self._csc_variances[positions].copy()
+            
+            column_number = {col_id: number for number, col_id in enumerate(affected.tolist())}
+            for col_id, row_id, operation in rate_changes:
+                number = column_number[col_id]
+                segment = slice(offsets[number], offsets[number + 1])
+                if row_id is not None:
+                    hits = np.flatnonzero(rows[segment] == row_id) + offsets[number]
+                    if not len(hits):
+                        unknown.append(f"{matrix.item_names[col_id]}@{matrix.monster_names[row_id]}")
+                        continue
+                    segment = hits
+                means[segment], variances[segment] = apply_rate_operation(means[segment], variances[segment],
+                                                                          operation)
+            
+            weights = kills[rows]
+            segment_ids = np.repeat(np.arange(len(affected)), lengths)
+            moments = variances + means * means if self.poisson_kills else variances
+            expected[affected] = np.bincount(segment_ids, weights=weights * means, minlength=len(affected))
+            variance[affected] = np.bincount(segment_ids, weights=weights * moments, minlength=len(affected))
+        
+        result = ForecastResult(matrix.item_names, expected, variance, self.base_expected, affected, float(kills.sum()))
+        result.unknown = unknown
+        result.elapsed = time.perf_counter() - start
+        logger.info(f"产出预测: {len(changes)} 条假设修改, 重新计算 {len(affected)} 个物品, "
+                    f"耗时{result.elapsed * 1000:.1f}毫秒")
+        return result
+
+
+def apply_rate_operation(means: np.ndarray, variances: np.ndarray,
+                         operation: RateOperation) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    修改爆率后的每次击杀期望和方差
+    期望与方差由同一怪物同一物品的各掉落行累加而来。按比例修改时各行爆率同乘一个系数 f，
+    则期望为 f*m，方差为 f*m - f²*(m - v)；只有一行的掉落按单行计算并限制在0~1。
+    设为指定爆率时视为只剩一行该爆率的掉落。
+    """
+    if operation.kind == RateOperation.SET:
+        rate = np.full_like(means, operation.value)
+        return rate, rate * (1.0 - rate)
+    
+    factor = operation.value if operation.kind == RateOperation.MULTIPLY else 1.0 / operation.value
+    single = np.isclose(variances, means * (1.0 - means), rtol=1e-9, atol=1e-15)
+    new_means = means * factor
+    new_variances = np.maximum(factor * means - factor * factor * (means - variances), 0.0)
+    single_means = np.clip(new_means, 0.0, 1.0)
+    new_means = np.where(single, single_means, new_means)
+    new_variances = np.where(single, single_means * (1.0 - single_means), new_variances)
+    return new_means, new_variances
@@ -0,0 +1,160 @@
+# src/farm_optimizer.py
+"""
+刷怪推荐：按物品清单为怪物排名
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+from typing import List, Tuple, Dict
+
+from config.constants import FARM_SCORE_EXPECTED, FARM_SCORE_ANY, FARM_TOP_N
+
+
+logger = logging.getLogger(__name__)
+
+
+class FarmTarget:
+    """一个推荐的刷怪目标"""
+    
+    def __init__(self, monster_name: str, expected_value: float, p_any: float, matched: List[Tuple[str, float]]):
+        self.monster_name = monster_name
+        self.expected_value = expected_value  # 每次击杀的加权期望掉落
+        self.p_any = p_any  # 每次击杀至少掉落一件清单物品的概率
+        self.matched = matched  # [(物品名, 爆率)]，按爆率从高到低
+    
+    @property
+    def kills_per_hit(self) -> float:
+        """平均多少次击杀命中一次清单物品"""
+        return 1 / self.p_any if self.p_any > 0 else float('inf')
+    
+    def __repr__(self):
+        return f"FarmTarget({self.monster_name}, EV={self.expected_value:.6f}, P={self.p_any:.6f})"
+
+
+class FarmOptimizer:
+    """刷怪推荐引擎
+
+    只遍历清单物品的倒排表（item_index），不掉落清单物品的怪物不会被访问；
+    合并爆率（同一怪物的重复掉落行合并后）低于阈值的物品直接剪枝。
+    - 期望模式: 分数 = Σ 权重 × 每次击杀的期望掉落数，期望数按各掉落行的爆率相加（不用合并后的至少一个概率）
+    - 概率模式: 分数 = 1 - ∏(1 - p)，#CHILD组内子物品互斥按组合并；
+      以 min(1, Σ爆率) 作为上界按从高到低精确计算，上界低于当前第N名时提前结束
+    """
+    
+    def __init__(self, parser):
+        self.parser = parser
+        self.last_stats = {}  # 最近一次排名的统计: 候选数、精确计算数
+    
+    @staticmethod
+    def _collect_candidates(snapshot, wishlist: Dict[str, float], min_rate: float) -> Dict[str, list]:
+        """按倒排表聚合候选怪物: {怪物名: [(物品名, 合并爆率, 权重)]}"""
+        candidates = defaultdict(list)
+        for item_name, weight in wishlist.items():
+            if weight <= 0:
+                continue
+            for monster_name, rate in snapshot.item_index.get(item_name, []):
+                if rate > 0 and rate >= min_rate:
+                    candidates[monster_name].append((item_name, rate, weight))
+        return candidates
+    
+    @staticmethod
+    def _expected_value(snapshot, monster_name: str, postings: list) -> float:
+        """每次击杀的加权期望掉落数: 各掉落行爆率（大于1按1计）乘以物品权重相加"""
+        monster_info = snapshot.drop_data.get(monster_name)
+        if monster_info is None:
+            return 0.0
+        
+        weights = {item_name: weight for item_name, _, weight in postings}
+        return sum(min(item.rate, 1.0) * weights[item.name] for item in monster_info.drop_items
+                   if item.name in weights and item.rate > 0)
+    
+    @staticmethod
+    def _exact_p_any(snapshot, monster_name: str, postings: list) -> float:
+        """
+        精确计算每次击杀至少掉落一件清单物品的概率
+        :param postings: 该怪物的候选 [(物品名, 合并爆率, 权重)]，已按合并爆率过滤，各掉落行不再单独过滤
+        """
+        monster_info = snapshot.drop_data.get(monster_name)
+        if monster_info is None:
+            return 0.0
+        
+        wanted = {item_name for item_name, _, _ in postings}
+        miss = 1.0
+        group_shares = defaultdict(float)
+        for item in monster_info.drop_items:
+            if item.name not in wanted or item.rate <= 0:
+                continue
+            if item.child_group is None:
+                miss *= 1 - min(item.rate, 1.0)
+            else:
+                # 同组子物品互斥，命中概率相加
+                group_shares[item.child_group] += item.rate
+        
+        for share in group_shares.values():
+            miss *= 1 - min(share, 1.0)
+        return 1 - miss
+    
+    @staticmethod
+    def _matched(postings) -> List[Tuple[str, float]]:
+        return sorted(((item_name, rate) for item_name, rate, _ in postings), key=lambda x: x[1], reverse=True)
+    
+    def rank(self, wishlist: Dict[str, float], top_n: int = FARM_TOP_N, score: str = FARM_SCORE_EXPECTED,
+             min_rate: float = 0.0) -> List[FarmTarget]:
+        """
+        为物品清单推荐刷怪目标
+        :param wishlist: {物品名: 权重}，权重 <= 0 的物品忽略
+        :param top_n: 返回的怪物数
+        :param score: FARM_SCORE_EXPECTED 或 FARM_SCORE_ANY
+        :param min_rate: 忽略爆率低于该值的掉落
+        :return: 按分数从高到低排列的 FarmTarget
+        """
+        if top_n <= 0:
+            return []
+        
+        snapshot = self.parser.snapshot()
+        candidates = self._collect_candidates(snapshot, wishlist, min_rate)
+        wanted = {name for name, weight in wishlist.items() if weight > 0}
+        
+        if score == FARM_SCORE_ANY:
+            results = self._rank_by_probability(snapshot, candidates, top_n)
+        else:
+            expected = {monster_name: self._expected_value(snapshot, monster_name, postings)
+                        for monster_name, postings in candidates.items()}
+            best = heapq.nlargest(top_n, expected.items(), key=lambda x: x[1])
+            results = [
+                FarmTarget(monster_name, value, self._exact_p_any(snapshot, monster_name, candidates[monster_name]),
+                           self._matched(candidates[monster_name]))
+                for monster_name, value in best
+            ]
+            self.last_stats = {'candidates': len(candidates), 'evaluated': len(results)}
+        
+        logger.info(f"刷怪推荐: {len(wanted)} 个物品, {self.last_stats['candidates']} 个候选怪物, "
+                    f"精确计算 {self.last_stats['evaluated']} 个")
+        return results
+    
+    def _rank_by_probability(self, snapshot, candidates: Dict[str, list], top_n: int) -> List[FarmTarget]:
+        # 并集上界: P(任一命中) <= Σ p
+        bounds = sorted(((min(1.0, sum(rate for _, rate, _ in postings)), monster_name)
+                         for monster_name, postings in candidates.items()), reverse=True)
+        
+        heap = []  # 最小堆，保留当前前N名 (概率, 怪物名)
+        evaluated = 0
+        for bound, monster_name in bounds:
+            if len(heap) >= top_n and bound <= heap[0][0]:
+                break
+            p_any = self._exact_p_any(snapshot, monster_name, candidates[monster_name])
+            evaluated += 1
+            if len(heap) < top_n:
+                heapq.heappush(heap, (p_any, monster_name))
+            elif p_any > heap[0][0]:
+                heapq.heapreplace(heap, (p_any, monster_name))
+        
+        self.last_stats = {'candidates': len(candidates), 'evaluated': evaluated}
+        
+        results = []
+        for p_any, monster_name in sorted(heap, reverse=True):
+            postings = candidates[monster_name]
+            results.append(FarmTarget(monster_name, self._expected_value(snapshot, monster_name, postings), p_any,
+                                      self._matched(postings)))
+        return results
@@ -0,0 +1,185 @@
+# src/fuzzy_index.py
+"""
+模糊名称搜索（编辑距离容错）与疑似重复名称检测
+"""
+
+import logging
+from collections import defaultdict
+from typing import List, Tuple, Iterable, Optional, Set, Callable
+
+from config.constants import FUZZY_MAX_DISTANCE, DUPLICATE_MAX_DISTANCE, DUPLICATE_MIN_LENGTH
+
+
+logger = logging.getLogger(__name__)
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    编辑距离（插入、删除、替换各计1）
+    :param limit: 给定时，距离超过limit后提前返回 limit + 1
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+    
+    previous = list(range(len(b) + 1))
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch_a != ch_b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def default_max_distance(query: str) -> int:
+    """按查询长度给出默认的容错距离: 4个字以内容错1个字，更长的容错2个字"""
+    return min(FUZZY_MAX_DISTANCE, 1 if len(query) <= 4 else 2)
+
+
+def deletion_variants(text: str, max_deletions: int) -> Set[str]:
+    """删除至多 max_deletions 个字符得到的全部字符串（含原串）"""
+    variants = {text}
+    level = {text}
+    for _ in range(max_deletions):
+        level = {word[:i] + word[i + 1:] for word in level for i in range(len(word))} - variants
+        if not level:
+            break
+        variants |= level
+    return variants
+
+
+class FuzzyIndex:
+    """名称模糊搜索索引（对称删除法，按规范化后的键匹配）
+
+    编辑距离不超过 k 的两个字符串，各自删除至多 k 个字符后必有一个相同的结果。
+    建索引时为每个名称预先生成删除变体并建立倒排表，查询时只生成查询词自身的删除变体去查表，
+    命中的候选再用编辑距离精确校验——查询代价只与查询词长度有关，与名称总数无关。
+    物品名和怪物名都很短（多为2~8个字），变体数量可控。
+    """
+    
+    def __init__(self, names: Iterable[str] = (), max_distance: int = FUZZY_MAX_DISTANCE,
+                 normalizer: Callable[[str], str] = str.casefold):
+        self.max_distance = max_distance  # 索引支持的最大编辑距离
+        self.normalizer = normalizer  # 名称和查询词共用的规范化函数
+        self._keys = []  # List[str]，下标即名称ID（规范化后的键）
+        self._names = {}  # {键: [原始名称]}
+        self._variants = defaultdict(list)  # {删除变体: [名称ID]}
+        self.last_candidates = 0  # 最近一次查询校验的候选数
+        for name in names:
+            self.add(name)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def add(self, name: str, key: Optional[str] = None) -> bool:
+        """
+        加入一个名称，键已存在时返回False
+        :param key: 预先计算的键，None时由normalizer计算
+        """
+        if key is None:
+            key = self.normalizer(name)
+        originals = self._names.get(key)
+        if originals is not None:
+            if name not in originals:
+                originals.append(name)
+            return False
+        
+        self._names[key] = [name]
+        key_id = len(self._keys)
+        self._keys.append(key)
+        for variant in deletion_variants(key, self.max_distance):
+            self._variants[variant].append(key_id)
+        return True
+    
+    def search_keys(self, key: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        查找与键 key 编辑距离不超过 max_distance 的已索引名称
+        :return: [(距离, 键)]，按距离、键排序
+        """
+        max_distance = min(max_distance, self.max_distance)
+        candidates = set()
+        for variant in deletion_variants(key, max_distance):
+            candidates.update(self._variants.get(variant, ()))
+        self.last_candidates = len(candidates)
+        
+        results = []
+        for key_id in candidates:
+            other = self._keys[key_id]
+            distance = edit_distance(key, other, max_distance)
+            if distance <= max_distance:
+                results.append((distance, other))
+        results.sort()
+        return results
+    
+    def search(self, query: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        模糊搜索
+        :param max_distance: 容错的编辑距离，None时按查询长度决定
+        :return: [(名称, 距离)]，距离越小越靠前
+        """
+        key = self.normalizer(query.strip())
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(key)
+        
+        results = []
+        for distance, matched in self.search_keys(key, max_distance):
+            results.extend((name, distance) for name in self._names[matched])
+        logger.debug(f"模糊搜索 '{query}': 校验 {self.last_candidates} 个候选, 找到 {len(results)} 个")
+        return results
+
+
+def find_near_duplicates(names: Iterable[str], max_distance: int = DUPLICATE_MAX_DISTANCE,
+                         min_length: int = DUPLICATE_MIN_LENGTH,
+                         normalizer: Callable[[str], str] = str.casefold) -> List[List[str]]:
+    """
+    一次遍历找出疑似重复的名称组
+    每个名称先在已加入的名称中查找近似名称再加入索引，相近的名称用并查集合并成组。
+    规范化后相同的名称（大小写、全角半角等）总是归为一组；
+    短于 min_length 的名称不参与近似匹配（短名称改一个字往往就是另一件物品）。
+    :return: [[名称]]，按组大小从大到小排列
+    """
+    parent = {}
+    
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+    
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    index = FuzzyIndex(max_distance=max_distance)
+    first_name = {}  # {键: 第一个原始名称}
+    for name in names:
+        if name in parent:
+            continue
+        parent[name] = name
+        key = normalizer(name)
+        if key in first_name:
+            union(name, first_name[key])
+            continue
+        first_name[key] = name
+        
+        if len(key) >= min_length:
+            for _, other_key in index.search_keys(key, max_distance):
+                union(name, first_name[other_key])
+            index.add(key, key)
+    
+    groups = defaultdict(list)
+    for name in parent:
+        groups[find(name)].append(name)
+    
+    result = [sorted(members) for members in groups.values() if len(members) > 1]
+    result.sort(key=lambda members: (-len(members), members[0]))
+    logger.info(f"疑似重复名称检测: {len(parent)} 个名称, {len(result)} 组")
+    return result
@@ -0,0 +1,156 @@
+# src/item_categories.py
+"""
+物品分类（规则文件 + 分类倒排索引）
+"""
+
+import os
+import re
+import json
+import logging
+from typing import List, Tuple, Dict, Optional, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "config", "item_categories.json")
+
+
+class ItemCategorizer:
+    """按规则文件为物品名分类
+
+    规则类型:
+    - items: 精确物品名，优先于所有关键字和正则
+    - keywords: 子串
+    - patterns: 正则表达式（在名称中搜索）
+    分类在文件中的先后顺序即优先级。全部关键字和正则编译为一个组合正则:
+        ^(?:.*?(?P<c0>分类0的规则)|.*?(?P<c1>分类1的规则)|...)
+    分支按顺序尝试，第一个能匹配的分支即优先级最高的分类，每个名称只需匹配一次。
+    名称和关键字都经过同一个规范化函数。
+    """
+    
+    def __init__(self, normalizer: Callable[[str], str] = str.casefold):
+        self.normalizer = normalizer
+        self.categories = []  # [(分类ID, 显示名称)]，按优先级
+        self.default_category = ('other', "其他")
+        self._exact = {}  # {规范化物品名: 分类ID}
+        self._matcher = None  # 组合正则
+        self._group_categories = {}  # {正则分组名: 分类ID}
+    
+    def load(self, path: str = DEFAULT_RULES_FILE) -> bool:
+        """从JSON规则文件加载"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except Exception as e:
+            logger.error(f"读取物品分类规则失败 {path}: {e}")
+            return False
+        return self.load_rules(rules)
+    
+    def load_rules(self, rules: dict) -> bool:
+        """加载规则（结构同规则文件）并编译组合正则"""
+        default = rules.get('default') or {}
+        self.default_category = (default.get('id', 'other'), default.get('name', "其他"))
+        self.categories = []
+        self._exact = {}
+        self._group_categories = {}
+        
+        branches = []
+        for number, category in enumerate(rules.get('categories', [])):
+            category_id = category.get('id')
+            if not category_id:
+                logger.warning(f"忽略缺少id的分类规则: {category}")
+                continue
+            self.categories.append((category_id, category.get('name', category_id)))
+            
+            for item_name in category.get('items', []):
+                self._exact.setdefault(self.normalizer(item_name), category_id)
+            
+            alternatives = [re.escape(self.normalizer(keyword)) for keyword in category.get('keywords', []) if keyword]
+            for pattern in category.get('patterns', []):
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    logger.warning(f"忽略无效的分类正则 [{category_id}] {pattern}: {e}")
+                    continue
+                alternatives.append(f"(?:{pattern})")
+            
+            if alternatives:
+                group = f"c{number}"
+                self._group_categories[group] = category_id
+                branches.append(f".*?(?P<{group}>{'|'.join(alternatives)})")
+        
+        if self.default_category[0] not in {category_id for category_id, _ in self.categories}:
+            self.categories.append(self.default_category)
+        
+        try:
+            self._matcher = re.compile(f"^(?:{'|'.join(branches)})", re.DOTALL) if branches else None
+        except re.error as e:
+            logger.error(f"编译物品分类规则失败: {e}")
+            self._matcher = None
+            return False
+        
+        logger.info(f"物品分类规则已加载: {len(self.categories)} 个分类, {len(self._exact)} 个指定物品")
+        return True
+    
+    def category_name(self, category_id: str) -> str:
+        for known_id, name in self.categories:
+            if known_id == category_id:
+                return name
+        return category_id
+    
+    def classify_key(self, key: str) -> str:
+        """按规范化后的物品名分类"""
+        category_id = self._exact.get(key)
+        if category_id is not None:
+            return category_id
+        if self._matcher is not None:
+            match = self._matcher.match(key)
+            if match:
+                return self._group_categories[match.lastgroup]
+        return self.default_category[0]
+    
+    def classify(self, item_name: str) -> str:
+        return self.classify_key(self.normalizer(item_name))
+
+
+class ItemCategoryIndex:
+    """物品分类倒排索引: 每个物品只在首次出现时分类一次"""
+    
+    def __init__(self, categorizer: ItemCategorizer):
+        self.categorizer = categorizer
+        self.item_category = {}  # {物品名: 分类ID}
+        self.postings = {}  # {分类ID: [物品名]}
+    
+    def clear(self):
+        self.item_category = {}
+        self.postings = {}
+    
+    def update(self, item_keys: Dict[str, str], previous: Optional[Dict[str, str]] = None):
+        """
+        按当前物品集合更新索引（已分类的物品沿用原分类）
+        :param item_keys: {物品名: 规范化后的物品名}
+        :param previous: 可沿用的已有分类 {物品名: 分类ID}，默认为本索引当前的分类
+        """
+        if previous is None:
+            previous = self.item_category
+        classify_key = self.categorizer.classify_key
+        self.item_category = {name: previous[name] if name in previous else classify_key(key)
+                              for name, key in item_keys.items()}
+        
+        postings = {category_id: [] for category_id, _ in self.categorizer.categories}
+        for name, category_id in self.item_category.items():
+            postings.setdefault(category_id, []).append(name)
+        self.postings = postings
+    
+    def category_of(self, item_name: str) -> Optional[str]:
+        return self.item_category.get(item_name)
+    
+    def items(self, category_id: str) -> List[str]:
+        return self.postings.get(category_id, [])
+    
+    def counts(self) -> List[Tuple[str, str, int]]:
+        """各分类的物品数: [(分类ID, 显示名称, 物品数)]，按规则顺序"""
+        return [(category_id, name, len(self.postings.get(category_id, [])))
+                for category_id, name in self.categorizer.categories]
@@ -0,0 +1,368 @@
+# src/log_ingest.py
+"""
+服务器掉落日志统计（实际掉落与配置爆率对比）
+"""
+
+import os
+import re
+import mmap
+import time
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Optional, Callable, Iterable
+
+from config.constants import (ENCODING, LOG_KILL_PATTERN, LOG_DROP_PATTERN, LOG_CHUNK_SIZE, LOG_WORKERS,
+                              LOG_SIGNIFICANCE)
+from src.data_exporter import CsvExporter
+from src.utils.rate_utils import binomial_test, binomial_interval, adjust_p_values
+
+
+logger = logging.getLogger(__name__)
+
+
+DEVIATION_HIGH = 'high'  # 实际偏高
+DEVIATION_LOW = 'low'  # 实际偏低
+DEVIATION_UNCONFIGURED = 'unconfigured'  # 掉落了未配置的物品
+DEVIATION_NONE = ''
+
+DEVIATION_LABELS = {
+    DEVIATION_HIGH: "偏高",
+    DEVIATION_LOW: "偏低",
+    DEVIATION_UNCONFIGURED: "未配置",
+    DEVIATION_NONE: "",
+}
+
+
+class LogFormat:
+    """日志格式
+
+    击杀和掉落事件各用一个正则描述，分组 monster / item 分别为怪物名和物品名，逐行匹配。
+    正则按日志编码转成字节串后直接在文件内容上匹配，只对匹配到的名称解码。
+    """
+    
+    def __init__(self, kill_pattern: str = LOG_KILL_PATTERN, drop_pattern: str = LOG_DROP_PATTERN,
+                 encoding: str = ENCODING):
+        self.kill_pattern = kill_pattern
+        self.drop_pattern = drop_pattern
+        self.encoding = encoding
+    
+    @classmethod
+    def from_settings(cls, settings, encoding: Optional[str] = None) -> 'LogFormat':
+        """按应用设置中的日志格式创建"""
+        return cls(settings.get('log_kill_pattern', LOG_KILL_PATTERN),
+                   settings.get('log_drop_pattern', LOG_DROP_PATTERN),
+                   encoding or settings.get('log_encoding', ENCODING))
+    
+    def compiled(self) -> Tuple[bytes, bytes]:
+        """字节串形式的正则（可传给子进程），格式无效时抛出 ValueError"""
+        patterns = []
+        for pattern, groups in ((self.kill_pattern, ('monster',)), (self.drop_pattern, ('monster', 'item'))):
+            try:
+                raw = pattern.encode(self.encoding)
+                compiled = re.compile(raw, re.MULTILINE)
+            except (UnicodeEncodeError, re.error) as e:
+                raise ValueError(f"无效的日志格式 {pattern}: {e}")
+            missing = [group for group in groups if group not in compiled.groupindex]
+            if missing:
+                raise ValueError(f"日志格式缺少分组 {', '.join(missing)}: {pattern}")
+            patterns.append(raw)
+        return patterns[0], patterns[1]
+
+
+def scan_log_range(path: str, start: int, end: int, kill_pattern: bytes,
+                   drop_pattern: bytes) -> Tuple[Counter, Counter]:
+    """
+    统计日志文件 [start, end) 范围内的击杀和掉落（范围的起点必须是行首）
+    文件以内存映射方式读取，内存占用只与不同名称的数量有关，与日志大小无关
+    :return: ({怪物名字节串: 击杀数}, {(怪物名字节串, 物品名字节串): 掉落数})
+    """
+    kill_re = re.compile(kill_pattern, re.MULTILINE)
+    drop_re = re.compile(drop_pattern, re.MULTILINE)
+    
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return Counter(), Counter()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return (_count_matches(kill_re, data, start, end, ('monster',)),
+                    _count_matches(drop_re, data, start, end, ('monster', 'item')))
+
+
+def _count_matches(pattern, data, start: int, end: int, groups: Tuple[str, ...]) -> Counter:
+    """按分组计数；正则只含所需分组时用 findall 计数，不逐个创建匹配对象"""
+    if pattern.groups == len(groups):
+        found = pattern.findall(data, start, end)
+        if len(groups) == 1:
+            return Counter(found)
+        order = [pattern.groupindex[group] - 1 for group in groups]
+        if order == sorted(order):
+            return Counter(found)
+        return Counter(tuple(values[index] for index in order) for values in found)
+    
+    counts = Counter()
+    for match in pattern.finditer(data, start, end):
+        counts[match.group(*groups)] += 1
+    return counts
+
+
+def split_log_ranges(path: str, chunk_size: int = LOG_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """把日志文件按行边界切成大约 chunk_size 字节的范围"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    
+    ranges = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                newline = data.find(b'\n', end)
+                end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+class NameResolver:
+    """外部来源（日志、击杀表）中的名称对应到数据中的名称
+
+    先精确匹配，再按规范化后的搜索键匹配（全角半角、空格等写法差异），都匹配不上时保留原名。
+    """
+    
+    def __init__(self, names, keys: Dict[str, str], normalizer: Callable[[str], str]):
+        self.names = names
+        self.by_key = {key: name for name, key in keys.items()}
+        self.normalizer = normalizer
+    
+    @classmethod
+    def monsters(cls, parser) -> 'NameResolver':
+        return cls(parser.drop_data, parser.monster_keys, parser.normalize_name)
+    
+    @classmethod
+    def items(cls, parser) -> 'NameResolver':
+        return cls(parser.item_index, parser.item_keys, parser.normalize_name)
+    
+    def __call__(self, name: str) -> str:
+        if name in self.names:
+            return name
+        return self.by_key.get(self.normalizer(name), name)
+
+
+class RateDeviation:
+    """一个 (怪物, 物品) 的实际掉落与配置爆率对比"""
+    
+    def __init__(self, monster_name: str, item_name: str, kills: int, drops: int, configured_rate: float,
+                 p_value: float):
+        self.monster_name = monster_name
+        self.item_name = item_name
+        self.kills = kills
+        self.drops = drops  # 掉落事件数
+        self.configured_rate = configured_rate  # 配置的每次击杀掉落概率（多行已合并）
+        self.p_value = p_value
+        self.q_value = p_value  # 多重检验校正后的p值
+        self.deviation = DEVIATION_NONE
+    
+    @property
+    def observed_rate(self) -> float:
+        return self.drops / self.kills if self.kills else 0.0
+    
+    @property
+    def expected_drops(self) -> float:
+        return self.kills * self.configured_rate
+    
+    @property
+    def ratio(self) -> Optional[float]:
+        """实际爆率 / 配置爆率"""
+        return self.observed_rate / self.configured_rate if self.configured_rate > 0 else None
+    
+    def interval(self, confidence: float = 0.95) -> Tuple[float, float]:
+        return binomial_interval(self.drops, self.kills, confidence)
+
+
+class DropLogReport:
+    """掉落日志对比结果"""
+    
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.rows = []  # List[RateDeviation]，显著偏差在前
+        self.unknown_monsters = []  # [(日志中的怪物名, 击杀数)]，数据中没有的怪物
+        self.orphan_drops = 0  # 没有击杀记录的怪物的掉落事件数
+        self.total_kills = 0
+        self.total_drops = 0
+    
+    def significant(self) -> List[RateDeviation]:
+        return [row for row in self.rows if row.deviation != DEVIATION_NONE]
+    
+    def describe(self) -> str:
+        counts = Counter(row.deviation for row in self.rows)
+        parts = [f"{DEVIATION_LABELS[kind]} {counts[kind]}"
+                 for kind in (DEVIATION_HIGH, DEVIATION_LOW, DEVIATION_UNCONFIGURED) if counts[kind]]
+        text = (f"击杀 {self.total_kills}，掉落 {self.total_drops}，检验 {len(self.rows)} 个怪物物品组合，"
+                f"显著偏差: {', '.join(parts) if parts else '无'}（错误发现率 {self.alpha:g}）")
+        if self.unknown_monsters:
+            text += f"，数据中没有的怪物 {len(self.unknown_monsters)} 个"
+        return text
+    
+    def export_rows(self):
+        for row in self.rows:
+            yield [row.monster_name, row.item_name, row.kills, row.drops, f"{row.configured_rate:.8g}",
+                   f"{row.observed_rate:.8g}", f"{row.ratio:.4g}" if row.ratio is not None else "",
+                   f"{row.p_value:.3g}", f"{row.q_value:.3g}", DEVIATION_LABELS[row.deviation]]
+    
+    def export_csv(self, output_path: str, progress_callback: Optional[Callable[[int, int], None]] = None,
+                   cancel_event=None) -> bool:
+        try:
+            exporter = CsvExporter(progress_callback=progress_callback, cancel_event=cancel_event)
+            exporter.export(output_path, ["怪物名称", "物品名称", "击杀数", "掉落数", "配置爆率", "实际爆率", "倍数",
+                                          "p值", "校正p值", "结论"], self.export_rows(), len(self.rows))
+            return True
+        except Exception as e:
+            logger.error(f"导出日志对比失败 {output_path}: {e}")
+            return False
+
+
+class DropLogIngestor:
+    """掉落日志统计
+
+    日志按行边界切块后由多个进程并行扫描（内存映射，不整体读入），
+    各块只返回 (怪物, 物品) 计数，合并后与爆率数据对比。
+    可以多次调用 ingest 累加多个日志文件。
+    """
+    
+    def __init__(self, log_format: Optional[LogFormat] = None, workers: int = LOG_WORKERS,
+                 chunk_size: int = LOG_CHUNK_SIZE):
+        self.log_format = log_format or LogFormat()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.kills = Counter()  # {怪物名: 击杀数}
+        self.drops = Counter()  # {(怪物名, 物品名): 掉落数}
+        self.files = []  # 已统计的日志文件
+        self.bytes_scanned = 0
+        self.elapsed = 0.0
+    
+    def ingest(self, paths: Iterable[str], progress_callback: Optional[Callable[[int, int], None]] = None,
+               cancel_event=None) -> bool:
+        """统计日志文件，进度以字节计；取消时已完成的块仍计入结果"""
+        start = time.perf_counter()
+        kill_pattern, drop_pattern = self.log_format.compiled()
+        
+        tasks = []
+        for path in paths:
+            try:
+                tasks.extend((path, range_start, range_end) for range_start, range_end
+                             in split_log_ranges(path, self.chunk_size))
+            except OSError as e:
+                logger.error(f"读取日志失败 {path}: {e}")
+                return False
+            self.files.append(path)
+        total = sum(end - begin for _, begin, end in tasks)
+        
+        raw_kills, raw_drops = Counter(), Counter()
+        done = 0
+        
+        def merge(task, result):
+            nonlocal done
+            raw_kills.update(result[0])
+            raw_drops.update(result[1])
+            done += task[2] - task[1]
+            self.bytes_scanned += task[2] - task[1]
+            if progress_callback:
+                progress_callback(done, total)
+        
+        try:
+            if self.workers <= 1 or len(tasks) <= 1:
+                for task in tasks:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    merge(task, scan_log_range(*task, kill_pattern, drop_pattern))
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+                    futures = {executor.submit(scan_log_range, *task, kill_pattern, drop_pattern): task
+                               for task in tasks}
+                    for future in as_completed(futures):
+                        merge(futures[future], future.result())
+                        if cancel_event is not None and cancel_event.is_set():
+                            for pending in futures:
+                                pending.cancel()
+                            break
+        except Exception as e:
+            logger.error(f"统计掉落日志失败: {e}")
+            return False
+        
+        # 名称只在合并后解码一次
+        encoding = self.log_format.encoding
+        for monster, count in raw_kills.items():
+            self.kills[monster.decode(encoding, errors='replace').strip()] += count
+        for (monster, item), count in raw_drops.items():
+            self.drops[monster.decode(encoding, errors='replace').strip(),
+                       item.decode(encoding, errors='replace').strip()] += count
+        
+        self.elapsed += time.perf_counter() - start
+        logger.info(f"掉落日志统计: {len(tasks)} 块, {done} 字节, 击杀 {sum(raw_kills.values())}, "
+                    f"掉落 {sum(raw_drops.values())}, 耗时{time.perf_counter() - start:.2f}秒")
+        return True
+    
+    def resolved_kills(self, parser, resolver: Optional['NameResolver'] = None) -> Counter:
+        """按数据中的怪物名合并的击杀数"""
+        resolver = resolver or NameResolver.monsters(parser)
+        kills = Counter()
+        for monster_name, count in self.kills.items():
+            kills[resolver(monster_name)] += count
+        return kills
+    
+    def compare(self, parser, alpha: float = LOG_SIGNIFICANCE) -> DropLogReport:
+        """
+        与爆率数据对比，对每个 (怪物, 物品) 做双侧二项检验并按错误发现率校正
+        怪物名、物品名先精确匹配，再按规范化后的搜索键匹配（全角半角、空格等写法差异）。
+        日志按掉落事件计数，与配置中每次击杀至少掉落一个的概率比较；
+        同一物品一次击杀掉落多个时计数会略高于该概率。
+        """
+        report = DropLogReport(alpha)
+        resolve_monster = NameResolver.monsters(parser)
+        resolve_item = NameResolver.items(parser)
+        
+        kills = self.resolved_kills(parser, resolve_monster)
+        observed = {}  # {怪物名: Counter(物品名: 掉落数)}
+        for (monster_name, item_name), count in self.drops.items():
+            monster_name = resolve_monster(monster_name)
+            item_name = resolve_item(item_name)
+            observed.setdefault(monster_name, Counter())[item_name] += count
+        report.total_kills = sum(kills.values())
+        report.total_drops = sum(self.drops.values())
+        
+        for monster_name, monster_drops in observed.items():
+            if not kills.get(monster_name):
+                report.orphan_drops += sum(monster_drops.values())
+        
+        tests = {}  # 击杀数相同的怪物、相同的常见爆率会重复出现，检验结果按参数缓存
+        for monster_name, kill_count in kills.items():
+            monster_info = parser.drop_data.get(monster_name)
+            if monster_info is None:
+                report.unknown_monsters.append((monster_name, kill_count))
+                continue
+            
+            configured = dict(monster_info.get_combined_drops())
+            monster_drops = observed.get(monster_name, Counter())
+            for item_name in list(configured) + [item for item in monster_drops if item not in configured]:
+                rate = configured.get(item_name, 0.0)
+                drop_count = monster_drops.get(item_name, 0)
+                key = (drop_count, kill_count, rate)
+                p_value = tests.get(key)
+                if p_value is None:
+                    p_value = tests[key] = binomial_test(drop_count, kill_count, rate)
+                report.rows.append(RateDeviation(monster_name, item_name, kill_count, drop_count, rate, p_value))
+        
+        for row, q_value in zip(report.rows, adjust_p_values([row.p_value for row in report.rows])):
+            row.q_value = q_value
+            if row.configured_rate <= 0 and row.drops > 0:
+                row.deviation = DEVIATION_UNCONFIGURED
+            elif q_value < alpha:
+                row.deviation = DEVIATION_HIGH if row.observed_rate > row.configured_rate else DEVIATION_LOW
+        
+        report.rows.sort(key=lambda row: (row.deviation == DEVIATION_NONE, row.q_value, row.monster_name))
+        report.unknown_monsters.sort(key=lambda entry: -entry[1])
+        logger.info(f"掉落日志对比: {report.describe()}")
+        return report
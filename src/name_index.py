@@ -0,0 +1,106 @@
+# src/name_index.py
+"""
+名称n-gram索引（子串 / 通配符匹配）
+"""
+
+import re
+import fnmatch
+import logging
+from typing import List, Set, Iterable, Optional, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+WILDCARD_PATTERN = re.compile(r'[*?]')
+
+
+def has_wildcard(pattern: str) -> bool:
+    return bool(WILDCARD_PATTERN.search(pattern))
+
+
+class NGramIndex:
+    """名称的一元/二元gram倒排索引
+
+    中文物品名和怪物名都很短，同时保存一元和二元gram：
+    - 长度 >= 2 的字面量取其全部二元gram的倒排表求交集
+    - 单个字符直接用一元gram的倒排表
+    候选结果再做一次精确校验，因此索引只负责缩小范围，不会漏掉结果。
+    名称和查询词经过同一个规范化函数（默认只忽略大小写）后再匹配。
+    """
+    
+    def __init__(self, names: Iterable[str] = (), normalizer: Callable[[str], str] = str.casefold):
+        self.normalizer = normalizer
+        self.names = []  # List[str]，下标即名称ID
+        self._keys = []  # 匹配用的规范化名称
+        self._postings = {}  # {gram: [名称ID]}，ID递增
+        for name in names:
+            self.add(name)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+    
+    def add(self, name: str, key: Optional[str] = None) -> int:
+        """加入名称，key为预先计算的规范化名称"""
+        name_id = len(self.names)
+        if key is None:
+            key = self.normalizer(name)
+        self.names.append(name)
+        self._keys.append(key)
+        for gram in self._grams(key):
+            self._postings.setdefault(gram, []).append(name_id)
+        return name_id
+    
+    def _literal_candidates(self, literal: str) -> Optional[Set[int]]:
+        """包含字面量的候选名称ID（None表示不限）"""
+        if not literal:
+            return None
+        if len(literal) == 1:
+            grams = [literal]
+        else:
+            grams = [literal[i:i + 2] for i in range(len(literal) - 1)]
+        
+        # 从最短的倒排表开始求交集
+        postings = sorted((self._postings.get(gram, []) for gram in set(grams)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return candidates
+    
+    def _candidates(self, pattern: str) -> Optional[Set[int]]:
+        candidates = None
+        for literal in WILDCARD_PATTERN.split(self.normalizer(pattern)):
+            literal_candidates = self._literal_candidates(literal)
+            if literal_candidates is None:
+                continue
+            candidates = literal_candidates if candidates is None else candidates & literal_candidates
+        return candidates
+    
+    def estimate(self, pattern: str) -> int:
+        """匹配数的上界（不做精确校验）"""
+        candidates = self._candidates(pattern)
+        return len(self.names) if candidates is None else len(candidates)
+    
+    def match(self, pattern: str) -> List[str]:
+        """
+        匹配名称
+        :param pattern: 含 * 或 ? 时按通配符整体匹配，否则按子串匹配
+        :return: 匹配的名称，按原始顺序
+        """
+        candidates = self._candidates(pattern)
+        ids = range(len(self.names)) if candidates is None else sorted(candidates)
+        
+        key = self.normalizer(pattern)
+        if has_wildcard(key):
+            # 方括号按普通字符处理
+            regex = re.compile(fnmatch.translate(key.replace('[', '[[]')), re.DOTALL)
+            return [self.names[i] for i in ids if regex.match(self._keys[i])]
+        return [self.names[i] for i in ids if key in self._keys[i]]
@@ -0,0 +1,207 @@
+# src/rate_index.py
+"""
+全局爆率排序索引（区间查询 / 最稀有、最常见掉落排行）
+"""
+
+import logging
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateIndex:
+    """按爆率升序排列的全部 (怪物, 物品) 掉落
+
+    每个 (怪物, 物品) 一条记录，爆率为合并后的每次击杀概率（与 item_index 一致）。
+    数据保存在三个并行的NumPy数组中（爆率 float64、怪物ID/物品ID int32），
+    千万级记录约占 16 字节/条。区间查询和排行均为二分查找 + 切片，不扫描全表。
+
+    增量维护: 修改先记入待处理队列，查询前统一合并——
+    删除用一次 np.isin 过滤，新增记录排序后用 searchsorted 插入，无需整体重排。
+    """
+    
+    def __init__(self):
+        self.monster_names = []  # List[str]
+        self.monster_ids = {}  # {怪物名: ID}
+        self.item_names = []  # List[str]
+        self.item_ids = {}  # {物品名: ID}
+        self.version = 0  # 每次修改加一
+        
+        self._rates = np.zeros(0, dtype=np.float64)
+        self._monsters = np.zeros(0, dtype=np.int32)
+        self._items = np.zeros(0, dtype=np.int32)
+        self._present = set()  # 索引中已有的怪物ID
+        
+        self._pending_removed = set()  # 待删除的怪物ID
+        self._pending_added = {}  # {怪物ID: [(物品ID, 爆率)]}
+    
+    @classmethod
+    def from_drop_data(cls, drop_data) -> 'RateIndex':
+        """由 {怪物名: MonsterDropInfo} 构建"""
+        index = cls()
+        for monster_info in drop_data.values():
+            index.set_monster(monster_info)
+        index.flush()
+        return index
+    
+    @staticmethod
+    def _intern(name: str, ids: dict, names: list) -> int:
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(names)
+            names.append(name)
+        return index
+    
+    # ------------------------------------------------------------------
+    # 增量维护
+    # ------------------------------------------------------------------
+    
+    def set_monster(self, monster_info):
+        """新增或替换一个怪物的全部掉落"""
+        monster_id = self._intern(monster_info.monster_name, self.monster_ids, self.monster_names)
+        if monster_id in self._present:
+            self._pending_removed.add(monster_id)
+        self._pending_added[monster_id] = [
+            (self._intern(item_name, self.item_ids, self.item_names), rate)
+            for item_name, rate in monster_info.get_combined_drops()
+        ]
+        self.version += 1
+    
+    def remove_monster(self, monster_name: str):
+        monster_id = self.monster_ids.get(monster_name)
+        if monster_id is None:
+            return
+        
+        changed = self._pending_added.pop(monster_id, None) is not None
+        if monster_id in self._present:
+            self._pending_removed.add(monster_id)
+            changed = True
+        if changed:
+            self.version += 1
+    
+    def clear(self):
+        self.monster_names.clear()
+        self.monster_ids.clear()
+        self.item_names.clear()
+        self.item_ids.clear()
+        self._rates = np.zeros(0, dtype=np.float64)
+        self._monsters = np.zeros(0, dtype=np.int32)
+        self._items = np.zeros(0, dtype=np.int32)
+        self._present = set()
+        self._pending_removed = set()
+        self._pending_added = {}
+        self.version += 1
+    
+    @property
+    def n_monsters(self) -> int:
+        return len((self._present - self._pending_removed) | set(self._pending_added))
+    
+    def flush(self):
+        """合并待处理的修改"""
+        if not self._pending_removed and not self._pending_added:
+            return
+        
+        rates, monsters, items = self._rates, self._monsters, self._items
+        
+        if self._pending_removed:
+            keep = ~np.isin(monsters, np.fromiter(self._pending_removed, dtype=np.int32))
+            rates, monsters, items = rates[keep], monsters[keep], items[keep]
+            self._present -= self._pending_removed
+        
+        if self._pending_added:
+            count = sum(len(entries) for entries in self._pending_added.values())
+            new_rates = np.empty(count, dtype=np.float64)
+            new_monsters = np.empty(count, dtype=np.int32)
+            new_items = np.empty(count, dtype=np.int32)
+            
+            pos = 0
+            for monster_id, entries in self._pending_added.items():
+                n = len(entries)
+                if n:
+                    new_monsters[pos:pos + n] = monster_id
+                    new_items[pos:pos + n], new_rates[pos:pos + n] = zip(*entries)
+                    pos += n
+            
+            order = np.argsort(new_rates, kind='stable')
+            new_rates, new_monsters, new_items = new_rates[order], new_monsters[order], new_items[order]
+            
+            if len(rates):
+                # 有序插入，代价与总量成线性关系
+                positions = np.searchsorted(rates, new_rates, side='right')
+                rates = np.insert(rates, positions, new_rates)
+                monsters = np.insert(monsters, positions, new_monsters)
+                items = np.insert(items, positions, new_items)
+            else:
+                rates, monsters, items = new_rates, new_monsters, new_items
+            
+            self._present |= set(self._pending_added)
+        
+        self._rates, self._monsters, self._items = rates, monsters, items
+        self._pending_removed = set()
+        self._pending_added = {}
+        logger.debug(f"爆率索引已更新: {len(self._rates)} 条记录")
+    
+    def __len__(self) -> int:
+        self.flush()
+        return len(self._rates)
+    
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    
+    def _rows(self, start: int, end: int, reverse: bool = False) -> List[Tuple[str, str, float]]:
+        if end <= start:
+            return []
+        if reverse:
+            selection = slice(end - 1, start - 1 if start > 0 else None, -1)
+        else:
+            selection = slice(start, end)
+        return [
+            (self.monster_names[m], self.item_names[i], r)
+            for m, i, r in zip(self._monsters[selection].tolist(), self._items[selection].tolist(),
+                               self._rates[selection].tolist())
+        ]
+    
+    def _bounds(self, low: Optional[float], high: Optional[float], include_low: bool,
+                include_high: bool) -> Tuple[int, int]:
+        self.flush()
+        start = 0 if low is None else int(np.searchsorted(self._rates, low, side='left' if include_low else 'right'))
+        end = len(self._rates) if high is None else \
+            int(np.searchsorted(self._rates, high, side='right' if include_high else 'left'))
+        return start, max(start, end)
+    
+    def count_range(self, low: Optional[float] = None, high: Optional[float] = None,
+                    include_low: bool = True, include_high: bool = True) -> int:
+        """爆率在区间内的记录数（只做二分查找）"""
+        start, end = self._bounds(low, high, include_low, include_high)
+        return end - start
+    
+    def range(self, low: Optional[float] = None, high: Optional[float] = None, limit: Optional[int] = None,
+              include_low: bool = True, include_high: bool = True,
+              descending: bool = False) -> List[Tuple[str, str, float]]:
+        """
+        查询爆率在 [low, high] 内的掉落
+        :param low: 下界，None表示不限
+        :param high: 上界，None表示不限
+        :param limit: 最多返回的条数
+        :param descending: 按爆率从高到低返回
+        :return: [(怪物名, 物品名, 爆率)]
+        """
+        start, end = self._bounds(low, high, include_low, include_high)
+        if limit is not None:
+            if descending:
+                start = max(start, end - limit)
+            else:
+                end = min(end, start + limit)
+        return self._rows(start, end, reverse=descending)
+    
+    def rarest(self, k: int) -> List[Tuple[str, str, float]]:
+        """爆率最低的k条（不含爆率为0的记录）"""
+        return self.range(low=0.0, include_low=False, limit=k)
+    
+    def most_common(self, k: int) -> List[Tuple[str, str, float]]:
+        """爆率最高的k条"""
+        return self.range(limit=k, descending=True)
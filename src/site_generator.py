@@ -0,0 +1,443 @@
+# src/site_generator.py
+"""
+静态掉落表网站生成（每个怪物、每个物品一个页面，附带离线搜索索引）
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from html import escape
+from functools import lru_cache
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple, Dict, Optional, Callable
+
+from config.constants import SITE_TITLE, SITE_WORKERS, SITE_BATCH_PAGES, SITE_SEARCH_LIMIT
+from src.data_exporter import RateFormatter, atomic_open
+from src.utils.file_utils import format_rate_display
+
+
+logger = logging.getLogger(__name__)
+
+
+SITE_MANIFEST = ".site-manifest.json"
+SITE_MANIFEST_VERSION = 1
+
+PAGE_MONSTER = 'monster'
+PAGE_ITEM = 'item'
+
+MONSTER_DIR = "monsters"
+ITEM_DIR = "items"
+ASSET_DIR = "assets"
+
+UNSAFE_FILENAME = re.compile(r'[<>:"/\\|?*%#\x00-\x1f]')
+RESERVED_FILENAMES = ({'con', 'prn', 'aux', 'nul'} | {f'com{i}' for i in range(1, 10)}
+                      | {f'lpt{i}' for i in range(1, 10)})  # Windows 保留的设备名
+MAX_FILENAME_CHARS = 60
+RATE_FORMATTER = RateFormatter()
+
+STYLE_CSS = """body { font-family: 'Microsoft YaHei', sans-serif; margin: 0; color: #2c3e50; background: #f5f6f7; }
+header { background: #2c3e50; padding: 10px 20px; }
+header a { color: #ecf0f1; text-decoration: none; font-weight: bold; }
+main { max-width: 960px; margin: 0 auto; padding: 10px 20px 40px; background: #fff; }
+h1 { border-bottom: 2px solid #3498db; padding-bottom: 5px; }
+table { width: 100%; border-collapse: collapse; }
+th, td { padding: 6px; border: 1px solid #ddd; text-align: left; }
+th { background: #f9f9f9; }
+td.rate { color: #e74c3c; }
+a { color: #2980b9; }
+.meta { color: #7f8c8d; }
+#search { width: 100%; padding: 8px; font-size: 16px; box-sizing: border-box; }
+#results { list-style: none; padding: 0; }
+#results li { padding: 4px 0; }
+.kind { display: inline-block; width: 3em; color: #7f8c8d; }
+ul.names { columns: 4; }
+"""
+
+SEARCH_JS = """(function () {
+  var LIMIT = %(limit)d;
+  var data = window.DROP_SEARCH_INDEX;
+  var input = document.getElementById('search');
+  var results = document.getElementById('results');
+  function norm(text) {
+    return text.normalize('NFKC').replace(/\\s+/g, ' ').trim().toLowerCase();
+  }
+  function expand(list, dir, kind) {
+    return list.map(function (entry) {
+      if (typeof entry === 'string') { entry = [entry]; }
+      var name = entry[0];
+      var plain = norm(name);
+      return {name: name, kind: kind, key: entry[2] || plain, plain: plain,
+              url: dir + '/' + encodeURIComponent(entry[1] || name) + '.html'};
+    });
+  }
+  // 索引键经过解析器的名称规范化（标点、空格、繁简），浏览器端只做NFKC和小写，
+  // 因此查询同时与索引键和名称本身比较，按显示的名称原样输入也能找到
+  function find(entry, query) {
+    var position = entry.key.indexOf(query);
+    if (position !== 0 && entry.plain !== entry.key) {
+      var other = entry.plain.indexOf(query);
+      if (other === 0 || position < 0) { position = other; }
+    }
+    return position;
+  }
+  var entries = expand(data.items, '%(item_dir)s', '物品').concat(expand(data.monsters, '%(monster_dir)s', '怪物'));
+  function search() {
+    var query = norm(input.value);
+    results.innerHTML = '';
+    if (!query) { return; }
+    var prefix = [], other = [];
+    for (var i = 0; i < entries.length && prefix.length < LIMIT; i++) {
+      var position = find(entries[i], query);
+      if (position === 0) { prefix.push(entries[i]); } else if (position > 0) { other.push(entries[i]); }
+    }
+    prefix.concat(other).slice(0, LIMIT).forEach(function (entry) {
+      var li = document.createElement('li');
+      var kind = document.createElement('span');
+      kind.className = 'kind';
+      kind.textContent = entry.kind;
+      var link = document.createElement('a');
+      link.href = entry.url;
+      link.textContent = entry.name;
+      li.appendChild(kind);
+      li.appendChild(link);
+      results.appendChild(li);
+    });
+  }
+  input.addEventListener('input', search);
+  var match = /[?&]q=([^&]*)/.exec(window.location.search);
+  if (match) { input.value = decodeURIComponent(match[1].replace(/\\+/g, ' ')); }
+  search();
+})();
+"""
+
+
+def page_file_names(names) -> Dict[str, str]:
+    """
+    为名称分配页面文件名（不含扩展名）
+    名称可以直接作文件名时原样使用；含有文件名不允许的字符、过长、与保留名冲突，
+    或与其他名称只有大小写不同的，替换后加上名称哈希，保证同一名称每次生成的文件名相同
+    """
+    bases = {}
+    for name in names:
+        base = UNSAFE_FILENAME.sub('_', name).strip(' .')[:MAX_FILENAME_CHARS] or '_'
+        bases[name] = base
+    groups = {}
+    for name, base in bases.items():
+        groups.setdefault(base.casefold(), []).append(name)
+    
+    file_names = {}
+    for name, base in bases.items():
+        if base != name or len(groups[base.casefold()]) > 1 or base.casefold() in RESERVED_FILENAMES:
+            base = f"{base}-{hashlib.blake2b(name.encode('utf-8'), digest_size=4).hexdigest()}"
+        file_names[name] = base
+    return file_names
+
+
+@lru_cache(maxsize=None)
+def _link(directory: str, file_name: str, name: str) -> str:
+    """页面间的链接（同一名称在很多页面中出现，按参数缓存）"""
+    return f'<a href="../{directory}/{quote(file_name)}.html">{escape(name)}</a>'
+
+
+@lru_cache(maxsize=None)
+def _rate_cells(rate: float) -> str:
+    """爆率的两列（百分比、约1/N），爆率值高度重复，按值缓存"""
+    return f'<td class="rate">{format_rate_display(rate)}</td><td>{RATE_FORMATTER.format(rate)[0]}</td>'
+
+
+def _layout(title: str, site_title: str, body: str, root: str = "../") -> str:
+    return (f'<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+            f'<title>{escape(title)}</title>\n<link rel="stylesheet" href="{root}{ASSET_DIR}/style.css">\n</head>\n'
+            f'<body>\n<header><a href="{root}index.html">{escape(site_title)}</a></header>\n<main>\n{body}</main>\n'
+            f'</body>\n</html>\n')
+
+
+def render_monster_page(name: str, level: Optional[int], drops: List[Tuple[str, str, float]], site_title: str) -> str:
+    """怪物页面: drops 为 [(物品名, 物品页面文件名, 爆率)]，按爆率从高到低"""
+    rows = []
+    for item_name, file_name, rate in drops:
+        rows.append(f'<tr><td>{_link(ITEM_DIR, file_name, item_name)}</td>{_rate_cells(rate)}</tr>\n')
+    meta = f"等级 {level} · " if level is not None else ""
+    body = (f"<h1>{escape(name)}</h1>\n<p class=\"meta\">{meta}掉落 {len(drops)} 种物品</p>\n"
+            f"<table>\n<tr><th>物品</th><th>爆率</th><th>约</th></tr>\n{''.join(rows)}</table>\n")
+    return _layout(f"{name} - {site_title}", site_title, body)
+
+
+def render_item_page(name: str, category: str, sources: List[Tuple[str, str, Optional[int], float]],
+                     site_title: str) -> str:
+    """物品页面: sources 为 [(怪物名, 怪物页面文件名, 等级, 爆率)]，按爆率从高到低"""
+    rows = []
+    for monster_name, file_name, level, rate in sources:
+        rows.append(f'<tr><td>{_link(MONSTER_DIR, file_name, monster_name)}</td>'
+                    f'<td>{level if level is not None else ""}</td>'
+                    f'{_rate_cells(rate)}</tr>\n')
+    meta = f"{escape(category)} · " if category else ""
+    body = (f"<h1>{escape(name)}</h1>\n<p class=\"meta\">{meta}{len(sources)} 个怪物可掉落</p>\n"
+            f"<table>\n<tr><th>怪物</th><th>等级</th><th>爆率</th><th>约</th></tr>\n{''.join(rows)}</table>\n")
+    return _layout(f"{name} - {site_title}", site_title, body)
+
+
+def page_digest(content: str) -> str:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def render_pages(tasks: List[tuple], site_title: str, known: Dict[str, str]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    渲染一批页面（供进程池调用）
+    :param tasks: [(页面类型, 相对路径, 参数...)]
+    :param known: {相对路径: 上次生成的内容哈希}
+    :return: [(相对路径, 内容哈希, 页面内容)]，内容与上次相同时页面内容为 None
+    """
+    results = []
+    for task in tasks:
+        kind, path = task[0], task[1]
+        if kind == PAGE_MONSTER:
+            content = render_monster_page(*task[2:], site_title)
+        else:
+            content = render_item_page(*task[2:], site_title)
+        digest = page_digest(content)
+        results.append((path, digest, None if known.get(path) == digest else content))
+    return results
+
+
+class SiteGenerator:
+    """静态掉落表网站生成器
+
+    输出目录结构:
+        index.html                 首页（离线搜索）
+        monsters.html / items.html 全部怪物、物品列表
+        monsters/<怪物>.html       怪物掉落表
+        items/<物品>.html          物品来源表
+        assets/                    样式、搜索脚本和搜索索引（search-index.js，以脚本方式加载，直接打开本地文件也能搜索）
+    页面内容不含生成时间等易变信息，同样的数据总是生成同样的页面。各页面的内容哈希记录在
+    输出目录的清单文件中，重新生成时只写入内容变化的页面，并删除已不存在的怪物和物品的页面；
+    页面分批交给多个进程并行渲染，内容未变的页面不传回主进程。
+    """
+    
+    def __init__(self, parser, output_dir: str, site_title: str = "", world_data=None, workers: int = SITE_WORKERS,
+                 batch_pages: int = SITE_BATCH_PAGES):
+        self.parser = parser
+        self.output_dir = output_dir
+        self.site_title = site_title or SITE_TITLE
+        self.world_data = world_data
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_pages = batch_pages
+        self.stats = {}
+    
+    def _manifest_path(self) -> str:
+        return os.path.join(self.output_dir, SITE_MANIFEST)
+    
+    def _load_manifest(self) -> Dict[str, str]:
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != SITE_MANIFEST_VERSION:
+                return {}
+            return data['pages']
+        except Exception as e:
+            logger.warning(f"读取网站清单失败 {path}: {e}")
+            return {}
+    
+    def _save_manifest(self, pages: Dict[str, str]):
+        with atomic_open(self._manifest_path(), 'w', encoding='utf-8') as f:
+            json.dump({'version': SITE_MANIFEST_VERSION, 'pages': pages}, f, ensure_ascii=False, separators=(',', ':'))
+    
+    def _level(self, monster_name: str) -> Optional[int]:
+        if self.world_data is None:
+            return None
+        return self.world_data.monster_level(self.parser, monster_name)
+    
+    def _build_tasks(self, monster_files: Dict[str, str], item_files: Dict[str, str]) -> List[tuple]:
+        parser = self.parser
+        levels = {monster_name: self._level(monster_name) for monster_name in parser.drop_data}
+        categorizer = parser.category_index.categorizer
+        
+        tasks = []
+        for monster_name, monster_info in parser.drop_data.items():
+            drops = sorted(monster_info.get_combined_drops(), key=lambda drop: (-drop[1], drop[0]))
+            drops = [(item_name, item_files[item_name], rate) for item_name, rate in drops]
+            tasks.append((PAGE_MONSTER, f"{MONSTER_DIR}/{monster_files[monster_name]}.html", monster_name,
+                          levels[monster_name], drops))
+        for item_name, sources in parser.item_index.items():
+            category_id = parser.get_item_category(item_name)
+            category = categorizer.category_name(category_id) if category_id else ""
+            sources = sorted(sources, key=lambda source: (-source[1], source[0]))
+            tasks.append((PAGE_ITEM, f"{ITEM_DIR}/{item_files[item_name]}.html", item_name, category or "",
+                          [(monster_name, monster_files[monster_name], levels.get(monster_name), rate)
+                           for monster_name, rate in sources]))
+        return tasks
+    
+    def _static_pages(self, monster_files: Dict[str, str], item_files: Dict[str, str]) -> Dict[str, str]:
+        """首页、列表页和资源文件"""
+        parser = self.parser
+        title = self.site_title
+        
+        def search_entries(names: Dict[str, str], keys: Dict[str, str]) -> list:
+            entries = []
+            for name in sorted(names):
+                # 文件名与名称相同、搜索键与小写名称相同时省略，只写名称
+                file_name = names[name] if names[name] != name else 0
+                key = keys.get(name) or 0
+                if key == name.casefold():
+                    key = 0
+                if key:
+                    entries.append([name, file_name, key])
+                elif file_name:
+                    entries.append([name, file_name])
+                else:
+                    entries.append(name)
+            return entries
+        
+        index_data = {'monsters': search_entries(monster_files, parser.monster_keys),
+                      'items': search_entries(item_files, parser.item_keys)}
+        search_index = ("window.DROP_SEARCH_INDEX=" + json.dumps(index_data, ensure_ascii=False, separators=(',', ':'))
+                        + ";\n")
+        
+        def name_list(names: Dict[str, str], directory: str) -> str:
+            links = "".join(f'<li><a href="{directory}/{quote(names[name])}.html">{escape(name)}</a></li>\n'
+                            for name in sorted(names))
+            return f'<ul class="names">\n{links}</ul>\n'
+        
+        index_body = (f"<h1>{escape(title)}</h1>\n"
+                      f'<p class="meta">{len(monster_files)} 个怪物 · {len(item_files)} 种物品 · '
+                      f'<a href="monsters.html">全部怪物</a> · <a href="items.html">全部物品</a></p>\n'
+                      f'<input id="search" type="search" placeholder="输入物品或怪物名称" autofocus>\n'
+                      f'<ul id="results"></ul>\n'
+                      f'<script src="{ASSET_DIR}/search-index.js"></script>\n'
+                      f'<script src="{ASSET_DIR}/search.js"></script>\n')
+        return {
+            "index.html": _layout(title, title, index_body, root=""),
+            "monsters.html": _layout(f"全部怪物 - {title}", title,
+                                     f"<h1>全部怪物</h1>\n{name_list(monster_files, MONSTER_DIR)}", root=""),
+            "items.html": _layout(f"全部物品 - {title}", title,
+                                  f"<h1>全部物品</h1>\n{name_list(item_files, ITEM_DIR)}", root=""),
+            f"{ASSET_DIR}/style.css": STYLE_CSS,
+            f"{ASSET_DIR}/search.js": SEARCH_JS % {'limit': SITE_SEARCH_LIMIT, 'item_dir': ITEM_DIR,
+                                                   'monster_dir': MONSTER_DIR},
+            f"{ASSET_DIR}/search-index.js": search_index,
+        }
+    
+    def _write_page(self, path: str, content: str):
+        full_path = os.path.join(self.output_dir, *path.split('/'))
+        with atomic_open(full_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(content)
+    
+    def generate(self, force: bool = False, progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event=None) -> bool:
+        """
+        生成或更新网站
+        :param force: 忽略清单，重新写入所有页面
+        :return: 是否完成（取消时已写入的页面保留，清单只记录已写入的页面）
+        """
+        start = time.perf_counter()
+        if not self.parser.drop_data:
+            logger.error("没有数据，无法生成网站")
+            return False
+        
+        try:
+            for directory in ("", MONSTER_DIR, ITEM_DIR, ASSET_DIR):
+                os.makedirs(os.path.join(self.output_dir, directory), exist_ok=True)
+        except OSError as e:
+            logger.error(f"创建网站目录失败 {self.output_dir}: {e}")
+            return False
+        
+        previous = {} if force else self._load_manifest()
+        # 清单中有记录但文件已被删除的页面需要重新写入
+        known = {path: digest for path, digest in previous.items()
+                 if os.path.exists(os.path.join(self.output_dir, *path.split('/')))}
+        
+        monster_files = page_file_names(self.parser.drop_data.keys())
+        item_files = page_file_names(self.parser.item_index.keys())
+        tasks = self._build_tasks(monster_files, item_files)
+        static_pages = self._static_pages(monster_files, item_files)
+        
+        pages = {}  # {相对路径: 内容哈希}
+        written = 0
+        total = len(tasks) + len(static_pages)
+        done = 0
+        cancelled = False
+        
+        def merge(results):
+            nonlocal written, done
+            for path, digest, content in results:
+                if content is not None:
+                    self._write_page(path, content)
+                    written += 1
+                pages[path] = digest
+            done += len(results)
+            if progress_callback:
+                progress_callback(done, total)
+        
+        batches = [tasks[index:index + self.batch_pages] for index in range(0, len(tasks), self.batch_pages)]
+        try:
+            static_results = []
+            for path, content in static_pages.items():
+                digest = page_digest(content)
+                static_results.append((path, digest, None if known.get(path) == digest else content))
+            merge(static_results)
+            if self.workers <= 1 or len(batches) <= 1:
+                for batch in batches:
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+                    merge(render_pages(batch, self.site_title, known))
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                    futures = [executor.submit(render_pages, batch, self.site_title,
+                                               {task[1]: known[task[1]] for task in batch if task[1] in known})
+                               for batch in batches]
+                    for future in as_completed(futures):
+                        merge(future.result())
+                        if cancel_event is not None and cancel_event.is_set():
+                            for pending in futures:
+                                pending.cancel()
+                            cancelled = True
+                            break
+        except Exception as e:
+            logger.error(f"生成网站失败: {e}")
+            self._save_manifest_safely(pages)
+            return False
+        
+        removed = 0
+        if not cancelled:
+            for path in set(previous) - set(pages):
+                try:
+                    os.remove(os.path.join(self.output_dir, *path.split('/')))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"删除过期页面失败 {path}: {e}")
+        else:
+            # 取消时保留清单中尚未处理的页面记录，下次生成时再比较
+            pages = {**{path: digest for path, digest in previous.items() if path not in pages}, **pages}
+        if not self._save_manifest_safely(pages):
+            return False
+        
+        self.stats = {'pages': len(pages), 'written': written, 'unchanged': done - written, 'removed': removed,
+                      'elapsed': time.perf_counter() - start, 'cancelled': cancelled}
+        logger.info(f"网站生成{'已取消' if cancelled else '完成'}: {self.describe()}")
+        return not cancelled
+    
+    def _save_manifest_safely(self, pages: Dict[str, str]) -> bool:
+        try:
+            self._save_manifest(pages)
+            return True
+        except OSError as e:
+            logger.error(f"保存网站清单失败 {self._manifest_path()}: {e}")
+            return False
+    
+    def describe(self) -> str:
+        stats = self.stats
+        if not stats:
+            return ""
+        return (f"{stats['pages']} 个页面，写入 {stats['written']} 个，未变 {stats['unchanged']} 个，"
+                f"删除 {stats['removed']} 个，耗时{stats['elapsed']:.2f}秒")
@@ -0,0 +1,390 @@
+# src/snapshot_store.py
+"""
+备份快照（按内容哈希去重存储的目录快照）
+"""
+
+import os
+import gzip
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable, Iterable, Tuple
+
+from config.constants import SNAPSHOT_WORKERS, SNAPSHOT_COMPRESS_LEVEL
+from src.data_exporter import atomic_open
+from src.utils.file_utils import ensure_directory
+
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class SnapshotStore:
+    """内容寻址的备份快照库
+
+    目录结构:
+        packs/<快照ID>.pack        该快照新增的文件内容（逐个压缩后首尾相接）
+        packs/<快照ID>.idx         {内容哈希: [偏移, 长度]}
+        snapshots/<快照ID>.json.gz 清单: {文件名: [内容哈希, 大小, 修改时间, 权限]}（早期快照没有权限）
+        snapshots/index.json       各快照的摘要信息（不含文件清单），用于列表显示
+    相同内容在整个库中只存一份，每个快照只把库中还没有的内容追加到自己的包文件里。
+    爆率文件大多只有几KB，打包存放避免了每个小文件占用一个磁盘块。
+    创建快照时，与同一目录上一个快照相比大小和修改时间都没变的文件直接沿用原哈希，不再读取，
+    因此对整个目录反复做快照，只有变化的文件占用时间和空间。
+    """
+    
+    def __init__(self, root: str, compress: bool = True, workers: int = SNAPSHOT_WORKERS):
+        self.root = root
+        self.compress = compress
+        self.workers = workers
+        self.packs_dir = os.path.join(root, "packs")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        self.index_path = os.path.join(self.snapshots_dir, "index.json")
+        self._objects = None  # {内容哈希: (包ID, 偏移, 长度, 是否压缩)}，首次使用时加载
+        self._lock = threading.Lock()
+    
+    def _pack_path(self, pack_id: str) -> str:
+        return os.path.join(self.packs_dir, f"{pack_id}.pack")
+    
+    def _pack_index_path(self, pack_id: str) -> str:
+        return os.path.join(self.packs_dir, f"{pack_id}.idx")
+    
+    def _load_objects(self) -> Dict[str, Tuple[str, int, int, bool]]:
+        if self._objects is not None:
+            return self._objects
+        
+        objects = {}
+        if os.path.isdir(self.packs_dir):
+            for filename in sorted(os.listdir(self.packs_dir)):
+                if not filename.endswith('.idx'):
+                    continue
+                pack_id = filename[:-len('.idx')]
+                try:
+                    with open(self._pack_index_path(pack_id), 'r', encoding='utf-8') as f:
+                        pack_index = json.load(f)
+                except Exception as e:
+                    logger.error(f"读取快照包索引失败 {pack_id}: {e}")
+                    continue
+                compressed = pack_index.get('compressed', True)
+                for digest, (offset, length) in pack_index['objects'].items():
+                    objects.setdefault(digest, (pack_id, offset, length, compressed))
+        self._objects = objects
+        return objects
+    
+    def has_object(self, digest: str) -> bool:
+        return digest in self._load_objects()
+    
+    def get_object(self, digest: str) -> bytes:
+        """读取内容并校验哈希"""
+        location = self._load_objects().get(digest)
+        if location is None:
+            raise FileNotFoundError(f"快照内容缺失: {digest}")
+        
+        pack_id, offset, length, compressed = location
+        with open(self._pack_path(pack_id), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        if compressed:
+            data = zlib.decompress(data)
+        if content_digest(data) != digest:
+            raise ValueError(f"快照内容已损坏: {digest}")
+        return data
+    
+    def _write_pack(self, pack_id: str, blobs: List[Tuple[str, bytes]], compressed: bool) -> int:
+        """写入包文件和包索引，返回包大小；blobs 为 [(内容哈希, 存储的内容)]"""
+        ensure_directory(self.packs_dir)
+        objects = {}
+        offset = 0
+        with atomic_open(self._pack_path(pack_id), 'wb') as f:
+            for digest, blob in blobs:
+                f.write(blob)
+                objects[digest] = [offset, len(blob)]
+                offset += len(blob)
+        # 包索引最后写入: 没有索引的包文件不会被引用，中断时只会留下可清理的孤立包
+        with atomic_open(self._pack_index_path(pack_id), 'w', encoding='utf-8') as f:
+            json.dump({'compressed': compressed, 'objects': objects}, f)
+        
+        loaded = self._load_objects()
+        for digest, (blob_offset, length) in objects.items():
+            loaded[digest] = (pack_id, blob_offset, length, compressed)
+        return offset
+    
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshots_dir, f"{snapshot_id}.json.gz")
+    
+    def load_manifest(self, snapshot_id: str) -> Optional[dict]:
+        try:
+            with gzip.open(self._manifest_path(snapshot_id), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"读取快照清单失败 {snapshot_id}: {e}")
+            return None
+    
+    def _load_index(self) -> List[dict]:
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"快照索引损坏，从清单重建: {e}")
+        
+        # 索引缺失或损坏时由各快照清单重建
+        index = []
+        if os.path.isdir(self.snapshots_dir):
+            for filename in sorted(os.listdir(self.snapshots_dir)):
+                if filename.endswith('.json.gz'):
+                    manifest = self.load_manifest(filename[:-len('.json.gz')])
+                    if manifest is not None:
+                        manifest.pop('files', None)
+                        index.append(manifest)
+        return index
+    
+    def _save_index(self, index: List[dict]):
+        ensure_directory(self.snapshots_dir)
+        with atomic_open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+    
+    def list_snapshots(self, directory: Optional[str] = None) -> List[dict]:
+        """快照摘要列表（按创建时间从新到旧），可按源目录过滤"""
+        index = self._load_index()
+        if directory is not None:
+            directory = os.path.abspath(directory)
+            index = [info for info in index if info.get('directory') == directory]
+        return sorted(index, key=lambda info: info['id'], reverse=True)
+    
+    def latest_manifest(self, directory: str) -> Optional[dict]:
+        snapshots = self.list_snapshots(directory)
+        return self.load_manifest(snapshots[0]['id']) if snapshots else None
+    
+    def create(self, directory: str, label: str = "", names: Optional[Iterable[str]] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None, cancel_event=None) -> Optional[dict]:
+        """
+        为目录下的 .txt 文件创建快照
+        :param names: 只包含指定文件名，None时为整个目录
+        :return: 快照摘要（不含文件清单），失败或取消时返回None
+        """
+        directory = os.path.abspath(directory)
+        start = datetime.now()
+        snapshot_id = start.strftime('%Y%m%d_%H%M%S_%f')
+        if names is None:
+            names = [name for name in os.listdir(directory) if name.lower().endswith('.txt')]
+        names = sorted(names)
+        total = len(names)
+        
+        previous = self.latest_manifest(directory)
+        previous_files = previous['files'] if previous else {}
+        objects = self._load_objects()
+        
+        def snapshot_one(name):
+            """返回 (清单条目, 需要新存储的内容或None)"""
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            stat = os.stat(os.path.join(directory, name))
+            file_mode = stat.st_mode & 0o7777
+            entry = previous_files.get(name)
+            if (entry is not None and entry[1] == stat.st_size and entry[2] == stat.st_mtime_ns
+                    and entry[0] in objects):
+                return [entry[0], stat.st_size, stat.st_mtime_ns, file_mode], None
+            
+            with open(os.path.join(directory, name), 'rb') as f:
+                data = f.read()
+            digest = content_digest(data)
+            if digest in objects:
+                return [digest, stat.st_size, stat.st_mtime_ns, file_mode], None
+            blob = zlib.compress(data, SNAPSHOT_COMPRESS_LEVEL) if self.compress else data
+            return [digest, stat.st_size, stat.st_mtime_ns, file_mode], blob
+        
+        files = {}
+        blobs = {}  # {内容哈希: 存储的内容}，同一快照内重复的内容只存一份
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for done, (name, result) in enumerate(zip(names, executor.map(snapshot_one, names)), 1):
+                    if result is None:
+                        continue
+                    entry, blob = result
+                    files[name] = entry
+                    if blob is not None:
+                        blobs.setdefault(entry[0], blob)
+                    if progress_callback and (done % 500 == 0 or done == total):
+                        progress_callback(done, total)
+            
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("创建快照已取消")
+                return None
+            
+            with self._lock:
+                pack_size = self._write_pack(snapshot_id, list(blobs.items()), self.compress) if blobs else 0
+        except Exception as e:
+            logger.error(f"创建快照失败 {directory}: {e}")
+            return None
+        
+        info = {
+            'id': snapshot_id,
+            'created': start.isoformat(timespec='seconds'),
+            'label': label,
+            'directory': directory,
+            'file_count': len(files),
+            'total_size': sum(entry[1] for entry in files.values()),
+            'new_objects': len(blobs),
+            'new_bytes': pack_size,
+        }
+        try:
+            index = [other for other in self._load_index() if other['id'] != snapshot_id]
+            ensure_directory(self.snapshots_dir)
+            with atomic_open(self._manifest_path(snapshot_id), 'wb') as f:
+                f.write(gzip.compress(json.dumps(dict(info, files=files), ensure_ascii=False).encode('utf-8')))
+            index.append(info)
+            self._save_index(index)
+        except Exception as e:
+            logger.error(f"保存快照清单失败: {e}")
+            return None
+        
+        elapsed = (datetime.now() - start).total_seconds()
+        logger.info(f"快照已创建 {snapshot_id}: {len(files)} 个文件, 新增 {len(blobs)} 个内容({pack_size}字节), "
+                    f"耗时{elapsed:.2f}秒")
+        return info
+    
+    def restore(self, snapshot_id: str, target_directory: Optional[str] = None, names: Optional[Iterable[str]] = None,
+                remove_extra: bool = False, progress_callback: Optional[Callable[[int, int], None]] = None,
+                cancel_event=None) -> Optional[Dict[str, int]]:
+        """
+        把快照恢复到目录（默认为快照的源目录）
+        :param names: 只恢复指定文件，None时恢复全部
+        :param remove_extra: 恢复全部时删除快照中没有的 .txt 文件
+        :return: 恢复统计，快照不存在时返回None
+        """
+        manifest = self.load_manifest(snapshot_id)
+        if manifest is None:
+            return None
+        
+        target_directory = target_directory or manifest['directory']
+        ensure_directory(target_directory)
+        files = manifest['files']
+        restore_all = names is None
+        names = list(files) if restore_all else [name for name in names if name in files]
+        total = len(names)
+        stats = {'restored': 0, 'skipped': 0, 'removed': 0, 'failed': 0}
+        
+        def restore_one(name):
+            if cancel_event is not None and cancel_event.is_set():
+                return 'cancelled'
+            entry = files[name]
+            digest, size, mtime_ns = entry[:3]
+            path = os.path.join(target_directory, name)
+            try:
+                exists = os.path.exists(path)
+                # 内容相同的文件不重写
+                if exists and os.path.getsize(path) == size:
+                    with open(path, 'rb') as f:
+                        if content_digest(f.read()) == digest:
+                            return 'skipped'
+                data = self.get_object(digest)
+                # 已有文件沿用当前权限（atomic_open），已删除的文件按快照时记录的权限恢复
+                with atomic_open(path, 'wb') as f:
+                    f.write(data)
+                if not exists and len(entry) > 3:
+                    os.chmod(path, entry[3])
+                # 恢复修改时间，下次快照时可直接沿用哈希
+                os.utime(path, ns=(mtime_ns, mtime_ns))
+                return 'restored'
+            except Exception as e:
+                logger.error(f"恢复文件失败 {name}: {e}")
+                return 'failed'
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for done, result in enumerate(executor.map(restore_one, names), 1):
+                if result in stats:
+                    stats[result] += 1
+                if progress_callback and (done % 500 == 0 or done == total):
+                    progress_callback(done, total)
+        
+        if remove_extra and restore_all and not (cancel_event is not None and cancel_event.is_set()):
+            for name in os.listdir(target_directory):
+                if name.lower().endswith('.txt') and name not in files:
+                    try:
+                        os.remove(os.path.join(target_directory, name))
+                        stats['removed'] += 1
+                    except OSError as e:
+                        logger.error(f"删除文件失败 {name}: {e}")
+        
+        logger.info(f"快照已恢复 {snapshot_id} → {target_directory}: 恢复{stats['restored']}个, "
+                    f"未变{stats['skipped']}个, 删除{stats['removed']}个, 失败{stats['failed']}个")
+        return stats
+    
+    def read_file(self, snapshot_id: str, name: str) -> Optional[bytes]:
+        """读取快照中某个文件的内容"""
+        manifest = self.load_manifest(snapshot_id)
+        if manifest is None or name not in manifest['files']:
+            return None
+        return self.get_object(manifest['files'][name][0])
+    
+    def delete(self, snapshot_id: str) -> bool:
+        """删除快照清单（不再引用的内容由 gc 清理）"""
+        try:
+            os.remove(self._manifest_path(snapshot_id))
+        except OSError as e:
+            logger.error(f"删除快照失败 {snapshot_id}: {e}")
+            return False
+        self._save_index([info for info in self._load_index() if info['id'] != snapshot_id])
+        return True
+    
+    def gc(self) -> Dict[str, int]:
+        """清理不再被任何快照引用的内容: 完全无用的包直接删除，部分有用的包重写为只含引用内容的新包"""
+        stats = {'removed': 0, 'bytes': 0}
+        referenced = set()
+        for info in self._load_index():
+            manifest = self.load_manifest(info['id'])
+            if manifest is None:
+                # 清单读取失败时不清理，避免误删
+                return stats
+            referenced.update(entry[0] for entry in manifest['files'].values())
+        
+        with self._lock:
+            objects = self._load_objects()
+            pack_objects = {}  # {包ID: [内容哈希]}
+            for digest, (pack_id, _, _, _) in objects.items():
+                pack_objects.setdefault(pack_id, []).append(digest)
+            
+            for pack_id, digests in pack_objects.items():
+                unused = [digest for digest in digests if digest not in referenced]
+                if not unused:
+                    continue
+                
+                old_size = os.path.getsize(self._pack_path(pack_id))
+                new_size = 0
+                kept = [digest for digest in digests if digest in referenced]
+                if kept:
+                    # 先把要保留的内容写入新包，再删除旧包
+                    blobs = []
+                    compressed = objects[kept[0]][3]
+                    with open(self._pack_path(pack_id), 'rb') as f:
+                        for digest in kept:
+                            _, offset, length, _ = objects[digest]
+                            f.seek(offset)
+                            blobs.append((digest, f.read(length)))
+                    new_size = self._write_pack(f"{pack_id}_gc{datetime.now():%Y%m%d%H%M%S%f}", blobs, compressed)
+                
+                for digest in unused:
+                    del objects[digest]
+                os.remove(self._pack_index_path(pack_id))
+                os.remove(self._pack_path(pack_id))
+                stats['removed'] += len(unused)
+                stats['bytes'] += old_size - new_size
+        
+        # 中断遗留的、没有索引的包文件
+        if os.path.isdir(self.packs_dir):
+            for filename in os.listdir(self.packs_dir):
+                if filename.endswith('.pack') and not os.path.exists(self._pack_index_path(filename[:-len('.pack')])):
+                    path = os.path.join(self.packs_dir, filename)
+                    stats['bytes'] += os.path.getsize(path)
+                    os.remove(path)
+        
+        logger.info(f"快照内容清理: 删除 {stats['removed']} 个内容, 释放 {stats['bytes']} 字节")
+        return stats
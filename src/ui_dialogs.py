@@ -0,0 +1,1798 @@
+# src/ui_dialogs.py
+"""
+工具对话框
+"""
+
+import os
+import logging
+from datetime import datetime
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from config.constants import (FARM_SCORE_EXPECTED, FARM_SCORE_ANY, FARM_TOP_N, MONSTER_COLUMN_WIDTH,
+                              ITEM_COLUMN_WIDTH, COMPARE_DISPLAY_LIMIT, BULK_EDIT_PREVIEW_LIMIT, LOG_SIGNIFICANCE,
+                              FORECAST_DISPLAY_LIMIT)
+from src.utils.file_utils import format_rate_display
+from src.ui_workers import run_with_progress
+
+
+logger = logging.getLogger(__name__)
+
+
+class NumericTableItem(QTableWidgetItem):
+    """按数值而不是文本排序的表格单元"""
+    
+    def __init__(self, value, text: str = None):
+        super().__init__(text if text is not None else str(value))
+        self.setData(Qt.UserRole, value)
+        self.setTextAlignment(Qt.AlignCenter)
+    
+    def __lt__(self, other):
+        try:
+            return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+        except TypeError:
+            return super().__lt__(other)
+
+
+def make_numeric_item(value, text: str = None) -> QTableWidgetItem:
+    """创建按数值排序的表格单元"""
+    return NumericTableItem(value, text)
+
+
+def format_kills(value: float) -> str:
+    if value == float('inf'):
+        return "∞"
+    return f"{int(value):,}"
+
+
+class DropCalculatorDialog(QDialog):
+    """爆率计算器（蒙特卡洛模拟）"""
+    
+    def __init__(self, parser, parent=None, monster_name: str = None):
+        super().__init__(parent)
+        self.parser = parser
+        self.setWindowTitle("爆率计算器")
+        self.resize(900, 600)
+        self.init_ui()
+        
+        if monster_name:
+            self.monster_combo.setCurrentText(monster_name)
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        # 怪物选择
+        monster_layout = QHBoxLayout()
+        monster_layout.addWidget(QLabel("怪物:"))
+        self.monster_combo = QComboBox()
+        self.monster_combo.setEditable(True)
+        self.monster_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.monster_combo.addItems(sorted(self.parser.drop_data.keys()))
+        self.monster_combo.completer().setFilterMode(Qt.MatchContains)
+        self.monster_combo.setMinimumWidth(200)
+        self.monster_combo.currentTextChanged.connect(self.on_monster_changed)
+        monster_layout.addWidget(self.monster_combo)
+        monster_layout.addStretch()
+        layout.addLayout(monster_layout)
+        
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.create_simulation_tab(), "掉落模拟")
+        self.tabs.addTab(self.create_wishlist_tab(), "集齐计算")
+        layout.addWidget(self.tabs)
+        
+        self.status_label = QLabel("选择怪物后点击“开始模拟”")
+        layout.addWidget(self.status_label)
+        
+        self.on_monster_changed(self.monster_combo.currentText())
+    
+    def create_simulation_tab(self):
+        """掉落模拟页"""
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        
+        # 参数设置
+        form_layout = QHBoxLayout()
+        form_layout.addWidget(QLabel("击杀数:"))
+        self.kills_spin = QSpinBox()
+        self.kills_spin.setRange(1, 100000000)
+        self.kills_spin.setValue(10000)
+        form_layout.addWidget(self.kills_spin)
+        
+        form_layout.addWidget(QLabel("模拟轮数:"))
+        self.trials_spin = QSpinBox()
+        self.trials_spin.setRange(100, 10000000)
+        self.trials_spin.setValue(10000)
+        form_layout.addWidget(self.trials_spin)
+        
+        form_layout.addWidget(QLabel("随机种子:"))
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setRange(0, 2147483647)
+        self.seed_spin.setValue(20240101)
+        form_layout.addWidget(self.seed_spin)
+        
+        self.simulate_btn = QPushButton("开始模拟")
+        self.simulate_btn.clicked.connect(self.run_simulation)
+        form_layout.addWidget(self.simulate_btn)
+        layout.addLayout(form_layout)
+        
+        # 结果表格
+        self.result_table = QTableWidget()
+        headers = ["物品名称", "单次爆率", "期望数量", "至少一个概率", "数量中位数", "数量95%",
+                   "首爆中位击杀", "首爆95%击杀"]
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setColumnWidth(0, 180)
+        layout.addWidget(self.result_table)
+        
+        return panel
+    
+    def create_wishlist_tab(self):
+        """集齐计算页"""
+        from src.wishlist_calculator import WishlistCalculator
+        
+        self.wishlist_calculator = WishlistCalculator(seed=20240101)
+        
+        panel = QWidget()
+        layout = QHBoxLayout(panel)
+        
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(QLabel("勾选要集齐的物品:"))
+        self.wishlist_list = QListWidget()
+        left_layout.addWidget(self.wishlist_list)
+        
+        self.wishlist_btn = QPushButton("计算集齐击杀数")
+        self.wishlist_btn.clicked.connect(self.run_wishlist)
+        left_layout.addWidget(self.wishlist_btn)
+        layout.addLayout(left_layout, 1)
+        
+        self.wishlist_result = QTextEdit()
+        self.wishlist_result.setReadOnly(True)
+        layout.addWidget(self.wishlist_result, 1)
+        
+        return panel
+    
+    def on_monster_changed(self, monster_name):
+        """切换怪物时刷新物品清单"""
+        self.wishlist_list.clear()
+        monster_info = self.parser.drop_data.get(monster_name.strip())
+        if monster_info is None:
+            return
+        
+        for item_name in dict.fromkeys(item.name for item in monster_info.drop_items):
+            list_item = QListWidgetItem(item_name)
+            list_item.setFlags(list_item.flags() | Qt.ItemIsUserCheckable)
+            list_item.setCheckState(Qt.Unchecked)
+            self.wishlist_list.addItem(list_item)
+    
+    def run_wishlist(self):
+        """计算集齐所选物品所需击杀数"""
+        monster_name = self.monster_combo.currentText().strip()
+        monster_info = self.parser.drop_data.get(monster_name)
+        if monster_info is None:
+            QMessageBox.warning(self, "怪物不存在", f"未找到怪物: {monster_name}")
+            return
+        
+        items = [self.wishlist_list.item(i).text() for i in range(self.wishlist_list.count())
+                 if self.wishlist_list.item(i).checkState() == Qt.Checked]
+        if not items:
+            QMessageBox.warning(self, "未选择物品", "请至少勾选一个物品")
+            return
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            start_time = datetime.now()
+            result, cached = self.wishlist_calculator.calculate(monster_info, items)
+            elapsed = (datetime.now() - start_time).total_seconds()
+        except Exception as e:
+            logger.error(f"集齐计算失败: {e}")
+            QMessageBox.critical(self, "计算失败", str(e))
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        method = "精确计算（容斥原理）" if result.method == 'exact' else "蒙特卡洛模拟"
+        html = f"""
+        <h3>{monster_name}: 集齐 {len(items)} 件物品</h3>
+        <p>{'、'.join(items)}</p>
+        <table style="border-collapse: collapse;">
+            <tr><td style="padding: 5px;">期望击杀数:</td><td style="padding: 5px;"><strong>{format_kills(result.expected_kills)}</strong></td></tr>
+        """
+        for q, kills in result.quantiles.items():
+            html += f'<tr><td style="padding: 5px;">{q * 100:.0f}% 概率集齐:</td><td style="padding: 5px;">{format_kills(kills)} 只</td></tr>'
+        html += f"""
+        </table>
+        <p style="color: #7f8c8d;">计算方式: {method}</p>
+        """
+        self.wishlist_result.setHtml(html)
+        self.status_label.setText(f"集齐计算完成 ({'缓存' if cached else f'{elapsed:.2f}秒'})")
+    
+    def run_simulation(self):
+        """运行模拟并显示结果"""
+        from src.drop_simulator import DropSimulator
+        
+        monster_name = self.monster_combo.currentText().strip()
+        if monster_name not in self.parser.drop_data:
+            QMessageBox.warning(self, "怪物不存在", f"未找到怪物: {monster_name}")
+            return
+        
+        kills = self.kills_spin.value()
+        trials = self.trials_spin.value()
+        seed = self.seed_spin.value()
+        simulator = DropSimulator(self.parser.drop_data[monster_name], seed=seed)
+        start_time = datetime.now()
+        
+        def job(progress_callback, cancel_event):
+            return simulator.simulate(kills, trials, progress_callback, cancel_event)
+        
+        def on_finished(result, cancelled):
+            if result is None:
+                self.status_label.setText("模拟已取消")
+                return
+            elapsed = (datetime.now() - start_time).total_seconds()
+            self.show_simulation(monster_name, simulator, result, elapsed)
+        
+        def on_failure(message):
+            logger.error(f"模拟失败: {message}")
+            QMessageBox.critical(self, "模拟失败", message)
+        
+        self.simulate_btn.setEnabled(False)
+        worker = run_with_progress(self, "掉落模拟", f"正在模拟 {monster_name}...", job, on_finished, on_failure)
+        worker.finished.connect(lambda: self.simulate_btn.setEnabled(True))
+    
+    def show_simulation(self, monster_name, simulator, result, elapsed):
+        """显示模拟结果"""
+        kills, trials = result.kills, result.trials
+        drop_probs = dict(zip(simulator.table.item_names, simulator.table.item_drop_probs()))
+        rows = result.summary()
+        
+        self.result_table.setSortingEnabled(False)
+        self.result_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            self.result_table.setItem(i, 0, QTableWidgetItem(row['item']))
+            rate = float(drop_probs[row['item']])
+            self.result_table.setItem(i, 1, make_numeric_item(rate, format_rate_display(rate)))
+            self.result_table.setItem(i, 2, make_numeric_item(row['mean'], f"{row['mean']:.2f}"))
+            self.result_table.setItem(i, 3, make_numeric_item(row['p_any'], f"{row['p_any'] * 100:.2f}%"))
+            self.result_table.setItem(i, 4, make_numeric_item(row['p50']))
+            self.result_table.setItem(i, 5, make_numeric_item(row['p95']))
+            self.result_table.setItem(i, 6, make_numeric_item(row['first_p50'], format_kills(row['first_p50'])))
+            self.result_table.setItem(i, 7, make_numeric_item(row['first_p95'], format_kills(row['first_p95'])))
+        self.result_table.setSortingEnabled(True)
+        
+        self.status_label.setText(
+            f"{monster_name}: {trials:,}轮 x {kills:,}次击杀，耗时{elapsed:.2f}秒（种子 {result.seed}）"
+        )
+
+
+class FarmOptimizerPanel(QWidget):
+    """刷怪推荐面板：按物品清单为怪物排名"""
+    
+    # (怪物名, 物品名, 爆率)，双击结果时发出
+    target_selected = pyqtSignal(str, str, float)
+    
+    def __init__(self, parser, parent=None):
+        super().__init__(parent)
+        from src.farm_optimizer import FarmOptimizer
+        
+        self.parser = parser
+        self.optimizer = FarmOptimizer(parser)
+        self.results = []
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QHBoxLayout(self)
+        
+        # 物品清单
+        wishlist_layout = QVBoxLayout()
+        add_layout = QHBoxLayout()
+        self.item_input = QLineEdit()
+        self.item_input.setPlaceholderText("输入物品名称...")
+        self.item_input.returnPressed.connect(self.on_add_clicked)
+        add_layout.addWidget(self.item_input)
+        
+        add_btn = QPushButton("添加")
+        add_btn.clicked.connect(self.on_add_clicked)
+        add_layout.addWidget(add_btn)
+        wishlist_layout.addLayout(add_layout)
+        
+        self.wishlist_table = QTableWidget()
+        self.wishlist_table.setColumnCount(2)
+        self.wishlist_table.setHorizontalHeaderLabels(["物品名称", "权重"])
+        self.wishlist_table.horizontalHeader().setStretchLastSection(True)
+        self.wishlist_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.wishlist_table.setColumnWidth(0, 160)
+        wishlist_layout.addWidget(self.wishlist_table)
+        
+        remove_layout = QHBoxLayout()
+        remove_btn = QPushButton("移除")
+        remove_btn.clicked.connect(self.remove_selected)
+        remove_layout.addWidget(remove_btn)
+        clear_btn = QPushButton("清空")
+        clear_btn.clicked.connect(lambda: self.wishlist_table.setRowCount(0))
+        remove_layout.addWidget(clear_btn)
+        wishlist_layout.addLayout(remove_layout)
+        layout.addLayout(wishlist_layout, 1)
+        
+        # 排名参数与结果
+        result_layout = QVBoxLayout()
+        form_layout = QHBoxLayout()
+        form_layout.addWidget(QLabel("排序:"))
+        self.score_combo = QComboBox()
+        self.score_combo.addItem("加权期望掉落", FARM_SCORE_EXPECTED)
+        self.score_combo.addItem("任一物品命中概率", FARM_SCORE_ANY)
+        form_layout.addWidget(self.score_combo)
+        
+        form_layout.addWidget(QLabel("前N名:"))
+        self.top_spin = QSpinBox()
+        self.top_spin.setRange(1, 10000)
+        self.top_spin.setValue(FARM_TOP_N)
+        form_layout.addWidget(self.top_spin)
+        
+        form_layout.addWidget(QLabel("最低爆率:"))
+        self.min_rate_input = QLineEdit()
+        self.min_rate_input.setPlaceholderText("如 1/10000，留空不限")
+        self.min_rate_input.setMaximumWidth(140)
+        form_layout.addWidget(self.min_rate_input)
+        
+        rank_btn = QPushButton("推荐")
+        rank_btn.clicked.connect(self.run_ranking)
+        form_layout.addWidget(rank_btn)
+        form_layout.addStretch()
+        result_layout.addLayout(form_layout)
+        
+        self.result_table = QTableWidget()
+        headers = ["排名", "怪物名称", "加权期望掉落", "任一命中概率", "平均击杀/次命中", "命中物品"]
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setColumnWidth(1, MONSTER_COLUMN_WIDTH)
+        self.result_table.itemDoubleClicked.connect(self.on_result_activated)
+        result_layout.addWidget(self.result_table)
+        
+        self.status_label = QLabel("添加物品后点击“推荐”")
+        result_layout.addWidget(self.status_label)
+        layout.addLayout(result_layout, 3)
+        
+        self.refresh_items()
+    
+    def refresh_items(self):
+        """数据重新加载后刷新物品补全列表"""
+        completer = QCompleter(sorted(self.parser.item_index.keys()), self)
+        completer.setFilterMode(Qt.MatchContains)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.item_input.setCompleter(completer)
+    
+    def add_item(self, item_name: str, weight: float = 1.0):
+        """加入物品清单（已存在时忽略）"""
+        item_name = item_name.strip()
+        if not item_name:
+            return
+        for row in range(self.wishlist_table.rowCount()):
+            if self.wishlist_table.item(row, 0).text() == item_name:
+                return
+        
+        row = self.wishlist_table.rowCount()
+        self.wishlist_table.insertRow(row)
+        name_cell = QTableWidgetItem(item_name)
+        name_cell.setFlags(name_cell.flags() & ~Qt.ItemIsEditable)
+        self.wishlist_table.setItem(row, 0, name_cell)
+        self.wishlist_table.setItem(row, 1, QTableWidgetItem(f"{weight:g}"))
+    
+    def on_add_clicked(self):
+        item_name = self.item_input.text().strip()
+        if item_name not in self.parser.item_index:
+            QMessageBox.warning(self, "物品不存在", f"未找到物品: {item_name}")
+            return
+        self.add_item(item_name)
+        self.item_input.clear()
+    
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.wishlist_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.wishlist_table.removeRow(row)
+    
+    def get_wishlist(self) -> dict:
+        wishlist = {}
+        for row in range(self.wishlist_table.rowCount()):
+            item_name = self.wishlist_table.item(row, 0).text()
+            weight_cell = self.wishlist_table.item(row, 1)
+            try:
+                weight = float(weight_cell.text()) if weight_cell else 1.0
+            except ValueError:
+                weight = 1.0
+            wishlist[item_name] = weight
+        return wishlist
+    
+    def run_ranking(self):
+        """计算并显示推荐结果"""
+        wishlist = self.get_wishlist()
+        if not wishlist:
+            QMessageBox.warning(self, "清单为空", "请先添加物品")
+            return
+        
+        min_rate_text = self.min_rate_input.text().strip()
+        min_rate = self.parser.parse_fraction(min_rate_text) if min_rate_text else 0.0
+        
+        start_time = datetime.now()
+        self.results = self.optimizer.rank(wishlist, self.top_spin.value(), self.score_combo.currentData(), min_rate)
+        elapsed = (datetime.now() - start_time).total_seconds()
+        
+        self.result_table.setSortingEnabled(False)
+        self.result_table.setRowCount(len(self.results))
+        for i, target in enumerate(self.results):
+            self.result_table.setItem(i, 0, make_numeric_item(i + 1))
+            name_cell = QTableWidgetItem(target.monster_name)
+            name_cell.setData(Qt.UserRole, i)
+            self.result_table.setItem(i, 1, name_cell)
+            self.result_table.setItem(i, 2, make_numeric_item(target.expected_value, f"{target.expected_value:.6f}"))
+            self.result_table.setItem(i, 3, make_numeric_item(target.p_any, f"{target.p_any * 100:.4f}%"))
+            self.result_table.setItem(i, 4, make_numeric_item(target.kills_per_hit, format_kills(target.kills_per_hit)))
+            matched = '、'.join(f"{name}({format_rate_display(rate)})" for name, rate in target.matched)
+            self.result_table.setItem(i, 5, QTableWidgetItem(matched))
+        self.result_table.setSortingEnabled(True)
+        
+        stats = self.optimizer.last_stats
+        self.status_label.setText(
+            f"{len(wishlist)} 个物品, {stats['candidates']} 个候选怪物, 精确计算 {stats['evaluated']} 个, "
+            f"耗时{elapsed * 1000:.1f}毫秒"
+        )
+    
+    def on_result_activated(self, cell):
+        """双击结果时显示该怪物掉落清单物品中爆率最高的一项"""
+        name_cell = self.result_table.item(cell.row(), 1)
+        target = self.results[name_cell.data(Qt.UserRole)]
+        if target.matched:
+            item_name, rate = target.matched[0]
+            self.target_selected.emit(target.monster_name, item_name, rate)
+
+
+class RateLeaderboardDialog(QDialog):
+    """全局爆率排行与区间筛选"""
+    
+    # (怪物名, 物品名, 爆率)，双击结果时发出
+    target_selected = pyqtSignal(str, str, float)
+    
+    MODE_RAREST = 0
+    MODE_COMMON = 1
+    MODE_RANGE = 2
+    
+    def __init__(self, parser, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.setWindowTitle("爆率排行与筛选")
+        self.resize(800, 600)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        form_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["最稀有掉落", "最常见掉落", "爆率区间"])
+        self.mode_combo.currentIndexChanged.connect(self.on_mode_changed)
+        form_layout.addWidget(self.mode_combo)
+        
+        form_layout.addWidget(QLabel("条数:"))
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(1, 1000000)
+        self.limit_spin.setValue(100)
+        form_layout.addWidget(self.limit_spin)
+        
+        self.low_input = QLineEdit()
+        self.low_input.setPlaceholderText("下限，如 1/50000")
+        form_layout.addWidget(self.low_input)
+        self.high_input = QLineEdit()
+        self.high_input.setPlaceholderText("上限，如 1/100")
+        form_layout.addWidget(self.high_input)
+        
+        query_btn = QPushButton("查询")
+        query_btn.clicked.connect(self.run_query)
+        form_layout.addWidget(query_btn)
+        layout.addLayout(form_layout)
+        
+        self.result_table = QTableWidget()
+        headers = ["怪物名称", "物品名称", "爆率", "约"]
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.result_table.setColumnWidth(1, 180)
+        self.result_table.itemDoubleClicked.connect(self.on_result_activated)
+        layout.addWidget(self.result_table)
+        
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        
+        self.on_mode_changed(self.mode_combo.currentIndex())
+    
+    def on_mode_changed(self, mode):
+        is_range = mode == self.MODE_RANGE
+        self.low_input.setEnabled(is_range)
+        self.high_input.setEnabled(is_range)
+    
+    def _parse_bound(self, line_edit: QLineEdit):
+        text = line_edit.text().strip()
+        return self.parser.parse_fraction(text) if text else None
+    
+    def run_query(self):
+        """查询并显示结果"""
+        index = self.parser.get_rate_index()
+        mode = self.mode_combo.currentIndex()
+        limit = self.limit_spin.value()
+        
+        start_time = datetime.now()
+        if mode == self.MODE_RAREST:
+            results = index.rarest(limit)
+            total = len(results)
+        elif mode == self.MODE_COMMON:
+            results = index.most_common(limit)
+            total = len(results)
+        else:
+            low, high = self._parse_bound(self.low_input), self._parse_bound(self.high_input)
+            total = index.count_range(low, high)
+            results = index.range(low, high, limit=limit)
+        elapsed = (datetime.now() - start_time).total_seconds()
+        
+        self.result_table.setSortingEnabled(False)
+        self.result_table.setRowCount(len(results))
+        for i, (monster_name, item_name, rate) in enumerate(results):
+            self.result_table.setItem(i, 0, QTableWidgetItem(monster_name))
+            self.result_table.setItem(i, 1, QTableWidgetItem(item_name))
+            self.result_table.setItem(i, 2, make_numeric_item(rate, f"{rate * 100:.6f}%"))
+            self.result_table.setItem(i, 3, make_numeric_item(rate, f"1/{round(1 / rate)}" if rate > 0 else "∞"))
+        self.result_table.setSortingEnabled(True)
+        
+        shown = f"，显示前 {len(results)} 条" if len(results) < total else ""
+        self.status_label.setText(f"共 {total} 条{shown}（索引 {len(index)} 条，耗时{elapsed * 1000:.1f}毫秒）")
+    
+    def on_result_activated(self, cell):
+        row = cell.row()
+        rate = self.result_table.item(row, 2).data(Qt.UserRole)
+        self.target_selected.emit(self.result_table.item(row, 0).text(), self.result_table.item(row, 1).text(), rate)
+
+
+class QueryDialog(QDialog):
+    """结构化掉落查询"""
+    
+    # (怪物名, 物品名, 爆率)，双击结果时发出
+    target_selected = pyqtSignal(str, str, float)
+    
+    BATCH_SIZE = 500  # 每次加载的结果条数
+    
+    def __init__(self, parser, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.engine = parser.get_query_engine()
+        self.plan = None
+        self.rows = None  # 当前查询的结果迭代器
+        self.setWindowTitle("掉落查询")
+        self.resize(850, 650)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        input_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("例如: item:*戒指 monster:祖玛* rate<1/1000 child:no")
+        self.query_input.returnPressed.connect(self.run_query)
+        input_layout.addWidget(self.query_input)
+        
+        run_btn = QPushButton("执行")
+        run_btn.clicked.connect(self.run_query)
+        input_layout.addWidget(run_btn)
+        explain_btn = QPushButton("EXPLAIN")
+        explain_btn.clicked.connect(lambda: self.run_query(explain=True))
+        input_layout.addWidget(explain_btn)
+        layout.addLayout(input_layout)
+        
+        help_label = QLabel("条件: item:名称  monster:名称  rate<1/1000（< <= > >= =）  child:yes/no，"
+                            "名称含 * ? 时为通配符，否则为子串；多个条件同时满足")
+        help_label.setWordWrap(True)
+        layout.addWidget(help_label)
+        
+        self.result_table = QTableWidget()
+        headers = ["怪物名称", "物品名称", "爆率", "约", "#CHILD"]
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.result_table.setColumnWidth(1, 180)
+        self.result_table.itemDoubleClicked.connect(self.on_result_activated)
+        layout.addWidget(self.result_table, 3)
+        
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel()
+        status_layout.addWidget(self.status_label, 1)
+        self.more_btn = QPushButton("继续加载")
+        self.more_btn.setEnabled(False)
+        self.more_btn.clicked.connect(self.load_more)
+        status_layout.addWidget(self.more_btn)
+        layout.addLayout(status_layout)
+        
+        self.plan_text = QPlainTextEdit()
+        self.plan_text.setReadOnly(True)
+        self.plan_text.setPlaceholderText("执行计划（点击 EXPLAIN 查看）")
+        layout.addWidget(self.plan_text, 1)
+    
+    def run_query(self, explain: bool = False):
+        """解析并执行查询"""
+        from src.drop_query import QuerySyntaxError
+        
+        text = self.query_input.text().strip()
+        if not text:
+            return
+        
+        try:
+            self.plan, self.rows = self.engine.execute(text)
+        except QuerySyntaxError as e:
+            QMessageBox.warning(self, "查询语法错误", str(e))
+            return
+        
+        self.result_table.setSortingEnabled(False)
+        self.result_table.setRowCount(0)
+        self.plan_text.clear()
+        
+        if explain or self.plan.query.explain:
+            # EXPLAIN 需要完整执行才能统计行数
+            while self.load_more():
+                pass
+            self.plan_text.setPlainText(self.plan.format())
+        else:
+            self.load_more()
+    
+    def load_more(self) -> bool:
+        """加载下一批结果，返回是否还有更多结果"""
+        if self.rows is None:
+            return False
+        
+        batch = []
+        for row in self.rows:
+            batch.append(row)
+            if len(batch) >= self.BATCH_SIZE:
+                break
+        has_more = len(batch) >= self.BATCH_SIZE
+        if not has_more:
+            self.rows = None
+        
+        self.result_table.setSortingEnabled(False)
+        start = self.result_table.rowCount()
+        self.result_table.setRowCount(start + len(batch))
+        for i, (monster_name, item_name, rate, is_child) in enumerate(batch, start):
+            self.result_table.setItem(i, 0, QTableWidgetItem(monster_name))
+            self.result_table.setItem(i, 1, QTableWidgetItem(item_name))
+            self.result_table.setItem(i, 2, make_numeric_item(rate, f"{rate * 100:.6f}%"))
+            self.result_table.setItem(i, 3, make_numeric_item(rate, f"1/{round(1 / rate)}" if rate > 0 else "∞"))
+            self.result_table.setItem(i, 4, QTableWidgetItem("是" if is_child else ""))
+        self.result_table.setSortingEnabled(True)
+        
+        self.more_btn.setEnabled(has_more)
+        more = "，还有更多结果" if has_more else ""
+        self.status_label.setText(f"已显示 {self.result_table.rowCount()} 条{more}"
+                                  f"（{self.plan.driver.description}，检查 {self.plan.examined} 行）")
+        return has_more
+    
+    def on_result_activated(self, cell):
+        row = cell.row()
+        rate = self.result_table.item(row, 2).data(Qt.UserRole)
+        self.target_selected.emit(self.result_table.item(row, 0).text(), self.result_table.item(row, 1).text(), rate)
+
+
+class DuplicateNamesDialog(QDialog):
+    """疑似重复物品名报告"""
+    
+    # 物品名，双击名称时发出
+    item_selected = pyqtSignal(str)
+    
+    def __init__(self, parser, groups, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.groups = groups  # [[物品名]]
+        self.setWindowTitle("疑似重复物品名")
+        self.resize(500, 600)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        hint = QLabel(f"共 {len(self.groups)} 组名称只差一个字或大小写，可能是手工编辑时的错别字。"
+                      f"掉落怪物数少的名称更可能是笔误。")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+        
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["物品名称", "掉落怪物数"])
+        self.tree.setColumnWidth(0, 300)
+        for number, names in enumerate(self.groups, 1):
+            group_node = QTreeWidgetItem([f"第{number}组（{len(names)}个）", ""])
+            counts = {name: len(self.parser.item_index.get(name, [])) for name in names}
+            for name in sorted(names, key=lambda x: counts[x], reverse=True):
+                group_node.addChild(QTreeWidgetItem([name, str(counts[name])]))
+            self.tree.addTopLevelItem(group_node)
+        self.tree.expandAll()
+        self.tree.itemDoubleClicked.connect(self.on_item_activated)
+        layout.addWidget(self.tree)
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn, alignment=Qt.AlignRight)
+    
+    def on_item_activated(self, node, column):
+        if node.parent() is not None:
+            self.item_selected.emit(node.text(0))
+
+
+class WorldSourceDialog(QDialog):
+    """怪物刷新数据来源设置（均为可选）"""
+    
+    SOURCES = [
+        ('mongen_path', "刷怪配置:", "MonGen.txt 或其所在目录"),
+        ('monster_db_path', "怪物数据库导出:", "Monster 表的文本导出（制表符或逗号分隔）"),
+        ('mapinfo_path', "地图信息:", "MapInfo.txt"),
+    ]
+    
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.inputs = {}
+        self.setWindowTitle("刷怪数据设置")
+        self.resize(600, 200)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        for key, label, placeholder in self.SOURCES:
+            row = QHBoxLayout()
+            line_edit = QLineEdit(self.settings.get(key, ''))
+            line_edit.setPlaceholderText(placeholder)
+            row.addWidget(line_edit)
+            browse_btn = QPushButton("浏览...")
+            browse_btn.clicked.connect(lambda checked, k=key: self.browse(k))
+            row.addWidget(browse_btn)
+            if key == 'mongen_path':
+                dir_btn = QPushButton("目录...")
+                dir_btn.clicked.connect(self.browse_mongen_directory)
+                row.addWidget(dir_btn)
+            self.inputs[key] = line_edit
+            form.addRow(label, row)
+        layout.addLayout(form)
+        
+        hint = QLabel("刷新数据用于显示怪物等级和物品的最佳刷怪地图，全部留空则不加载。")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+    
+    def browse(self, key: str):
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择文件", self.inputs[key].text(),
+                                                   "文本文件 (*.txt *.csv);;所有文件 (*)")
+        if file_path:
+            self.inputs[key].setText(file_path)
+    
+    def browse_mongen_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "选择刷怪配置目录", self.inputs['mongen_path'].text())
+        if directory:
+            self.inputs['mongen_path'].setText(directory)
+    
+    def accept(self):
+        for key, line_edit in self.inputs.items():
+            self.settings.set(key, line_edit.text().strip())
+        self.settings.save_settings()
+        super().accept()
+
+
+class CompareDialog(QDialog):
+    """多版本数据对比（以当前数据为基准）"""
+    
+    def __init__(self, parser, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.comparison = None  # DataComparison
+        self.diffs = []  # List[DataDiff]，每个对比数据源相对基准的差异
+        self.setWindowTitle("数据对比")
+        self.resize(950, 700)
+        self.init_ui()
+    
+    def init_ui(self):
+        from src.data_compare import CHANGE_LABELS
+        
+        layout = QVBoxLayout(self)
+        
+        # 对比数据源
+        source_group = QGroupBox("对比数据源（基准为当前已加载的数据）")
+        source_layout = QHBoxLayout(source_group)
+        self.source_list = QListWidget()
+        self.source_list.setMaximumHeight(90)
+        source_layout.addWidget(self.source_list)
+        
+        button_layout = QVBoxLayout()
+        add_dir_btn = QPushButton("添加目录...")
+        add_dir_btn.clicked.connect(self.add_directory)
+        button_layout.addWidget(add_dir_btn)
+        add_archive_btn = QPushButton("添加压缩包...")
+        add_archive_btn.clicked.connect(self.add_archive)
+        button_layout.addWidget(add_archive_btn)
+        remove_btn = QPushButton("移除")
+        remove_btn.clicked.connect(lambda: self.source_list.takeItem(self.source_list.currentRow()))
+        button_layout.addWidget(remove_btn)
+        source_layout.addLayout(button_layout)
+        
+        compare_btn = QPushButton("开始对比")
+        compare_btn.clicked.connect(self.run_compare)
+        source_layout.addWidget(compare_btn)
+        layout.addWidget(source_group)
+        
+        self.tabs = QTabWidget()
+        
+        # 差异列表
+        diff_tab = QWidget()
+        diff_layout = QVBoxLayout(diff_tab)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("数据源:"))
+        self.diff_combo = QComboBox()
+        self.diff_combo.currentIndexChanged.connect(self.show_diff)
+        filter_layout.addWidget(self.diff_combo, 1)
+        filter_layout.addWidget(QLabel("类型:"))
+        self.kind_combo = QComboBox()
+        self.kind_combo.addItem("全部", None)
+        for kind, label in CHANGE_LABELS.items():
+            self.kind_combo.addItem(label, kind)
+        self.kind_combo.currentIndexChanged.connect(self.show_diff)
+        filter_layout.addWidget(self.kind_combo)
+        export_btn = QPushButton("导出CSV...")
+        export_btn.clicked.connect(self.export_diff)
+        filter_layout.addWidget(export_btn)
+        diff_layout.addLayout(filter_layout)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        diff_layout.addWidget(self.summary_label)
+        
+        self.diff_table = QTableWidget()
+        headers = ["类型", "怪物名称", "物品名称", "原爆率", "新爆率", "倍数"]
+        self.diff_table.setColumnCount(len(headers))
+        self.diff_table.setHorizontalHeaderLabels(headers)
+        self.diff_table.horizontalHeader().setStretchLastSection(True)
+        self.diff_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.diff_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.diff_table.setColumnWidth(1, MONSTER_COLUMN_WIDTH)
+        self.diff_table.setColumnWidth(2, 180)
+        self.diff_table.itemDoubleClicked.connect(self.on_diff_activated)
+        diff_layout.addWidget(self.diff_table)
+        self.tabs.addTab(diff_tab, "差异")
+        
+        # 并列对比
+        side_tab = QWidget()
+        side_layout = QVBoxLayout(side_tab)
+        query_layout = QHBoxLayout()
+        self.side_mode_combo = QComboBox()
+        self.side_mode_combo.addItems(["物品", "怪物"])
+        query_layout.addWidget(self.side_mode_combo)
+        self.side_input = QLineEdit()
+        self.side_input.setPlaceholderText("输入物品名或怪物名")
+        self.side_input.returnPressed.connect(self.show_side_by_side)
+        query_layout.addWidget(self.side_input, 1)
+        side_btn = QPushButton("查看")
+        side_btn.clicked.connect(self.show_side_by_side)
+        query_layout.addWidget(side_btn)
+        side_layout.addLayout(query_layout)
+        
+        self.side_table = QTableWidget()
+        self.side_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.side_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        side_layout.addWidget(self.side_table)
+        self.tabs.addTab(side_tab, "并列对比")
+        
+        layout.addWidget(self.tabs)
+    
+    def add_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "选择对比的爆率目录")
+        if directory:
+            self.source_list.addItem(directory)
+    
+    def add_archive(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择对比的爆率压缩包", "",
+                                                   "压缩包 (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz)")
+        if file_path:
+            self.source_list.addItem(file_path)
+    
+    def run_compare(self):
+        """在后台加载对比数据源并计算差异"""
+        from src.data_compare import DataComparison
+        
+        paths = [self.source_list.item(i).text() for i in range(self.source_list.count())]
+        if not paths:
+            QMessageBox.information(self, "数据对比", "请先添加要对比的目录或压缩包")
+            return
+        
+        def job(progress_callback, cancel_event):
+            comparison = DataComparison(self.parser.encoding)
+            comparison.add_parser("当前数据", self.parser)
+            for number, path in enumerate(paths):
+                if cancel_event.is_set():
+                    return None
+                progress_callback(number, len(paths))
+                if not comparison.load_source(path, os.path.basename(path.rstrip('/\\')) or path):
+                    raise RuntimeError(f"无法加载: {path}")
+            progress_callback(len(paths), len(paths))
+            return comparison, comparison.diffs()
+        
+        def on_finished(result, cancelled):
+            if cancelled or result is None:
+                return
+            self.comparison, self.diffs = result
+            self.diff_combo.blockSignals(True)
+            self.diff_combo.clear()
+            for diff in self.diffs:
+                self.diff_combo.addItem(diff.other_label)
+            self.diff_combo.blockSignals(False)
+            self.show_diff()
+        
+        run_with_progress(self, "数据对比", "正在加载对比数据...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "数据对比失败", message))
+    
+    def current_diff(self):
+        index = self.diff_combo.currentIndex()
+        return self.diffs[index] if 0 <= index < len(self.diffs) else None
+    
+    def show_diff(self):
+        """显示选中数据源的差异"""
+        diff = self.current_diff()
+        if diff is None:
+            return
+        
+        kind = self.kind_combo.currentData()
+        changes = diff.of_kind(kind) if kind else diff.changes
+        shown = changes[:COMPARE_DISPLAY_LIMIT]
+        
+        self.diff_table.setSortingEnabled(False)
+        self.diff_table.setRowCount(len(shown))
+        for i, (change, row) in enumerate(zip(shown, diff.rows_for(shown))):
+            for column, text in enumerate(row):
+                if column >= 3 and column <= 4:
+                    rate = change.old_rate if column == 3 else change.new_rate
+                    cell = make_numeric_item(rate if rate is not None else -1.0, text)
+                elif column == 5:
+                    cell = make_numeric_item(change.ratio if change.ratio is not None else -1.0, text)
+                else:
+                    cell = QTableWidgetItem(text)
+                self.diff_table.setItem(i, column, cell)
+        self.diff_table.setSortingEnabled(True)
+        
+        limited = f"，仅显示前 {len(shown)} 条，完整结果请导出" if len(shown) < len(changes) else ""
+        self.summary_label.setText(f"{diff.describe()}，对比耗时{diff.elapsed * 1000:.0f}毫秒{limited}")
+    
+    def on_diff_activated(self, cell):
+        """双击差异行时查看该物品（或怪物）的并列对比"""
+        row = cell.row()
+        item_name = self.diff_table.item(row, 2).text()
+        if item_name:
+            self.side_mode_combo.setCurrentIndex(0)
+            self.side_input.setText(item_name)
+        else:
+            self.side_mode_combo.setCurrentIndex(1)
+            self.side_input.setText(self.diff_table.item(row, 1).text())
+        self.show_side_by_side()
+        self.tabs.setCurrentIndex(1)
+    
+    def show_side_by_side(self):
+        """并列显示各数据源中的爆率"""
+        name = self.side_input.text().strip()
+        if self.comparison is None or not name:
+            return
+        
+        by_item = self.side_mode_combo.currentIndex() == 0
+        rows = self.comparison.item_side_by_side(name) if by_item else self.comparison.monster_side_by_side(name)
+        labels = self.comparison.labels
+        
+        self.side_table.setSortingEnabled(False)
+        self.side_table.clear()
+        self.side_table.setColumnCount(len(labels) + 1)
+        self.side_table.setHorizontalHeaderLabels(["怪物名称" if by_item else "物品名称"] + labels)
+        self.side_table.setRowCount(len(rows))
+        for i, (row_name, rates) in enumerate(rows):
+            self.side_table.setItem(i, 0, QTableWidgetItem(row_name))
+            for column, rate in enumerate(rates, 1):
+                text = format_rate_display(rate) if rate is not None else "—"
+                cell = make_numeric_item(rate if rate is not None else -1.0, text)
+                if rate is not None and rates[0] is not None and rate != rates[0]:
+                    cell.setForeground(QColor('#e74c3c'))
+                self.side_table.setItem(i, column, cell)
+        self.side_table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.side_table.setSortingEnabled(True)
+    
+    def export_diff(self):
+        diff = self.current_diff()
+        if diff is None:
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出差异", f"爆率差异_{diff.other_label}.csv",
+                                                   "CSV文件 (*.csv)")
+        if not file_path:
+            return
+        if diff.export_csv(file_path):
+            QMessageBox.information(self, "导出成功", f"差异已导出到:\n{file_path}")
+        else:
+            QMessageBox.critical(self, "导出失败", "请检查文件路径和权限")
+
+
+class LogCheckDialog(QDialog):
+    """服务器掉落日志与配置爆率对比"""
+    
+    def __init__(self, parser, log_format=None, alpha: float = LOG_SIGNIFICANCE, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.log_format = log_format
+        self.alpha = alpha
+        self.report = None  # DropLogReport
+        self.setWindowTitle("掉落日志核对")
+        self.resize(1000, 650)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        file_group = QGroupBox("服务器掉落日志")
+        file_layout = QHBoxLayout(file_group)
+        self.file_list = QListWidget()
+        self.file_list.setMaximumHeight(90)
+        file_layout.addWidget(self.file_list)
+        
+        button_layout = QVBoxLayout()
+        add_btn = QPushButton("添加日志...")
+        add_btn.clicked.connect(self.add_logs)
+        button_layout.addWidget(add_btn)
+        remove_btn = QPushButton("移除")
+        remove_btn.clicked.connect(lambda: self.file_list.takeItem(self.file_list.currentRow()))
+        button_layout.addWidget(remove_btn)
+        file_layout.addLayout(button_layout)
+        
+        run_btn = QPushButton("开始核对")
+        run_btn.clicked.connect(self.run_check)
+        file_layout.addWidget(run_btn)
+        layout.addWidget(file_group)
+        
+        filter_layout = QHBoxLayout()
+        self.significant_check = QCheckBox("只显示显著偏差")
+        self.significant_check.setChecked(True)
+        self.significant_check.toggled.connect(self.show_report)
+        filter_layout.addWidget(self.significant_check)
+        filter_layout.addStretch()
+        export_btn = QPushButton("导出CSV...")
+        export_btn.clicked.connect(self.export_report)
+        filter_layout.addWidget(export_btn)
+        layout.addLayout(filter_layout)
+        
+        self.summary_label = QLabel("添加日志文件后开始核对")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget()
+        headers = ["怪物名称", "物品名称", "击杀数", "掉落数", "配置爆率", "实际爆率", "95%区间", "倍数", "校正p值",
+                   "结论"]
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.table.setColumnWidth(1, 180)
+        layout.addWidget(self.table)
+    
+    def add_logs(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择服务器掉落日志", "", "日志文件 (*.log *.txt);;所有文件 (*)")
+        for file_path in file_paths:
+            self.file_list.addItem(file_path)
+    
+    def run_check(self):
+        """在后台统计日志并与当前数据对比"""
+        from src.log_ingest import DropLogIngestor
+        
+        paths = [self.file_list.item(i).text() for i in range(self.file_list.count())]
+        if not paths:
+            QMessageBox.information(self, "掉落日志核对", "请先添加日志文件")
+            return
+        
+        def job(progress_callback, cancel_event):
+            ingestor = DropLogIngestor(self.log_format)
+            if not ingestor.ingest(paths, progress_callback, cancel_event):
+                raise RuntimeError("日志统计失败，请查看日志")
+            if cancel_event.is_set():
+                return None
+            return ingestor.compare(self.parser, self.alpha)
+        
+        def on_finished(result, cancelled):
+            if cancelled or result is None:
+                return
+            self.report = result
+            self.show_report()
+        
+        run_with_progress(self, "掉落日志核对", "正在统计掉落日志...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "掉落日志核对失败", message))
+    
+    def show_report(self):
+        from src.log_ingest import DEVIATION_LABELS, DEVIATION_HIGH, DEVIATION_NONE
+        
+        if self.report is None:
+            return
+        
+        rows = self.report.significant() if self.significant_check.isChecked() else self.report.rows
+        shown = rows[:COMPARE_DISPLAY_LIMIT]
+        
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(shown))
+        for i, row in enumerate(shown):
+            low, high = row.interval()
+            ratio = row.ratio
+            cells = [
+                QTableWidgetItem(row.monster_name),
+                QTableWidgetItem(row.item_name),
+                make_numeric_item(row.kills, str(row.kills)),
+                make_numeric_item(row.drops, str(row.drops)),
+                make_numeric_item(row.configured_rate, format_rate_display(row.configured_rate)),
+                make_numeric_item(row.observed_rate, format_rate_display(row.observed_rate)),
+                QTableWidgetItem(f"{low:.4%} ~ {high:.4%}"),
+                make_numeric_item(ratio if ratio is not None else -1.0, f"{ratio:.3g}" if ratio is not None else ""),
+                make_numeric_item(row.q_value, f"{row.q_value:.3g}"),
+                QTableWidgetItem(DEVIATION_LABELS[row.deviation]),
+            ]
+            if row.deviation != DEVIATION_NONE:
+                color = QColor('#e74c3c') if row.deviation == DEVIATION_HIGH else QColor('#2980b9')
+                cells[-1].setForeground(color)
+            for column, cell in enumerate(cells):
+                self.table.setItem(i, column, cell)
+        self.table.setSortingEnabled(True)
+        
+        text = self.report.describe()
+        if self.report.unknown_monsters:
+            names = ", ".join(name for name, _ in self.report.unknown_monsters[:10])
+            text += f"（{names}{' 等' if len(self.report.unknown_monsters) > 10 else ''}）"
+        if len(shown) < len(rows):
+            text += f"，仅显示前 {len(shown)} 条，完整结果请导出"
+        self.summary_label.setText(text)
+    
+    def export_report(self):
+        if self.report is None:
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出核对结果", "掉落日志核对.csv", "CSV文件 (*.csv)")
+        if not file_path:
+            return
+        if self.report.export_csv(file_path):
+            QMessageBox.information(self, "导出成功", f"核对结果已导出到:\n{file_path}")
+        else:
+            QMessageBox.critical(self, "导出失败", "请检查文件路径和权限")
+
+
+class ValidateDialog(QDialog):
+    """整个数据目录的爆率文件检查"""
+    
+    def __init__(self, directory: str, encoding: str, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.encoding = encoding
+        self.report = None  # ValidationReport
+        self.setWindowTitle("检查数据文件")
+        self.resize(900, 600)
+        self.init_ui()
+        QTimer.singleShot(0, self.run_check)
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel(f"数据目录: {self.directory}"))
+        top_layout.addStretch()
+        self.errors_check = QCheckBox("只显示错误")
+        self.errors_check.toggled.connect(self.show_report)
+        top_layout.addWidget(self.errors_check)
+        run_btn = QPushButton("重新检查")
+        run_btn.clicked.connect(self.run_check)
+        top_layout.addWidget(run_btn)
+        export_btn = QPushButton("导出CSV...")
+        export_btn.clicked.connect(self.export_report)
+        top_layout.addWidget(export_btn)
+        layout.addLayout(top_layout)
+        
+        self.summary_label = QLabel("正在检查...")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget()
+        headers = ["文件", "行号", "级别", "说明"]
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.table.setColumnWidth(1, 60)
+        self.table.setColumnWidth(2, 60)
+        layout.addWidget(self.table)
+    
+    def run_check(self):
+        """在后台检查数据目录（未变化的文件沿用上次的结果）"""
+        from src.drop_validator import DropValidator
+        
+        def job(progress_callback, cancel_event):
+            report = DropValidator(self.encoding).validate(self.directory, progress_callback, cancel_event)
+            if report is None:
+                raise RuntimeError("检查失败，请查看日志")
+            return report
+        
+        def on_finished(result, cancelled):
+            if result is None:
+                return
+            self.report = result
+            self.show_report()
+        
+        run_with_progress(self, "检查数据文件", "正在检查爆率文件...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "检查数据文件失败", message))
+    
+    def show_report(self):
+        from src.drop_validator import SEVERITY_ERROR
+        
+        if self.report is None:
+            return
+        
+        issues = self.report.issues
+        if self.errors_check.isChecked():
+            issues = [issue for issue in issues if issue.severity == SEVERITY_ERROR]
+        shown = issues[:COMPARE_DISPLAY_LIMIT]
+        
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(shown))
+        for i, issue in enumerate(shown):
+            severity_item = QTableWidgetItem(issue.severity_label)
+            severity_item.setForeground(QColor('#e74c3c') if issue.severity == SEVERITY_ERROR else QColor('#f39c12'))
+            cells = [
+                QTableWidgetItem(issue.file_name),
+                make_numeric_item(issue.line, str(issue.line)),
+                severity_item,
+                QTableWidgetItem(issue.message),
+            ]
+            for column, cell in enumerate(cells):
+                self.table.setItem(i, column, cell)
+        self.table.setSortingEnabled(True)
+        
+        text = self.report.describe()
+        if self.report.passed():
+            text += "，没有错误"
+        if len(shown) < len(issues):
+            text += f"，仅显示前 {len(shown)} 条，完整结果请导出"
+        self.summary_label.setText(text)
+    
+    def export_report(self):
+        if self.report is None:
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出检查结果", "数据文件检查.csv", "CSV文件 (*.csv)")
+        if not file_path:
+            return
+        if self.report.export_csv(file_path):
+            QMessageBox.information(self, "导出成功", f"检查结果已导出到:\n{file_path}")
+        else:
+            QMessageBox.critical(self, "导出失败", "请检查文件路径和权限")
+
+
+class ForecastDialog(QDialog):
+    """全服物品产出预测"""
+    
+    def __init__(self, parser, log_format=None, parent=None):
+        super().__init__(parent)
+        self.parser = parser
+        self.log_format = log_format
+        self.kills = None  # {怪物名: 每日击杀数}
+        self.forecast = None  # EconomyForecast
+        self.result = None  # ForecastResult
+        self.setWindowTitle("物品产出预测")
+        self.resize(950, 720)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        kills_group = QGroupBox("每日击杀数")
+        kills_layout = QHBoxLayout(kills_group)
+        table_btn = QPushButton("导入击杀表...")
+        table_btn.setToolTip("CSV文件，每行: 怪物名称,每日击杀数")
+        table_btn.clicked.connect(self.import_kill_table)
+        kills_layout.addWidget(table_btn)
+        log_btn = QPushButton("从掉落日志统计...")
+        log_btn.clicked.connect(self.import_logs)
+        kills_layout.addWidget(log_btn)
+        kills_layout.addWidget(QLabel("日志天数:"))
+        self.days_spin = QDoubleSpinBox()
+        self.days_spin.setRange(0.01, 3650)
+        self.days_spin.setValue(1)
+        kills_layout.addWidget(self.days_spin)
+        self.poisson_check = QCheckBox("击杀数按泊松分布波动")
+        self.poisson_check.toggled.connect(self.rebuild_forecast)
+        kills_layout.addWidget(self.poisson_check)
+        self.kills_label = QLabel("尚未导入")
+        kills_layout.addWidget(self.kills_label, 1)
+        layout.addWidget(kills_group)
+        
+        scenario_group = QGroupBox("假设修改（每行一条）")
+        scenario_layout = QHBoxLayout(scenario_group)
+        self.scenario_edit = QPlainTextEdit()
+        self.scenario_edit.setPlaceholderText("爆率 屠龙 *2\n爆率 屠龙@祖玛教主 =1/500\n击杀 祖玛教主 600\n击杀 沃玛教主 *1.5")
+        self.scenario_edit.setMaximumHeight(100)
+        scenario_layout.addWidget(self.scenario_edit)
+        run_btn = QPushButton("计算")
+        run_btn.clicked.connect(self.run_forecast)
+        scenario_layout.addWidget(run_btn)
+        layout.addWidget(scenario_group)
+        
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("物品:"))
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("按物品名筛选")
+        self.filter_input.textChanged.connect(self.show_result)
+        filter_layout.addWidget(self.filter_input, 1)
+        self.affected_check = QCheckBox("只显示受影响的物品")
+        self.affected_check.toggled.connect(self.show_result)
+        filter_layout.addWidget(self.affected_check)
+        export_btn = QPushButton("导出CSV...")
+        export_btn.clicked.connect(self.export_result)
+        filter_layout.addWidget(export_btn)
+        layout.addLayout(filter_layout)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget()
+        headers = ["物品名称", "每日期望产出", "标准差", "区间下限", "区间上限", "修改前", "变化"]
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setColumnWidth(0, ITEM_COLUMN_WIDTH)
+        layout.addWidget(self.table)
+    
+    def import_kill_table(self):
+        from src.economy_forecast import load_kill_table
+        
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择击杀表", "", "CSV文件 (*.csv);;所有文件 (*)")
+        if not file_path:
+            return
+        kills = load_kill_table(file_path)
+        if kills is None:
+            QMessageBox.critical(self, "导入失败", "无法读取击杀表，请查看日志")
+            return
+        self.set_kills(kills, os.path.basename(file_path))
+    
+    def import_logs(self):
+        from src.log_ingest import DropLogIngestor
+        from src.economy_forecast import kill_table_from_log
+        
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择服务器掉落日志", "", "日志文件 (*.log *.txt);;所有文件 (*)")
+        if not file_paths:
+            return
+        days = self.days_spin.value()
+        
+        def job(progress_callback, cancel_event):
+            ingestor = DropLogIngestor(self.log_format)
+            if not ingestor.ingest(file_paths, progress_callback, cancel_event):
+                raise RuntimeError("日志统计失败，请查看日志")
+            if cancel_event.is_set():
+                return None
+            return kill_table_from_log(ingestor, self.parser, days)
+        
+        def on_finished(result, cancelled):
+            if cancelled or result is None:
+                return
+            self.set_kills(result, f"{len(file_paths)} 个日志文件，{days:g} 天")
+        
+        run_with_progress(self, "物品产出预测", "正在统计掉落日志...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "统计失败", message))
+    
+    def set_kills(self, kills, source: str):
+        self.kills = kills
+        self.kills_label.setText(f"{source}: {len(kills)} 个怪物，每日击杀 {sum(kills.values()):,.0f}")
+        self.rebuild_forecast()
+    
+    def rebuild_forecast(self):
+        """击杀数或波动设置变化后重新计算基准"""
+        from src.economy_forecast import EconomyForecast
+        
+        if self.kills is None:
+            return
+        kills = self.kills
+        poisson = self.poisson_check.isChecked()
+        
+        def on_finished(result, cancelled):
+            if cancelled or result is None:
+                return
+            self.forecast = result
+            self.run_forecast()
+        
+        run_with_progress(self, "物品产出预测", "正在计算基准产出...",
+                          lambda progress_callback, cancel_event: EconomyForecast(self.parser, kills, poisson),
+                          on_finished, lambda message: QMessageBox.critical(self, "计算失败", message))
+    
+    def run_forecast(self):
+        """按假设修改计算（只重新计算受影响的物品）"""
+        from src.economy_forecast import parse_scenario
+        from src.drop_query import QuerySyntaxError
+        
+        if self.forecast is None:
+            QMessageBox.information(self, "物品产出预测", "请先导入击杀表或从掉落日志统计击杀数")
+            return
+        try:
+            changes = parse_scenario(self.scenario_edit.toPlainText())
+        except QuerySyntaxError as e:
+            QMessageBox.warning(self, "假设修改有误", str(e))
+            return
+        self.result = self.forecast.evaluate(changes) if changes else self.forecast.baseline()
+        self.show_result()
+    
+    def show_result(self):
+        if self.result is None:
+            return
+        
+        result = self.result
+        columns = result.order(affected_only=self.affected_check.isChecked())
+        keyword = self.filter_input.text().strip()
+        if keyword:
+            columns = columns[[keyword in result.item_names[col_id] for col_id in columns.tolist()]]
+        shown = columns[:FORECAST_DISPLAY_LIMIT]
+        
+        low, high = result.interval()
+        std = result.std
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(shown))
+        for i, (col_id, row) in enumerate(zip(shown.tolist(), result.rows(shown))):
+            base = result.base_expected[col_id]
+            change = result.expected[col_id] / base - 1 if base > 0 else float('inf')
+            values = [None, result.expected[col_id], std[col_id], low[col_id], high[col_id], base, change]
+            for column, text in enumerate(row):
+                if values[column] is None:
+                    cell = QTableWidgetItem(text)
+                else:
+                    cell = make_numeric_item(float(values[column]), text)
+                if column == 6 and text:
+                    cell.setForeground(QColor('#e74c3c') if change > 0 else QColor('#2980b9'))
+                self.table.setItem(i, column, cell)
+        self.table.setSortingEnabled(True)
+        
+        text = f"{result.describe()}，计算耗时{result.elapsed * 1000:.1f}毫秒"
+        if len(shown) < len(columns):
+            text += f"，仅显示前 {len(shown)} 个，完整结果请导出"
+        self.summary_label.setText(text)
+    
+    def export_result(self):
+        if self.result is None:
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出产出预测", "物品产出预测.csv", "CSV文件 (*.csv)")
+        if not file_path:
+            return
+        if self.result.export_csv(file_path):
+            QMessageBox.information(self, "导出成功", f"产出预测已导出到:\n{file_path}")
+        else:
+            QMessageBox.critical(self, "导出失败", "请检查文件路径和权限")
+
+
+class BulkEditDialog(QDialog):
+    """批量修改爆率"""
+    
+    # 文件已写回，需要重新加载数据
+    data_changed = pyqtSignal()
+    
+    def __init__(self, parser, snapshot_store=None, parent=None):
+        super().__init__(parent)
+        from src.bulk_edit import BulkRateEditor
+        
+        self.parser = parser
+        self.editor = BulkRateEditor(parser)
+        self.snapshot_store = snapshot_store  # 写回前为整个目录创建快照，None时不备份
+        self.plan = None  # 当前预览的 EditPlan
+        self.setWindowTitle("批量修改爆率")
+        self.resize(850, 650)
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        form_layout = QFormLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("例如: item:屠龙 monster:*王  或  rate<1/100000")
+        self.query_input.returnPressed.connect(self.run_preview)
+        form_layout.addRow("选择掉落:", self.query_input)
+        self.operation_input = QLineEdit()
+        self.operation_input.setPlaceholderText("*2 加倍、/2 减半、=1/5000 设为指定爆率")
+        self.operation_input.returnPressed.connect(self.run_preview)
+        form_layout.addRow("修改操作:", self.operation_input)
+        layout.addLayout(form_layout)
+        
+        help_label = QLabel("选择条件同掉落查询；#CHILD组内的物品通过修改#CHILD行的组爆率生效（同组物品一起变化）。"
+                            "只改写爆率字段，文件编码、换行符和其余内容保持不变。")
+        help_label.setWordWrap(True)
+        layout.addWidget(help_label)
+        
+        self.preview_table = QTableWidget()
+        headers = ["怪物名称", "物品名称", "行号", "原爆率", "新爆率", "备注"]
+        self.preview_table.setColumnCount(len(headers))
+        self.preview_table.setHorizontalHeaderLabels(headers)
+        self.preview_table.horizontalHeader().setStretchLastSection(True)
+        self.preview_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.preview_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.preview_table.setColumnWidth(0, MONSTER_COLUMN_WIDTH)
+        self.preview_table.setColumnWidth(1, 180)
+        layout.addWidget(self.preview_table)
+        
+        self.status_label = QLabel()
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        preview_btn = QPushButton("预览")
+        preview_btn.clicked.connect(self.run_preview)
+        button_layout.addWidget(preview_btn)
+        self.apply_btn = QPushButton("写回文件")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.run_apply)
+        button_layout.addWidget(self.apply_btn)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+    
+    def run_preview(self):
+        """生成修改计划并预览"""
+        from src.bulk_edit import parse_operation
+        from src.drop_query import QuerySyntaxError
+        
+        query_text = self.query_input.text().strip()
+        if not query_text:
+            return
+        try:
+            operation = parse_operation(self.operation_input.text())
+        except QuerySyntaxError as e:
+            QMessageBox.warning(self, "修改操作错误", str(e))
+            return
+        
+        self.plan = None
+        self.apply_btn.setEnabled(False)
+        
+        def job(progress_callback, cancel_event):
+            return self.editor.plan(query_text, operation, progress_callback, cancel_event)
+        
+        def on_finished(plan, cancelled):
+            if cancelled:
+                return
+            self.show_plan(plan)
+        
+        run_with_progress(self, "批量修改爆率", "正在生成修改预览...", job, on_finished,
+                          lambda message: QMessageBox.warning(self, "无法预览", message))
+    
+    def show_plan(self, plan):
+        self.plan = plan
+        rows = plan.preview_rows(BULK_EDIT_PREVIEW_LIMIT)
+        self.preview_table.setSortingEnabled(False)
+        self.preview_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for column, value in enumerate(row):
+                cell = make_numeric_item(value) if column == 2 else QTableWidgetItem(str(value))
+                self.preview_table.setItem(i, column, cell)
+        self.preview_table.setSortingEnabled(True)
+        
+        text = plan.describe()
+        if len(rows) < plan.line_count:
+            text += f"（仅预览前 {len(rows)} 行）"
+        self.status_label.setText(text)
+        self.apply_btn.setEnabled(plan.line_count > 0)
+    
+    def run_apply(self):
+        """把修改写回文件"""
+        plan = self.plan
+        if plan is None or not plan.files:
+            return
+        
+        backup_text = "写回前会为数据目录创建备份快照。" if self.snapshot_store else "不会备份原文件。"
+        reply = QMessageBox.question(self, "确认写回",
+                                     f"将修改 {len(plan.files)} 个文件中的 {plan.line_count} 行。{backup_text}\n确定继续吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.plan = None
+        self.apply_btn.setEnabled(False)
+        
+        def job(progress_callback, cancel_event):
+            return self.editor.apply(plan, self.snapshot_store, progress_callback, cancel_event)
+        
+        def on_finished(result, cancelled):
+            if result is None:
+                return
+            message = result.describe()
+            if result.failed:
+                message += "\n\n" + "\n".join(f"{path}: {reason}" for path, reason in result.failed[:20])
+            if result.files_written:
+                self.data_changed.emit()
+            self.status_label.setText(result.describe())
+            if result.failed:
+                QMessageBox.warning(self, "批量修改完成", message)
+            else:
+                QMessageBox.information(self, "批量修改完成", message)
+        
+        run_with_progress(self, "批量修改爆率", "正在写回文件...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "写回失败", message))
+
+
+class SnapshotDialog(QDialog):
+    """备份快照管理"""
+    
+    # 快照已恢复到数据目录，需要重新加载数据
+    data_changed = pyqtSignal()
+    
+    def __init__(self, store, data_path: str, parent=None):
+        super().__init__(parent)
+        self.store = store  # SnapshotStore
+        self.data_path = data_path
+        self.setWindowTitle("备份快照")
+        self.resize(850, 450)
+        self.init_ui()
+        self.refresh()
+    
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        
+        self.only_current = QCheckBox("只显示当前数据目录的快照")
+        self.only_current.setChecked(True)
+        self.only_current.toggled.connect(self.refresh)
+        layout.addWidget(self.only_current)
+        
+        self.table = QTableWidget()
+        headers = ["创建时间", "说明", "文件数", "大小", "新增存储", "目录"]
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setColumnWidth(0, 150)
+        self.table.setColumnWidth(1, 300)
+        layout.addWidget(self.table)
+        
+        button_layout = QHBoxLayout()
+        create_btn = QPushButton("创建快照...")
+        create_btn.clicked.connect(self.create_snapshot)
+        button_layout.addWidget(create_btn)
+        restore_btn = QPushButton("恢复整个目录")
+        restore_btn.clicked.connect(self.restore_all)
+        button_layout.addWidget(restore_btn)
+        restore_file_btn = QPushButton("恢复单个文件...")
+        restore_file_btn.clicked.connect(self.restore_file)
+        button_layout.addWidget(restore_file_btn)
+        delete_btn = QPushButton("删除")
+        delete_btn.clicked.connect(self.delete_snapshot)
+        button_layout.addWidget(delete_btn)
+        gc_btn = QPushButton("清理空间")
+        gc_btn.clicked.connect(self.collect_garbage)
+        button_layout.addWidget(gc_btn)
+        button_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+    
+    def refresh(self):
+        directory = self.data_path if self.only_current.isChecked() else None
+        self.snapshots = self.store.list_snapshots(directory)
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.snapshots))
+        for i, info in enumerate(self.snapshots):
+            self.table.setItem(i, 0, QTableWidgetItem(info['created'].replace('T', ' ')))
+            self.table.setItem(i, 1, QTableWidgetItem(info['label']))
+            self.table.setItem(i, 2, make_numeric_item(info['file_count']))
+            self.table.setItem(i, 3, make_numeric_item(info['total_size'], self.format_size(info['total_size'])))
+            self.table.setItem(i, 4, make_numeric_item(info['new_bytes'], self.format_size(info['new_bytes'])))
+            self.table.setItem(i, 5, QTableWidgetItem(info['directory']))
+            self.table.item(i, 0).setData(Qt.UserRole, info['id'])
+    
+    @staticmethod
+    def format_size(size: int) -> str:
+        if size < 1024:
+            return f"{size}B"
+        if size < 1024 * 1024:
+            return f"{size / 1024:.1f}KB"
+        return f"{size / 1024 / 1024:.1f}MB"
+    
+    def selected_snapshot(self):
+        row = self.table.currentRow()
+        if row < 0:
+            QMessageBox.information(self, "备份快照", "请先选择一个快照")
+            return None
+        return self.table.item(row, 0).data(Qt.UserRole)
+    
+    def create_snapshot(self):
+        label, ok = QInputDialog.getText(self, "创建快照", "快照说明:")
+        if not ok:
+            return
+        
+        def job(progress_callback, cancel_event):
+            return self.store.create(self.data_path, label, progress_callback=progress_callback,
+                                     cancel_event=cancel_event)
+        
+        def on_finished(info, cancelled):
+            if cancelled:
+                return
+            if info is None:
+                QMessageBox.critical(self, "创建失败", "创建快照失败，详见日志")
+                return
+            self.refresh()
+        
+        run_with_progress(self, "备份快照", "正在创建快照...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "创建失败", message))
+    
+    def run_restore(self, snapshot_id, names=None):
+        def job(progress_callback, cancel_event):
+            return self.store.restore(snapshot_id, names=names, remove_extra=names is None,
+                                      progress_callback=progress_callback, cancel_event=cancel_event)
+        
+        def on_finished(stats, cancelled):
+            if stats is None:
+                return
+            if stats['restored'] or stats['removed']:
+                self.data_changed.emit()
+            QMessageBox.information(self, "恢复完成",
+                                    f"恢复 {stats['restored']} 个文件，未变 {stats['skipped']} 个，"
+                                    f"删除 {stats['removed']} 个，失败 {stats['failed']} 个")
+        
+        run_with_progress(self, "备份快照", "正在恢复...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "恢复失败", message))
+    
+    def restore_all(self):
+        snapshot_id = self.selected_snapshot()
+        if snapshot_id is None:
+            return
+        reply = QMessageBox.question(self, "确认恢复",
+                                     "将把快照中的全部文件恢复到原目录，并删除快照中没有的爆率文件。\n"
+                                     "建议先为当前数据创建快照。确定继续吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.run_restore(snapshot_id)
+    
+    def restore_file(self):
+        snapshot_id = self.selected_snapshot()
+        if snapshot_id is None:
+            return
+        manifest = self.store.load_manifest(snapshot_id)
+        if manifest is None:
+            return
+        name, ok = QInputDialog.getItem(self, "恢复单个文件", "文件名:", sorted(manifest['files']), 0, True)
+        if ok and name in manifest['files']:
+            self.run_restore(snapshot_id, [name])
+    
+    def delete_snapshot(self):
+        snapshot_id = self.selected_snapshot()
+        if snapshot_id is None:
+            return
+        reply = QMessageBox.question(self, "确认删除", "确定删除选中的快照吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes and self.store.delete(snapshot_id):
+            self.refresh()
+    
+    def collect_garbage(self):
+        stats = self.store.gc()
+        QMessageBox.information(self, "清理空间",
+                                f"删除 {stats['removed']} 个不再引用的内容，释放 {self.format_size(stats['bytes'])}")
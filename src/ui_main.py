@@ -14,6 +14,7 @@ from config.constants import *
 from config.settings import Settings
 from src.data_parser import LegendDropParser
 from src.utils.file_utils import format_rate_display
+from src.ui_workers import run_with_progress
 
 
 logger = logging.getLogger(__name__)
@@ -63,10 +64,20 @@ class LegendDropApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = Settings()
-        self.parser = LegendDropParser()
+        self.parser = LegendDropParser(
+            encoding=self.settings.get('encoding', ENCODING),
+            storage=self.settings.get('storage_engine', STORAGE_MEMORY),
+            db_path=self.settings.get('sqlite_path'),
+            build_matrix=self.settings.get('build_drop_matrix', False),
+            build_rate_index=self.settings.get('build_rate_index', True),
+            normalize_traditional=self.settings.get('normalize_traditional', False),
+            categories_file=self.settings.get('item_categories_file') or None,
+            archive_member_dir=self.settings.get('archive_member_dir', ARCHIVE_MEMBER_DIR),
+        )
         self.current_item = None
         self.current_monster = None
         self.is_data_loaded = False
+        self.world_data = None  # 怪物刷新数据（可选）
         
         self.init_ui()
         self.load_data()
@@ -97,6 +108,9 @@ class LegendDropApp(QMainWindow):
         right_panel = self.create_right_panel()
         main_layout.addWidget(right_panel, 3)
         
+        # 创建刷怪推荐面板（停靠窗口）
+        self.create_farm_dock()
+        
         # 创建菜单栏
         self.create_menu_bar()
         
@@ -123,12 +137,27 @@ class LegendDropApp(QMainWindow):
         self.search_box.textChanged.connect(self.on_search_items)
         search_layout.addWidget(self.search_box)
         
+        # 模糊搜索（容错错别字）
+        self.fuzzy_check = QCheckBox("模糊")
+        self.fuzzy_check.setToolTip("按编辑距离容错匹配，结果按相似度排序")
+        self.fuzzy_check.toggled.connect(self.on_search_items)
+        search_layout.addWidget(self.fuzzy_check)
+        
         # 搜索按钮
         self.search_btn = QPushButton("搜索")
         self.search_btn.clicked.connect(self.on_search_items)
         search_layout.addWidget(self.search_btn)
         layout.addLayout(search_layout)
         
+        # 物品分类（括号内为该分类的物品数）
+        category_layout = QHBoxLayout()
+        category_layout.addWidget(QLabel("分类:"))
+        self.category_combo = QComboBox()
+        self.category_combo.addItem("全部", None)
+        self.category_combo.currentIndexChanged.connect(self.on_search_items)
+        category_layout.addWidget(self.category_combo, 1)
+        layout.addLayout(category_layout)
+        
         # 物品列表
         layout.addWidget(QLabel("物品列表:"))
         
@@ -139,6 +168,8 @@ class LegendDropApp(QMainWindow):
         self.item_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.item_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.item_table.itemClicked.connect(self.on_item_selected)
+        self.item_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.item_table.customContextMenuRequested.connect(self.show_item_context_menu)
         
         # 设置列宽
         self.item_table.setColumnWidth(0, ITEM_COLUMN_WIDTH)
@@ -228,6 +259,19 @@ class LegendDropApp(QMainWindow):
         
         return panel
     
+    def create_farm_dock(self):
+        """创建刷怪推荐停靠面板"""
+        from src.ui_dialogs import FarmOptimizerPanel
+        
+        self.farm_panel = FarmOptimizerPanel(self.parser, self)
+        self.farm_panel.target_selected.connect(self.on_farm_target_selected)
+        
+        self.farm_dock = QDockWidget("刷怪推荐", self)
+        self.farm_dock.setObjectName("FarmDock")
+        self.farm_dock.setWidget(self.farm_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.farm_dock)
+        self.farm_dock.hide()
+    
     def create_menu_bar(self):
         """创建菜单栏"""
         menubar = self.menuBar()
@@ -239,6 +283,10 @@ class LegendDropApp(QMainWindow):
         open_action.triggered.connect(self.open_data_directory)
         file_menu.addAction(open_action)
         
+        archive_action = QAction("打开服务器备份压缩包...", self)
+        archive_action.triggered.connect(self.open_archive)
+        file_menu.addAction(archive_action)
+        
         reload_action = QAction("重新加载数据", self)
         reload_action.triggered.connect(self.reload_data)
         reload_action.setShortcut("F5")
@@ -246,10 +294,18 @@ class LegendDropApp(QMainWindow):
         
         file_menu.addSeparator()
         
-        export_action = QAction("导出为CSV...", self)
+        export_action = QAction("导出数据...", self)
         export_action.triggered.connect(self.export_data)
         file_menu.addAction(export_action)
         
+        import_action = QAction("导入数据快照...", self)
+        import_action.triggered.connect(self.import_dataset)
+        file_menu.addAction(import_action)
+        
+        world_action = QAction("刷怪数据设置...", self)
+        world_action.triggered.connect(self.show_world_sources)
+        file_menu.addAction(world_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("退出", self)
@@ -270,6 +326,8 @@ class LegendDropApp(QMainWindow):
         show_statusbar.triggered.connect(self.toggle_statusbar)
         view_menu.addAction(show_statusbar)
         
+        view_menu.addAction(self.farm_dock.toggleViewAction())
+        
         # 工具菜单
         tools_menu = menubar.addMenu("工具(&T)")
         
@@ -277,6 +335,50 @@ class LegendDropApp(QMainWindow):
         calc_action.triggered.connect(self.show_calculator)
         tools_menu.addAction(calc_action)
         
+        leaderboard_action = QAction("爆率排行与筛选...", self)
+        leaderboard_action.triggered.connect(self.show_rate_leaderboard)
+        tools_menu.addAction(leaderboard_action)
+        
+        query_action = QAction("掉落查询...", self)
+        query_action.triggered.connect(self.show_query_dialog)
+        tools_menu.addAction(query_action)
+        
+        farm_action = QAction("刷怪推荐...", self)
+        farm_action.triggered.connect(self.show_farm_optimizer)
+        tools_menu.addAction(farm_action)
+        
+        duplicates_action = QAction("疑似重复物品名...", self)
+        duplicates_action.triggered.connect(self.show_duplicate_items)
+        tools_menu.addAction(duplicates_action)
+        
+        bulk_edit_action = QAction("批量修改爆率...", self)
+        bulk_edit_action.triggered.connect(self.show_bulk_edit)
+        tools_menu.addAction(bulk_edit_action)
+        
+        snapshot_action = QAction("备份快照...", self)
+        snapshot_action.triggered.connect(self.show_snapshots)
+        tools_menu.addAction(snapshot_action)
+        
+        site_action = QAction("生成掉落表网站...", self)
+        site_action.triggered.connect(self.show_site_generator)
+        tools_menu.addAction(site_action)
+        
+        validate_action = QAction("检查数据文件...", self)
+        validate_action.triggered.connect(self.show_validate)
+        tools_menu.addAction(validate_action)
+        
+        log_check_action = QAction("掉落日志核对...", self)
+        log_check_action.triggered.connect(self.show_log_check)
+        tools_menu.addAction(log_check_action)
+        
+        forecast_action = QAction("物品产出预测...", self)
+        forecast_action.triggered.connect(self.show_forecast)
+        tools_menu.addAction(forecast_action)
+        
+        compare_action = QAction("数据对比...", self)
+        compare_action.triggered.connect(self.show_data_compare)
+        tools_menu.addAction(compare_action)
+        
         stats_action = QAction("数据统计", self)
         stats_action.triggered.connect(self.show_statistics)
         tools_menu.addAction(stats_action)
@@ -395,12 +497,15 @@ class LegendDropApp(QMainWindow):
                 end_time = datetime.now()
                 load_time = (end_time - start_time).total_seconds()
                 
-                # 更新统计信息
+                # 统计信息（属于已发布的快照，只读）
                 stats = self.parser.monster_stats
-                stats['parse_time'] = load_time
+                
+                self.load_world_data()
                 
                 # 显示物品列表
+                self.refresh_category_combo()
                 self.refresh_item_list()
+                self.farm_panel.refresh_items()
                 
                 # 更新状态栏
                 self.data_stats_label.setText(f"怪物: {stats['total_monsters']} | 物品: {stats['total_items']} | 唯一物品: {stats['unique_items']}")
@@ -426,8 +531,13 @@ class LegendDropApp(QMainWindow):
         
         self.item_table.setRowCount(0)
         
-        # 获取所有物品并排序
-        items = list(self.parser.item_index.keys())
+        # 获取所有物品（选择分类时直接取分类倒排表）并排序
+        snapshot = self.parser.snapshot()
+        category = self.category_combo.currentData()
+        if category:
+            items = list(snapshot.category_index.items(category))
+        else:
+            items = list(snapshot.item_index.keys())
         items.sort()
         
         self.item_table.setRowCount(len(items))
@@ -438,13 +548,26 @@ class LegendDropApp(QMainWindow):
             self.item_table.setItem(i, 0, item_cell)
             
             # 可掉落怪物数
-            drop_count = len(self.parser.item_index[item_name])
+            drop_count = len(snapshot.item_index[item_name])
             count_cell = QTableWidgetItem(str(drop_count))
             count_cell.setTextAlignment(Qt.AlignCenter)
             self.item_table.setItem(i, 1, count_cell)
         
         self.item_stats_label.setText(f"共 {len(items)} 个物品")
     
+    def refresh_category_combo(self):
+        """按分类索引更新分类下拉框的物品数"""
+        current = self.category_combo.currentData()
+        self.category_combo.blockSignals(True)
+        self.category_combo.clear()
+        self.category_combo.addItem(f"全部 ({len(self.parser.item_index)})", None)
+        for category_id, name, count in self.parser.get_category_counts():
+            if count > 0 or category_id == current:
+                self.category_combo.addItem(f"{name} ({count})", category_id)
+        index = self.category_combo.findData(current)
+        self.category_combo.setCurrentIndex(max(index, 0))
+        self.category_combo.blockSignals(False)
+    
     def on_search_items(self):
         """搜索物品"""
         keyword = self.search_box.text().strip()
@@ -458,22 +581,39 @@ class LegendDropApp(QMainWindow):
             return
         
         # 搜索物品
-        results = self.parser.search_items(keyword)
+        results = self.parser.search_items(keyword, fuzzy=self.fuzzy_check.isChecked())
+        category = self.category_combo.currentData()
+        if category:
+            results = [item_name for item_name in results if self.parser.get_item_category(item_name) == category]
         
         # 更新表格
+        item_index = self.parser.item_index
         self.item_table.setRowCount(len(results))
         
         for i, item_name in enumerate(results):
             item_cell = QTableWidgetItem(item_name)
             self.item_table.setItem(i, 0, item_cell)
             
-            drop_count = len(self.parser.item_index[item_name])
+            drop_count = len(item_index.get(item_name, ()))
             count_cell = QTableWidgetItem(str(drop_count))
             count_cell.setTextAlignment(Qt.AlignCenter)
             self.item_table.setItem(i, 1, count_cell)
         
         self.item_stats_label.setText(f"找到 {len(results)} 个物品")
     
+    def show_item_context_menu(self, pos):
+        """物品列表右键菜单"""
+        cell = self.item_table.itemAt(pos)
+        if cell is None:
+            return
+        item_name = self.item_table.item(cell.row(), 0).text()
+        
+        menu = QMenu(self)
+        add_action = menu.addAction("加入刷怪清单")
+        if menu.exec_(self.item_table.viewport().mapToGlobal(pos)) == add_action:
+            self.farm_panel.add_item(item_name)
+            self.farm_dock.show()
+    
     def on_item_selected(self, item):
         """物品被选中时触发"""
         if item.column() == 0:  # 只响应第一列的点击
@@ -483,13 +623,12 @@ class LegendDropApp(QMainWindow):
     
     def show_item_drops(self, item_name):
         """显示物品的掉落信息"""
-        if item_name not in self.parser.item_index:
+        drops = self.parser.get_item_drops(item_name)
+        if not drops:
             return
         
-        drops = self.parser.item_index[item_name]
-        
-        # 按爆率排序（从高到低）
-        drops.sort(key=lambda x: x[1], reverse=True)
+        # 按爆率排序（从高到低），排序副本，不修改快照中的索引
+        drops = sorted(drops, key=lambda x: x[1], reverse=True)
         
         # 更新怪物表格
         self.monster_table.setRowCount(len(drops))
@@ -504,8 +643,9 @@ class LegendDropApp(QMainWindow):
             rate_cell.setTextAlignment(Qt.AlignCenter)
             self.monster_table.setItem(i, 1, rate_cell)
             
-            # 等级（这里可以扩展从怪物数据中获取）
-            level_cell = QTableWidgetItem("N/A")
+            # 等级（来自怪物数据库导出）
+            level = self.world_data.monster_level(self.parser, monster_name) if self.world_data else None
+            level_cell = QTableWidgetItem(str(level) if level is not None else "N/A")
             level_cell.setTextAlignment(Qt.AlignCenter)
             self.monster_table.setItem(i, 2, level_cell)
         
@@ -514,19 +654,63 @@ class LegendDropApp(QMainWindow):
         # 更新详情标题
         self.detail_title.setText(f"物品详情: {item_name}")
         
-        # 清空详情
-        self.detail_text.clear()
+        # 有刷新数据时显示最佳刷怪地图，否则清空详情
+        if self.world_data:
+            self.show_best_maps(item_name)
+        else:
+            self.detail_text.clear()
         
         # 显示物品的简要信息
         self.status_label.setText(f"已选择物品: {item_name}")
     
+    def show_best_maps(self, item_name):
+        """显示物品的最佳刷怪地图（按刷新一轮的期望掉落数排序）"""
+        best_maps = self.world_data.best_maps(self.parser, item_name)
+        if not best_maps:
+            self.detail_text.setHtml(f"<p>刷新数据中没有掉落 {item_name} 的怪物</p>")
+            return
+        
+        rows = []
+        for entry in best_maps:
+            sources = "、".join(f"{monster_name}×{count}" for monster_name, count, _ in entry.sources[:3])
+            if len(entry.sources) > 3:
+                sources += f" 等{len(entry.sources)}种"
+            rows.append(f"""
+                <tr>
+                    <td style="padding: 6px; border: 1px solid #ddd;">{entry.label}</td>
+                    <td style="padding: 6px; border: 1px solid #ddd; color: #e74c3c;">{entry.per_cycle:.4g}</td>
+                    <td style="padding: 6px; border: 1px solid #ddd;">{entry.per_hour:.4g}</td>
+                    <td style="padding: 6px; border: 1px solid #ddd;">{sources}</td>
+                </tr>""")
+        
+        self.detail_text.setHtml(f"""
+        <div style="font-family: 'Microsoft YaHei', sans-serif;">
+            <h3 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 5px;">
+                {item_name} 最佳刷怪地图
+            </h3>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr style="background-color: #f9f9f9;">
+                    <th style="padding: 6px; border: 1px solid #ddd;">地图</th>
+                    <th style="padding: 6px; border: 1px solid #ddd;">每轮期望掉落</th>
+                    <th style="padding: 6px; border: 1px solid #ddd;">每小时期望掉落</th>
+                    <th style="padding: 6px; border: 1px solid #ddd;">主要来源（怪物×刷新数量）</th>
+                </tr>{"".join(rows)}
+            </table>
+            <p style="color: #7f8c8d;">每轮: 地图上该物品的全部来源怪物各击杀一次；每小时: 每次刷新后都清完。</p>
+        </div>
+        """)
+    
     def on_filter_monsters(self):
-        """筛选怪物"""
-        keyword = self.monster_filter.text().strip().lower()
+        """筛选怪物（与物品搜索相同的规范化: 全角半角、繁简、大小写视为相同）"""
+        key = self.parser.normalize_name(self.monster_filter.text())
+        monster_keys = self.parser.monster_keys
         
         for i in range(self.monster_table.rowCount()):
-            monster_name = self.monster_table.item(i, 0).text().lower()
-            visible = not keyword or keyword in monster_name
+            monster_name = self.monster_table.item(i, 0).text()
+            monster_key = monster_keys.get(monster_name)
+            if monster_key is None:
+                monster_key = self.parser.normalize_name(monster_name)
+            visible = not key or key in monster_key
             self.monster_table.setRowHidden(i, not visible)
     
     def on_monster_selected(self, item):
@@ -552,6 +736,52 @@ class LegendDropApp(QMainWindow):
     
     def show_drop_details(self, item_name, monster_name, rate):
         """显示详细的掉落信息"""
+        # 同一物品有多行掉落时列出原始爆率行
+        raw_lines = self.parser.get_item_lines(item_name, monster_name)
+        raw_row = ""
+        if len(raw_lines) > 1:
+            raw_text = " + ".join(
+                f"{line.rate * 100:.6f}%" + (" (#CHILD)" if line.child_group is not None else "")
+                for line in raw_lines
+            )
+            raw_row = f"""
+                <tr>
+                    <td style="padding: 8px; border: 1px solid #ddd; background-color: #f9f9f9;">
+                        <strong>原始爆率行:</strong>
+                    </td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">
+                        {raw_text}
+                    </td>
+                </tr>"""
+        
+        # 怪物等级和刷新地图（有刷新数据时）
+        world_row = ""
+        if self.world_data:
+            record = self.world_data.monster_record(self.parser, monster_name)
+            spawn_maps = self.world_data.monster_maps_for(self.parser, monster_name)
+            level_text = str(record.level) if record and record.level is not None else "未知"
+            maps_text = "、".join(f"{self.world_data.map_name(map_code)}×{count}"
+                                 for map_code, count, _ in spawn_maps[:5]) or "无刷新"
+            if len(spawn_maps) > 5:
+                maps_text += f" 等{len(spawn_maps)}张地图"
+            world_row = f"""
+                <tr>
+                    <td style="padding: 8px; border: 1px solid #ddd; background-color: #f9f9f9;">
+                        <strong>怪物等级:</strong>
+                    </td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">
+                        {level_text}
+                    </td>
+                </tr>
+                <tr>
+                    <td style="padding: 8px; border: 1px solid #ddd; background-color: #f9f9f9;">
+                        <strong>刷新地图:</strong>
+                    </td>
+                    <td style="padding: 8px; border: 1px solid #ddd;">
+                        {maps_text}
+                    </td>
+                </tr>"""
+        
         details = f"""
         <div style="font-family: 'Microsoft YaHei', sans-serif;">
             <h2 style="color: #2c3e50; text-align: center;">爆率详情</h2>
@@ -588,7 +818,7 @@ class LegendDropApp(QMainWindow):
                     <td style="padding: 8px; border: 1px solid #ddd;">
                         约 1/{int(1/rate) if rate > 0 else "∞"}
                     </td>
-                </tr>
+                </tr>{raw_row}
                 <tr>
                     <td style="padding: 8px; border: 1px solid #ddd; background-color: #f9f9f9;">
                         <strong>期望击杀数:</strong>
@@ -596,7 +826,7 @@ class LegendDropApp(QMainWindow):
                     <td style="padding: 8px; border: 1px solid #ddd;">
                         {int(1/rate) if rate > 0 else "∞"} 只
                     </td>
-                </tr>
+                </tr>{world_row}
             </table>
             
             <h3 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 5px;">
@@ -610,9 +840,9 @@ class LegendDropApp(QMainWindow):
             monster_info = self.parser.drop_data[monster_name]
             other_drops = []
             
-            for drop_item in monster_info.drop_items:
-                if drop_item.name != item_name:
-                    other_drops.append((drop_item.name, drop_item.rate))
+            for other_name, other_rate in monster_info.get_combined_drops():
+                if other_name != item_name:
+                    other_drops.append((other_name, other_rate))
             
             # 按爆率排序
             other_drops.sort(key=lambda x: x[1], reverse=True)
@@ -658,15 +888,96 @@ class LegendDropApp(QMainWindow):
             return
         
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "导出数据", "传奇掉落数据.csv", "CSV文件 (*.csv)"
+            self, "导出数据", "传奇掉落数据.csv", EXPORT_FILE_FILTER
         )
         
         if file_path:
-            success = self.parser.export_to_csv(file_path)
-            if success:
-                self.show_info("导出成功", f"数据已导出到:\n{file_path}")
-            else:
-                self.show_error("导出失败", "请检查文件路径和权限")
+            from src.data_formats import detect_format, FORMAT_NAMES
+            format_name = FORMAT_NAMES.get(detect_format(file_path), "CSV")
+            
+            def job(progress_callback, cancel_event):
+                return self.parser.export_dataset(file_path, progress_callback, cancel_event)
+            
+            def on_finished(success, cancelled):
+                if cancelled:
+                    self.status_label.setText("导出已取消")
+                elif success:
+                    self.status_label.setText(f"数据已导出到: {os.path.basename(file_path)}")
+                    self.show_info("导出成功", f"数据已导出到:\n{file_path}")
+                else:
+                    self.show_error("导出失败", "请检查文件路径和权限")
+            
+            self.status_label.setText("正在导出数据...")
+            run_with_progress(self, "导出数据", f"正在导出{format_name}...", job, on_finished,
+                              lambda message: self.show_error("导出失败", message))
+    
+    def open_archive(self):
+        """直接从zip/tar.gz备份读取爆率文件"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "打开服务器备份压缩包", "", ARCHIVE_FILE_FILTER
+        )
+        
+        if file_path:
+            self.settings.set('data_path', file_path)
+            self.settings.save_settings()
+            self.load_data()
+    
+    def load_world_data(self):
+        """按设置加载怪物刷新数据（未配置时跳过）"""
+        paths = [self.settings.get(key, '') for key in ('mongen_path', 'monster_db_path', 'mapinfo_path')]
+        if not any(paths):
+            self.world_data = None
+            return
+        
+        from src.world_data import WorldData
+        world_data = WorldData(self.settings.get('encoding', ENCODING))
+        self.world_data = world_data if world_data.load(*paths) else None
+        if self.world_data is None:
+            self.show_warning("刷怪数据加载失败", "请检查 文件 → 刷怪数据设置 中的路径")
+    
+    def show_world_sources(self):
+        """设置怪物刷新数据来源"""
+        from src.ui_dialogs import WorldSourceDialog
+        if WorldSourceDialog(self.settings, self).exec_() != QDialog.Accepted:
+            return
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.load_world_data()
+        finally:
+            QApplication.restoreOverrideCursor()
+        if self.world_data:
+            self.status_label.setText(f"刷怪数据: {self.world_data.describe()}")
+        if self.current_item:
+            self.show_item_drops(self.current_item)
+    
+    def import_dataset(self):
+        """从快照文件导入数据"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "导入数据快照", "", IMPORT_FILE_FILTER
+        )
+        
+        if not file_path:
+            return
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            start_time = datetime.now()
+            success = self.parser.load_dataset(file_path)
+            load_time = (datetime.now() - start_time).total_seconds()
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        if success:
+            stats = self.parser.monster_stats
+            self.refresh_category_combo()
+            self.refresh_item_list()
+            self.farm_panel.refresh_items()
+            self.data_stats_label.setText(f"怪物: {stats['total_monsters']} | 物品: {stats['total_items']} | 唯一物品: {stats['unique_items']}")
+            self.status_label.setText(f"已导入快照 {os.path.basename(file_path)} ({load_time:.2f}秒)")
+            self.is_data_loaded = True
+        else:
+            self.show_error("导入失败", f"无法读取数据快照:\n{file_path}")
     
     def open_data_directory(self):
         """打开数据目录"""
@@ -717,8 +1028,194 @@ class LegendDropApp(QMainWindow):
     
     def show_calculator(self):
         """显示爆率计算器"""
-        # 这里可以扩展一个爆率计算器对话框
-        QMessageBox.information(self, "爆率计算器", "爆率计算器功能开发中...")
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        try:
+            from src.ui_dialogs import DropCalculatorDialog
+            dialog = DropCalculatorDialog(self.parser, self, self.current_monster)
+        except ImportError as e:
+            logger.warning(f"爆率计算器依赖缺失: {e}")
+            self.show_warning("缺少依赖", "爆率计算器需要安装numpy:\npip install numpy")
+            return
+        
+        dialog.exec_()
+    
+    def show_rate_leaderboard(self):
+        """显示全局爆率排行与区间筛选"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        try:
+            from src.ui_dialogs import RateLeaderboardDialog
+            self.parser.get_rate_index()
+            dialog = RateLeaderboardDialog(self.parser, self)
+        except ImportError as e:
+            logger.warning(f"爆率排行依赖缺失: {e}")
+            self.show_warning("缺少依赖", "爆率排行需要安装numpy:\npip install numpy")
+            return
+        
+        dialog.target_selected.connect(self.on_farm_target_selected)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_query_dialog(self):
+        """显示结构化掉落查询"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        from src.ui_dialogs import QueryDialog
+        dialog = QueryDialog(self.parser, self)
+        dialog.target_selected.connect(self.on_farm_target_selected)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_farm_optimizer(self):
+        """显示刷怪推荐面板"""
+        if self.current_item:
+            self.farm_panel.add_item(self.current_item)
+        self.farm_dock.show()
+        self.farm_dock.raise_()
+    
+    def on_farm_target_selected(self, monster_name, item_name, rate):
+        """在详情区显示推荐怪物的掉落"""
+        self.current_monster = monster_name
+        self.show_drop_details(item_name, monster_name, rate)
+    
+    def show_duplicate_items(self):
+        """显示疑似重复的物品名"""
+        if not self.parser.item_index:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        from src.ui_dialogs import DuplicateNamesDialog
+        groups = self.parser.find_duplicate_items()
+        if not groups:
+            self.show_info("疑似重复物品名", "没有发现疑似重复的物品名")
+            return
+        
+        dialog = DuplicateNamesDialog(self.parser, groups, self)
+        dialog.item_selected.connect(self.on_duplicate_item_selected)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_bulk_edit(self):
+        """显示批量修改爆率"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        from src.ui_dialogs import BulkEditDialog
+        store = self.get_snapshot_store() if self.settings.get('snapshot_before_bulk_edit', True) else None
+        dialog = BulkEditDialog(self.parser, store, self)
+        dialog.data_changed.connect(self.reload_data)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def get_snapshot_store(self):
+        from src.snapshot_store import SnapshotStore
+        return SnapshotStore(self.settings.get('snapshot_dir'), compress=self.settings.get('snapshot_compress', True))
+    
+    def show_snapshots(self):
+        """显示备份快照管理"""
+        data_path = self.settings.get('data_path')
+        if not os.path.isdir(data_path):
+            self.show_warning("目录不存在", f"备份快照只支持数据目录:\n{data_path}")
+            return
+        
+        from src.ui_dialogs import SnapshotDialog
+        dialog = SnapshotDialog(self.get_snapshot_store(), os.path.abspath(data_path), self)
+        dialog.data_changed.connect(self.reload_data)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_site_generator(self):
+        """生成静态掉落表网站（再次生成时只写入变化的页面）"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "选择网站输出目录", self.settings.get('site_output_dir', ''))
+        if not output_dir:
+            return
+        self.settings.set('site_output_dir', output_dir)
+        
+        from src.site_generator import SiteGenerator
+        generator = SiteGenerator(self.parser, output_dir, self.settings.get('site_title', SITE_TITLE), self.world_data)
+        
+        def job(progress_callback, cancel_event):
+            if not generator.generate(progress_callback=progress_callback, cancel_event=cancel_event):
+                if cancel_event.is_set():
+                    return None
+                raise RuntimeError("生成网站失败，请查看日志")
+            return generator
+        
+        def on_finished(result, cancelled):
+            if cancelled or result is None:
+                self.status_label.setText("已取消生成网站")
+                return
+            self.status_label.setText(f"网站已生成: {result.describe()}")
+            QMessageBox.information(self, "生成完成", f"{result.describe()}\n\n首页: "
+                                    f"{os.path.join(output_dir, 'index.html')}")
+        
+        run_with_progress(self, "生成掉落表网站", "正在生成页面...", job, on_finished,
+                          lambda message: QMessageBox.critical(self, "生成网站失败", message))
+    
+    def show_validate(self):
+        """检查数据目录下所有爆率文件的格式"""
+        data_path = self.settings.get('data_path')
+        if not os.path.isdir(data_path):
+            self.show_warning("目录不存在", f"数据文件检查只支持数据目录:\n{data_path}")
+            return
+        
+        from src.ui_dialogs import ValidateDialog
+        dialog = ValidateDialog(os.path.abspath(data_path), self.settings.get('encoding', ENCODING), self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_data_compare(self):
+        """显示多版本数据对比"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载作为对比基准的数据")
+            return
+        
+        from src.ui_dialogs import CompareDialog
+        dialog = CompareDialog(self.parser, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_log_check(self):
+        """显示服务器掉落日志核对"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        from src.log_ingest import LogFormat
+        from src.ui_dialogs import LogCheckDialog
+        dialog = LogCheckDialog(self.parser, LogFormat.from_settings(self.settings),
+                                self.settings.get('log_significance', LOG_SIGNIFICANCE), self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def show_forecast(self):
+        """显示全服物品产出预测"""
+        if not self.parser.drop_data:
+            self.show_warning("没有数据", "请先加载数据")
+            return
+        
+        from src.log_ingest import LogFormat
+        from src.ui_dialogs import ForecastDialog
+        dialog = ForecastDialog(self.parser, LogFormat.from_settings(self.settings), self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+    
+    def on_duplicate_item_selected(self, item_name):
+        """显示重复名称报告中选中物品的掉落"""
+        self.current_item = item_name
+        self.show_item_drops(item_name)
     
     def show_statistics(self):
         """显示数据统计"""
@@ -0,0 +1,91 @@
+# src/ui_workers.py
+"""
+后台任务线程
+"""
+
+import logging
+import threading
+from PyQt5.QtWidgets import QProgressDialog
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskWorker(QThread):
+    """在后台线程执行耗时任务
+
+    任务函数签名: job(progress_callback, cancel_event) -> 结果
+    """
+    
+    progress = pyqtSignal(int, int)  # 已完成, 总数
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.cancel_event = threading.Event()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+    
+    def run(self):
+        try:
+            result = self.job(self.progress.emit, self.cancel_event)
+            self.succeeded.emit(result)
+        except Exception as e:
+            if self.is_cancelled():
+                # 取消导致的中断不视为失败
+                logger.info(f"后台任务已取消: {e!r}")
+                self.succeeded.emit(None)
+                return
+            logger.error(f"后台任务失败: {e}")
+            self.failed.emit(str(e))
+
+
+def run_with_progress(parent, title: str, label: str, job, on_success=None, on_failure=None) -> TaskWorker:
+    """启动后台任务并显示可取消的进度对话框"""
+    dialog = QProgressDialog(label, "取消", 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    
+    worker = TaskWorker(job, parent)
+    
+    def update_progress(done, total):
+        if total > 0:
+            dialog.setMaximum(100)
+            dialog.setValue(min(100, int(done * 100 / total)))
+            dialog.setLabelText(f"{label}\n{done:,} / {total:,}")
+        else:
+            dialog.setLabelText(f"{label}\n{done:,}")
+    
+    def finish_success(result):
+        dialog.close()
+        if on_success:
+            on_success(result, worker.is_cancelled())
+    
+    def finish_failure(message):
+        dialog.close()
+        if on_failure:
+            on_failure(message)
+    
+    worker.progress.connect(update_progress)
+    worker.succeeded.connect(finish_success)
+    worker.failed.connect(finish_failure)
+    worker.finished.connect(worker.deleteLater)
+    dialog.canceled.connect(worker.cancel)
+    
+    # 保持引用，避免线程对象被回收
+    parent._active_workers = getattr(parent, '_active_workers', set())
+    parent._active_workers.add(worker)
+    worker.finished.connect(lambda: parent._active_workers.discard(worker))
+    
+    worker.start()
+    return worker
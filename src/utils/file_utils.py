@@ -4,9 +4,14 @@
 """
 
 import os
+import uuid
 import shutil
+import hashlib
 import logging
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict
+
+from config.constants import IMPORT_MODE_REFERENCE, IMPORT_MODE_LINK, IMPORT_MODE_SYNC, IMPORT_WORKERS
 
 logger = logging.getLogger(__name__)
 
@@ -103,4 +108,123 @@ def format_rate_display(rate: float) -> str:
     elif rate >= 0.01:  # 大于1%
         return f"{rate*100:.2f}%"
     else:  # 小于1%
-        return f"{rate*100:.6f}%"
\ No newline at end of file
+        return f"{rate*100:.6f}%"
+
+
+def file_digest(filepath: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件SHA1"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_same_file_content(src: str, dst: str) -> bool:
+    """依次比较 inode、大小+修改时间、哈希，判断目标是否无需更新"""
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    
+    if os.path.samestat(src_stat, dst_stat):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if int(src_stat.st_mtime) == int(dst_stat.st_mtime):
+        return True
+    
+    # 大小相同但时间不同，用哈希确认
+    if file_digest(src) == file_digest(dst):
+        shutil.copystat(src, dst)
+        return True
+    return False
+
+
+def _link_or_copy(src: str, dst: str) -> str:
+    """
+    优先硬链接，其次符号链接，都不支持时复制；返回实际使用的方式
+    先在目标目录中以临时文件名创建，成功后再替换目标文件，全部失败时原有文件保持不变
+    """
+    temp_path = os.path.join(os.path.dirname(dst), f".import_{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(src, temp_path)
+            result = 'linked'
+        except (OSError, AttributeError):
+            try:
+                os.symlink(os.path.abspath(src), temp_path)
+                result = 'linked'
+            except (OSError, NotImplementedError):
+                shutil.copy2(src, temp_path)
+                result = 'copied'
+        os.replace(temp_path, dst)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return result
+
+
+def import_directory(src_dir: str, dst_dir: str, mode: str = IMPORT_MODE_SYNC, workers: int = IMPORT_WORKERS,
+                     progress_callback=None, cancel_event=None) -> Dict[str, int]:
+    """
+    导入外部爆率目录
+    :param mode: reference 原地引用 / link 硬链接或符号链接 / sync 仅同步变化的文件
+    :return: 导入统计（复制字节数、跳过文件数等）
+    """
+    stats = {'copied': 0, 'linked': 0, 'skipped': 0, 'removed': 0, 'failed': 0, 'bytes_copied': 0}
+    
+    if mode == IMPORT_MODE_REFERENCE:
+        return stats
+    
+    ensure_directory(dst_dir)
+    
+    src_names = [name for name in os.listdir(src_dir) if name.lower().endswith('.txt')]
+    total = len(src_names)
+    
+    def import_one(name):
+        if cancel_event is not None and cancel_event.is_set():
+            return 'cancelled', 0
+        src = os.path.join(src_dir, name)
+        dst = os.path.join(dst_dir, name)
+        try:
+            if is_same_file_content(src, dst):
+                return 'skipped', 0
+            if mode == IMPORT_MODE_LINK:
+                result = _link_or_copy(src, dst)
+            else:
+                shutil.copy2(src, dst)
+                result = 'copied'
+            return result, os.path.getsize(src) if result == 'copied' else 0
+        except Exception as e:
+            logger.error(f"导入文件失败 {src}: {e}")
+            return 'failed', 0
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, (result, size) in enumerate(executor.map(import_one, src_names), 1):
+            if result != 'cancelled':
+                stats[result] += 1
+                stats['bytes_copied'] += size
+            if progress_callback and (done % 100 == 0 or done == total):
+                progress_callback(done, total)
+    
+    if cancel_event is not None and cancel_event.is_set():
+        return stats
+    
+    # 删除上游已不存在的文件
+    src_set = set(src_names)
+    for name in os.listdir(dst_dir):
+        if name.lower().endswith('.txt') and name not in src_set:
+            try:
+                os.remove(os.path.join(dst_dir, name))
+                stats['removed'] += 1
+            except OSError as e:
+                logger.error(f"删除文件失败 {name}: {e}")
+    
+    logger.info(f"导入完成: 复制{stats['copied']}个({stats['bytes_copied']}字节), 链接{stats['linked']}个, "
+                f"跳过{stats['skipped']}个, 删除{stats['removed']}个, 失败{stats['failed']}个")
+    return stats
@@ -6,6 +6,11 @@
 import math
 from fractions import Fraction
 
+try:
+    import numpy as np
+except ImportError:  # 批量版本需要numpy，标量版本不受影响
+    np = None
+
 
 def calculate_expected_kills(rate: float, confidence: float = 0.95) -> int:
     """
@@ -44,19 +49,40 @@ def rate_to_fraction(rate: float) -> str:
 
 
 def combine_rates(rates: list) -> float:
-    """合并多个独立爆率（至少掉落一个的概率）"""
+    """合并多个独立爆率（至少掉落一个的概率），大于1的爆率按1计，负值忽略"""
     if not rates:
         return 0.0
     
     # P(至少掉落一个) = 1 - ∏(1 - rate_i)
     prob_no_drop = 1.0
     for rate in rates:
-        if 0 <= rate <= 1:
-            prob_no_drop *= (1 - rate)
+        if rate >= 0:
+            prob_no_drop *= (1 - min(rate, 1.0))
     
     return 1 - prob_no_drop
 
 
+def combine_drop_lines(lines) -> float:
+    """
+    合并同一怪物同一物品的多行掉落为每次击杀至少掉落一个的概率
+    :param lines: [(爆率, 子掉落组)]，子掉落组为None表示独立爆率行
+    同一#CHILD组的子物品互斥（每次命中只掉其中一个），组内概率相加；不同行、不同组之间独立
+    """
+    independent = []
+    group_shares = {}
+    for rate, child_group in lines:
+        if child_group is None:
+            independent.append(rate)
+        else:
+            group_shares[child_group] = group_shares.get(child_group, 0.0) + rate
+    
+    sources = [min(rate, 1.0) for rate in independent + list(group_shares.values())]
+    if len(sources) == 1 and sources[0] >= 0:
+        # 只有一个来源时直接返回，避免 1 - (1 - p) 的舍入误差
+        return sources[0]
+    return combine_rates(sources)
+
+
 def calculate_drop_chance(rate: float, kills: int) -> float:
     """
     计算击杀n次至少掉落一次的概率
@@ -85,4 +111,222 @@ def format_rate_for_display(rate: float) -> dict:
         'fraction': rate_to_fraction(rate),
         'inverse': f"1/{int(1/rate)}" if rate > 0 else "∞",
         'expected': str(int(1/rate)) if rate > 0 else "∞"
-    }
\ No newline at end of file
+    }
+
+
+# ---------------------------------------------------------------------------
+# 二项检验（实际掉落次数与配置爆率是否相符）
+# ---------------------------------------------------------------------------
+
+def _beta_continued_fraction(a: float, b: float, x: float) -> float:
+    """不完全贝塔函数的连分式（Lentz算法）"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 100000):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a - 1.0 + m2) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + 1.0 + m2))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            delta = c * d
+            result *= delta
+        if abs(delta - 1.0) < 1e-14:
+            break
+    return result
+
+
+def regularized_beta(a: float, b: float, x: float) -> float:
+    """正则化不完全贝塔函数 I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_front) * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_continued_fraction(b, a, 1.0 - x) / b
+
+
+def binomial_cdf(k: int, n: int, rate: float) -> float:
+    """P(X <= k)，X ~ B(n, rate)"""
+    if k < 0:
+        return 0.0
+    if k >= n:
+        return 1.0
+    if rate <= 0:
+        return 1.0
+    if rate >= 1:
+        return 0.0
+    return regularized_beta(n - k, k + 1, 1.0 - rate)
+
+
+def binomial_sf(k: int, n: int, rate: float) -> float:
+    """P(X >= k)，X ~ B(n, rate)"""
+    if k <= 0:
+        return 1.0
+    if k > n:
+        return 0.0
+    if rate <= 0:
+        return 0.0
+    if rate >= 1:
+        return 1.0
+    return regularized_beta(k, n - k + 1, rate)
+
+
+def binomial_test(drops: int, kills: int, rate: float) -> float:
+    """
+    双侧二项检验: 击杀 kills 次掉落 drops 次，与爆率 rate 相符的p值
+    取两侧尾概率中较小者的两倍（上限为1）
+    """
+    if kills <= 0:
+        return 1.0
+    drops = min(max(drops, 0), kills)
+    lower = binomial_cdf(drops, kills, rate)
+    upper = binomial_sf(drops, kills, rate)
+    return min(1.0, 2.0 * min(lower, upper))
+
+
+def binomial_interval(drops: int, kills: int, confidence: float = 0.95) -> tuple:
+    """实际爆率的 Wilson 置信区间 (下限, 上限)"""
+    if kills <= 0:
+        return 0.0, 1.0
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    observed = min(max(drops, 0), kills) / kills
+    denominator = 1 + z * z / kills
+    center = (observed + z * z / (2 * kills)) / denominator
+    margin = z * math.sqrt(observed * (1 - observed) / kills + z * z / (4 * kills * kills)) / denominator
+    lower = 0.0 if observed <= 0 else max(0.0, center - margin)
+    upper = 1.0 if observed >= 1 else min(1.0, center + margin)
+    return lower, upper
+
+
+def adjust_p_values(p_values: list) -> list:
+    """Benjamini-Hochberg 多重检验校正（同时检验大量物品时控制误报比例）"""
+    count = len(p_values)
+    adjusted = [1.0] * count
+    running = 1.0
+    for rank, index in zip(range(count, 0, -1), sorted(range(count), key=p_values.__getitem__, reverse=True)):
+        running = min(running, p_values[index] * count / rank)
+        adjusted[index] = running
+    return adjusted
+
+
+# ---------------------------------------------------------------------------
+# 批量版本（NumPy数组输入/输出，边界处理与上面的标量版本一致）
+# ---------------------------------------------------------------------------
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("批量爆率计算需要安装numpy")
+
+
+def calculate_expected_kills_batch(rates, confidence: float = 0.95):
+    """
+    批量计算期望击杀数
+    :param rates: 爆率数组
+    :return: 浮点数组；rate <= 0 或 rate >= 1 时为inf（与标量版本一致）
+    注: 使用log1p计算，极小爆率时比标量版本更精确（标量版本在 rate < 1e-16 时返回inf）
+    """
+    _require_numpy()
+    rates = np.asarray(rates, dtype=np.float64)
+    
+    if confidence >= 1:
+        confidence = 0.999
+    
+    valid = (rates > 0) & (rates < 1)
+    result = np.full(rates.shape, np.inf)
+    
+    # log1p 避免极小爆率时 log(1 - rate) 的精度损失
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = math.log1p(-confidence) / np.log1p(-rates[valid])
+    result[valid] = np.ceil(n)
+    return result
+
+
+def calculate_drop_chance_batch(rates, kills):
+    """批量计算击杀n次至少掉落一次的概率（rates 与 kills 可广播）"""
+    _require_numpy()
+    rates, kills = np.broadcast_arrays(np.asarray(rates, dtype=np.float64), np.asarray(kills, dtype=np.float64))
+    
+    result = np.zeros(rates.shape)
+    valid = (rates > 0) & (kills > 0)
+    
+    normal = valid & (rates < 1)
+    result[normal] = -np.expm1(kills[normal] * np.log1p(-rates[normal]))
+    
+    saturated = valid & (rates >= 1)
+    result[saturated] = 1 - np.power(1 - rates[saturated], kills[saturated])
+    return result
+
+
+def combine_rates_batch(rates, axis: int = -1):
+    """沿指定轴合并独立爆率（至少掉落一个的概率），大于1的爆率按1计，负值忽略"""
+    _require_numpy()
+    rates = np.minimum(np.asarray(rates, dtype=np.float64), 1.0)
+    
+    valid = rates >= 0
+    with np.errstate(divide='ignore'):
+        log_miss = np.where(valid, np.log1p(-np.where(valid, rates, 0.0)), 0.0)
+    return -np.expm1(log_miss.sum(axis=axis)) + 0.0
+
+
+def combine_rates_grouped(rates, group_ids, n_groups: int = None):
+    """
+    按组合并独立爆率
+    :param group_ids: 每个爆率所属的组号（0..n_groups-1）
+    :return: 长度为 n_groups 的数组
+    """
+    _require_numpy()
+    rates = np.minimum(np.asarray(rates, dtype=np.float64), 1.0)
+    group_ids = np.asarray(group_ids, dtype=np.int64)
+    
+    valid = rates >= 0
+    with np.errstate(divide='ignore'):
+        log_miss = np.where(valid, np.log1p(-np.where(valid, rates, 0.0)), 0.0)
+    return -np.expm1(np.bincount(group_ids, weights=log_miss, minlength=n_groups or 0)) + 0.0
+
+
+def format_rate_for_display_batch(rates) -> dict:
+    """
+    批量格式化爆率
+    :return: {'percent': 字符串数组, 'fraction': ..., 'inverse': ..., 'expected': ...}
+    """
+    _require_numpy()
+    rates = np.asarray(rates, dtype=np.float64)
+    
+    # 同一爆率只格式化一次
+    unique, inverse_index = np.unique(rates, return_inverse=True)
+    positive = unique > 0
+    
+    percent = np.full(unique.shape, '0%', dtype=object)
+    fraction = np.full(unique.shape, '0', dtype=object)
+    inverse = np.full(unique.shape, '∞', dtype=object)
+    expected = np.full(unique.shape, '∞', dtype=object)
+    
+    if positive.any():
+        values = unique[positive]
+        percent[positive] = np.char.mod('%.6f%%', values * 100).astype(object)
+        inverse_values = 1 / values
+        small = inverse_values < 2 ** 62
+        whole = np.empty(values.shape, dtype=object)
+        whole[small] = np.floor(inverse_values[small]).astype(np.int64).astype(str)
+        # 超出int64范围的极小爆率按标量方式处理
+        whole[~small] = [str(int(value)) for value in inverse_values[~small]]
+        inverse[positive] = ['1/' + text for text in whole]
+        expected[positive] = whole
+        fraction[positive] = [rate_to_fraction(float(rate)) for rate in values]
+    
+    inverse_index = inverse_index.reshape(rates.shape)
+    return {
+        'percent': percent[inverse_index],
+        'fraction': fraction[inverse_index],
+        'inverse': inverse[inverse_index],
+        'expected': expected[inverse_index],
+    }
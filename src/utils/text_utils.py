@@ -0,0 +1,77 @@
+# src/utils/text_utils.py
+"""
+文本规范化工具（名称搜索键）
+"""
+
+import re
+import logging
+import unicodedata
+
+
+logger = logging.getLogger(__name__)
+
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# 与非ASCII字符相邻的空格（中文名称中的空格多为手工编辑残留）
+CJK_SPACE_PATTERN = re.compile(r'(?<=[^\x00-\x7f]) | (?=[^\x00-\x7f])')
+
+# NFKC 不处理的常见标点变体
+PUNCTUATION_MAP = str.maketrans({
+    '【': '[', '】': ']', '〔': '(', '〕': ')', '〈': '<', '〉': '>', '《': '<', '》': '>',
+    '「': '"', '」': '"', '『': '"', '』': '"', '“': '"', '”': '"', '‘': "'", '’': "'",
+    '・': '·', '•': '·', '‧': '·', '∙': '·',
+    '—': '-', '–': '-', '―': '-', '‐': '-', '−': '-',
+    '、': ',', '。': '.',
+})
+
+# 内置繁简对照（游戏物品名、怪物名中的常用字）；安装 opencc 时使用完整转换
+TRADITIONAL_CHARS = (
+    "龍鳳劍戰靈護頭鐲鍊項藥書聖無極裝幣鬥觀門關陽陰雙銀鐵銅鋼錢寶環輪衛騎馬魚鳥獸蟲蠍殭屍殺滅惡"
+    "雞豬貓紅綠藍黃鍾衝擊彈術師將軍國幫會長萬億兩個級強傳說記錄體氣復還歸義風雲電覺聲態勢獄鎧"
+    "槍錘鏈帶飾煉鍛礦鑽為與這後裡見東車幾點時間開發對號種類從過進場隊羅蘭爾諾維達謎祕紋鑰經驗練"
+    "專屬亂陣離濤麗壽禮願戀愛憶夢歲隱顯驚懼獅龜蠻貝殘斬絕鏡燈爐燒煙熱災營鎮廟閣樓宮島嶺峽灣濕滿"
+    "漢溫淚澤瀾鋒銳鐮鉤錐鏢決勝敗權榮讚賞財貨買賣價費質變異樣標圖畫陸鎖傷療補紗綢織絲線網繩縛"
+    "鑄鑑靜淨燦爛輝鬚髮麵飛鳴鶴鷹鵬鸞獨狀猶嘯魘魎誅討闖"
+)
+SIMPLIFIED_CHARS = (
+    "龙凤剑战灵护头镯链项药书圣无极装币斗观门关阳阴双银铁铜钢钱宝环轮卫骑马鱼鸟兽虫蝎僵尸杀灭恶"
+    "鸡猪猫红绿蓝黄钟冲击弹术师将军国帮会长万亿两个级强传说记录体气复还归义风云电觉声态势狱铠"
+    "枪锤链带饰炼锻矿钻为与这后里见东车几点时间开发对号种类从过进场队罗兰尔诺维达谜秘纹钥经验练"
+    "专属乱阵离涛丽寿礼愿恋爱忆梦岁隐显惊惧狮龟蛮贝残斩绝镜灯炉烧烟热灾营镇庙阁楼宫岛岭峡湾湿满"
+    "汉温泪泽澜锋锐镰钩锥镖决胜败权荣赞赏财货买卖价费质变异样标图画陆锁伤疗补纱绸织丝线网绳缚"
+    "铸鉴静净灿烂辉须发面飞鸣鹤鹰鹏鸾独状犹啸魇魉诛讨闯"
+)
+TRADITIONAL_MAP = str.maketrans(TRADITIONAL_CHARS, SIMPLIFIED_CHARS)
+
+_converter = None  # 繁转简函数，首次使用时确定
+
+
+def to_simplified(text: str) -> str:
+    """繁体转简体（优先使用opencc，未安装时使用内置常用字对照）"""
+    global _converter
+    if _converter is None:
+        try:
+            import opencc
+            _converter = opencc.OpenCC('t2s').convert
+        except Exception as e:
+            logger.info(f"未使用opencc（{e}），繁简转换使用内置常用字对照")
+            _converter = lambda value: value.translate(TRADITIONAL_MAP)
+    return _converter(text)
+
+
+def normalize_name(text: str, simplify: bool = False) -> str:
+    """
+    计算名称的搜索键
+    - NFKC: 全角字母数字、全角标点、兼容字符统一为标准形式
+    - 常见标点变体统一
+    - 可选繁体转简体
+    - 连续空白合并为一个空格，去掉中文字符两侧的空格
+    - 不区分大小写
+    搜索时对查询词做同样的处理后与预先计算的键比较
+    """
+    text = unicodedata.normalize('NFKC', text).translate(PUNCTUATION_MAP)
+    if simplify:
+        text = to_simplified(text)
+    text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    text = CJK_SPACE_PATTERN.sub('', text)
+    return text.casefold()
@@ -0,0 +1,160 @@
+# src/wishlist_calculator.py
+"""
+集齐多个物品所需击杀数（多物品集卡问题）
+"""
+
+import logging
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from config.constants import WISHLIST_EXACT_MAX_ITEMS, WISHLIST_MC_TRIALS
+from src.drop_simulator import CompiledDropTable, DropSimulator, RATE_CAP
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class WishlistResult:
+    """集齐计算结果"""
+    
+    def __init__(self, monster_name: str, items: List[str], expected_kills: float,
+                 quantiles: Dict[float, float], method: str):
+        self.monster_name = monster_name
+        self.items = items
+        self.expected_kills = expected_kills
+        self.quantiles = quantiles  # {概率: 击杀数}
+        self.method = method  # 'exact' 或 'monte_carlo'
+    
+    def __repr__(self):
+        return f"WishlistResult({self.monster_name}, {len(self.items)}件, E={self.expected_kills:.1f}, {self.method})"
+
+
+class ExactWishlistModel:
+    """容斥原理精确求解
+
+    单次击杀不掉落集合S中任何物品的概率:
+        q_S = ∏(独立行: 1 - p) × ∏(#CHILD组: 1 - r·c_S/k)
+    其中 c_S 为组内属于S的子物品个数。于是
+        P(T > n) = Σ_{S≠∅} (-1)^{|S|+1} q_S^n
+        E[T]     = Σ_{S≠∅} (-1)^{|S|+1} / (1 - q_S)
+    所有子集的 q_S 以矩阵运算一次求出。
+    """
+    
+    def __init__(self, table: CompiledDropTable, items: List[str]):
+        targets = [table.item_ids[name] for name in items]
+        w = len(targets)
+        
+        # 独立行: 每个目标物品的对数不掉落概率
+        indep_log = np.zeros(w)
+        for t, item_id in enumerate(targets):
+            rates = table.line_rates[table.line_items == item_id]
+            indep_log[t] = np.log1p(-np.minimum(rates, RATE_CAP)).sum()
+        
+        # #CHILD组: 每组中各目标物品出现的次数
+        group_rates, group_sizes, multiplicity = [], [], []
+        for rate, members in zip(table.group_rates, table.group_members):
+            counts = [int(np.count_nonzero(members == item_id)) for item_id in targets]
+            if any(counts):
+                group_rates.append(rate)
+                group_sizes.append(len(members))
+                multiplicity.append(counts)
+        
+        masks = np.arange(1, 1 << w, dtype=np.int64)
+        bits = ((masks[:, None] >> np.arange(w)) & 1).astype(np.float64)  # (2^w-1, w)
+        
+        log_q = bits @ indep_log
+        if group_rates:
+            child_counts = bits @ np.array(multiplicity, dtype=np.float64).T  # (2^w-1, 组数)
+            share = np.array(group_rates) * child_counts / np.array(group_sizes, dtype=np.float64)
+            log_q += np.log1p(-np.minimum(share, RATE_CAP)).sum(axis=1)
+        
+        self.log_q = log_q
+        self.signs = np.where(bits.sum(axis=1) % 2 == 1, 1.0, -1.0)
+        # 每个物品都可能掉落时才能集齐
+        self.feasible = bool(np.all(log_q < 0))
+    
+    def expected_kills(self) -> float:
+        if not self.feasible:
+            return float('inf')
+        return float(np.sum(self.signs / -np.expm1(self.log_q)))
+    
+    def survival(self, kills: np.ndarray) -> np.ndarray:
+        """P(T > n)，对一组n向量化计算"""
+        kills = np.atleast_1d(np.asarray(kills, dtype=np.float64))
+        terms = np.exp(np.outer(kills, self.log_q))
+        return np.clip(terms @ self.signs, 0.0, 1.0)
+    
+    def quantile(self, probability: float) -> float:
+        """最小的n，使 P(T <= n) >= probability"""
+        if not self.feasible:
+            return float('inf')
+        
+        target = 1.0 - probability
+        low, high = 0, 1
+        while self.survival(high)[0] > target:
+            low, high = high, high * 2
+            if high > 1e15:
+                return float('inf')
+        
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self.survival(mid)[0] > target:
+                low = mid
+            else:
+                high = mid
+        return float(high)
+
+
+def calculate_wishlist(monster_info, items: List[str], quantiles=DEFAULT_QUANTILES,
+                       exact_max_items: int = WISHLIST_EXACT_MAX_ITEMS, mc_trials: int = WISHLIST_MC_TRIALS,
+                       seed: Optional[int] = None) -> WishlistResult:
+    """
+    计算集齐物品清单所需击杀数
+    清单不超过 exact_max_items 件时用容斥原理精确计算，否则自动改用蒙特卡洛模拟
+    """
+    items = list(dict.fromkeys(items))
+    simulator = DropSimulator(monster_info, seed=seed)
+    table = simulator.table
+    
+    missing = [name for name in items if name not in table.item_ids]
+    if missing:
+        raise KeyError(f"{monster_info.monster_name} 不掉落: {', '.join(missing)}")
+    
+    if len(items) <= exact_max_items:
+        model = ExactWishlistModel(table, items)
+        return WishlistResult(
+            monster_info.monster_name, items, model.expected_kills(),
+            {q: model.quantile(q) for q in quantiles}, 'exact',
+        )
+    
+    logger.info(f"物品清单 {len(items)} 件超过精确计算上限 {exact_max_items}，改用蒙特卡洛模拟")
+    samples = simulator.simulate_collection(items, mc_trials)
+    return WishlistResult(
+        monster_info.monster_name, items, float(np.mean(samples)),
+        {q: float(np.quantile(samples, q, method='higher')) for q in quantiles}, 'monte_carlo',
+    )
+
+
+class WishlistCalculator:
+    """带缓存的集齐计算（按 (怪物, 物品清单) 缓存）"""
+    
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self._cache = {}  # {(怪物名, frozenset(物品)): WishlistResult}
+    
+    def clear(self):
+        self._cache.clear()
+    
+    def calculate(self, monster_info, items: List[str]) -> Tuple[WishlistResult, bool]:
+        """返回 (结果, 是否命中缓存)"""
+        key = (monster_info.monster_name, frozenset(items))
+        result = self._cache.get(key)
+        if result is not None:
+            return result, True
+        result = calculate_wishlist(monster_info, items, seed=self.seed)
+        self._cache[key] = result
+        return result, False
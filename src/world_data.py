@@ -0,0 +1,350 @@
+# src/world_data.py
+"""
+怪物刷新与属性数据（MonGen 刷怪配置、Monster 数据库导出、MapInfo 地图信息）
+"""
+
+import os
+import re
+import csv
+import json
+import time
+import hashlib
+import logging
+from typing import List, Tuple, Optional
+
+from config.constants import ENCODING, WORLD_BEST_MAPS
+from src.archive_source import DEFAULT_CACHE_DIR
+from src.log_ingest import NameResolver
+
+
+logger = logging.getLogger(__name__)
+
+
+WORLD_CACHE_VERSION = 1
+
+# Monster 数据库导出的列名（不区分大小写）；没有表头时按 Monster 表的默认列顺序读取
+MONSTER_NAME_COLUMNS = ('name', '名称', '怪物名', '怪物名称')
+MONSTER_LEVEL_COLUMNS = ('lvl', 'level', '等级')
+MONSTER_EXP_COLUMNS = ('exp', '经验')
+MONSTER_HP_COLUMNS = ('hp', '血量', '生命')
+MONSTER_DEFAULT_COLUMNS = (0, 4, 7, 8)  # Name, Race, RaceImg, Appr, Lvl, Undead, CoolEye, Exp, HP, ...
+
+MAP_INFO_PATTERN = re.compile(r'^\s*\[\s*(\S+)\s+([^\]\s]+)')
+
+
+class MonsterRecord:
+    """怪物属性"""
+    
+    def __init__(self, name: str, level: Optional[int] = None, exp: Optional[int] = None, hp: Optional[int] = None):
+        self.name = name
+        self.level = level
+        self.exp = exp
+        self.hp = hp
+
+
+class MapDrop:
+    """某个物品在一张地图上的产出"""
+    
+    def __init__(self, map_code: str, map_name: str):
+        self.map_code = map_code
+        self.map_name = map_name
+        self.per_cycle = 0.0  # 刷新一轮全部击杀的期望掉落数
+        self.per_hour = 0.0  # 每次刷新都清完时每小时的期望掉落数
+        self.sources = []  # [(怪物名, 刷新数量, 每次击杀的期望掉落数)]
+    
+    @property
+    def label(self) -> str:
+        return f"{self.map_name}({self.map_code})" if self.map_name != self.map_code else self.map_code
+
+
+def _to_int(text: str) -> Optional[int]:
+    try:
+        return int(float(text))
+    except (TypeError, ValueError):
+        return None
+
+
+def _source_files(path: str) -> List[str]:
+    """文件本身，或目录下的全部 .txt 文件"""
+    if os.path.isdir(path):
+        files = []
+        for root, _, names in os.walk(path):
+            files.extend(os.path.join(root, name) for name in names if name.lower().endswith('.txt'))
+        return sorted(files)
+    return [path]
+
+
+class WorldData:
+    """怪物刷新数据及其与爆率数据的连接
+
+    加载后建立 怪物→{地图: 刷新数量}、地图→{怪物: 刷新数量} 和 怪物→属性 三个索引，
+    并按源文件的大小和修改时间缓存到磁盘，源文件未变化时直接读取缓存。
+    与爆率数据的名称对应关系在数据版本变化时重建一次，之后的查询只做字典查找。
+    """
+    
+    def __init__(self, encoding: str = ENCODING, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.encoding = encoding
+        self.cache_dir = cache_dir
+        self.monster_maps = {}  # {怪物名: {地图编号: [刷新数量, 每小时刷新数量, 刷新点数]}}
+        self.map_spawns = {}  # {地图编号: {怪物名: 刷新数量}}
+        self.monsters = {}  # {怪物名: MonsterRecord}
+        self.map_names = {}  # {地图编号: 地图名}
+        self.stats = {}
+        self._joined_key = None
+        self._joined_maps = {}  # 按爆率数据中的怪物名: {地图编号: [刷新数量, 每小时刷新数量, 刷新点数]}
+        self._joined_monsters = {}  # 按爆率数据中的怪物名: MonsterRecord
+    
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self.monster_maps or self.monsters)
+    
+    # ------------------------------------------------------------------
+    # 加载
+    # ------------------------------------------------------------------
+    
+    def load(self, mongen_path: str = '', monster_db_path: str = '', map_info_path: str = '') -> bool:
+        """
+        加载刷怪配置（文件或目录）、怪物数据库导出和地图信息，均为可选
+        :return: 是否成功加载了至少一项
+        """
+        start = time.perf_counter()
+        sources = [path for path in (mongen_path, monster_db_path, map_info_path) if path]
+        if not sources:
+            return False
+        missing = [path for path in sources if not os.path.exists(path)]
+        if missing:
+            logger.error(f"刷怪数据文件不存在: {', '.join(missing)}")
+            return False
+        
+        try:
+            signature = self._signature(mongen_path, monster_db_path, map_info_path)
+        except OSError as e:
+            logger.error(f"读取刷怪数据失败: {e}")
+            return False
+        cache_path = self._cache_path(mongen_path, monster_db_path, map_info_path)
+        if self._load_cache(cache_path, signature):
+            self._build_map_index()
+            logger.info(f"刷怪数据未变化，已从缓存加载: {self.describe()}")
+            return True
+        
+        self.monster_maps, self.monsters, self.map_names, self.stats = {}, {}, {}, {}
+        try:
+            if mongen_path:
+                self._parse_mongen(mongen_path)
+            if monster_db_path:
+                self._parse_monster_db(monster_db_path)
+            if map_info_path:
+                self._parse_map_info(map_info_path)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"读取刷怪数据失败: {e}")
+            return False
+        
+        self._build_map_index()
+        self._save_cache(cache_path, signature)
+        logger.info(f"刷怪数据加载完成，耗时{time.perf_counter() - start:.2f}秒: {self.describe()}")
+        return True
+    
+    def _signature(self, *paths) -> list:
+        signature = []
+        for path in paths:
+            for file_path in (_source_files(path) if path else []):
+                stat = os.stat(file_path)
+                signature.append([os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns])
+        return signature
+    
+    def _cache_path(self, *paths) -> str:
+        key = "|".join(os.path.abspath(path) if path else '' for path in paths) + "|" + self.encoding
+        return os.path.join(self.cache_dir, f"world_{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+    
+    def _load_cache(self, cache_path: str, signature: list) -> bool:
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != WORLD_CACHE_VERSION or data.get('signature') != signature:
+                return False
+            self.monster_maps = data['monster_maps']
+            self.monsters = {name: MonsterRecord(name, *values) for name, values in data['monsters'].items()}
+            self.map_names = data['map_names']
+            self.stats = data['stats']
+            return True
+        except Exception as e:
+            logger.warning(f"读取刷怪数据缓存失败 {cache_path}: {e}")
+            return False
+    
+    def _save_cache(self, cache_path: str, signature: list):
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': WORLD_CACHE_VERSION,
+                    'signature': signature,
+                    'monster_maps': self.monster_maps,
+                    'monsters': {name: [record.level, record.exp, record.hp] for name, record in self.monsters.items()},
+                    'map_names': self.map_names,
+                    'stats': self.stats,
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"保存刷怪数据缓存失败 {cache_path}: {e}")
+    
+    def _read_lines(self, file_path: str) -> List[str]:
+        with open(file_path, 'r', encoding=self.encoding, errors='replace') as f:
+            return f.read().splitlines()
+    
+    def _parse_mongen(self, path: str):
+        """
+        解析刷怪配置，每行: 地图 X Y 怪物名 范围 数量 刷新时间(分钟) [其他列]
+        ; 或 # 开头为注释；同一地图同一怪物的多个刷新点合并
+        """
+        lines = bad_lines = 0
+        monster_maps = self.monster_maps
+        for file_path in _source_files(path):
+            for line in self._read_lines(file_path):
+                line = line.split(';', 1)[0].strip()
+                if not line or line.startswith(('#', '//')):
+                    continue
+                parts = line.split()
+                count = _to_int(parts[5]) if len(parts) >= 7 else None
+                minutes = _to_int(parts[6]) if len(parts) >= 7 else None
+                if count is None or minutes is None or count <= 0:
+                    bad_lines += 1
+                    continue
+                lines += 1
+                
+                entry = monster_maps.setdefault(parts[3], {}).setdefault(parts[0], [0, 0.0, 0])
+                entry[0] += count
+                entry[1] += count * 60.0 / max(minutes, 1)
+                entry[2] += 1
+        
+        self.stats['spawn_lines'] = lines
+        self.stats['bad_spawn_lines'] = bad_lines
+        if bad_lines:
+            logger.warning(f"刷怪配置中有 {bad_lines} 行格式无法识别，已跳过")
+    
+    def _parse_monster_db(self, file_path: str):
+        """解析怪物数据库的文本导出（制表符或逗号分隔，可带表头）"""
+        lines = [line for line in self._read_lines(file_path) if line.strip() and not line.startswith(';')]
+        if not lines:
+            return
+        delimiter = '\t' if '\t' in lines[0] else ',' if ',' in lines[0] else None
+        rows = list(csv.reader(lines, delimiter=delimiter)) if delimiter else [line.split() for line in lines]
+        
+        header = [cell.strip().lower() for cell in rows[0]]
+        columns_from_header = any(name in header for name in MONSTER_NAME_COLUMNS)
+        
+        def column(names, default):
+            for name in names:
+                if name in header:
+                    return header.index(name)
+            return None if columns_from_header else default
+        
+        name_col, level_col, exp_col, hp_col = (
+            column(names, default) for names, default in zip(
+                (MONSTER_NAME_COLUMNS, MONSTER_LEVEL_COLUMNS, MONSTER_EXP_COLUMNS, MONSTER_HP_COLUMNS),
+                MONSTER_DEFAULT_COLUMNS))
+        if columns_from_header:
+            rows = rows[1:]
+        
+        def cell(row, index):
+            return _to_int(row[index]) if index is not None and index < len(row) else None
+        
+        for row in rows:
+            if name_col >= len(row) or not row[name_col].strip():
+                continue
+            name = row[name_col].strip()
+            self.monsters[name] = MonsterRecord(name, cell(row, level_col), cell(row, exp_col), cell(row, hp_col))
+        self.stats['monster_records'] = len(self.monsters)
+    
+    def _parse_map_info(self, file_path: str):
+        """解析地图信息，每张地图一行: [地图编号 地图名 ...] 属性..."""
+        for line in self._read_lines(file_path):
+            match = MAP_INFO_PATTERN.match(line)
+            if match:
+                self.map_names[match.group(1)] = match.group(2)
+    
+    def _build_map_index(self):
+        self.map_spawns = {}
+        for monster_name, maps in self.monster_maps.items():
+            for map_code, (count, _, _) in maps.items():
+                self.map_spawns.setdefault(map_code, {})[monster_name] = count
+        self._joined_key = None
+    
+    def describe(self) -> str:
+        return (f"{len(self.monster_maps)} 种刷新怪物, {len(self.map_spawns)} 张地图, "
+                f"{self.stats.get('spawn_lines', 0)} 个刷新点, {len(self.monsters)} 条怪物属性")
+    
+    # ------------------------------------------------------------------
+    # 与爆率数据连接
+    # ------------------------------------------------------------------
+    
+    def _join(self, parser):
+        """按爆率数据中的怪物名重建索引（名称写法不同时按规范化后的搜索键对应）"""
+        key = (id(parser), parser.data_version)
+        if self._joined_key == key:
+            return
+        
+        resolve = NameResolver.monsters(parser)
+        joined_maps = {}
+        for monster_name, maps in self.monster_maps.items():
+            data_name = resolve(monster_name)
+            if data_name not in parser.drop_data:
+                continue
+            target = joined_maps.setdefault(data_name, {})
+            for map_code, values in maps.items():
+                entry = target.setdefault(map_code, [0, 0.0, 0])
+                for i, value in enumerate(values):
+                    entry[i] += value
+        
+        self._joined_monsters = {}
+        for monster_name, record in self.monsters.items():
+            self._joined_monsters.setdefault(resolve(monster_name), record)
+        self._joined_maps = joined_maps
+        self._joined_key = key
+    
+    def map_name(self, map_code: str) -> str:
+        return self.map_names.get(map_code, map_code)
+    
+    def monster_record(self, parser, monster_name: str) -> Optional[MonsterRecord]:
+        self._join(parser)
+        return self._joined_monsters.get(monster_name)
+    
+    def monster_level(self, parser, monster_name: str) -> Optional[int]:
+        record = self.monster_record(parser, monster_name)
+        return record.level if record else None
+    
+    def monster_maps_for(self, parser, monster_name: str) -> List[Tuple[str, int, float]]:
+        """怪物的刷新地图: [(地图编号, 刷新数量, 每小时刷新数量)]，按刷新数量从多到少"""
+        self._join(parser)
+        maps = self._joined_maps.get(monster_name, {})
+        return sorted(((map_code, count, per_hour) for map_code, (count, per_hour, _) in maps.items()),
+                      key=lambda entry: -entry[1])
+    
+    def best_maps(self, parser, item_name: str, limit: Optional[int] = WORLD_BEST_MAPS) -> List[MapDrop]:
+        """
+        物品的最佳刷怪地图，按刷新一轮的期望掉落数排序
+        每张地图的期望掉落 = Σ 该地图上各怪物的刷新数量 × 该怪物每次击杀的期望掉落数
+        期望掉落数按该物品各掉落行的爆率相加（大于1按1计），不用合并后的至少掉落一个的概率
+        """
+        self._join(parser)
+        snapshot = parser.snapshot()
+        results = {}
+        for monster_name, _ in snapshot.item_index.get(item_name, []):
+            monster_info = snapshot.drop_data.get(monster_name)
+            if monster_info is None:
+                continue
+            rate = sum(min(item.rate, 1.0) for item in monster_info.get_item_lines(item_name) if item.rate > 0)
+            for map_code, (count, per_hour, _) in self._joined_maps.get(monster_name, {}).items():
+                entry = results.get(map_code)
+                if entry is None:
+                    entry = results[map_code] = MapDrop(map_code, self.map_name(map_code))
+                entry.per_cycle += count * rate
+                entry.per_hour += per_hour * rate
+                entry.sources.append((monster_name, count, rate))
+        
+        ranked = sorted(results.values(), key=lambda entry: (-entry.per_cycle, entry.map_code))
+        for entry in ranked:
+            entry.sources.sort(key=lambda source: -source[1] * source[2])
+        return ranked[:limit] if limit else ranked